@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+질의 일괄 실행 스크립트
+질의 파일의 질의를 차례로 멀티에이전트 파이프라인에 실행하고 결과를 JSON Lines로 저장합니다.
+
+질의 파일 형식은 benchmarks/tune_retrieval.py와 같고(질의 목록 JSON), 항목에 "profile": true를 지정하면
+그 질의만 프로파일링합니다. --profile을 주면 모든 질의를 프로파일링합니다. (프로파일은 PROFILE_OUTPUT_DIR에 저장)
+
+사용 예:
+    python batch_runner.py --queries benchmarks/data/retrieval_queries.example.json --output results.jsonl --profile
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from src.core.langgraph_pipeline import run_agent_pipeline
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def run_batch(queries, folder_id, profile_all):
+    """질의를 하나씩 실행하고 질의별 결과 목록을 반환합니다. 한 질의의 실패는 다음 질의에 영향을 주지 않습니다."""
+    results = []
+    for index, item in enumerate(queries, 1):
+        print(f"[{index}/{len(queries)}] {item['query']}", file=sys.stderr)
+        profile = True if profile_all else item.get("profile")
+        start_time = time.perf_counter()
+        entry = {"query": item["query"]}
+        try:
+            state = await run_agent_pipeline(item["query"], folder_id, profile=profile)
+            entry.update({
+                "router_decision": state.get("router_decision"),
+                "coordinator_path": state.get("coordinator_path") or None,
+                "final_recommendation": state.get("final_recommendation"),
+                "degraded_nodes": state.get("degraded_nodes") or [],
+                "profile_files": state.get("profile_files") or [],
+            })
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["elapsed_s"] = time.perf_counter() - start_time
+        results.append(entry)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질의 파일의 질의를 일괄 실행합니다.")
+    parser.add_argument("--queries", required=True, help="질의 JSON 파일")
+    parser.add_argument("--folder-id", help="검색할 Google Drive 폴더 ID (기본값: GOOGLE_DRIVE_FOLDER_ID)")
+    parser.add_argument("--profile", action="store_true", help="모든 질의를 프로파일링합니다.")
+    parser.add_argument("--output", help="결과 JSON Lines를 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_batch(load_queries(args.queries), args.folder_id, args.profile))
+    lines = "\n".join(json.dumps(entry, ensure_ascii=False) for entry in results) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(lines)
+    else:
+        sys.stdout.write(lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+채팅 서버 부하 테스트: 요청 병합과 입장 제어
+
+benchmarks/fakes.py의 오프라인 대체 구현(가짜 LLM, 임베딩, Drive, Notion)을 설치하고
+Gradio 처리 함수(gradio_app.process_chat_query)를 직접 동시에 호출하여 다음 시나리오를 측정합니다.
+  - hot_burst:      같은 질문(띄어쓰기, 물음표만 다른 변형 포함)을 한꺼번에 보냄 → 병합 켬/끔 비교
+  - overload_burst: 서로 다른 질문을 한꺼번에 보냄 → 동시 실행 한도 + 대기열을 넘는 요청은 즉시 혼잡 응답
+  - open_loop:      포아송 도착(--arrival-rps)으로 일정 시간 동안 요청, 일부(--hot-fraction)는 같은 질문
+
+시나리오마다 응답 종류(성공/혼잡/오류)별 수와 지연 시간, 실제 파이프라인 실행 수, 병합된 요청 수를 보고합니다.
+
+사용 예:
+    python benchmarks/bench_admission.py --llm-latency-ms 200 --max-concurrent 4 --max-queue 16 --output admission.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes  # noqa: E402
+
+FOLDER_ID = "offline-folder"
+HOT_QUERY = "학생회비로 회식비 사용이 가능한가요?"
+HOT_VARIANTS = (HOT_QUERY, "학생회비로  회식비 사용이 가능한가요", " 학생회비로 회식비 사용이 가능한가요?? ")
+
+
+def _summarize(latencies):
+    """지연 시간(초) 목록을 ms 단위 통계로 요약합니다."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _classify(response):
+    if response.startswith("⏳"):
+        return "busy"
+    if response.startswith("❌"):
+        return "error"
+    return "ok"
+
+
+def _pipeline_runs():
+    from src.utils.metrics import PIPELINE_REQUESTS
+    return sum(PIPELINE_REQUESTS.value(status=status) for status in ("ok", "degraded", "error"))
+
+
+def _reset_gate(max_concurrent, max_queue, queue_timeout_s, coalesce):
+    """시나리오마다 새 입장 제어 객체로 바꿔 이전 시나리오의 상태가 남지 않게 합니다."""
+    from src.utils import admission
+
+    admission.admission_controller = admission.AdmissionController(max_concurrent, max_queue, queue_timeout_s)
+    admission.request_coalescer = admission.RequestCoalescer()
+    admission.COALESCE_REQUESTS = coalesce
+
+
+async def _run_scenario(messages, arrivals=None):
+    """메시지마다 (도착 시각이 있으면 그때) 처리 함수를 호출하고 응답 종류별 지연 시간을 모읍니다."""
+    import gradio_app
+    from src.utils.metrics import COALESCED_REQUESTS
+
+    runs_before = _pipeline_runs()
+    coalesced_before = COALESCED_REQUESTS.value()
+    latencies = {"ok": [], "busy": [], "error": []}
+    start_time = time.perf_counter()
+
+    async def one(index, message):
+        if arrivals is not None:
+            await asyncio.sleep(max(0.0, start_time + arrivals[index] - time.perf_counter()))
+        request_start = time.perf_counter()
+        response = await gradio_app.process_chat_query(message, [], False, None)
+        latencies[_classify(response)].append(time.perf_counter() - request_start)
+
+    await asyncio.gather(*(one(index, message) for index, message in enumerate(messages)))
+    wall = time.perf_counter() - start_time
+    return {
+        "requests": len(messages),
+        "ok": len(latencies["ok"]),
+        "busy": len(latencies["busy"]),
+        "error": len(latencies["error"]),
+        "pipeline_runs": _pipeline_runs() - runs_before,
+        "coalesced": COALESCED_REQUESTS.value() - coalesced_before,
+        "wall_s": round(wall, 4),
+        "goodput_rps": round(len(latencies["ok"]) / wall, 3) if wall else None,
+        "ok_latency": _summarize(latencies["ok"]),
+        "busy_latency": _summarize(latencies["busy"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 병합과 입장 제어를 오프라인 부하로 측정합니다.")
+    parser.add_argument("--clients", type=int, default=32, help="한꺼번에 보내는 요청 수 (burst 시나리오)")
+    parser.add_argument("--max-concurrent", type=int, default=4, help="동시 실행 파이프라인 수")
+    parser.add_argument("--max-queue", type=int, default=16, help="입장 대기열 최대 길이")
+    parser.add_argument("--queue-timeout-s", type=float, default=60.0, help="대기열 최대 대기 시간 (초)")
+    parser.add_argument("--arrival-rps", type=float, default=20.0, help="open_loop 시나리오의 평균 도착률 (요청/초)")
+    parser.add_argument("--duration-s", type=float, default=5.0, help="open_loop 시나리오 길이 (초)")
+    parser.add_argument("--hot-fraction", type=float, default=0.5, help="open_loop에서 같은 질문의 비율")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="가짜 LLM 응답 지연 중앙값 (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="가짜 LLM 지연 로그정규 sigma")
+    parser.add_argument("--notion-latency-ms", type=float, default=20.0, help="Notion 요청당 지연 (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # 모듈과 파이프라인의 진행 메시지가 결과 JSON과 섞이지 않도록 표준 오류로 보냅니다.
+    with contextlib.redirect_stdout(sys.stderr):
+        work_dir = fakes.configure_offline_environment()
+        corpus_dir = os.path.join(work_dir, "corpus")
+        fakes.write_fixture_corpus(corpus_dir, 20, 1, args.seed)
+        fakes.install_fakes(
+            corpus_dir,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_jitter=args.llm_jitter,
+            notion_latency_ms=args.notion_latency_ms,
+            seed=args.seed,
+        )
+        from src.agents.document_manager import get_document_manager
+
+        # 첫 요청들이 동시에 적재를 시작하지 않도록 미리 적재합니다.
+        get_document_manager().ingest_folder(FOLDER_ID)
+        distinct = [item["query"] for item in fakes.fixture_queries()]
+        gate = (args.max_concurrent, args.max_queue, args.queue_timeout_s)
+        results = {}
+
+        hot_messages = [HOT_VARIANTS[index % len(HOT_VARIANTS)] for index in range(args.clients)]
+        for label, coalesce in (("coalesce_on", True), ("coalesce_off", False)):
+            print(f"hot_burst ({label}): {args.clients}건 실행 중...")
+            _reset_gate(*gate, coalesce)
+            results.setdefault("hot_burst", {})[label] = asyncio.run(_run_scenario(hot_messages))
+
+        print(f"overload_burst: {args.clients}건 실행 중...")
+        _reset_gate(*gate, True)
+        overload_messages = [f"{distinct[index % len(distinct)]} (#{index})" for index in range(args.clients)]
+        results["overload_burst"] = asyncio.run(_run_scenario(overload_messages))
+
+        arrivals, clock = [], 0.0
+        while True:
+            clock += rng.expovariate(args.arrival_rps)
+            if clock > args.duration_s:
+                break
+            arrivals.append(clock)
+        open_messages = [
+            rng.choice(HOT_VARIANTS) if rng.random() < args.hot_fraction else f"{rng.choice(distinct)} (#{index})"
+            for index in range(len(arrivals))
+        ]
+        print(f"open_loop: {len(arrivals)}건 ({args.arrival_rps} rps, {args.duration_s}초) 실행 중...")
+        _reset_gate(*gate, True)
+        results["open_loop"] = asyncio.run(_run_scenario(open_messages, arrivals))
+
+    report = {
+        "benchmark": "admission",
+        "settings": {
+            key: getattr(args, key)
+            for key in (
+                "clients", "max_concurrent", "max_queue", "queue_timeout_s", "arrival_rps", "duration_s",
+                "hot_fraction", "llm_latency_ms", "llm_jitter", "notion_latency_ms", "seed",
+            )
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+파이프라인 체크포인트 벤치마크: 중간 실패 후 재개로 절감되는 시간
+
+질의마다 다음 세 가지를 실제 파이프라인으로 실행합니다.
+  1. 실패 실행: --fail-at 노드에서 인위적으로 한 번 실패시킵니다.
+  2. 재개 실행: 같은 session_id로 다시 요청하여 체크포인트에서 이어서 실행합니다.
+  3. 처음부터 실행: 체크포인트가 없을 때의 재시도 비용(새 session_id로 전체 실행)입니다.
+절감 시간 = 처음부터 실행 시간 - 재개 실행 시간
+
+Gemini, Google Drive, Notion 설정(.env)이 필요합니다. 질의 파일 형식은 tune_retrieval.py와 같습니다.
+체크포인트는 임시 SQLite 파일에 기록하므로 운영 체크포인트 DB에 영향을 주지 않습니다.
+
+사용 예:
+    python benchmarks/bench_checkpoint_resume.py --queries benchmarks/data/retrieval_queries.example.json --fail-at run_coordinator
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tune_retrieval import load_queries  # noqa: E402
+from src.core import langgraph_pipeline  # noqa: E402
+
+FAILURE_NODES = ("run_auditor", "run_coordinator", "record_to_notion")
+
+
+class SimulatedFailure(Exception):
+    """벤치마크에서 주입한 노드 실패"""
+    pass
+
+
+def inject_failure(node_name):
+    """
+    지정한 노드 함수를 다음 한 번의 호출에서 실패하도록 바꿉니다.
+    create_graph()가 노드 함수를 모듈 전역에서 찾으므로 그래프를 만들기 전에 호출해야 합니다.
+    """
+    original = getattr(langgraph_pipeline, node_name)
+
+    def failing_node(state):
+        setattr(langgraph_pipeline, node_name, original)
+        raise SimulatedFailure(f"{node_name}에서 인위적으로 실패시켰습니다.")
+
+    setattr(langgraph_pipeline, node_name, failing_node)
+    return original
+
+
+async def timed_run(query, folder_id, session_id):
+    start_time = time.perf_counter()
+    try:
+        state = await langgraph_pipeline.run_agent_pipeline(query, folder_id, session_id=session_id)
+    except SimulatedFailure:
+        return time.perf_counter() - start_time, None
+    return time.perf_counter() - start_time, state
+
+
+async def measure_query(query, folder_id, fail_at):
+    session_id = f"bench-{uuid.uuid4().hex}"
+
+    original = inject_failure(fail_at)
+    try:
+        failed_s, _ = await timed_run(query, folder_id, session_id)
+    finally:
+        # 관련 없는 질의는 실패 노드에 도달하지 않으므로 항상 원래 노드로 되돌립니다.
+        setattr(langgraph_pipeline, fail_at, original)
+    resume_s, resumed_state = await timed_run(query, folder_id, session_id)
+    scratch_s, _ = await timed_run(query, folder_id, f"bench-{uuid.uuid4().hex}")
+
+    return {
+        "query": query,
+        "router_decision": (resumed_state or {}).get("router_decision"),
+        "failed_attempt_s": failed_s,
+        "resume_s": resume_s,
+        "from_scratch_s": scratch_s,
+        "saved_s": scratch_s - resume_s,
+    }
+
+
+async def run_benchmark(queries, folder_id, fail_at):
+    results = []
+    for index, item in enumerate(queries, 1):
+        print(f"[{index}/{len(queries)}] {item['query']}", file=sys.stderr)
+        results.append(await measure_query(item["query"], folder_id, fail_at))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중간 실패 후 체크포인트 재개로 절감되는 시간을 측정합니다.")
+    parser.add_argument("--queries", required=True, help="질의 JSON 파일")
+    parser.add_argument("--folder-id", help="검색할 Google Drive 폴더 ID (기본값: GOOGLE_DRIVE_FOLDER_ID)")
+    parser.add_argument("--fail-at", choices=FAILURE_NODES, default="run_coordinator", help="실패시킬 노드")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        langgraph_pipeline.CHECKPOINT_DB_PATH = os.path.join(tmp_dir, "checkpoints.sqlite")
+        per_query = asyncio.run(run_benchmark(queries, args.folder_id, args.fail_at))
+
+    # 관련 없는 질의는 실패 노드까지 도달하지 않으므로 집계에서 제외합니다.
+    relevant = [item for item in per_query if item["router_decision"] == "relevant"]
+    report = {
+        "benchmark": "checkpoint_resume",
+        "settings": {"fail_at": args.fail_at},
+        "query_count": len(per_query),
+        "relevant_query_count": len(relevant),
+        "mean_resume_s": statistics.mean(item["resume_s"] for item in relevant) if relevant else None,
+        "mean_from_scratch_s": statistics.mean(item["from_scratch_s"] for item in relevant) if relevant else None,
+        "mean_saved_s": statistics.mean(item["saved_s"] for item in relevant) if relevant else None,
+        "queries": per_query,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
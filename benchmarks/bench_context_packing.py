@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+컨텍스트 조립 벤치마크: 질의별 프롬프트 토큰 절감량
+
+규정 검토 에이전트(규정 k=5)와 감사 에이전트(규정 k=3 + 감사 보고서 k=3)가 하는 것과 같은 검색을 수행한 뒤,
+기존 방식("\\n\\n".join)과 pack_context(병합 + MMR 중복 제거 + 토큰 예산)의 추정 토큰 수를 비교합니다.
+
+임베딩은 네트워크 없이 동작하는 해싱 임베딩을 사용하고, 인덱스는 임시 flat 저장소에 구축합니다.
+문서와 질의 파일 형식은 tune_retrieval.py와 같습니다. (질의 파일의 expected 항목은 사용하지 않습니다)
+
+사용 예:
+    python benchmarks/bench_context_packing.py --documents ./docs --queries benchmarks/data/retrieval_queries.example.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tune_retrieval import load_documents, load_queries  # noqa: E402
+from src.config import AUDITOR_CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, REVIEWER_CONTEXT_TOKEN_BUDGET  # noqa: E402
+from src.utils.context_packer import pack_context  # noqa: E402
+from src.utils.document_types import AUDIT_DOC_TYPES, REGULATION_DOC_TYPES  # noqa: E402
+from src.utils.embedding_models import HashingEmbeddings  # noqa: E402
+from src.utils.flat_vector_store import FlatVectorStore  # noqa: E402
+from src.utils.vector_db_manager import _build_doc_type_filter, _split_documents_into_chunks  # noqa: E402
+
+
+def measure_query(store, query, reviewer_budget, auditor_budget, mmr_lambda):
+    """한 질의에 대해 에이전트별 기존/조립 후 토큰 수를 계산합니다."""
+    reviewer_docs = store.similarity_search(query, k=5, filter=_build_doc_type_filter(REGULATION_DOC_TYPES))
+    auditor_regulations = store.similarity_search(query, k=3, filter=_build_doc_type_filter(REGULATION_DOC_TYPES))
+    auditor_records = store.similarity_search(query, k=3, filter=_build_doc_type_filter(AUDIT_DOC_TYPES))
+
+    reviewer = pack_context(reviewer_docs, reviewer_budget, mmr_lambda=mmr_lambda)
+    auditor_regulation_pack = pack_context(auditor_regulations, auditor_budget // 2, mmr_lambda=mmr_lambda)
+    auditor_record_pack = pack_context(
+        auditor_records, auditor_budget - auditor_regulation_pack["packed_tokens"], mmr_lambda=mmr_lambda
+    )
+
+    naive = reviewer["naive_tokens"] + auditor_regulation_pack["naive_tokens"] + auditor_record_pack["naive_tokens"]
+    packed = reviewer["packed_tokens"] + auditor_regulation_pack["packed_tokens"] + auditor_record_pack["packed_tokens"]
+    return {
+        "query": query,
+        "reviewer_naive_tokens": reviewer["naive_tokens"],
+        "reviewer_packed_tokens": reviewer["packed_tokens"],
+        "auditor_naive_tokens": auditor_regulation_pack["naive_tokens"] + auditor_record_pack["naive_tokens"],
+        "auditor_packed_tokens": auditor_regulation_pack["packed_tokens"] + auditor_record_pack["packed_tokens"],
+        "merged_chunks": (
+            reviewer["merged_chunks"] + auditor_regulation_pack["merged_chunks"] + auditor_record_pack["merged_chunks"]
+        ),
+        "dropped_duplicates": (
+            reviewer["dropped_duplicates"] + auditor_regulation_pack["dropped_duplicates"]
+            + auditor_record_pack["dropped_duplicates"]
+        ),
+        "naive_tokens": naive,
+        "packed_tokens": packed,
+        "saved_tokens": naive - packed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="컨텍스트 조립 전후의 프롬프트 토큰 수를 비교합니다.")
+    parser.add_argument("--documents", required=True, help="평가용 규정 문서 디렉터리 (.pdf, .txt, .md)")
+    parser.add_argument("--queries", required=True, help="질의 JSON 파일")
+    parser.add_argument("--reviewer-budget", type=int, default=REVIEWER_CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--auditor-budget", type=int, default=AUDITOR_CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--mmr-lambda", type=float, default=CONTEXT_MMR_LAMBDA)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.documents)
+    queries = load_queries(args.queries)
+    chunks = _split_documents_into_chunks(documents)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = FlatVectorStore(tmp_dir, embedding_function=HashingEmbeddings())
+        store.add_documents(chunks)
+        per_query = [
+            measure_query(store, q["query"], args.reviewer_budget, args.auditor_budget, args.mmr_lambda)
+            for q in queries
+        ]
+
+    total_naive = sum(item["naive_tokens"] for item in per_query)
+    total_packed = sum(item["packed_tokens"] for item in per_query)
+    report = {
+        "benchmark": "context_packing",
+        "settings": {
+            "reviewer_budget": args.reviewer_budget,
+            "auditor_budget": args.auditor_budget,
+            "mmr_lambda": args.mmr_lambda,
+        },
+        "query_count": len(per_query),
+        "mean_naive_tokens": total_naive / len(per_query) if per_query else 0,
+        "mean_packed_tokens": total_packed / len(per_query) if per_query else 0,
+        "mean_saved_tokens": (total_naive - total_packed) / len(per_query) if per_query else 0,
+        "saved_ratio": (total_naive - total_packed) / total_naive if total_naive else 0,
+        "queries": per_query,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+조정 에이전트 빠른 경로 벤치마크: 처리 비율과 절감된 지연 시간
+
+질의 파일의 질의를 실제 파이프라인(run_agent_pipeline)으로 재생하고,
+조정 단계가 빠른 경로로 처리된 비율과 조정 단계 지연 시간을 집계합니다.
+--measure-full을 주면 빠른 경로로 처리된 질의마다 전체 조정 LLM 호출도 함께 실행해
+실제로 절감된 시간을 측정합니다. (추가 LLM 호출 비용이 듭니다)
+
+Gemini, Google Drive, Notion 설정(.env)이 필요합니다. 질의 파일 형식은 tune_retrieval.py와 같습니다.
+COORDINATOR_FAST_PATH_ENABLED를 따로 지정하지 않으면 빠른 경로를 켜고 실행합니다.
+
+사용 예:
+    python benchmarks/bench_coordinator_fast_path.py --queries benchmarks/data/retrieval_queries.example.json --output fast_path.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 설정을 가져오기 전에 지정해야 합니다.
+os.environ.setdefault("COORDINATOR_FAST_PATH_ENABLED", "true")
+
+from benchmarks.tune_retrieval import load_queries  # noqa: E402
+from src.config import COORDINATOR_FAST_PATH_MAX_RISK, COORDINATOR_FAST_PATH_MODEL  # noqa: E402
+from src.core.langgraph_pipeline import coordinator_agent, run_agent_pipeline  # noqa: E402
+
+
+def _time_full_coordinator(query, state):
+    """빠른 경로로 처리된 질의에 대해 전체 조정 호출 시간을 측정합니다."""
+    start_time = time.perf_counter()
+    coordinator_agent._invoke_chain(coordinator_agent.chain, query, state["reviewer_result"], state["auditor_result"])
+    return time.perf_counter() - start_time
+
+
+async def replay(queries, folder_id, measure_full):
+    per_query = []
+    for index, item in enumerate(queries, 1):
+        print(f"[{index}/{len(queries)}] {item['query']}", file=sys.stderr)
+        start_time = time.perf_counter()
+        state = await run_agent_pipeline(item["query"], folder_id)
+        entry = {
+            "query": item["query"],
+            "router_decision": state.get("router_decision"),
+            "coordinator_path": state.get("coordinator_path") or None,
+            "pipeline_s": time.perf_counter() - start_time,
+        }
+        if measure_full and entry["coordinator_path"] == "fast_path":
+            entry["full_coordinator_s"] = _time_full_coordinator(item["query"], state)
+        per_query.append(entry)
+    return per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description="조정 에이전트 빠른 경로의 처리 비율과 절감 시간을 측정합니다.")
+    parser.add_argument("--queries", required=True, help="질의 JSON 파일")
+    parser.add_argument("--folder-id", help="검색할 Google Drive 폴더 ID (기본값: GOOGLE_DRIVE_FOLDER_ID)")
+    parser.add_argument("--measure-full", action="store_true", help="빠른 경로 질의의 전체 조정 시간도 측정합니다.")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    per_query = asyncio.run(replay(queries, args.folder_id, args.measure_full))
+
+    stats = coordinator_agent.get_fast_path_stats()
+    measured = [item["full_coordinator_s"] for item in per_query if "full_coordinator_s" in item]
+    report = {
+        "benchmark": "coordinator_fast_path",
+        "settings": {
+            "max_risk": COORDINATOR_FAST_PATH_MAX_RISK,
+            "fast_path_model": COORDINATOR_FAST_PATH_MODEL or None,
+        },
+        "query_count": len(per_query),
+        "coordinator_calls": stats["total"],
+        "fast_path_ratio": stats["fast_path_ratio"],
+        "fast_path_mean_s": stats["fast_path_mean_seconds"],
+        "full_path_mean_s": stats["full_path_mean_seconds"],
+        "estimated_saved_s": stats["estimated_saved_seconds"],
+        # --measure-full일 때만: 빠른 경로 질의에서 실제 전체 조정 호출에 걸린 시간
+        "measured_full_mean_s": statistics.mean(measured) if measured else None,
+        "measured_saved_s": (
+            sum(measured) - stats["fast_path_mean_seconds"] * len(measured) if measured else None
+        ),
+        "queries": per_query,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+압축 임베딩 저장 벤치마크: 폴더가 많은 배포에서 flat 인덱스 저장 형식별 디스크·메모리 사용량과 검색 재현율 비교
+
+폴더마다 모든 폴더에 공통인 청크(학칙 등 --shared)와 폴더 고유 청크(--unique)를 가진 컬렉션을 만들고,
+저장 형식(float32, int8, pq), 공유 임베딩 풀, 재순위화 후보 수 조합별로 다음을 측정하여 JSON으로 출력합니다.
+- 인덱스 전체 디스크 사용량 (풀 포함)
+- 새 프로세스에서 모든 폴더를 열고 검색한 뒤의 메모리 사용량(RSS 증가분). 익명 메모리와 메모리 매핑된 파일 페이지를
+  나누어 기록합니다. (파일 페이지는 작업자 프로세스끼리 공유되고 메모리가 부족하면 운영체제가 회수할 수 있음)
+  int8 점수 계산의 임시 블록은 glibc가 해제한 뒤에도 힙에 남겨 두어 익명 메모리가 몇 MB 더 보일 수 있습니다.
+  (MALLOC_MMAP_THRESHOLD_=131072로 실행하면 사라짐)
+- 정확한(float32 전수 탐색) 결과 대비 recall@k와 질의 지연 시간 (p50/p95)
+
+임베딩 API를 호출하지 않도록 주제 중심 벡터에 잡음을 더한 고정 시드의 합성 임베딩을 사용합니다.
+(무작위 단위 벡터는 구조가 없어 실제 임베딩보다 pq 재현율이 낮게 나옵니다)
+
+사용 예:
+    python benchmarks/bench_embedding_storage.py --folders 20 --shared 2000 --unique 500 --output bench_storage.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.embedding_pool import EmbeddingPool  # noqa: E402
+from src.utils.flat_vector_store import VersionedFlatIndex  # noqa: E402
+
+# (이름, 저장 형식, 공유 임베딩 풀, 재순위화 후보 수)
+CONFIGURATIONS = [
+    ("float32", "float32", False, 0),
+    ("int8", "int8", False, 0),
+    ("int8+pool", "int8", True, 0),
+    ("int8+pool+rerank", "int8", True, 50),
+    ("pq", "pq", False, 0),
+    ("pq+rerank", "pq", False, 50),
+    ("pq+pool+rerank", "pq", True, 50),
+]
+
+
+def _synthetic_embeddings(count, dim, topics, rng, noise=0.6):
+    centers = topics[rng.integers(0, len(topics), count)]
+    vectors = centers + noise * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_corpus(folders, shared, unique, dim, seed=0):
+    """폴더별 (텍스트, 임베딩) 목록과 질의 임베딩을 만듭니다. 공통 청크는 모든 폴더에서 텍스트와 임베딩이 같습니다."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((64, dim)).astype(np.float32)
+    shared_vectors = _synthetic_embeddings(shared, dim, topics, rng)
+    shared_texts = [f"공통 규정 청크 {i}" for i in range(shared)]
+    corpus = []
+    for folder in range(folders):
+        texts = shared_texts + [f"폴더 {folder} 청크 {i}" for i in range(unique)]
+        vectors = np.vstack([shared_vectors, _synthetic_embeddings(unique, dim, topics, rng)])
+        corpus.append((texts, vectors))
+    queries = _synthetic_embeddings(100, dim, topics, rng)
+    return corpus, queries
+
+
+def _dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total / (1024 * 1024)
+
+
+def _rss_mb():
+    """
+    현재 프로세스의 상주 메모리(RSS)를 MB 단위로 반환합니다.
+
+    Returns:
+        tuple: (전체, 파일 페이지). /proc이 없는 환경에서는 최대 RSS와 None.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            fields = f.read().split()
+        page_mb = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        return int(fields[1]) * page_mb, int(fields[2]) * page_mb
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, None
+
+
+def _open_index(root, folder, dtype, rerank, pq_subvectors, pool):
+    return VersionedFlatIndex(
+        os.path.join(root, f"regulations_{folder}"), dtype=dtype, pool=pool,
+        pq_subvectors=pq_subvectors, rerank_candidates=rerank,
+    )
+
+
+def build(root, corpus, dtype, use_pool, pq_subvectors):
+    pool = EmbeddingPool(os.path.join(root, "_pool"), index_root=root) if use_pool else None
+    for folder, (texts, vectors) in enumerate(corpus):
+        index = VersionedFlatIndex(
+            os.path.join(root, f"regulations_{folder}"), dtype=dtype, pool=pool, pq_subvectors=pq_subvectors
+        )
+        metadatas = [{"doc_type": "세칙"} for _ in texts]
+        index.publish([str(i) for i in range(len(texts))], texts, metadatas, vectors)
+
+
+def child_measure(root, folders, dtype, use_pool, rerank, k, pq_subvectors):
+    """새 프로세스에서 모든 폴더를 열고 검색하여 메모리 증가분, 지연 시간, 검색 결과를 출력합니다."""
+    queries = np.load(os.path.join(root, "queries.npy"))
+    # 서버 프로세스처럼 풀 하나를 모든 폴더가 공유합니다.
+    pool = EmbeddingPool(os.path.join(root, "_pool"), index_root=root) if use_pool else None
+    baseline_rss = _rss_mb()
+
+    latencies = []
+    results = []
+    # 서버처럼 열어 둔 인덱스를 유지하여 모든 폴더의 메모리 사용량을 함께 측정합니다.
+    indexes = []
+    for folder in range(folders):
+        index = _open_index(root, folder, dtype, rerank, pq_subvectors, pool)
+        indexes.append(index)
+        folder_results = []
+        for query in queries:
+            start = time.perf_counter()
+            row = index.batch_similarity_search_by_vector(query[None, :], k=k)[0]
+            latencies.append(time.perf_counter() - start)
+            folder_results.append([doc.page_content for doc, _ in row])
+        results.append(folder_results)
+
+    rss, file_rss = _rss_mb()
+    print(json.dumps({
+        "rss_increase_mb": rss - baseline_rss[0],
+        "file_rss_increase_mb": file_rss - baseline_rss[1] if file_rss is not None else None,
+        "p50_ms": float(np.percentile(np.asarray(latencies) * 1000.0, 50)),
+        "p95_ms": float(np.percentile(np.asarray(latencies) * 1000.0, 95)),
+        "results": results,
+    }, ensure_ascii=False))
+
+
+def exact_results(corpus, queries, k):
+    """float32 전수 탐색의 정답 텍스트 집합 (폴더별, 질의별)"""
+    truth = []
+    for texts, vectors in corpus:
+        top = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+        truth.append([{texts[i] for i in row} for row in top])
+    return truth
+
+
+def run_benchmark(folders, shared, unique, dim, k, pq_subvectors, configurations):
+    corpus, queries = make_corpus(folders, shared, unique, dim)
+    truth = exact_results(corpus, queries, k)
+    chunks = sum(len(texts) for texts, _ in corpus)
+
+    results = []
+    for name, dtype, use_pool, rerank in configurations:
+        root = tempfile.mkdtemp(prefix="bench-storage-")
+        try:
+            start = time.perf_counter()
+            build(root, corpus, dtype, use_pool, pq_subvectors)
+            build_s = time.perf_counter() - start
+            disk_mb = _dir_size_mb(root)
+            np.save(os.path.join(root, "queries.npy"), queries)
+
+            command = [
+                sys.executable, os.path.abspath(__file__), "--child", root, dtype, str(int(use_pool)), str(rerank),
+                "--folders", str(folders), "--k", str(k), "--pq-subvectors", str(pq_subvectors),
+            ]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            measured = json.loads(output.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+        hits = [
+            len(set(found) & expected) / k
+            for folder_found, folder_truth in zip(measured["results"], truth)
+            for found, expected in zip(folder_found, folder_truth)
+        ]
+        entry = {
+            "configuration": name,
+            "dtype": dtype,
+            "shared_pool": use_pool,
+            "rerank_candidates": rerank,
+            "folders": folders,
+            "chunks": chunks,
+            "dimension": dim,
+            "k": k,
+            "build_s": build_s,
+            "disk_mb": disk_mb,
+            "rss_increase_mb": measured["rss_increase_mb"],
+            "file_rss_increase_mb": measured["file_rss_increase_mb"],
+            "recall_at_k": float(np.mean(hits)),
+            "p50_ms": measured["p50_ms"],
+            "p95_ms": measured["p95_ms"],
+        }
+        results.append(entry)
+        print(
+            f"[{name}] disk={disk_mb:.1f}MB rss=+{entry['rss_increase_mb']:.1f}MB "
+            f"(file +{entry['file_rss_increase_mb'] or 0:.1f}MB) "
+            f"recall@{k}={entry['recall_at_k']:.3f} p50={entry['p50_ms']:.2f}ms",
+            file=sys.stderr,
+        )
+
+    baseline = next((entry for entry in results if entry["configuration"] == "float32"), None)
+    if baseline:
+        for entry in results:
+            entry["disk_reduction"] = 1 - entry["disk_mb"] / baseline["disk_mb"] if baseline["disk_mb"] else None
+            entry["rss_reduction"] = (
+                1 - entry["rss_increase_mb"] / baseline["rss_increase_mb"] if baseline["rss_increase_mb"] > 0 else None
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="flat 인덱스 저장 형식별 디스크·메모리 사용량과 재현율을 비교합니다.")
+    parser.add_argument("--folders", type=int, default=20, help="폴더(학생회) 수")
+    parser.add_argument("--shared", type=int, default=2000, help="모든 폴더에 공통인 청크 수")
+    parser.add_argument("--unique", type=int, default=500, help="폴더마다 고유한 청크 수")
+    parser.add_argument("--dim", type=int, default=768, help="임베딩 차원 (embedding-001은 768)")
+    parser.add_argument("--k", type=int, default=5, help="검색할 문서 수")
+    parser.add_argument("--pq-subvectors", type=int, default=96, help="pq 부분 벡터 수")
+    parser.add_argument(
+        "--configurations", default=",".join(name for name, *_ in CONFIGURATIONS),
+        help="측정할 조합 (쉼표로 구분)",
+    )
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    parser.add_argument("--child", nargs=4, metavar=("ROOT", "DTYPE", "POOL", "RERANK"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        root, dtype, use_pool, rerank = args.child
+        child_measure(root, args.folders, dtype, use_pool == "1", int(rerank), args.k, args.pq_subvectors)
+        return
+
+    selected = set(args.configurations.split(","))
+    results = run_benchmark(
+        folders=args.folders,
+        shared=args.shared,
+        unique=args.unique,
+        dim=args.dim,
+        k=args.k,
+        pq_subvectors=args.pq_subvectors,
+        configurations=[entry for entry in CONFIGURATIONS if entry[0] in selected],
+    )
+    report = json.dumps({"benchmark": "embedding_storage", "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+헤징과 마감 시간 벤치마크: 지연 분포를 조절할 수 있는 가짜 LLM으로 꼬리 지연 비교
+
+가짜 LLM은 대부분 로그정규 분포(중앙값 --median-ms)로 응답하고, --slow-prob 확률로 --slow-ms 만큼 지연됩니다.
+같은 호출 순서를 다음 세 가지 방식으로 실행하여 p50/p95/p99와 추가 요청 비율을 비교합니다.
+  - baseline: 그대로 호출 (현재 동작)
+  - hedged:   hedged_call (관측 p95가 지나면 중복 요청)
+  - deadline: hedged_call + run_with_deadline(--deadline-ms), 시간 초과 비율(degraded) 집계
+
+네트워크나 API 키 없이 실행됩니다. (src.config를 읽기 위한 환경 변수는 필요합니다)
+
+사용 예:
+    python benchmarks/bench_hedging.py --calls 400 --slow-prob 0.05 --slow-ms 2000 --output hedging.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import deadlines  # noqa: E402
+
+
+class FakeLatencyLLM:
+    """invoke() 호출마다 정해진 분포에서 뽑은 시간만큼 지연한 뒤 응답하는 가짜 LLM"""
+
+    def __init__(self, median_ms, sigma, slow_prob, slow_ms, seed):
+        self.median_s = median_ms / 1000
+        self.sigma = sigma
+        self.slow_prob = slow_prob
+        self.slow_s = slow_ms / 1000
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.invocations = 0
+
+    def _sample_latency(self):
+        with self._lock:
+            self.invocations += 1
+            if self._random.random() < self.slow_prob:
+                return self.slow_s
+            return self.median_s * self._random.lognormvariate(0, self.sigma)
+
+    def invoke(self, prompt):
+        time.sleep(self._sample_latency())
+        return f"응답: {prompt}"
+
+
+def _percentiles(latencies):
+    ordered = sorted(latencies)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+    return {"p50_ms": pick(50) * 1000, "p95_ms": pick(95) * 1000, "p99_ms": pick(99) * 1000, "max_ms": ordered[-1] * 1000}
+
+
+def run_scenario(name, args, call):
+    """call(llm, index)를 --calls번 동시에 실행하고 지연 시간 분포를 집계합니다."""
+    llm = FakeLatencyLLM(args.median_ms, args.sigma, args.slow_prob, args.slow_ms, args.seed)
+    degraded = 0
+    latencies = []
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal degraded
+        start_time = time.perf_counter()
+        try:
+            call(llm, index)
+        except deadlines.DeadlineExceeded:
+            with lock:
+                degraded += 1
+        with lock:
+            latencies.append(time.perf_counter() - start_time)
+
+    print(f"{name}: {args.calls}회 호출 중...", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.calls)))
+
+    return {
+        "scenario": name,
+        **_percentiles(latencies),
+        "llm_invocations": llm.invocations,
+        "extra_request_ratio": llm.invocations / args.calls - 1,
+        "degraded_ratio": degraded / args.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 LLM으로 헤징과 마감 시간의 꼬리 지연 효과를 측정합니다.")
+    parser.add_argument("--calls", type=int, default=400, help="시나리오별 호출 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 호출 수")
+    parser.add_argument("--median-ms", type=float, default=80.0, help="정상 응답의 중앙값 지연 (ms)")
+    parser.add_argument("--sigma", type=float, default=0.3, help="정상 응답 로그정규 분포의 sigma")
+    parser.add_argument("--slow-prob", type=float, default=0.05, help="느린 응답이 나올 확률")
+    parser.add_argument("--slow-ms", type=float, default=2000.0, help="느린 응답의 지연 (ms)")
+    parser.add_argument("--deadline-ms", type=float, default=1000.0, help="deadline 시나리오의 노드 마감 시간 (ms)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    deadlines.HEDGE_REQUESTS = True
+
+    results = [
+        run_scenario("baseline", args, lambda llm, index: llm.invoke(index)),
+        run_scenario(
+            "hedged", args, lambda llm, index: deadlines.hedged_call("bench_hedged", lambda: llm.invoke(index))
+        ),
+        run_scenario(
+            "deadline", args, lambda llm, index: deadlines.run_with_deadline(
+                deadlines.hedged_call, args.deadline_ms / 1000, "bench_deadline", lambda: llm.invoke(index)
+            )
+        ),
+    ]
+
+    report = {
+        "benchmark": "hedging",
+        "settings": {
+            key: getattr(args, key)
+            for key in ("calls", "concurrency", "median_ms", "sigma", "slow_prob", "slow_ms", "deadline_ms", "seed")
+        },
+        "hedge_min_samples": deadlines.HEDGE_MIN_SAMPLES,
+        "latency_trackers": deadlines.get_latency_stats(),
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+OCR 벤치마크: 렌더링/Tesseract 설정별 페이지당 OCR 시간과 글자 정확도
+
+스캔한 한국어 규정 페이지를 설정별로 OCR하여 다음 항목을 JSON으로 출력합니다.
+- 페이지당 OCR 시간 (렌더링 + 전처리 + Tesseract, 빈 페이지 포함 평균)
+- 글자 정확도 (공백을 뺀 정답과의 편집 거리 기준, 1 - CER)
+- 건너뛴 빈 페이지 수, 자동 DPI를 쓴 경우 선택된 DPI
+
+표본은 두 가지 중 하나를 사용합니다.
+- --pdf/--truth: 실제 스캔 PDF와 정답 텍스트 파일(페이지 사이를 폼 피드 \\f로 구분)을 짝지어 지정
+- 지정하지 않으면 한글 TrueType 글꼴(--font, 없으면 시스템 글꼴 검색)로 규정 조문을 글자 크기별로 그린
+  합성 스캔 페이지(잡티 포함)와 빈 페이지 하나를 만들어 사용
+
+Tesseract 실행 파일과 한국어 데이터(kor), poppler(pdftoppm)가 필요합니다.
+
+사용 예:
+    python benchmarks/bench_ocr.py --output bench_ocr.json
+    python benchmarks/bench_ocr.py --pdf scan1.pdf --truth scan1.txt --configs baseline gray-auto configured
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import _document_lines  # noqa: E402
+from src.config import OCR_COLOR_MODE, OCR_DPI, OCR_OEM, OCR_PSM, OCR_SKIP_BLANK_PAGES  # noqa: E402
+from src.utils.ocr import ocr_pdf  # noqa: E402
+
+# 비교할 설정 (baseline은 변경 전 동작: 컬러, pdf2image 기본 200 DPI, Tesseract 기본값, 빈 페이지도 OCR)
+CONFIGS = {
+    "baseline": {"color_mode": "rgb", "dpi": 200, "psm": "", "oem": "", "skip_blank_pages": False},
+    "gray": {"color_mode": "gray", "dpi": 200, "psm": "", "oem": "", "skip_blank_pages": True},
+    "gray-300": {"color_mode": "gray", "dpi": 300, "psm": "", "oem": "", "skip_blank_pages": True},
+    "gray-auto": {"color_mode": "gray", "dpi": "auto", "psm": "", "oem": "", "skip_blank_pages": True},
+    "binary-auto": {"color_mode": "binary", "dpi": "auto", "psm": "", "oem": "", "skip_blank_pages": True},
+    "gray-auto-psm6": {"color_mode": "gray", "dpi": "auto", "psm": 6, "oem": "", "skip_blank_pages": True},
+    "gray-auto-psm6-oem1": {"color_mode": "gray", "dpi": "auto", "psm": 6, "oem": 1, "skip_blank_pages": True},
+    # 현재 OCR_* 환경 변수 설정
+    "configured": {
+        "color_mode": OCR_COLOR_MODE, "dpi": OCR_DPI, "psm": OCR_PSM, "oem": OCR_OEM,
+        "skip_blank_pages": OCR_SKIP_BLANK_PAGES,
+    },
+}
+
+# 합성 페이지의 글자 크기 (pt)
+FONT_SIZES_PT = (9, 10, 12, 14)
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/truetype/nanum/NanumMyeongjo.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+
+
+def _check_prerequisites():
+    missing = [name for name in ("tesseract", "pdftoppm") if not shutil.which(name)]
+    if missing:
+        return f"실행 파일을 찾을 수 없습니다: {', '.join(missing)}"
+    try:
+        import pytesseract
+        import pdf2image  # noqa: F401
+    except ImportError as e:
+        return f"OCR 패키지가 설치되어 있지 않습니다: {e.name} (pip install -r requirements.txt)"
+    if "kor" not in pytesseract.get_languages(config=""):
+        return "Tesseract 한국어 데이터(kor.traineddata)가 설치되어 있지 않습니다."
+    return None
+
+
+def _find_font(path):
+    if path:
+        return path
+    for candidate in FONT_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _wrap(text, font, max_width):
+    """글꼴 기준으로 max_width 픽셀을 넘지 않게 줄을 나눕니다."""
+    lines = []
+    current = ""
+    for char in text:
+        if current and font.getlength(current + char) > max_width:
+            lines.append(current)
+            current = char.lstrip()
+        else:
+            current += char
+    if current:
+        lines.append(current)
+    return lines
+
+
+def make_scanned_pages(font_path, scan_dpi, seed):
+    """
+    글자 크기별 합성 스캔 페이지와 빈 페이지 하나로 된 PDF를 만듭니다.
+
+    Returns:
+        tuple: (PDF 바이트, 페이지별 정답 텍스트 목록)
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    width, height = int(8.27 * scan_dpi), int(11.69 * scan_dpi)
+    margin = int(0.8 * scan_dpi)
+    images = []
+    truths = []
+    for page_index, size_pt in enumerate(FONT_SIZES_PT):
+        font = ImageFont.truetype(font_path, int(round(size_pt * scan_dpi / 72)))
+        line_height = int(font.size * 1.6)
+        image = Image.new("L", (width, height), 250)
+        draw = ImageDraw.Draw(image)
+        written = []
+        top = margin
+        for paragraph in _document_lines(f"재정·회계 세칙 {page_index + 1}", 20, seed + page_index):
+            for line in _wrap(paragraph, font, width - 2 * margin) or [""]:
+                if top + line_height > height - margin:
+                    break
+                draw.text((margin, top), line, font=font, fill=rng.randint(20, 60))
+                written.append(line)
+                top += line_height
+        # 스캔 잡티
+        for _ in range(width * height // 4000):
+            draw.point((rng.randrange(width), rng.randrange(height)), fill=rng.randint(120, 200))
+        images.append(image)
+        truths.append("\n".join(written))
+    # 간지처럼 비어 있는 페이지
+    images.append(Image.new("L", (width, height), 250))
+    truths.append("")
+
+    output = io.BytesIO()
+    images[0].save(output, format="PDF", resolution=scan_dpi, save_all=True, append_images=images[1:])
+    return output.getvalue(), truths
+
+
+def char_accuracy(truth, text):
+    """공백을 뺀 두 문자열의 편집 거리로 글자 정확도(1 - CER, 0 이상)를 계산합니다."""
+    reference = "".join(truth.split())
+    hypothesis = "".join(text.split())
+    if not reference:
+        return 1.0 if not hypothesis else 0.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / len(reference))
+
+
+def run_config(name, settings, samples, lang):
+    """표본 전체를 한 설정으로 OCR하고 페이지별 결과를 요약합니다."""
+    page_seconds = []
+    accuracies = []
+    dpis = []
+    skipped = 0
+    for pdf_bytes, truths in samples:
+        texts, pages = ocr_pdf(pdf_bytes, lang=lang, **settings)
+        for page, text, truth in zip(pages, texts, truths):
+            page_seconds.append(page["seconds"])
+            if truth.strip():
+                accuracies.append(char_accuracy(truth, text))
+            if page["skipped"]:
+                skipped += 1
+            else:
+                dpis.append(page["dpi"])
+        print(f"[{name}] 표본 처리 완료 ({len(pages)}쪽)", file=sys.stderr)
+    return {
+        "config": name,
+        "settings": dict(settings),
+        "pages": len(page_seconds),
+        "skipped_blank_pages": skipped,
+        "seconds_per_page": statistics.mean(page_seconds) if page_seconds else None,
+        "total_seconds": sum(page_seconds),
+        "char_accuracy_mean": statistics.mean(accuracies) if accuracies else None,
+        "char_accuracy_min": min(accuracies) if accuracies else None,
+        "dpi_mean": statistics.mean(dpis) if dpis else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 설정별 페이지당 시간과 글자 정확도를 측정합니다.")
+    parser.add_argument("--pdf", action="append", default=[], help="스캔 PDF 표본 (여러 번 지정 가능)")
+    parser.add_argument("--truth", action="append", default=[], help="--pdf와 같은 순서의 정답 텍스트 파일 (페이지 구분: \\f)")
+    parser.add_argument("--font", help="합성 표본에 사용할 한글 TrueType 글꼴 경로")
+    parser.add_argument("--scan-dpi", type=int, default=300, help="합성 표본의 스캔 해상도")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=list(CONFIGS), help="비교할 설정")
+    parser.add_argument("--lang", default="kor+eng", help="Tesseract 언어")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    problem = _check_prerequisites()
+    if problem:
+        print(f"OCR 벤치마크를 실행할 수 없습니다: {problem}", file=sys.stderr)
+        sys.exit(2)
+    if len(args.pdf) != len(args.truth):
+        parser.error("--pdf와 --truth는 같은 수만큼 지정해야 합니다.")
+
+    if args.pdf:
+        samples = []
+        for pdf_path, truth_path in zip(args.pdf, args.truth):
+            with open(pdf_path, "rb") as f, open(truth_path, "r", encoding="utf-8") as t:
+                samples.append((f.read(), t.read().split("\f")))
+        source = {"pdfs": args.pdf}
+    else:
+        font_path = _find_font(args.font)
+        if not font_path:
+            parser.error("한글 글꼴을 찾을 수 없습니다. --font로 지정하거나 --pdf/--truth로 실제 표본을 지정하세요.")
+        samples = [make_scanned_pages(font_path, args.scan_dpi, args.seed)]
+        source = {"synthetic": {"font": font_path, "scan_dpi": args.scan_dpi, "font_sizes_pt": list(FONT_SIZES_PT)}}
+
+    results = []
+    with contextlib.redirect_stdout(sys.stderr):
+        for name in args.configs:
+            results.append(run_config(name, CONFIGS[name], samples, args.lang))
+
+    baseline = next((result for result in results if result["config"] == "baseline"), None)
+    if baseline and baseline["seconds_per_page"]:
+        for result in results:
+            result["speedup_vs_baseline"] = baseline["seconds_per_page"] / result["seconds_per_page"]
+
+    report = {"cpu_count": os.cpu_count(), "source": source, "lang": args.lang, "results": results}
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+오프라인 벤치마크 모음: Gemini, Google Drive, Notion 없이 재현 가능한 성능 측정
+
+benchmarks/fakes.py의 대체 구현(가짜 채팅 모델, 해싱 임베딩, 로컬 디렉터리 Drive, 가짜 Notion)을 설치하고
+결정적으로 생성한 규정 문서 PDF 묶음(텍스트 PDF + 스캔 PDF)으로 다음을 측정합니다.
+  - ingestion:   Drive 다운로드 → 텍스트 추출(OCR 포함) → 분할 → 임베딩 → 저장 처리량과 최대 메모리 할당량
+  - retrieval:   벡터 검색 지연 시간 (전체 / 문서 종류 필터)
+  - pipeline:    질의 하나씩 실행한 파이프라인 종단 간 지연 시간
+  - concurrency: 동시 요청 수별 처리량과 지연 시간
+  - memory:      프로세스 최대 RSS
+
+외부 서비스의 지연은 --llm-latency-ms 등으로 흉내 내며, 결과 JSON의 키 구성은 고정되어 있으므로
+커밋 사이의 결과를 --baseline으로 비교할 수 있습니다. (스캔 PDF의 OCR은 tesseract와 poppler가 설치된 경우에만 성공합니다)
+
+사용 예:
+    python benchmarks/bench_offline_suite.py --output offline.json
+    python benchmarks/bench_offline_suite.py --llm-latency-ms 300 --concurrency 1,4,8 --baseline offline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes  # noqa: E402
+
+SCHEMA_VERSION = 1
+FOLDER_ID = "offline-folder"
+
+
+def _summarize(latencies):
+    """지연 시간(초) 목록을 ms 단위 통계로 요약합니다."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+        "p99_ms": pick(99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _peak_rss_mib():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux는 KiB, macOS는 바이트 단위입니다.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ----- 시나리오 -----
+
+def bench_ingestion(corpus, drive):
+    """폴더 전체를 적재하는 시간과, 같은 적재를 tracemalloc으로 다시 실행한 최대 메모리 할당량을 측정합니다."""
+    from src.agents.document_manager import DocumentManagerAgent
+    from src.utils.vector_db_manager import count_documents
+
+    manager = DocumentManagerAgent()
+    start_time = time.perf_counter()
+    document_count = manager.ingest_folder(FOLDER_ID)
+    elapsed = time.perf_counter() - start_time
+    chunk_count = count_documents(f"regulations_{FOLDER_ID}")
+    download_bytes = drive.stats["bytes"]
+
+    # 메모리 추적은 실행 속도를 떨어뜨리므로 시간 측정과 분리하여 별도 컬렉션에 한 번 더 적재합니다.
+    tracemalloc.start()
+    manager.ingest_folder(FOLDER_ID, "offline_bench_memory")
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "files": len(corpus),
+        "scanned_files": sum(1 for item in corpus if item["kind"] == "scanned"),
+        "documents_ingested": document_count,
+        "chunks": chunk_count,
+        "download_mib": round(download_bytes / (1024 * 1024), 3),
+        "seconds": round(elapsed, 4),
+        "documents_per_s": round(document_count / elapsed, 3) if elapsed else None,
+        "chunks_per_s": round(chunk_count / elapsed, 3) if elapsed else None,
+        "peak_traced_mib": round(peak_bytes / (1024 * 1024), 3),
+    }
+
+
+def bench_retrieval(queries, repeats):
+    """질의마다 repeats번 검색하여 전체 검색과 규정 문서 필터 검색의 지연 시간을 측정합니다."""
+    from src.utils.document_types import REGULATION_DOC_TYPES
+    from src.utils.vector_db_manager import search_documents_from_db
+
+    collection_name = f"regulations_{FOLDER_ID}"
+    results = {}
+    for label, doc_types in (("all", None), ("regulation_filter", REGULATION_DOC_TYPES)):
+        latencies = []
+        for _ in range(repeats):
+            for item in queries:
+                start_time = time.perf_counter()
+                search_documents_from_db(item["query"], collection_name, k=5, doc_types=doc_types)
+                latencies.append(time.perf_counter() - start_time)
+        results[label] = _summarize(latencies)
+    return results
+
+
+async def _timed_pipeline(pipeline, query):
+    start_time = time.perf_counter()
+    state = await pipeline.run_agent_pipeline(query, FOLDER_ID)
+    return time.perf_counter() - start_time, state
+
+
+async def bench_pipeline(pipeline, queries, requests):
+    """질의를 하나씩 실행하여 종단 간 지연 시간과 조정 경로 분포를 측정합니다."""
+    latencies = []
+    paths = {}
+    for index in range(requests):
+        elapsed, state = await _timed_pipeline(pipeline, queries[index % len(queries)]["query"])
+        latencies.append(elapsed)
+        path = state.get("coordinator_path") or "none"
+        paths[path] = paths.get(path, 0) + 1
+    return {**_summarize(latencies), "coordinator_paths": dict(sorted(paths.items()))}
+
+
+async def bench_concurrency(pipeline, queries, levels, requests_per_level):
+    """동시 요청 수별로 requests_per_level개의 요청을 실행하여 처리량과 지연 시간을 측정합니다."""
+    results = {}
+    for level in levels:
+        semaphore = asyncio.Semaphore(level)
+
+        async def one(index):
+            async with semaphore:
+                elapsed, _ = await _timed_pipeline(pipeline, queries[index % len(queries)]["query"])
+                return elapsed
+
+        print(f"동시 요청 {level}개: {requests_per_level}건 실행 중...", file=sys.stderr)
+        start_time = time.perf_counter()
+        latencies = await asyncio.gather(*(one(index) for index in range(requests_per_level)))
+        wall = time.perf_counter() - start_time
+        results[str(level)] = {
+            **_summarize(latencies),
+            "wall_s": round(wall, 4),
+            "throughput_rps": round(requests_per_level / wall, 3) if wall else None,
+        }
+    return results
+
+
+# ----- 비교 -----
+
+def _numeric_leaves(value, prefix=""):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _numeric_leaves(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def compare_results(baseline, current):
+    """두 결과의 같은 지표를 비교하여 지표 경로별 기준값, 현재값, 변화율(%)을 반환합니다."""
+    baseline_values = dict(_numeric_leaves(baseline.get("results", {})))
+    comparison = {}
+    for path, value in _numeric_leaves(current["results"]):
+        if path not in baseline_values:
+            continue
+        before = baseline_values[path]
+        comparison[path] = {
+            "baseline": before,
+            "current": value,
+            "change_pct": round((value - before) / before * 100, 2) if before else None,
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="외부 서비스 없이 적재, 검색, 파이프라인 성능을 측정합니다.")
+    parser.add_argument("--copies", type=int, default=2, help="문서 묶음 반복 횟수 (적재 규모)")
+    parser.add_argument("--articles", type=int, default=60, help="문서당 조항 수")
+    parser.add_argument("--retrieval-repeats", type=int, default=5, help="검색 질의 반복 횟수")
+    parser.add_argument("--pipeline-requests", type=int, default=16, help="순차 파이프라인 요청 수")
+    parser.add_argument("--concurrency", default="1,4,8", help="동시 요청 수 목록 (쉼표 구분)")
+    parser.add_argument("--requests-per-level", type=int, default=16, help="동시 요청 수별 요청 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="가짜 LLM 응답 지연 중앙값 (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="가짜 LLM 지연 로그정규 sigma")
+    parser.add_argument("--llm-output-tokens", type=int, default=200, help="가짜 LLM 응답 길이 (토큰)")
+    parser.add_argument("--embedding-latency-ms", type=float, default=5.0, help="임베딩 호출당 지연 (ms)")
+    parser.add_argument("--embedding-per-text-ms", type=float, default=0.2, help="임베딩 텍스트당 추가 지연 (ms)")
+    parser.add_argument("--drive-latency-ms", type=float, default=10.0, help="Drive 다운로드 요청당 지연 (ms)")
+    parser.add_argument("--notion-latency-ms", type=float, default=20.0, help="Notion 요청당 지연 (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="문서 묶음과 인덱스를 만들 디렉터리 (기본값: 임시 디렉터리)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    # 모듈과 파이프라인의 진행 메시지가 결과 JSON과 섞이지 않도록 표준 오류로 보냅니다.
+    with contextlib.redirect_stdout(sys.stderr):
+        work_dir = fakes.configure_offline_environment(args.work_dir)
+        corpus_dir = os.path.join(work_dir, "corpus")
+        print(f"문서 묶음 생성 중: {corpus_dir}")
+        corpus = fakes.write_fixture_corpus(corpus_dir, args.articles, args.copies, args.seed)
+        installed = fakes.install_fakes(
+            corpus_dir,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_jitter=args.llm_jitter,
+            llm_output_tokens=args.llm_output_tokens,
+            embedding_latency_ms=args.embedding_latency_ms,
+            embedding_per_text_ms=args.embedding_per_text_ms,
+            drive_latency_ms=args.drive_latency_ms,
+            notion_latency_ms=args.notion_latency_ms,
+            seed=args.seed,
+        )
+        from src.core import langgraph_pipeline
+
+        queries = fakes.fixture_queries()
+        results = {"ingestion": bench_ingestion(corpus, installed["drive"])}
+        results["retrieval"] = bench_retrieval(queries, args.retrieval_repeats)
+        results["pipeline"] = asyncio.run(bench_pipeline(langgraph_pipeline, queries, args.pipeline_requests))
+        results["concurrency"] = asyncio.run(
+            bench_concurrency(langgraph_pipeline, queries, levels, args.requests_per_level)
+        )
+        results["memory"] = {"peak_rss_mib": _peak_rss_mib()}
+        results["external_calls"] = {
+            "drive_downloads": installed["drive"].stats["download_requests"],
+            "notion_pages": installed["notion"].count("pages.create"),
+            # NOTION_WRITE_MODE=upsert이면 같은 질문의 반복 기록이 바뀐 블록 갱신으로 줄어듭니다.
+            "notion_calls": len(installed["notion"].calls),
+        }
+
+    report = {
+        "benchmark": "offline_suite",
+        "schema_version": SCHEMA_VERSION,
+        "git_commit": _git_commit(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "settings": {
+            key: getattr(args, key)
+            for key in (
+                "copies", "articles", "retrieval_repeats", "pipeline_requests", "concurrency", "requests_per_level",
+                "llm_latency_ms", "llm_jitter", "llm_output_tokens", "embedding_latency_ms",
+                "embedding_per_text_ms", "drive_latency_ms", "notion_latency_ms", "seed",
+            )
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["baseline_comparison"] = compare_results(json.load(f), report)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
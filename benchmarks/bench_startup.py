@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+시작 시간 벤치마크: 모듈 가져오기와 첫 요청 준비에 걸리는 시간
+
+매 실행을 새 파이썬 프로세스에서 하여 다음 단계의 소요 시간을 측정하고 실행별 중앙값을 보고합니다.
+  - import_config:   src.config 가져오기 (.env 읽기, 설정 검증)
+  - import_pipeline: src.core.langgraph_pipeline 가져오기 (앱 시작 시 비용)
+  - create_graph:    LangGraph 워크플로우 컴파일
+  - first_use:       에이전트와 모델, 벡터 DB 클라이언트를 처음 사용할 때의 초기화
+Google Drive는 OAuth 창이 뜨지 않도록 로컬 디렉터리를 제공하는 가짜 서비스로 대체하고,
+API 키는 오프라인 값으로 설정합니다. 벡터 저장소는 --backend로 고르며(기본 chroma), 임시 디렉터리에 만듭니다.
+
+사용 예:
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("import_config", "import_pipeline", "create_graph", "first_use")
+
+
+def child(backend):
+    """새 프로세스에서 단계별 시간을 측정하여 JSON 한 줄로 출력합니다."""
+    sys.path.insert(0, ROOT_DIR)
+    from benchmarks import fakes
+
+    work_dir = fakes.configure_offline_environment()
+    os.environ["VECTOR_STORE_BACKEND"] = backend
+    os.environ["CHROMADB_PATH"] = os.path.join(work_dir, "chroma_db")
+    timings = {}
+
+    start_time = time.perf_counter()
+    import src.config  # noqa: F401
+    timings["import_config"] = time.perf_counter() - start_time
+
+    from src.utils.google_drive_handler import set_google_drive_service
+    set_google_drive_service(fakes.FakeDriveService(work_dir))
+
+    start_time = time.perf_counter()
+    from src.core import langgraph_pipeline
+    timings["import_pipeline"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    langgraph_pipeline.create_graph()
+    timings["create_graph"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for name in ("reviewer_agent", "auditor_agent", "coordinator_agent", "query_router_chain"):
+        getattr(langgraph_pipeline, name)
+    from src.utils import vector_db_manager
+    vector_db_manager.count_documents("startup_probe")
+    timings["first_use"] = time.perf_counter() - start_time
+
+    sys.__stdout__.write(json.dumps(timings) + "\n")
+
+
+def run_once(backend):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--backend", backend],
+        capture_output=True, text=True, cwd=tempfile.gettempdir(),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"측정 프로세스 실패:\n{completed.stderr[-2000:]}")
+    timings = None
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            timings = json.loads(line)
+            break
+    if timings is None:
+        raise RuntimeError("측정 결과를 찾지 못했습니다.")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 가져오기와 첫 요청 준비 시간을 측정합니다.")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수 (매번 새 프로세스)")
+    parser.add_argument("--backend", choices=("chroma", "flat"), default="chroma", help="벡터 저장소 백엔드")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    if args.child:
+        # 모듈의 진행 메시지는 표준 오류로 보내고 측정 결과만 표준 출력에 씁니다.
+        sys.stdout = sys.stderr
+        child(args.backend)
+        return
+
+    runs = []
+    for index in range(args.runs):
+        print(f"[{index + 1}/{args.runs}] 측정 중...", file=sys.stderr)
+        runs.append(run_once(args.backend))
+
+    stages = {
+        stage: round(statistics.median(run[stage] for run in runs) * 1000, 1) for stage in STAGES
+    }
+    report = {
+        "benchmark": "startup",
+        "settings": {"runs": args.runs, "backend": args.backend},
+        "median_ms": {**stages, "import_to_first_use": round(sum(stages.values()), 1)},
+        "runs": runs,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
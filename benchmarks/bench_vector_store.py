@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+벡터 저장소 벤치마크: ChromaDB(HNSW) vs FlatVectorStore(NumPy 전수 탐색)
+
+코퍼스 크기별로 다음 항목을 측정하여 JSON으로 출력합니다.
+- 인덱스 구축 시간
+- 단일 질의 검색 지연 시간 (p50/p95)과 배치 검색 처리량
+- 새 프로세스에서 인덱스를 여는 시간(cold open)과 첫 질의 시간
+- 인덱스를 열고 검색한 뒤의 메모리 사용량(RSS 증가분)과 디스크 사용량
+
+임베딩 API를 호출하지 않도록 고정 시드의 무작위 단위 벡터를 사용합니다.
+
+사용 예:
+    python benchmarks/bench_vector_store.py --sizes 1000,5000,20000 --output bench_vector_store.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.flat_vector_store import FlatVectorStore  # noqa: E402
+
+COLLECTION_NAME = "bench"
+
+
+def _random_unit_vectors(count, dim, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000.0, q))
+
+
+def _dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total / (1024 * 1024)
+
+
+def _rss_mb():
+    """현재 프로세스의 상주 메모리(RSS)를 MB 단위로 반환합니다."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # /proc이 없는 환경에서는 최대 RSS로 대신합니다. (Linux 기준 KB 단위)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ----- 백엔드별 구축/검색 -----
+
+def build_flat(path, vectors, dtype):
+    store = FlatVectorStore(path, dtype=dtype)
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    metadatas = [{"doc_type": "세칙" if i % 3 else "감사 보고서"} for i in range(len(vectors))]
+    store.add_embeddings(texts, vectors, metadatas=metadatas, ids=[str(i) for i in range(len(vectors))])
+    return store
+
+
+def build_chroma(path, vectors):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    batch_size = 5000
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"chunk {i}" for i in range(start, end)],
+            metadatas=[{"doc_type": "세칙" if i % 3 else "감사 보고서"} for i in range(start, end)],
+        )
+    return collection
+
+
+def open_store(backend, path):
+    if backend == "chroma":
+        import chromadb
+        return chromadb.PersistentClient(path=path).get_collection(COLLECTION_NAME)
+    return FlatVectorStore(path)
+
+
+def search(backend, store, query_vectors, k):
+    if backend == "chroma":
+        return store.query(query_embeddings=query_vectors.tolist(), n_results=k)
+    return store.batch_similarity_search_by_vector(query_vectors, k=k)
+
+
+# ----- 측정 -----
+
+def measure_latency(backend, store, queries, k):
+    """질의를 하나씩 검색한 지연 시간과 전체를 한 번에 검색한 배치 처리량을 측정합니다."""
+    search(backend, store, queries[:1], k)  # 예열
+
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(backend, store, query[None, :], k)
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    search(backend, store, queries, k)
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": _percentile_ms(samples, 50),
+        "p95_ms": _percentile_ms(samples, 95),
+        "batch_queries_per_s": len(queries) / batch_elapsed if batch_elapsed else None,
+    }
+
+
+def measure_cold_open(backend, path, dim, k):
+    """새 파이썬 프로세스에서 인덱스를 열고 첫 질의를 수행하는 비용을 측정합니다."""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--child-cold-open", backend, path, "--dim", str(dim), "--k", str(k),
+    ]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def child_cold_open(backend, path, dim, k):
+    if backend == "chroma":
+        import chromadb  # noqa: F401  라이브러리 import 비용은 기준선에 포함합니다.
+    baseline_rss = _rss_mb()
+    queries = _random_unit_vectors(100, dim, seed=7)
+
+    start = time.perf_counter()
+    store = open_store(backend, path)
+    open_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    search(backend, store, queries[:1], k)
+    first_query_s = time.perf_counter() - start
+
+    for query in queries:
+        search(backend, store, query[None, :], k)
+
+    print(json.dumps({
+        "open_ms": open_s * 1000.0,
+        "first_query_ms": first_query_s * 1000.0,
+        "rss_increase_mb": _rss_mb() - baseline_rss,
+    }))
+
+
+def run_benchmark(sizes, dim, query_count, k, dtypes, include_chroma):
+    results = []
+    queries = _random_unit_vectors(query_count, dim, seed=1)
+
+    for size in sizes:
+        vectors = _random_unit_vectors(size, dim, seed=0)
+        backends = [("flat", dtype) for dtype in dtypes]
+        if include_chroma:
+            backends.append(("chroma", None))
+
+        for backend, dtype in backends:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, "index")
+                start = time.perf_counter()
+                if backend == "chroma":
+                    store = build_chroma(path, vectors)
+                else:
+                    store = build_flat(path, vectors, dtype)
+                build_s = time.perf_counter() - start
+
+                entry = {
+                    "backend": backend,
+                    "dtype": dtype,
+                    "corpus_size": size,
+                    "dimension": dim,
+                    "k": k,
+                    "build_s": build_s,
+                    "disk_mb": _dir_size_mb(path),
+                }
+                entry.update(measure_latency(backend, store, queries, k))
+                entry.update(measure_cold_open(backend, path, dim, k))
+                results.append(entry)
+                print(
+                    f"[{backend}{'/' + dtype if dtype else ''}] n={size} "
+                    f"p50={entry['p50_ms']:.2f}ms p95={entry['p95_ms']:.2f}ms "
+                    f"open={entry['open_ms']:.1f}ms rss=+{entry['rss_increase_mb']:.1f}MB",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChromaDB와 FlatVectorStore의 검색 성능을 비교합니다.")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="쉼표로 구분한 코퍼스 크기 목록")
+    parser.add_argument("--dim", type=int, default=768, help="임베딩 차원 (embedding-001은 768)")
+    parser.add_argument("--queries", type=int, default=200, help="지연 시간 측정에 사용할 질의 수")
+    parser.add_argument("--k", type=int, default=5, help="검색할 문서 수")
+    parser.add_argument("--dtypes", default="float32,float16,int8", help="측정할 flat 인덱스 저장 형식")
+    parser.add_argument("--skip-chroma", action="store_true", help="ChromaDB 측정을 생략합니다.")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    parser.add_argument("--child-cold-open", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_cold_open:
+        child_cold_open(args.child_cold_open[0], args.child_cold_open[1], args.dim, args.k)
+        return
+
+    results = run_benchmark(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        dim=args.dim,
+        query_count=args.queries,
+        k=args.k,
+        dtypes=args.dtypes.split(","),
+        include_chroma=not args.skip_chroma,
+    )
+    report = json.dumps({"benchmark": "vector_store", "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
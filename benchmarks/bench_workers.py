@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+다중 프로세스 작업자 벤치마크
+
+benchmarks/fakes.py의 오프라인 대체 구현을 서버 프로세스와 모든 작업자 프로세스에 설치하고
+src.core.worker_pool.dispatch_pipeline을 직접 동시에 호출하여 다음 시나리오를 측정합니다.
+  - throughput: 서로 다른 질문 --queries건을 동시성 --concurrency로 실행 → 작업자 수(--workers, 0은 단일 프로세스)별 처리량
+  - ingestion:  질의를 계속 보내는 동안 다른 폴더를 다시 적재(refresh) → 적재 중 질의 지연 시간을
+                단일 프로세스(작업 스레드에서 적재)와 작업자 배치(적재 작업자 프로세스) 사이에서 비교
+
+가짜 LLM의 기본 지연은 0이므로 파이프라인의 CPU 작업(프롬프트 구성, 파싱, 검색, 그래프 실행)이 처리량을 결정합니다.
+작업자 수에 따른 확장은 사용 가능한 CPU 코어 수를 넘을 수 없으므로 결과에 cpu_count를 함께 기록합니다.
+
+사용 예:
+    python benchmarks/bench_workers.py --workers 0 2 4 --concurrency 8 --queries 48 --output workers.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes  # noqa: E402
+
+QUERY_FOLDER = "query-folder"
+REFRESH_FOLDER = "refresh-folder"
+
+
+def _summarize(latencies):
+    """지연 시간(초) 목록을 ms 단위 통계로 요약합니다."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _worker_setup(corpus_dir, fake_settings):
+    """작업자 프로세스 초기화: 진행 메시지를 표준 오류로 보내고 대체 구현을 설치합니다."""
+    sys.stdout = sys.stderr
+    fakes.install_fakes(corpus_dir, **fake_settings)
+
+
+def _messages(count, offset=0):
+    distinct = [item["query"] for item in fakes.fixture_queries()]
+    return [f"{distinct[(offset + index) % len(distinct)]} (#{offset + index})" for index in range(count)]
+
+
+async def _run_batch(messages, folder_id, concurrency):
+    """메시지를 동시성 concurrency로 실행하고 (지연 시간 목록, 오류 수, 걸린 시간)을 반환합니다."""
+    from src.core.worker_pool import dispatch_pipeline
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(message):
+        nonlocal errors
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                await dispatch_pipeline(message, folder_id)
+                latencies.append(time.perf_counter() - start_time)
+            except Exception as e:
+                errors += 1
+                print(f"질의 실패: {e}")
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one(message) for message in messages))
+    return latencies, errors, time.perf_counter() - start_time
+
+
+async def _run_during_ingestion(start_ingestion, wait_ingestion, concurrency, lead_s, tail_s):
+    """
+    질의를 계속 보내면서 lead_s초 뒤에 적재를 시작하고, 적재가 끝난 뒤 tail_s초 더 보냅니다.
+    질의 지연 시간을 적재 전/적재 중/적재 후로 나누어 반환합니다.
+    """
+    from src.core.worker_pool import dispatch_pipeline
+
+    samples, errors = [], 0
+    stop = asyncio.Event()
+    counter = 0
+
+    async def client(client_index):
+        nonlocal errors, counter
+        while not stop.is_set():
+            counter += 1
+            message = _messages(1, offset=counter)[0]
+            start_time = time.perf_counter()
+            try:
+                await dispatch_pipeline(message, QUERY_FOLDER)
+                samples.append((start_time, time.perf_counter()))
+            except Exception as e:
+                errors += 1
+                print(f"질의 실패: {e}")
+
+    clients = [asyncio.create_task(client(index)) for index in range(concurrency)]
+    await asyncio.sleep(lead_s)
+    ingestion_start = time.perf_counter()
+    await start_ingestion()
+    await wait_ingestion()
+    ingestion_end = time.perf_counter()
+    await asyncio.sleep(tail_s)
+    stop.set()
+    await asyncio.gather(*clients)
+
+    phases = {"before": [], "during": [], "after": []}
+    for start, end in samples:
+        if end <= ingestion_start:
+            phases["before"].append(end - start)
+        elif start >= ingestion_end:
+            phases["after"].append(end - start)
+        else:
+            phases["during"].append(end - start)
+    return {
+        "ingestion_s": round(ingestion_end - ingestion_start, 4),
+        "errors": errors,
+        **{f"{phase}_latency": _summarize(values) for phase, values in phases.items()},
+    }
+
+
+async def _wait_for_new_version(index, previous, timeout_s=600.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if index.current_version() not in (None, previous):
+            return index.current_version()
+        await asyncio.sleep(0.1)
+    raise TimeoutError("적재 작업자가 새 버전을 게시하지 않았습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질의 작업자 프로세스 수에 따른 처리량과 적재 중 질의 지연을 측정합니다.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4], help="비교할 질의 작업자 수 (0은 단일 프로세스)")
+    parser.add_argument("--worker-concurrency", type=int, default=4, help="작업자 하나가 동시에 실행할 파이프라인 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 보내는 질의 수")
+    parser.add_argument("--queries", type=int, default=48, help="throughput 시나리오의 질의 수")
+    parser.add_argument("--refresh-copies", type=int, default=6, help="다시 적재할 폴더의 문서 묶음 반복 수 (적재 작업량)")
+    parser.add_argument("--lead-s", type=float, default=2.0, help="ingestion 시나리오에서 적재 전에 질의만 보내는 시간 (초)")
+    parser.add_argument("--tail-s", type=float, default=2.0, help="ingestion 시나리오에서 적재 후에 더 보내는 시간 (초)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="가짜 LLM 응답 지연 중앙값 (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    fake_settings = {"llm_latency_ms": args.llm_latency_ms, "seed": args.seed}
+    # 모듈과 파이프라인의 진행 메시지가 결과 JSON과 섞이지 않도록 표준 오류로 보냅니다.
+    with contextlib.redirect_stdout(sys.stderr):
+        work_dir = fakes.configure_offline_environment()
+        corpus_dir = os.path.join(work_dir, "corpus")
+        fakes.write_fixture_corpus(os.path.join(corpus_dir, QUERY_FOLDER), 20, 1, args.seed)
+        fakes.write_fixture_corpus(os.path.join(corpus_dir, REFRESH_FOLDER), 60, args.refresh_copies, args.seed)
+        fakes.install_fakes(corpus_dir, **fake_settings)
+
+        from src.agents.document_manager import get_document_manager
+        from src.core import worker_pool
+        from src.utils.vector_db_manager import _get_flat_index
+
+        manager = get_document_manager()
+        # 작업자가 시작하기 전에 질의 폴더를 적재해 둡니다. (모든 시나리오가 같은 인덱스 버전에서 시작)
+        manager.ingest_folder(QUERY_FOLDER)
+        initializer = functools.partial(_worker_setup, corpus_dir, fake_settings)
+        results = {"throughput": {}, "ingestion": {}}
+
+        for workers in args.workers:
+            label = f"workers_{workers}"
+            if workers:
+                print(f"질의 작업자 {workers}개를 시작합니다...")
+                worker_pool.start_worker_pool(workers, args.worker_concurrency, initializer)
+            try:
+                # 작업자마다 모듈 가져오기와 첫 실행 비용을 측정에서 제외합니다.
+                asyncio.run(_run_batch(_messages(max(args.concurrency, workers * 2)), QUERY_FOLDER, args.concurrency))
+                print(f"throughput ({label}): {args.queries}건 실행 중...")
+                latencies, errors, wall = asyncio.run(_run_batch(_messages(args.queries), QUERY_FOLDER, args.concurrency))
+                results["throughput"][label] = {
+                    "queries": args.queries,
+                    "errors": errors,
+                    "wall_s": round(wall, 4),
+                    "throughput_qps": round(len(latencies) / wall, 3) if wall else None,
+                    "latency": _summarize(latencies),
+                }
+
+                # ingestion 시나리오는 단일 프로세스와 첫 번째 작업자 배치에서만 실행합니다.
+                if workers and set(results["ingestion"]) - {"workers_0"}:
+                    continue
+                index = _get_flat_index(f"regulations_{REFRESH_FOLDER}")
+                previous = index.current_version()
+
+                if workers:
+                    async def start_ingestion():
+                        worker_pool.get_worker_pool().request_ingestion(REFRESH_FOLDER, refresh=True)
+
+                    async def wait_ingestion():
+                        await _wait_for_new_version(index, previous)
+                else:
+                    pending = {}
+
+                    async def start_ingestion():
+                        loop = asyncio.get_running_loop()
+                        pending["task"] = loop.run_in_executor(
+                            None, functools.partial(manager.ingest_folder, REFRESH_FOLDER, replace=True)
+                        )
+
+                    async def wait_ingestion():
+                        await pending["task"]
+
+                print(f"ingestion ({label}): 질의를 보내는 동안 '{REFRESH_FOLDER}'를 다시 적재합니다...")
+                scenario = asyncio.run(
+                    _run_during_ingestion(start_ingestion, wait_ingestion, args.concurrency, args.lead_s, args.tail_s)
+                )
+                scenario["published_version"] = index.current_version()
+                scenario["version_changed"] = index.current_version() != previous
+                results["ingestion"][label] = scenario
+            finally:
+                worker_pool.stop_worker_pool()
+
+    report = {
+        "benchmark": "workers",
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            key: getattr(args, key)
+            for key in (
+                "workers", "worker_concurrency", "concurrency", "queries", "refresh_copies",
+                "lead_s", "tail_s", "llm_latency_ms", "seed",
+            )
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
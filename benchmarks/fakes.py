@@ -0,0 +1,477 @@
+"""
+오프라인 벤치마크용 대체 구현(stand-in) 모음
+
+Gemini, Google Drive, Notion 없이 파이프라인 전체를 실행할 수 있도록 다음을 제공합니다.
+  - FakeChatModel: 지연 시간과 출력 토큰 수를 조절할 수 있는 가짜 채팅 모델 (with_structured_output 지원)
+  - FakeEmbeddings: 호출 지연을 흉내 내는 결정적 해싱 임베딩
+  - FakeDriveService: 로컬 디렉터리의 PDF를 Drive API 형식(files().list, files().get_media)으로 제공
+  - FakeNotionClient: pages.create / blocks.children.append 호출만 기록하는 가짜 Notion 클라이언트
+  - write_fixture_corpus: 텍스트 PDF와 스캔(이미지) PDF로 된 결정적 규정 문서 묶음 생성
+
+사용 순서: configure_offline_environment() → install_fakes(...) → 파이프라인 실행
+(설정은 src.config를 가져올 때 환경 변수에서 읽고, 에이전트와 모델(get_component), Drive 서비스는 처음 사용할 때 만들기 때문입니다)
+"""
+
+import io
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, List, Literal, get_args, get_origin
+
+import httplib2
+from googleapiclient.http import HttpRequest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+# ----- 환경 설정 -----
+
+OFFLINE_ENVIRONMENT = {
+    "GEMINI_API_KEY": "offline-benchmark",
+    "NOTION_API_KEY": "offline-benchmark",
+    "NOTION_DATABASE_ID": "https://www.notion.so/offline-0123456789abcdef0123456789abcdef",
+    "GOOGLE_DRIVE_FOLDER_ID": "offline-folder",
+    "VECTOR_STORE_BACKEND": "flat",
+    "EMBEDDING_CACHE_PATH": "",
+    "CHECKPOINT_DB_PATH": "",
+    "TRACING_ENABLED": "false",
+    "PROFILE_REQUESTS": "false",
+    "HEDGE_REQUESTS": "false",
+}
+
+
+def configure_offline_environment(work_dir=None):
+    """
+    src.config를 가져오기 전에 오프라인 실행용 환경 변수를 설정합니다.
+    .env보다 우선하도록 os.environ에 직접 쓰며, 벡터 인덱스는 work_dir(없으면 임시 디렉터리)에 만듭니다.
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix="offline-bench-")
+    os.environ.update(OFFLINE_ENVIRONMENT)
+    os.environ["FLAT_INDEX_PATH"] = os.path.join(work_dir, "flat_index")
+    return work_dir
+
+
+# ----- 가짜 채팅 모델 -----
+
+ROUTER_PROMPT_MARKER = "'relevant'"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    응답 전에 로그정규 분포(중앙값 latency_ms, sigma jitter)만큼 지연하고 output_tokens 길이의 응답을 돌려주는 채팅 모델.
+    응답에 usage_metadata를 채우므로 토큰 추적과 지표 콜백이 실제 모델과 같이 동작합니다.
+    """
+
+    model: str = "fake-chat"
+    temperature: float = 0.0
+    latency_ms: float = 0.0
+    jitter: float = 0.0
+    output_tokens: int = 200
+    seed: int = 0
+
+    _random: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self):
+        return {"model": self.model, "latency_ms": self.latency_ms, "output_tokens": self.output_tokens}
+
+    def _sleep(self):
+        if self.latency_ms <= 0:
+            return
+        with self._lock:
+            factor = self._random.lognormvariate(0, self.jitter) if self.jitter else 1.0
+        time.sleep(self.latency_ms / 1000 * factor)
+
+    def _respond(self, prompt):
+        # 질문 라우터 프롬프트에는 항상 relevant로 답해 전체 분석 경로를 실행합니다.
+        if ROUTER_PROMPT_MARKER in prompt:
+            return "relevant"
+        words = ["검토", "결과", "규정", "조항에", "따라", "집행", "가능", "여부를", "판단합니다."]
+        return " ".join(words[i % len(words)] for i in range(self.output_tokens))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(message.content) for message in messages)
+        self._sleep()
+        text = self._respond(prompt)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": len(prompt.split()),
+                "output_tokens": len(text.split()),
+                "total_tokens": len(prompt.split()) + len(text.split()),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model})
+
+    def with_structured_output(self, schema, **kwargs):
+        """schema(pydantic 모델) 인스턴스를 반환하는 Runnable. Literal 필드는 프롬프트 해시로 결정적으로 고릅니다."""
+        def structured(value):
+            message = self.invoke(value)
+            prompt = value.to_string() if hasattr(value, "to_string") else str(value)
+            return _build_structured(schema, prompt, message.content)
+        return RunnableLambda(structured)
+
+
+def _build_structured(schema, prompt, text):
+    chooser = random.Random(f"{schema.__name__}:{prompt}")
+    values = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        origin = get_origin(annotation)
+        if origin is Literal:
+            values[name] = chooser.choice(get_args(annotation))
+        elif origin in (list, List):
+            values[name] = []
+        else:
+            values[name] = text[:300]
+    return schema(**values)
+
+
+def fake_chat_model_factory(latency_ms=0.0, jitter=0.0, output_tokens=200, seed=0):
+    """src.utils.llm_factory.set_chat_model_factory에 넘길 FakeChatModel 생성 함수를 반환합니다."""
+    def factory(model, temperature, callbacks=None):
+        return FakeChatModel(
+            model=f"fake-{model}",
+            temperature=temperature,
+            latency_ms=latency_ms,
+            jitter=jitter,
+            output_tokens=output_tokens,
+            seed=seed,
+            callbacks=callbacks,
+        )
+    return factory
+
+
+# ----- 가짜 임베딩 -----
+
+def _fake_embeddings_class():
+    # src 모듈은 configure_offline_environment() 이후에 가져와야 하므로 클래스 정의를 늦춥니다.
+    from src.utils.embedding_models import HashingEmbeddings
+
+    class FakeEmbeddings(HashingEmbeddings):
+        """호출마다 latency_ms, 텍스트마다 per_text_ms만큼 지연하는 결정적 해싱 임베딩 (임베딩 API 흉내)"""
+
+        def __init__(self, dimension=256, latency_ms=0.0, per_text_ms=0.0):
+            super().__init__(dimension)
+            self.latency_ms = latency_ms
+            self.per_text_ms = per_text_ms
+            self.calls = 0
+
+        def _sleep(self, count):
+            self.calls += 1
+            delay_ms = self.latency_ms + self.per_text_ms * count
+            if delay_ms > 0:
+                time.sleep(delay_ms / 1000)
+
+        def embed_documents(self, texts):
+            self._sleep(len(texts))
+            return super().embed_documents(texts)
+
+        def embed_query(self, text):
+            self._sleep(1)
+            return super().embed_query(text)
+
+    return FakeEmbeddings
+
+
+def create_fake_embeddings(dimension=256, latency_ms=0.0, per_text_ms=0.0):
+    return _fake_embeddings_class()(dimension, latency_ms, per_text_ms)
+
+
+# ----- 가짜 Google Drive -----
+
+class _FakeDriveHttp:
+    """MediaIoBaseDownload가 사용하는 http 객체. Range 요청에 맞춰 로컬 파일 내용을 206 응답으로 돌려줍니다."""
+
+    def __init__(self, path, latency_ms, stats):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.stats = stats
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        start, end = 0, len(data) - 1
+        match = re.match(r"bytes=(\d+)-(\d+)", (headers or {}).get("range", ""))
+        if match:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+        content = data[start:end + 1]
+        self.stats["download_requests"] += 1
+        self.stats["bytes"] += len(content)
+        return httplib2.Response({"status": 206, "content-range": f"bytes {start}-{end}/{len(data)}"}), content
+
+
+class _FakeExecutable:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self, num_retries=0):
+        return self._result
+
+
+class _FakeDriveFiles:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, q="", fields=None, **kwargs):
+        match = re.search(r"'([^']+)' in parents", q)
+        folder_dir = self._service.folder_dir(match.group(1) if match else None)
+        self._service.stats["list_requests"] += 1
+        files = [
+            {"id": os.path.relpath(os.path.join(folder_dir, name), self._service.root_dir),
+             "name": name, "mimeType": "application/pdf"}
+            for name in sorted(os.listdir(folder_dir)) if name.lower().endswith(".pdf")
+        ]
+        return _FakeExecutable({"files": files})
+
+    def get_media(self, fileId, **kwargs):
+        path = os.path.join(self._service.root_dir, fileId)
+        http = _FakeDriveHttp(path, self._service.latency_ms, self._service.stats)
+        return HttpRequest(http, lambda response, content: content, f"fake-drive://{fileId}")
+
+
+class FakeDriveService:
+    """
+    로컬 디렉터리를 Google Drive 폴더처럼 제공하는 가짜 Drive v3 서비스.
+    root_dir 아래에 폴더 ID 이름의 하위 디렉터리가 있으면 그 디렉터리를, 없으면 root_dir을 폴더 내용으로 사용합니다.
+    """
+
+    def __init__(self, root_dir, latency_ms=0.0):
+        self.root_dir = root_dir
+        self.latency_ms = latency_ms
+        self.stats = {"list_requests": 0, "download_requests": 0, "bytes": 0}
+
+    def folder_dir(self, folder_id):
+        candidate = os.path.join(self.root_dir, folder_id or "")
+        return candidate if folder_id and os.path.isdir(candidate) else self.root_dir
+
+    def files(self):
+        return _FakeDriveFiles(self)
+
+
+# ----- 가짜 Notion -----
+
+class _FakeNotionEndpoint:
+    def __init__(self, client, operation, result_factory):
+        self._client = client
+        self._operation = operation
+        self._result_factory = result_factory
+
+    def __call__(self, **kwargs):
+        if self._client.latency_ms > 0:
+            time.sleep(self._client.latency_ms / 1000)
+        with self._client.lock:
+            self._client.calls.append((self._operation, kwargs))
+        return self._result_factory(**kwargs)
+
+
+class FakeNotionClient:
+    """Notion 클라이언트 대신 호출 내용만 기록하고 latency_ms만큼 지연하는 가짜 클라이언트"""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.calls = []
+        self.lock = threading.Lock()
+        self.pages = type("Pages", (), {})()
+        self.pages.create = _FakeNotionEndpoint(self, "pages.create", lambda **kwargs: {"id": str(uuid.uuid4())})
+        self.pages.update = _FakeNotionEndpoint(self, "pages.update", lambda **kwargs: {"id": kwargs["page_id"]})
+        self.blocks = type("Blocks", (), {})()
+        self.blocks.update = _FakeNotionEndpoint(self, "blocks.update", lambda **kwargs: {"id": kwargs["block_id"]})
+        self.blocks.delete = _FakeNotionEndpoint(self, "blocks.delete", lambda **kwargs: {"id": kwargs["block_id"]})
+        self.blocks.children = type("Children", (), {})()
+        self.blocks.children.append = _FakeNotionEndpoint(
+            self, "blocks.children.append",
+            lambda **kwargs: {"results": [{"id": str(uuid.uuid4()), **child} for child in kwargs.get("children", [])]},
+        )
+
+    def count(self, operation):
+        with self.lock:
+            return sum(1 for name, _ in self.calls if name == operation)
+
+
+# ----- 문서 묶음 생성 -----
+
+_ARTICLE_TOPICS = [
+    ("회식비", "학생회비로 회식비를 집행할 수 없으며 예외적으로 중앙운영위원회 의결을 거친 경우에 한한다."),
+    ("예산 변경", "예산을 변경하려면 중앙운영위원회 의결 후 전체학생대표자회의 승인을 받아야 한다."),
+    ("영수증", "모든 지출은 영수증과 지출결의서를 갖추어야 하며 누락 시 감사 지적 대상이 된다."),
+    ("선거 비용", "선거 비용은 선거관리위원회가 정한 한도 안에서 지원하며 초과분은 후보자가 부담한다."),
+    ("동아리 지원금", "동아리 지원금 사용 내역은 분기마다 공개하며 미공개 시 다음 분기 지원을 보류한다."),
+    ("감사 처분", "감사 결과 위반이 확인되면 경고, 시정 요구, 징계 요구 중 하나의 처분을 한다."),
+    ("회계 장부", "회계 담당자는 회계 장부를 매월 정리하고 감사위원회의 열람 요청에 응해야 한다."),
+    ("비품 구매", "일정 금액 이상의 비품 구매는 견적서 두 개 이상을 비교한 뒤 집행한다."),
+]
+
+FIXTURE_DOCUMENTS = [
+    ("총학생회 회칙", "text"),
+    ("재정·회계 세칙", "text"),
+    ("선거관리 세칙", "text"),
+    ("동아리연합회 세칙", "text"),
+    ("2024 정기감사 보고서", "text"),
+    ("2023 정기감사 보고서(스캔본)", "scanned"),
+]
+
+
+def fixture_queries():
+    """문서 묶음의 조항 주제로 만든 질의 목록 (tune_retrieval.py 질의 파일 형식)"""
+    return [{"query": f"{topic} 관련 규정은 어떻게 되나요?"} for topic, _ in _ARTICLE_TOPICS]
+
+
+def _document_lines(title, articles, seed):
+    chooser = random.Random(f"{title}:{seed}")
+    lines = [title, ""]
+    for number in range(1, articles + 1):
+        topic, sentence = chooser.choice(_ARTICLE_TOPICS)
+        lines.append(f"제{number}조 ({topic}) {sentence}")
+        lines.append(f"② {topic}에 관한 세부 사항은 {title}의 시행 규칙으로 정한다.")
+    return lines
+
+
+def _pdf_object_bytes(objects):
+    """(번호 순서대로 정렬된) PDF 객체 본문 목록으로 교차 참조 표를 갖춘 PDF 파일을 만듭니다."""
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+    )
+    return output.getvalue()
+
+
+def _stream(data):
+    return f"<< /Length {len(data)} >>\nstream\n".encode("ascii") + data + b"\nendstream"
+
+
+def make_text_pdf(lines, lines_per_page=40):
+    """
+    텍스트 계층이 있는 PDF를 만듭니다. 한글을 그대로 추출할 수 있도록 유니코드 코드 포인트를 CID로 쓰고
+    ToUnicode CMap을 붙입니다. (글꼴은 포함하지 않으므로 뷰어 표시는 목적이 아닙니다)
+    """
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    high_bytes = sorted({ord(char) >> 8 for line in lines for char in line} | {0})
+    ranges = "\n".join(f"<{high:02X}00> <{high:02X}FF> <{high:02X}00>" for high in high_bytes)
+    cmap = (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        f"{len(high_bytes)} beginbfrange\n{ranges}\nendbfrange\n"
+        "endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+    ).encode("ascii")
+
+    # 1: 카탈로그, 2: 페이지 트리, 3: Type0 글꼴, 4: CID 글꼴, 5: ToUnicode, 6부터: 페이지와 내용 스트림
+    page_numbers = [6 + 2 * index for index in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{n} 0 R' for n in page_numbers)}] /Count {len(pages)} >>".encode("ascii"),
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /Fixture /Encoding /Identity-H "
+        b"/DescendantFonts [4 0 R] /ToUnicode 5 0 R >>",
+        b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Fixture "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> /DW 1000 >>",
+        _stream(cmap),
+    ]
+    for index, page_lines in enumerate(pages):
+        commands = ["BT", "/F1 10 Tf", "14 TL", "40 800 Td"]
+        for line in page_lines:
+            commands.append(f"<{''.join(f'{ord(char):04X}' for char in line)}> Tj T*")
+        commands.append("ET")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_numbers[index] + 1} 0 R >>".encode("ascii")
+        )
+        objects.append(_stream("\n".join(commands).encode("ascii")))
+    return _pdf_object_bytes(objects)
+
+
+def make_scanned_pdf(lines, lines_per_page=40, dpi=100):
+    """
+    텍스트 계층이 없는 이미지 PDF(스캔본)를 만듭니다. 텍스트 추출이 실패하므로 OCR 경로를 거칩니다.
+    기본 비트맵 글꼴은 한글을 그리지 못하므로 글자 모양 대신 줄 단위 막대를 그려 페이지 크기와 밀도만 흉내 냅니다.
+    """
+    from PIL import Image, ImageDraw
+
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    images = []
+    for page_lines in pages:
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(page_lines):
+            top = 40 + row * 24
+            draw.rectangle([40, top, 40 + min(width - 80, len(line) * 9), top + 12], fill=40)
+        images.append(image)
+    output = io.BytesIO()
+    images[0].save(output, format="PDF", resolution=dpi, save_all=True, append_images=images[1:])
+    return output.getvalue()
+
+
+def write_fixture_corpus(directory, articles_per_document=60, copies=1, seed=0):
+    """
+    directory에 결정적인 규정 문서 PDF 묶음을 씁니다. copies만큼 번호를 붙여 반복하여 적재 규모를 키웁니다.
+
+    Returns:
+        list: 생성한 파일 정보 목록 ({"name", "kind", "bytes"}).
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for copy_index in range(copies):
+        for title, kind in FIXTURE_DOCUMENTS:
+            name = f"{title}_{copy_index + 1:02d}.pdf"
+            lines = _document_lines(title, articles_per_document, f"{seed}:{copy_index}")
+            data = make_text_pdf(lines) if kind == "text" else make_scanned_pdf(lines)
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(data)
+            written.append({"name": name, "kind": kind, "bytes": len(data)})
+    return written
+
+
+# ----- 설치 -----
+
+def install_fakes(corpus_dir, llm_latency_ms=0.0, llm_jitter=0.0, llm_output_tokens=200,
+                  embedding_latency_ms=0.0, embedding_per_text_ms=0.0, drive_latency_ms=0.0,
+                  notion_latency_ms=0.0, seed=0):
+    """
+    모든 외부 의존성을 대체 구현으로 바꿉니다. configure_offline_environment() 이후,
+    파이프라인을 처음 실행하기 전(에이전트와 모델이 만들어지기 전)에 호출해야 합니다.
+
+    Returns:
+        dict: 설치한 대체 구현 ({"embeddings", "drive", "notion"}).
+    """
+    from src.utils import vector_db_manager
+    from src.utils.google_drive_handler import set_google_drive_service
+    from src.utils.llm_factory import set_chat_model_factory
+    from src.utils.notion_handler import set_notion_client
+
+    set_chat_model_factory(fake_chat_model_factory(llm_latency_ms, llm_jitter, llm_output_tokens, seed))
+    embeddings = create_fake_embeddings(latency_ms=embedding_latency_ms, per_text_ms=embedding_per_text_ms)
+    vector_db_manager.set_embeddings(embeddings)
+    drive = FakeDriveService(corpus_dir, latency_ms=drive_latency_ms)
+    set_google_drive_service(drive)
+    notion = FakeNotionClient(latency_ms=notion_latency_ms)
+    set_notion_client(notion)
+    return {"embeddings": embeddings, "drive": drive, "notion": notion}
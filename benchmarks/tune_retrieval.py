@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+검색 파라미터 튜닝 하네스: recall / MRR vs. 지연 시간
+
+정답이 표시된 질의 세트를 사용하여 k, chunk_size, chunk_overlap과 ChromaDB HNSW 파라미터
+(hnsw:M, construction_ef, search_ef)를 조합별로 평가하고 다음 지표를 JSON 보고서로 출력합니다.
+
+- recall@k: 기대 출처(파일명 + 조항) 중 상위 k개 안에서 찾은 비율의 평균
+- MRR: 첫 번째 정답 청크 순위의 역수 평균
+- 검색 지연 시간 p50/p95 (질의 임베딩은 미리 계산하여 제외)
+- 인덱스 디스크 크기
+- 프롬프트 토큰 비용: 검색된 청크를 프롬프트에 넣을 때의 추정 토큰 수 평균
+
+임베딩은 기본적으로 네트워크 없이 동작하는 해싱 임베딩을 사용하며,
+--embedding gemini를 지정하면 디스크 캐시를 거친 Gemini 임베딩을 사용하므로 재실행 시 API를 호출하지 않습니다.
+
+질의 파일 형식 (JSON):
+    [
+      {"query": "학생회비로 회식비를 집행할 수 있나요?",
+       "expected": [{"source": "재정·회계 세칙.pdf", "article": "제10조"}]}
+    ]
+
+사용 예:
+    python benchmarks/tune_retrieval.py --documents ./docs --queries benchmarks/data/retrieval_queries.example.json \\
+        --k 3,5,8 --chunk-size 500,1000 --chunk-overlap 100,200 --hnsw-m 16,32 --search-ef 10,50 \\
+        --output reports/retrieval_tuning.json
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.document_types import is_supported_document  # noqa: E402
+from src.utils.embedding_models import HashingEmbeddings, with_disk_cache  # noqa: E402
+from src.utils.flat_vector_store import FlatVectorStore  # noqa: E402
+from src.utils.tokens import estimate_tokens  # noqa: E402
+from src.utils.vector_db_manager import (  # noqa: E402
+    EMBEDDING_MODEL,
+    _split_documents_into_chunks,
+    build_hnsw_metadata,
+)
+
+REPORT_VERSION = 1
+
+
+# ----- 입력 준비 -----
+
+def load_documents(directory):
+    """디렉터리의 PDF/텍스트 파일을 ingestion과 같은 키워드 필터로 읽어옵니다."""
+    documents = []
+    for file_name in sorted(os.listdir(directory)):
+        if not is_supported_document(file_name):
+            continue
+        path = os.path.join(directory, file_name)
+        if file_name.lower().endswith(".pdf"):
+            from src.utils.google_drive_handler import extract_text_from_pdf
+            with open(path, "rb") as f:
+                text = extract_text_from_pdf(f.read())
+        elif file_name.lower().endswith((".txt", ".md")):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        else:
+            continue
+        if text:
+            documents.append({"file_name": file_name, "text_content": text})
+    return documents
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_embeddings(kind, cache_path):
+    """평가에 사용할 임베딩 모델을 생성합니다."""
+    if kind == "hashing":
+        return HashingEmbeddings(), "hashing-256"
+
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from src.config import GEMINI_API_KEY
+
+    base = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=GEMINI_API_KEY)
+    return with_disk_cache(base, cache_path, namespace=EMBEDDING_MODEL), EMBEDDING_MODEL
+
+
+# ----- 정답 판정 -----
+
+def _compact(text):
+    return "".join(text.split())
+
+
+def is_relevant(chunk_text, chunk_metadata, expected):
+    """청크가 기대 출처(파일명, 선택적으로 조항 번호)와 일치하는지 판정합니다."""
+    source = chunk_metadata.get("source") or chunk_metadata.get("source_file")
+    if expected.get("source") and source != expected["source"]:
+        return False
+    article = expected.get("article")
+    return not article or _compact(article) in _compact(chunk_text)
+
+
+def score_query(retrieved, expected_items, k):
+    """
+    한 질의의 검색 결과를 평가합니다.
+
+    Args:
+        retrieved (list): (텍스트, 메타데이터) 목록 (순위 순).
+        expected_items (list): 기대 출처 목록.
+
+    Returns:
+        tuple: (recall@k, reciprocal rank)
+    """
+    top = retrieved[:k]
+    found = sum(
+        1 for expected in expected_items
+        if any(is_relevant(text, metadata, expected) for text, metadata in top)
+    )
+    recall = found / len(expected_items) if expected_items else 0.0
+
+    reciprocal_rank = 0.0
+    for rank, (text, metadata) in enumerate(top, start=1):
+        if any(is_relevant(text, metadata, expected) for expected in expected_items):
+            reciprocal_rank = 1.0 / rank
+            break
+    return recall, reciprocal_rank
+
+
+# ----- 인덱스 구축과 검색 -----
+
+def _dir_size_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def build_index(backend, path, chunks, chunk_embeddings, hnsw_metadata):
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [dict(chunk.metadata) for chunk in chunks]
+    ids = [str(i) for i in range(len(chunks))]
+
+    if backend == "flat":
+        store = FlatVectorStore(path)
+        store.add_embeddings(texts, chunk_embeddings, metadatas=metadatas, ids=ids)
+        return store
+
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection("tuning", metadata=hnsw_metadata)
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=ids[start:end],
+            documents=texts[start:end],
+            metadatas=metadatas[start:end],
+            embeddings=chunk_embeddings[start:end].tolist(),
+        )
+    return collection
+
+
+def search_index(backend, index, query_embedding, k):
+    """인덱스를 검색하여 (텍스트, 메타데이터) 목록을 반환합니다."""
+    if backend == "flat":
+        results = index.batch_similarity_search_by_vector([query_embedding], k=k)[0]
+        return [(doc.page_content, doc.metadata) for doc, _ in results]
+
+    results = index.query(query_embeddings=[np.asarray(query_embedding, dtype=np.float32).tolist()], n_results=k)
+    return list(zip(results["documents"][0], results["metadatas"][0]))
+
+
+def evaluate_configuration(backend, index, query_embeddings, queries, k):
+    recalls, reciprocal_ranks, latencies, prompt_tokens = [], [], [], []
+    search_index(backend, index, query_embeddings[0], k)  # 예열 (첫 검색의 인덱스 로딩 비용 제외)
+    for query, query_embedding in zip(queries, query_embeddings):
+        start = time.perf_counter()
+        retrieved = search_index(backend, index, query_embedding, k)
+        latencies.append(time.perf_counter() - start)
+
+        recall, reciprocal_rank = score_query(retrieved, query["expected"], k)
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+        prompt_tokens.append(sum(estimate_tokens(text) for text, _ in retrieved))
+
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        "recall_at_k": float(np.mean(recalls)),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "prompt_tokens_mean": float(np.mean(prompt_tokens)),
+    }
+
+
+# ----- 스윕 -----
+
+def run_sweep(documents, queries, embeddings, grid, backends):
+    results = []
+    query_embeddings = np.asarray(embeddings.embed_documents([q["query"] for q in queries]), dtype=np.float32)
+
+    for chunk_size, chunk_overlap in itertools.product(grid["chunk_size"], grid["chunk_overlap"]):
+        if chunk_overlap >= chunk_size:
+            continue
+        chunks = _split_documents_into_chunks(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        chunk_embeddings = np.asarray(
+            embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32
+        )
+
+        index_settings = []
+        if "chroma" in backends:
+            for m, construction_ef, search_ef in itertools.product(
+                grid["hnsw_m"], grid["construction_ef"], grid["search_ef"]
+            ):
+                index_settings.append(("chroma", {"hnsw_m": m, "construction_ef": construction_ef, "search_ef": search_ef}))
+        if "flat" in backends:
+            index_settings.append(("flat", {}))
+
+        for backend, hnsw in index_settings:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, "index")
+                hnsw_metadata = build_hnsw_metadata(
+                    hnsw.get("hnsw_m"), hnsw.get("construction_ef"), hnsw.get("search_ef")
+                )
+                start = time.perf_counter()
+                index = build_index(backend, path, chunks, chunk_embeddings, hnsw_metadata)
+                build_s = time.perf_counter() - start
+                index_bytes = _dir_size_bytes(path)
+
+                for k in grid["k"]:
+                    entry = {
+                        "backend": backend,
+                        "k": k,
+                        "chunk_size": chunk_size,
+                        "chunk_overlap": chunk_overlap,
+                        **hnsw,
+                        "chunk_count": len(chunks),
+                        "index_bytes": index_bytes,
+                        "build_s": build_s,
+                    }
+                    entry.update(evaluate_configuration(backend, index, query_embeddings, queries, k))
+                    results.append(entry)
+                    print(
+                        f"[{backend}] k={k} size={chunk_size} overlap={chunk_overlap} {hnsw} "
+                        f"recall={entry['recall_at_k']:.3f} mrr={entry['mrr']:.3f} "
+                        f"p95={entry['latency_p95_ms']:.2f}ms tokens={entry['prompt_tokens_mean']:.0f}",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _dataset_fingerprint(documents, queries):
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc["file_name"].encode("utf-8"))
+        digest.update(doc["text_content"].encode("utf-8"))
+    digest.update(json.dumps(queries, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def _optional_int_list(value):
+    # "none"은 ChromaDB 기본값을 의미합니다.
+    return [None if item == "none" else int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 파라미터 조합별 recall/MRR/지연 시간을 평가합니다.")
+    parser.add_argument("--documents", required=True, help="평가용 규정 문서 디렉터리 (.pdf, .txt, .md)")
+    parser.add_argument("--queries", required=True, help="정답이 표시된 질의 JSON 파일")
+    parser.add_argument("--k", default="3,5,8")
+    parser.add_argument("--chunk-size", default="1000")
+    parser.add_argument("--chunk-overlap", default="200")
+    parser.add_argument("--hnsw-m", default="none", help="쉼표 구분, 'none'은 기본값")
+    parser.add_argument("--construction-ef", default="none")
+    parser.add_argument("--search-ef", default="none")
+    parser.add_argument("--backends", default="chroma", help="평가할 백엔드 (chroma, flat)")
+    parser.add_argument("--embedding", choices=["hashing", "gemini"], default="hashing")
+    parser.add_argument("--embedding-cache", default="./.embedding_cache", help="Gemini 임베딩 캐시 디렉터리")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.documents)
+    queries = load_queries(args.queries)
+    if not documents or not queries:
+        parser.error("평가할 문서 또는 질의가 없습니다.")
+
+    embeddings, embedding_name = create_embeddings(args.embedding, args.embedding_cache)
+    grid = {
+        "k": _int_list(args.k),
+        "chunk_size": _int_list(args.chunk_size),
+        "chunk_overlap": _int_list(args.chunk_overlap),
+        "hnsw_m": _optional_int_list(args.hnsw_m),
+        "construction_ef": _optional_int_list(args.construction_ef),
+        "search_ef": _optional_int_list(args.search_ef),
+    }
+
+    results = run_sweep(documents, queries, embeddings, grid, args.backends.split(","))
+    report = {
+        "report": "retrieval_tuning",
+        "report_version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "embedding_model": embedding_name,
+        "dataset_sha256": _dataset_fingerprint(documents, queries),
+        "document_count": len(documents),
+        "query_count": len(queries),
+        "grid": grid,
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,32 @@
 """
 
 import gradio as gr
+import uvicorn
 import asyncio
 import time
 import logging
 from typing import List, Tuple, Optional, Dict, Any
 
-from src.core.langgraph_pipeline import run_agent_pipeline
-from src.config import GOOGLE_DRIVE_FOLDER_ID, ConfigurationError
+from src.core.http_api import create_api_app
+from src.core.worker_pool import dispatch_pipeline, start_worker_pool, stop_worker_pool
+from src.config import METRICS_HOST, METRICS_PORT, QUERY_WORKERS, ConfigurationError, require_setting
+from src.utils.admission import ServerBusy, run_admitted
+from src.utils.answer_cache import lookup_answer, store_answer
+from src.utils.metrics import start_metrics_server
+from src.utils.request_log import record_request
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# 예시 질문 (캐시 예열에도 사용합니다)
+EXAMPLE_QUERIES = [
+    "학생회비로 회식비 사용이 가능한가요?",
+    "동아리 지원금 사용 내역을 공개해야 하는 의무가 있나요?",
+    "학생회 임원 선거에서 선거 비용 지원 한도는 얼마인가요?",
+    "예산 변경 시 필요한 승인 절차는 무엇인가요?",
+    "감사에서 어떤 처분을 받을 수 있는지 궁금합니다",
+]
+
 
 class QueryValidator:
     """질의 검증을 담당하는 클래스"""
@@ -53,6 +68,24 @@ class ResultProcessor:
         """최종 권고안을 반환합니다."""
         recommendation = self.final_state.get("final_recommendation", "").strip()
         return recommendation or "⚠️ 최종 권고안을 생성하지 못했습니다."
+    
+    def get_degraded_nodes(self) -> List[str]:
+        """제한 시간을 넘겨 간이 결과로 대체된 단계 목록을 반환합니다."""
+        return self.final_state.get("degraded_nodes") or []
+    
+    def get_profile_files(self) -> List[str]:
+        """프로파일링한 요청이면 저장된 프로파일 파일 경로 목록을 반환합니다."""
+        return self.final_state.get("profile_files") or []
+
+
+# 제한 시간 초과 안내에 표시할 단계 이름
+NODE_DISPLAY_NAMES = {
+    "route_query": "질문 분류",
+    "irrelevant_query_branch": "일반 답변",
+    "run_reviewer": "규정 검토",
+    "run_auditor": "감사 분석",
+    "run_coordinator": "종합 권고",
+}
 
 
 class ResponseFormatter:
@@ -60,9 +93,24 @@ class ResponseFormatter:
     
     @staticmethod
     def format_success_response(reviewer_analysis: str, auditor_analysis: str, 
-                              final_recommendation: str, processing_time: float) -> str:
-        """성공적인 분석 결과를 포맷팅합니다."""
-        return f"""## 📋 **규정 검토 결과**
+                              final_recommendation: str, processing_time: float,
+                              degraded_nodes: Optional[List[str]] = None,
+                              profile_files: Optional[List[str]] = None,
+                              cached: bool = False) -> str:
+        """
+        성공적인 분석 결과를 포맷팅합니다. 제한 시간을 넘긴 단계가 있으면 상단에 안내를 표시하고,
+        프로파일링한 요청이면 하단에 프로파일 파일 경로를 표시합니다. 답변 캐시에서 가져온 결과이면 처리 시간 옆에 표시합니다.
+        """
+        degraded_notice = ""
+        if degraded_nodes:
+            names = ", ".join(NODE_DISPLAY_NAMES.get(node, node) for node in degraded_nodes)
+            degraded_notice = f"> ⚠️ **일부 결과가 제한 시간 초과로 간이 결과입니다:** {names}\n\n"
+        
+        profile_notice = ""
+        if profile_files:
+            profile_notice = "\n🔬 **프로파일**: " + ", ".join(f"`{path}`" for path in profile_files)
+        
+        return f"""{degraded_notice}## 📋 **규정 검토 결과**
 {reviewer_analysis}
 
 ---
@@ -77,7 +125,7 @@ class ResponseFormatter:
 
 ---
 
-⏱️ **처리 시간**: {processing_time:.2f}초"""
+⏱️ **처리 시간**: {processing_time:.2f}초{" (캐시된 답변)" if cached else ""}{profile_notice}"""
 
 
 class ErrorHandler:
@@ -97,9 +145,24 @@ class ErrorHandler:
 
 ⏱️ **처리 시간**: {processing_time:.2f}초"""
 
+    @staticmethod
+    def format_busy_response(error_message: str) -> str:
+        """서버 혼잡(입장 거부) 응답을 포맷팅합니다."""
+        return f"""⏳ **지금은 요청이 많아 처리할 수 없습니다**
+
+{error_message}
+
+잠시 후 다시 시도해주세요."""
+
 
-async def process_chat_query(message: str, history: List) -> str:
-    """사용자 질의를 멀티에이전트 파이프라인으로 처리하여 종합 분석 결과 반환"""
+async def process_chat_query(message: str, history: List, profile: bool = False, request: gr.Request = None) -> str:
+    """
+    사용자 질의를 멀티에이전트 파이프라인으로 처리하여 종합 분석 결과 반환
+    브라우저 세션 ID를 파이프라인 세션 ID로 넘겨, 같은 질의를 재시도하면 체크포인트에서 이어서 실행합니다.
+    profile을 체크하면 이 요청을 프로파일링합니다. (체크하지 않으면 PROFILE_REQUESTS 설정을 따름)
+    같은 질의가 이미 처리 중이면 그 실행의 결과를 함께 받고, 동시 처리 한도와 대기열이 가득 차면 혼잡 응답을 즉시 반환합니다.
+    같은 질의를 같은 인덱스로 답한 적이 있으면(답변 캐시) 파이프라인을 실행하지 않고 그 결과를 반환합니다.
+    """
     start_time = time.time()
     
     # 입력 검증
@@ -109,15 +172,33 @@ async def process_chat_query(message: str, history: List) -> str:
     
     # 설정 검증
     try:
-        folder_id = GOOGLE_DRIVE_FOLDER_ID
+        folder_id = require_setting("GOOGLE_DRIVE_FOLDER_ID")
     except ConfigurationError:
         return "❌ 설정 오류: .env 파일에 Google Drive 폴더 ID가 설정되지 않았습니다."
         
     logger.info(f"사용자 질의 수신: '{message[:50]}...'")
+    record_request(message, folder_id)
     
     try:
         # 멀티에이전트 파이프라인 실행
-        final_state = await run_agent_pipeline(message, folder_id)
+        session_id = request.session_hash if request is not None else None
+        # 대화 기록이 비어 있으면 새 대화이므로 세션의 이전 대화 문맥을 쓰지 않습니다. (답변 캐시도 새 대화 기준으로 조회)
+        # 프로파일링 요청은 자기 실행의 프로파일이 필요하므로 캐시를 쓰지 않고 다른 요청과 병합하지 않습니다.
+        cache_key, final_state = (None, None) if profile else lookup_answer(
+            message, folder_id, session_id=session_id if history else None
+        )
+        cached = final_state is not None
+        if not cached:
+            final_state = await run_admitted(
+                message,
+                folder_id,
+                lambda: dispatch_pipeline(
+                    message, folder_id, session_id=session_id, profile=profile or None, new_conversation=not history
+                ),
+                coalesce=False if profile else None,
+                session_id=session_id,
+            )
+            store_answer(cache_key, final_state)
         processing_time = time.time() - start_time
         
         # 결과 처리 및 검증
@@ -125,12 +206,19 @@ async def process_chat_query(message: str, history: List) -> str:
         reviewer_analysis = result_processor.get_reviewer_analysis()
         auditor_analysis = result_processor.get_auditor_analysis()
         final_recommendation = result_processor.get_final_recommendation()
+        degraded_nodes = result_processor.get_degraded_nodes()
+        profile_files = result_processor.get_profile_files()
         
         # 응답 포맷팅 및 반환
         return ResponseFormatter.format_success_response(
-            reviewer_analysis, auditor_analysis, final_recommendation, processing_time
+            reviewer_analysis, auditor_analysis, final_recommendation, processing_time, degraded_nodes, profile_files,
+            cached=cached,
         )
         
+    except ServerBusy as e:
+        logger.warning(f"입장 거부: {e}")
+        return ErrorHandler.format_busy_response(str(e))
+        
     except Exception as e:
         processing_time = time.time() - start_time
         logger.error(f"처리 중 오류 발생: {str(e)}", exc_info=True)
@@ -141,13 +229,7 @@ def create_gradio_interface() -> gr.Interface:
     """Gradio 인터페이스를 생성합니다."""
     
     # 예시 질문들
-    examples = [
-        ["학생회비로 회식비 사용이 가능한가요?"],
-        ["동아리 지원금 사용 내역을 공개해야 하는 의무가 있나요?"],
-        ["학생회 임원 선거에서 선거 비용 지원 한도는 얼마인가요?"],
-        ["예산 변경 시 필요한 승인 절차는 무엇인가요?"],
-        ["감사에서 어떤 처분을 받을 수 있는지 궁금합니다"]
-    ]
+    examples = [[query, False] for query in EXAMPLE_QUERIES]
     
     # 인터페이스 생성 (Gradio 4.0+ 호환 버전)
     interface = gr.ChatInterface(
@@ -162,8 +244,14 @@ def create_gradio_interface() -> gr.Interface:
         
         💡 **사용법**: 학생회 활동과 관련된 궁금한 점을 자연어로 질문해주세요.
         """,
+        additional_inputs=[
+            gr.Checkbox(label="🔬 이 요청 프로파일링 (PROFILE_OUTPUT_DIR에 저장)", value=False)
+        ],
         examples=examples,
         cache_examples=False,
+        # 동시 실행 수와 대기열은 입장 제어(MAX_CONCURRENT_PIPELINES, MAX_QUEUED_REQUESTS)가 관리하므로
+        # Gradio 자체의 이벤트별 동시 실행 제한(기본 1)은 두지 않습니다.
+        concurrency_limit=None,
         theme=gr.themes.Soft(),
         type="messages"
     )
@@ -176,15 +264,25 @@ def main():
     try:
         interface = create_gradio_interface()
         
-        logger.info("Gradio 인터페이스를 시작합니다...")
-        logger.info("브라우저에서 http://localhost:7860 으로 접속하세요")
+        # METRICS_PORT가 설정되어 있으면 Prometheus 지표 엔드포인트를 Gradio 서버와 함께 시작합니다.
+        if METRICS_PORT:
+            start_metrics_server(METRICS_PORT, METRICS_HOST)
         
-        interface.launch(
-            server_name="0.0.0.0",
-            server_port=7860,
-            share=False,
-            show_error=True
-        )
+        # QUERY_WORKERS가 설정되어 있으면 파이프라인은 작업자 프로세스에서 실행하고, 이 프로세스는 요청만 받습니다.
+        if QUERY_WORKERS > 0:
+            start_worker_pool(QUERY_WORKERS)
+        
+        # HTTP API(/api/...)와 Gradio UI(/)를 한 서버에서 제공하여 입장 제어, 모델 클라이언트, 캐시를 공유합니다.
+        # WARMUP_ENABLED이면 서버가 시작된 뒤 예시 질문과 자주 들어온 질문으로 답변 캐시를 예열합니다.
+        app = gr.mount_gradio_app(create_api_app(warmup_queries=EXAMPLE_QUERIES), interface, path="/", show_error=True)
+        
+        logger.info("Gradio 인터페이스와 HTTP API를 시작합니다...")
+        logger.info("브라우저에서 http://localhost:7860 으로 접속하세요 (API 문서: http://localhost:7860/api/docs)")
+        
+        try:
+            uvicorn.run(app, host="0.0.0.0", port=7860)
+        finally:
+            stop_worker_pool()
         
     except Exception as e:
         logger.error(f"애플리케이션 시작 실패: {e}", exc_info=True)
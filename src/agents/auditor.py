@@ -1,7 +1,15 @@
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.agents.document_manager import DocumentManagerAgent
-from src.config import GEMINI_API_KEY
+from src.agents.document_manager import get_document_manager
+from src.agents.schemas import AuditorVerdict
+from src.utils.context_packer import pack_context
+from src.utils.deadlines import hedged_call
+from src.utils.llm_factory import create_chat_model
+from src.utils.session_store import describe_prior_turn, resolve_documents
+from src.utils.tracing import span
+from src.utils.document_types import REGULATION_DOC_TYPES, AUDIT_DOC_TYPES
+from src.config import (
+    GEMINI_API_KEY, AUDITOR_CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, CONTEXT_USE_SUMMARIES, CONTEXT_FULL_TEXT_PASSAGES,
+)
 
 class AuditorAgent:
     """재정 관련 업무의 감사 기준 준수 여부를 확인하고 감사 처분 가능성을 판단하는 에이전트"""
@@ -9,12 +17,12 @@ class AuditorAgent:
     def __init__(self):
         # Gemini LLM 초기화
         if GEMINI_API_KEY:
-            self.llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.1, google_api_key=GEMINI_API_KEY)
+            self.llm = create_chat_model("gemini-2.5-flash", temperature=0.1)
             print("감사 에이전트: Gemini 모델을 사용합니다.")
         else:
             raise ValueError("Gemini API 키가 설정되지 않았습니다.")
 
-        self.doc_manager = DocumentManagerAgent()
+        self.doc_manager = get_document_manager()
 
         # 감사 분석을 위한 프롬프트 템플릿
         self.prompt_template = PromptTemplate(
@@ -22,8 +30,15 @@ class AuditorAgent:
             template="""
             당신은 학생회 재정 감사 전문가입니다. 다음 재정 관련 질의와 관련 규정, 과거 감사 처분 기록 및 보고서를 종합하여
             질의 내용이 감사 기준을 준수하는지, 그리고 감사 처분 가능성이 있는지 판단하세요.
+            파일명 머리글에 '(요약)'이 붙은 구절은 원문 대신 조항 요약과 주요 의무만 담고 있습니다.
             
-            분석 결과는 아래 형식에 맞춰 명확하게 작성해 주세요.
+            판정 결과는 지정된 구조화 형식의 각 필드에 맞춰 명확하게 작성해 주세요.
+            - compliance: 감사 기준 준수 여부 (준수, 위반 가능성 높음, 위반 가능성 낮음)
+            - sanction_likelihood: 감사 처분 가능성 (가능성 높음, 가능성 낮음, 가능성 없음)
+            - cited_articles: 참고한 문서와 조항 목록
+            - cited_audit_cases: 참고한 과거 감사 사례 목록
+            - rationale: 왜 그렇게 판단했는지 관련 규정 조항과 과거 감사 사례를 바탕으로 구체적으로 설명
+            - recommendations: 감사 리스크를 줄이기 위한 대안이나 조치 제안
             
             ---
             **사용자 질의:** {query}
@@ -33,38 +48,74 @@ class AuditorAgent:
             
             **과거 감사 기록 (RAG):**
             {audit_records}
-            
-            **분석 결과:**
-            - **감사 기준 준수 여부:** (준수, 위반 가능성 높음, 위반 가능성 낮음)
-            - **감사 처분 가능성:** (가능성 높음, 가능성 낮음, 가능성 없음)
-            - **근거:** (왜 그렇게 판단했는지 관련 규정 조항과 과거 감사 사례를 바탕으로 구체적으로 설명)
-            - **권고사항:** (감사 리스크를 줄이기 위한 대안이나 조치 제안)
             ---
             """
         )
 
-        self.chain = self.prompt_template | self.llm
+        # 스키마로 검증된 판정 결과를 반환하도록 구조화 출력을 사용합니다.
+        self.chain = self.prompt_template | self.llm.with_structured_output(AuditorVerdict)
+
+    def review_and_audit(self, query, folder_id, prior=None):
+        """
+        사용자 질의를 분석하여 감사 기준 준수 여부와 감사 처분 가능성을 평가합니다.
+        prior(세션의 직전 턴 문맥)가 주어지면 후속 질문으로 보고 이전 검색 결과를 재사용하거나 보강하며,
+        직전 질문과 판정을 함께 LLM에 전달합니다.
 
-    def review_and_audit(self, query, folder_id):
-        """사용자 질의를 분석하여 감사 기준 준수 여부와 감사 처분 가능성을 평가"""
-        # 관련 규정 문서 검색
-        relevant_regulations = self.doc_manager.get_relevant_documents(query, folder_id)
+        Returns:
+            dict: 성공 시 {"result": AuditorVerdict 필드 딕셔너리}, 실패 시 {"error": 오류 메시지}.
+                  "documents"에는 사용한 검색 결과({슬롯: 청크 목록})를 담습니다.
+        """
+        # 관련 규정 문서 검색 (회칙/세칙만 대상으로 검색)
+        relevant_regulations = resolve_documents(
+            prior,
+            "auditor.regulations",
+            lambda text: self.doc_manager.get_relevant_documents(text, folder_id, k=3, doc_types=REGULATION_DOC_TYPES),
+            query,
+        )
         
-        # 감사 기록 문서는 보고서 키워드를 추가하여 검색
-        audit_query = f"{query}에 대한 감사 보고서 또는 감사 사례"
-        relevant_audit_records = self.doc_manager.get_relevant_documents(audit_query, folder_id)
+        # 감사 기록은 감사 보고서로 분류된 문서에서만 검색하므로 질의 문구를 덧붙일 필요가 없습니다.
+        relevant_audit_records = resolve_documents(
+            prior,
+            "auditor.audit_records",
+            lambda text: self.doc_manager.get_relevant_documents(text, folder_id, k=3, doc_types=AUDIT_DOC_TYPES),
+            query,
+        )
+        documents = {"auditor.regulations": relevant_regulations, "auditor.audit_records": relevant_audit_records}
 
-        regulations_text = "\n\n".join([doc.page_content for doc in relevant_regulations])
-        audit_records_text = "\n\n".join([doc.page_content for doc in relevant_audit_records])
+        # 예산의 절반을 규정에 쓰고, 남은 예산은 감사 기록에 사용합니다.
+        # (청크 요약이 있으면 각각 상위 구절만 원문으로, 나머지는 요약으로 넣습니다)
+        full_text_passages = CONTEXT_FULL_TEXT_PASSAGES if CONTEXT_USE_SUMMARIES else None
+        packed_regulations = pack_context(
+            relevant_regulations, AUDITOR_CONTEXT_TOKEN_BUDGET // 2, mmr_lambda=CONTEXT_MMR_LAMBDA,
+            full_text_passages=full_text_passages,
+        )
+        packed_audit_records = pack_context(
+            relevant_audit_records,
+            AUDITOR_CONTEXT_TOKEN_BUDGET - packed_regulations["packed_tokens"],
+            mmr_lambda=CONTEXT_MMR_LAMBDA,
+            full_text_passages=full_text_passages,
+        )
+        regulations_text = packed_regulations["text"]
+        audit_records_text = packed_audit_records["text"]
+        print(
+            f"감사 컨텍스트: {packed_regulations['naive_tokens'] + packed_audit_records['naive_tokens']} → "
+            f"{packed_regulations['packed_tokens'] + packed_audit_records['packed_tokens']} 토큰 "
+            f"(요약 구절 {packed_regulations['summarized_passages'] + packed_audit_records['summarized_passages']}개)"
+        )
 
         if not regulations_text:
-            return "관련 규정을 찾을 수 없습니다. 좀 더 구체적인 질의를 해주세요."
+            return {"error": "관련 규정을 찾을 수 없습니다. 좀 더 구체적인 질의를 해주세요."}
+        
+        llm_query = describe_prior_turn(
+            query, prior, "auditor_verdict", (("compliance", "감사 기준 준수 여부"), ("sanction_likelihood", "처분 가능성"))
+        )
         
-        # LLM을 통한 감사 분석 실행
+        # LLM을 통한 감사 분석 실행 (같은 입력으로 다시 호출해도 안전하므로 헤징 대상)
         try:
-            analysis_result = self.chain.invoke(
-                {"query": query, "regulations": regulations_text, "audit_records": audit_records_text}
-            )
-            return analysis_result.content
+            with span("llm.auditor", model=self.llm.model):
+                verdict = hedged_call("auditor_llm", lambda: self.chain.invoke(
+                    {"query": llm_query, "regulations": regulations_text, "audit_records": audit_records_text or "(관련 감사 기록 없음)"}
+                ))
+            return {"result": verdict.model_dump(), "documents": documents}
         except Exception as e:
-            return f"감사 분석 중 오류가 발생했습니다: {e}"
\ No newline at end of file
+            return {"error": f"감사 분석 중 오류가 발생했습니다: {e}"}
\ No newline at end of file
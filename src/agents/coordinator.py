@@ -4,11 +4,27 @@
 """
 
 import logging
+import threading
+import time
 from typing import Dict, Any
 
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.config import GEMINI_API_KEY
+from src.agents.schemas import (
+    RISK_ORDER,
+    build_verdict_summary,
+    combine_risk_level,
+    render_agreed_recommendation,
+    verdicts_agree,
+)
+from src.config import (
+    COORDINATOR_FAST_PATH_ENABLED,
+    COORDINATOR_FAST_PATH_MAX_RISK,
+    COORDINATOR_FAST_PATH_MODEL,
+    GEMINI_API_KEY,
+)
+from src.utils.llm_factory import create_chat_model
+from src.utils.pipeline_events import emit_event, events_enabled
+from src.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +35,8 @@ class CoordinatorAgent:
         """조정 에이전트를 초기화합니다."""
         self._initialize_llm()
         self._setup_prompt_template()
+        self._stats_lock = threading.Lock()
+        self._stats = {"total": 0, "fast_path": 0, "full_path": 0, "fast_path_seconds": 0.0, "full_path_seconds": 0.0}
     
     def _initialize_llm(self) -> None:
         """Gemini LLM을 초기화합니다."""
@@ -26,12 +44,14 @@ class CoordinatorAgent:
             raise ValueError("Gemini API 키가 설정되지 않았습니다.")
         
         try:
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", 
-                temperature=0.1, 
-                google_api_key=GEMINI_API_KEY
-            )
+            self.llm = create_chat_model("gemini-2.5-flash", temperature=0.1)
             logger.info("조정 에이전트: Gemini 모델을 사용합니다.")
+
+            # 빠른 경로 모델이 지정되지 않으면 템플릿으로 권고안을 만듭니다.
+            self.fast_path_llm = None
+            if COORDINATOR_FAST_PATH_MODEL:
+                self.fast_path_llm = create_chat_model(COORDINATOR_FAST_PATH_MODEL, temperature=0.1)
+                logger.info(f"조정 에이전트 빠른 경로: {COORDINATOR_FAST_PATH_MODEL} 모델을 사용합니다.")
         except Exception as e:
             logger.error(f"LLM 초기화 실패: {e}")
             raise
@@ -39,21 +59,18 @@ class CoordinatorAgent:
     def _setup_prompt_template(self) -> None:
         """프롬프트 템플릿을 설정합니다."""
         self.prompt_template = PromptTemplate(
-            input_variables=["initial_query", "reviewer_analysis", "auditor_analysis"],
+            input_variables=["initial_query", "verdict_summary"],
             template="""
             당신은 학생회 규정 관련 사안을 종합적으로 분석하는 최고 조정자입니다.
-            다음 사용자 질의와 '규정 검토 에이전트', '감사 에이전트'의 분석 결과를 종합하여
+            다음 사용자 질의와 '규정 검토 에이전트', '감사 에이전트'의 판정 요약(JSON)을 종합하여
             최종 권고안만을 작성하세요.
 
             **사용자 질의:** {initial_query}
 
-            **규정 검토 에이전트의 분석 결과:**
-            {reviewer_analysis}
-
-            **감사 에이전트의 분석 결과:**
-            {auditor_analysis}
+            **에이전트 판정 요약:**
+            {verdict_summary}
 
-            위 두 에이전트의 분석을 종합하여, 아래 형식으로 최종 종합 분석 및 권고안만 작성하세요:
+            위 두 에이전트의 판정을 종합하여, 아래 형식으로 최종 종합 분석 및 권고안만 작성하세요:
 
             **최종 종합 분석 및 권고안:**
             - **핵심 요약:** (두 에이전트의 분석을 요약하고 핵심 결론을 제시)
@@ -63,28 +80,108 @@ class CoordinatorAgent:
         )
 
         self.chain = self.prompt_template | self.llm
+        self.fast_path_chain = self.prompt_template | self.fast_path_llm if self.fast_path_llm else None
+
+    def should_use_fast_path(self, reviewer_result: Dict[str, Any], auditor_result: Dict[str, Any]) -> bool:
+        """
+        전체 조정 없이 빠른 경로로 권고안을 만들 수 있는지 판단합니다.
+        두 에이전트가 모두 판정을 반환했고, 판정이 일치하며, 종합 위험도가 설정한 기준 이하여야 합니다.
+        """
+        if not COORDINATOR_FAST_PATH_ENABLED or COORDINATOR_FAST_PATH_MAX_RISK not in RISK_ORDER:
+            return False
+
+        reviewer_verdict = reviewer_result.get("result")
+        auditor_verdict = auditor_result.get("result")
+        if not verdicts_agree(reviewer_verdict, auditor_verdict):
+            return False
+
+        risk_level = combine_risk_level(reviewer_verdict, auditor_verdict)
+        return RISK_ORDER[risk_level] <= RISK_ORDER[COORDINATOR_FAST_PATH_MAX_RISK]
+
+    def _record_path(self, path: str, elapsed: float) -> None:
+        with self._stats_lock:
+            self._stats["total"] += 1
+            self._stats[path] += 1
+            self._stats[f"{path}_seconds"] += elapsed
+
+    def get_fast_path_stats(self) -> Dict[str, Any]:
+        """
+        빠른 경로 처리 비율과 절감된 지연 시간 추정치를 반환합니다.
+        절감 시간은 (전체 조정 평균 시간 - 빠른 경로 평균 시간) × 빠른 경로 처리 건수로 추정합니다.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
 
-    def synthesize_and_coordinate(self, initial_query, reviewer_analysis, auditor_analysis):
-        """두 에이전트의 분석 결과를 종합하여 최종 권고안을 생성"""
+        fast_mean = stats["fast_path_seconds"] / stats["fast_path"] if stats["fast_path"] else 0.0
+        full_mean = stats["full_path_seconds"] / stats["full_path"] if stats["full_path"] else None
+        return {
+            "total": stats["total"],
+            "fast_path": stats["fast_path"],
+            "full_path": stats["full_path"],
+            "fast_path_ratio": stats["fast_path"] / stats["total"] if stats["total"] else 0.0,
+            "fast_path_mean_seconds": fast_mean,
+            "full_path_mean_seconds": full_mean,
+            # 전체 조정 호출을 아직 관측하지 못했으면 추정할 수 없습니다.
+            "estimated_saved_seconds": (
+                max(full_mean - fast_mean, 0.0) * stats["fast_path"] if full_mean is not None else None
+            ),
+        }
+
+    def _invoke_chain(self, chain, initial_query, reviewer_result, auditor_result) -> str:
+        inputs = {"initial_query": initial_query, "verdict_summary": build_verdict_summary(reviewer_result, auditor_result)}
+        if events_enabled():
+            # 스트리밍을 요청한 호출자에게는 권고안을 생성되는 대로 'coordinator_token' 이벤트로 보냅니다.
+            parts = []
+            for chunk in chain.stream(inputs):
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if text:
+                    parts.append(text)
+                    emit_event("coordinator_token", text=text)
+            return "".join(parts)
+
+        final_result = chain.invoke(inputs)
+
+        # LLM 응답 형태에 따른 처리
+        if hasattr(final_result, 'content'):
+            return final_result.content
+        elif isinstance(final_result, str):
+            return final_result
+        return str(final_result)
+
+    def synthesize_and_coordinate(self, initial_query, reviewer_result, auditor_result):
+        """
+        두 에이전트의 구조화된 판정 결과를 종합하여 최종 권고안을 생성합니다.
+
+        Args:
+            initial_query (str): 사용자 질의.
+            reviewer_result (dict): 규정 검토 에이전트 결과 ({"result": ...} 또는 {"error": ...}).
+            auditor_result (dict): 감사 에이전트 결과 ({"result": ...} 또는 {"error": ...}).
+        """
         print("에이전트들의 분석 결과를 종합하여 최종 권고안을 도출합니다...")
         
+        start_time = time.perf_counter()
         try:
-            final_result = self.chain.invoke(
-                {"initial_query": initial_query, "reviewer_analysis": reviewer_analysis, "auditor_analysis": auditor_analysis}
-            )
-
-            # LLM 응답 형태에 따른 처리
-            if hasattr(final_result, 'content'):
-                result_text = final_result.content
-            elif isinstance(final_result, str):
-                result_text = final_result
+            if self.should_use_fast_path(reviewer_result, auditor_result):
+                print("두 에이전트의 판정이 일치하고 위험도가 낮아 빠른 경로로 권고안을 작성합니다.")
+                if self.fast_path_chain is not None:
+                    with span("llm.coordinator_fast_path", model=self.fast_path_llm.model):
+                        result_text = self._invoke_chain(self.fast_path_chain, initial_query, reviewer_result, auditor_result)
+                else:
+                    with span("coordinator.fast_path_template"):
+                        result_text = render_agreed_recommendation(reviewer_result["result"], auditor_result["result"])
+                    emit_event("coordinator_token", text=result_text)
+                path = "fast_path"
             else:
-                result_text = str(final_result)
+                with span("llm.coordinator", model=self.llm.model):
+                    result_text = self._invoke_chain(self.chain, initial_query, reviewer_result, auditor_result)
+                path = "full_path"
 
+            self._record_path(path, time.perf_counter() - start_time)
             return {
-                "result": result_text
+                "result": result_text,
+                "path": path
             }
         except Exception as e:
             return {
                 "error": f"최종 권고안 도출 중 오류가 발생했습니다: {e}"
-            }
\ No newline at end of file
+            }
@@ -1,20 +1,59 @@
 # src/agents/document_manager.py
 # 문서 관리 에이전트
-# 사용자가 지정한 Google Drive 폴더에서 규정 문서를 가져와 벡터 DB에 임베딩하고,
+# 사용자가 지정한 폴더(Google Drive 또는 로컬 디렉터리, DOCUMENT_SOURCE)에서 규정 문서를 가져와 벡터 DB에 임베딩하고,
 # 다른 에이전트의 요청에 따라 관련 조항을 검색하여 제공합니다.
 
-import os
-import io
+import contextlib
+import threading
+import time
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+from src.utils.document_sources import get_document_source
+from src.utils.folder_watcher import watch_folder
+from src.utils.google_drive_handler import get_google_drive_service
+from src.utils.vector_db_manager import add_documents_to_db, search_documents_from_db, search_collections, count_documents, ensure_document_type_metadata
+from src.utils.metrics import FEDERATED_SKIPPED_FOLDERS
+from src.utils.profiling import track_memory
+from src.utils.tracing import span
+from src.config import FEDERATED_SOURCE_SHARE, FEDERATED_WARM_MISSING, GOOGLE_DRIVE_FOLDER_ID, INGESTION_WAIT_S, LOCAL_WATCH_ENABLED
 
-from src.utils.google_drive_handler import get_google_drive_service, download_documents_from_folder
-from src.utils.vector_db_manager import add_documents_to_db, search_documents_from_db, get_vector_store
-from src.config import GOOGLE_DRIVE_FOLDER_ID
+# 설정되어 있으면 이 프로세스는 인덱스를 읽기만 합니다. (질의 작업자)
+# 비어 있는 컬렉션을 직접 적재하지 않고 requester(folder_id)로 적재 작업자에게 요청한 뒤 새 버전을 기다립니다.
+_ingestion_requester = None
+
+def set_ingestion_requester(requester):
+    """폴더 적재를 다른 프로세스에 맡기는 함수를 설정합니다. None이면 이 프로세스에서 직접 적재합니다."""
+    global _ingestion_requester
+    _ingestion_requester = requester
+
+# 질의 작업자가 적재 작업자에게 감시 시작을 요청한 폴더 (이미 적재된 폴더는 한 번만 요청)
+_watch_requested = set()
+
+# 연합 검색에서 백그라운드 적재를 시작한 폴더와 시작 시각
+_warming_folders = {}
+_warming_lock = threading.Lock()
+
+# 컬렉션별 적재 잠금과 기다리는 스레드 수 (아무도 쓰지 않으면 지웁니다)
+# 에이전트 마감 시간이 지나도 적재는 작업 스레드에서 계속되므로, 같은 컬렉션을 다른 노드나 요청이 동시에 적재하지 않게 합니다.
+_ingestion_locks = {}
+
+@contextlib.contextmanager
+def _collection_ingestion_lock(collection_name):
+    with _warming_lock:
+        entry = _ingestion_locks.setdefault(collection_name, [threading.RLock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _warming_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                _ingestion_locks.pop(collection_name, None)
+
+def split_folder_ids(folder_id):
+    """쉼표로 구분한 폴더 ID 문자열(또는 목록)을 순서를 유지한 중복 없는 폴더 ID 목록으로 바꿉니다."""
+    parts = folder_id if isinstance(folder_id, (list, tuple)) else (folder_id or "").split(",")
+    return list(dict.fromkeys(part.strip() for part in parts if part and part.strip()))
 
 class DocumentManagerAgent:
     """
@@ -22,47 +61,237 @@ class DocumentManagerAgent:
     """
     def __init__(self, collection_name="student_council_regulations"):
         """
-        에이전트를 초기화하고 Google Drive 서비스와 벡터 DB 컬렉션을 설정합니다.
+        에이전트를 초기화하고 벡터 DB 컬렉션을 설정합니다.
+        Google Drive 서비스는 문서를 적재할 때 처음 필요해지므로 그때 인증합니다.
 
         Args:
             collection_name (str): 문서를 저장할 ChromaDB 컬렉션 이름.
         """
         self.collection_name = collection_name
-        self.drive_service = get_google_drive_service()
 
-    def get_relevant_documents(self, query, folder_id=None, k=5):
+    @property
+    def drive_service(self):
+        """Google Drive 서비스 객체. 처음 접근할 때 인증하며 프로세스 안에서 공유합니다."""
+        return get_google_drive_service()
+
+    def get_relevant_documents(self, query, folder_id=None, k=5, doc_types=None):
         """
         주어진 쿼리에 대한 가장 관련성 높은 문서를 벡터 DB에서 검색합니다.
         
         Args:
             query (str): 사용자의 질의 텍스트.
-            folder_id (str, optional): 검색할 Google Drive 폴더의 ID.
-                                     None이면 기본 컬렉션에서 검색합니다.
+            folder_id (str | list, optional): 검색할 Google Drive 폴더의 ID. 쉼표로 구분하거나 목록으로 주면
+                                     여러 폴더를 함께 검색합니다. None이면 GOOGLE_DRIVE_FOLDER_ID를 사용합니다.
             k (int): 반환할 문서의 개수.
+            doc_types (list, optional): 검색할 문서 종류 목록 (예: REGULATION_DOC_TYPES).
+                                        None이면 모든 종류의 문서에서 검색합니다.
 
         Returns:
             list: 관련 문서 청크 목록.
         """
-        if not folder_id:
+        with span("retrieval.get_relevant_documents", k=k, doc_types=list(doc_types or [])) as retrieval_span:
+            documents = self._get_relevant_documents(query, folder_id, k, doc_types)
+            retrieval_span.set_attribute("result_count", len(documents))
+            return documents
+
+    def _get_relevant_documents(self, query, folder_id, k, doc_types):
+        folder_ids = split_folder_ids(folder_id or GOOGLE_DRIVE_FOLDER_ID)
+        if not folder_ids:
             # .env 파일에 GOOGLE_DRIVE_FOLDER_ID가 없으면 오류를 발생시킵니다.
-            if not GOOGLE_DRIVE_FOLDER_ID:
-                raise ValueError("폴더 ID가 제공되지 않았습니다. .env 파일에 GOOGLE_DRIVE_FOLDER_ID를 설정하거나, Gradio UI에 폴더 ID를 입력해야 합니다.")
-            folder_id = GOOGLE_DRIVE_FOLDER_ID
+            raise ValueError("폴더 ID가 제공되지 않았습니다. .env 파일에 GOOGLE_DRIVE_FOLDER_ID를 설정하거나, Gradio UI에 폴더 ID를 입력해야 합니다.")
+        if len(folder_ids) > 1:
+            return self._get_federated_documents(query, folder_ids, k, doc_types)
 
+        folder_id = folder_ids[0]
         collection_name = f"regulations_{folder_id}"
+        if not self._ensure_collection(folder_id, collection_name):
+            return []
         
-        # 해당 폴더의 컬렉션이 이미 있는지 확인합니다.
-        vector_store = get_vector_store(collection_name)
-        
-        # 컬렉션에 문서가 없으면 새로 처리
-        if not vector_store._collection.count():
-            print(f"새로운 폴더 ID '{folder_id}'에 대한 문서를 처리합니다.")
-            documents = download_documents_from_folder(self.drive_service, folder_id)
-            if not documents:
-                print(f"폴더 '{folder_id}'에 문서가 없습니다.")
-                return []
-            else:
-                add_documents_to_db(documents, collection_name)
+        # 이전 버전으로 구축된 컬렉션이면 문서 종류 메타데이터를 보완합니다.
+        if doc_types:
+            ensure_document_type_metadata(collection_name)
     
         print(f"'{query}'에 대한 관련 규정을 '{collection_name}' 컬렉션에서 검색합니다...")
-        return search_documents_from_db(query, collection_name, k=k)
\ No newline at end of file
+        return search_documents_from_db(query, collection_name, k=k, doc_types=doc_types)
+
+    def _get_federated_documents(self, query, folder_ids, k, doc_types):
+        """
+        여러 폴더의 컬렉션을 동시에 검색하고 관련도 순으로 합칩니다. 한 폴더는 결과의 FEDERATED_SOURCE_SHARE까지만 차지합니다.
+        아직 적재되지 않은 폴더는 건너뛰고 백그라운드에서 적재하므로 다음 질의부터 검색에 포함됩니다.
+        (적재된 폴더가 하나도 없으면 첫 폴더만 기다려서 적재합니다)
+        반환하는 청크의 메타데이터에는 출처 폴더 ID('folder_id')를 넣습니다.
+        """
+        collections = {folder: f"regulations_{folder}" for folder in folder_ids}
+        ready = [folder for folder in folder_ids if count_documents(collections[folder])]
+        missing = [folder for folder in folder_ids if folder not in ready]
+
+        if missing and not FEDERATED_WARM_MISSING:
+            ready = [folder for folder in folder_ids
+                     if folder in ready or self._ensure_collection(folder, collections[folder])]
+            missing = []
+        elif missing and not ready:
+            first = missing.pop(0)
+            if self._ensure_collection(first, collections[first]):
+                ready.append(first)
+        if missing:
+            FEDERATED_SKIPPED_FOLDERS.inc(len(missing))
+            print(f"아직 적재되지 않은 폴더 {', '.join(missing)}는 이번 검색에서 건너뛰고 백그라운드에서 적재합니다.")
+            for folder in missing:
+                self._warm_folder(folder)
+        if not ready:
+            return []
+
+        collection_names = [collections[folder] for folder in ready]
+        for folder in ready:
+            self._ensure_watch(folder, collections[folder])
+        if doc_types:
+            for collection_name in collection_names:
+                ensure_document_type_metadata(collection_name)
+
+        print(f"'{query}'에 대한 관련 규정을 {len(collection_names)}개 컬렉션({', '.join(collection_names)})에서 검색합니다...")
+        folder_by_collection = {name: folder for folder, name in collections.items()}
+        merged = search_collections(
+            query, collection_names, k=k, doc_types=doc_types, source_share=FEDERATED_SOURCE_SHARE or None
+        )
+        documents = []
+        for collection_name, doc, _ in merged:
+            doc.metadata["folder_id"] = folder_by_collection[collection_name]
+            documents.append(doc)
+        return documents
+
+    def _ensure_collection(self, folder_id, collection_name):
+        """컬렉션에 문서가 없으면 폴더를 적재(또는 적재 작업자에게 요청하고 대기)합니다. 검색할 문서가 있으면 True."""
+        if count_documents(collection_name):
+            self._ensure_watch(folder_id, collection_name)
+            return True
+        if _ingestion_requester is not None:
+            return self._wait_for_ingestion(folder_id, collection_name)
+        return self._ingest_once(folder_id, collection_name)
+
+    def _ingest_once(self, folder_id, collection_name):
+        """
+        비어 있는 컬렉션을 적재합니다. 다른 스레드가 같은 컬렉션을 적재하고 있으면 새로 적재하지 않고
+        그 적재가 끝나기를 기다렸다가 결과를 씁니다. 검색할 문서가 있으면 True.
+        """
+        with _collection_ingestion_lock(collection_name):
+            if count_documents(collection_name):
+                return True
+            return bool(self.ingest_folder(folder_id, collection_name))
+
+    def _ensure_watch(self, folder_id, collection_name):
+        """
+        로컬 출처이면 이미 적재된 폴더의 파일 변경 감시를 시작합니다. (재시작 후 이전 실행에서 적재한 폴더)
+        질의 작업자는 적재 작업자에게 한 번 요청하며, 적재 작업자가 적재된 폴더를 건너뛰면서 감시를 시작합니다.
+        """
+        if not LOCAL_WATCH_ENABLED or not get_document_source().supports_watch:
+            return
+        if _ingestion_requester is None:
+            self.watch_folder(folder_id, collection_name)
+            return
+        with _warming_lock:
+            if folder_id in _watch_requested:
+                return
+            _watch_requested.add(folder_id)
+        _ingestion_requester(folder_id)
+
+    def watch_folder(self, folder_id, collection_name=None, versions=None):
+        """
+        폴더의 파일 변경 감시를 시작합니다. 문서 출처가 감시를 지원하지 않거나 LOCAL_WATCH_ENABLED가 꺼져 있으면 아무것도 하지 않습니다.
+        인덱스에 기록하는 프로세스(단일 프로세스 또는 적재 작업자)에서만 호출해야 합니다.
+        versions에는 방금 적재한 파일별 버전을 넘길 수 있습니다. (없으면 컬렉션에 저장된 버전과 비교)
+
+        Returns:
+            FolderWatcher | None: 감시 객체.
+        """
+        source = get_document_source()
+        if not LOCAL_WATCH_ENABLED or not source.supports_watch:
+            return None
+        try:
+            return watch_folder(source, folder_id, collection_name or f"regulations_{folder_id}", versions)
+        except Exception as e:
+            print(f"폴더 '{folder_id}'의 변경 감시를 시작하지 못했습니다: {e}")
+            return None
+
+    def _warm_folder(self, folder_id):
+        """폴더를 백그라운드에서 적재합니다. 적재를 시작한 지 INGESTION_WAIT_S초가 지나지 않은 폴더는 다시 요청하지 않습니다."""
+        now = time.monotonic()
+        with _warming_lock:
+            started_at = _warming_folders.get(folder_id)
+            if started_at is not None and now - started_at < INGESTION_WAIT_S:
+                return
+            _warming_folders[folder_id] = now
+
+        if _ingestion_requester is not None:
+            # 적재 작업자가 차례로 적재하고, 질의 작업자는 다음 검색부터 새 버전을 읽습니다.
+            _ingestion_requester(folder_id)
+            return
+
+        def warm():
+            try:
+                self._ingest_once(folder_id, f"regulations_{folder_id}")
+            except Exception as e:
+                print(f"폴더 '{folder_id}'의 백그라운드 적재 중 오류 발생: {e}")
+            finally:
+                with _warming_lock:
+                    _warming_folders.pop(folder_id, None)
+
+        threading.Thread(target=warm, name=f"warm-{folder_id}", daemon=True).start()
+
+    def _wait_for_ingestion(self, folder_id, collection_name, poll_interval_s=0.5):
+        """적재 작업자에게 폴더 적재를 요청하고, 컬렉션의 새 버전이 게시될 때까지 최대 INGESTION_WAIT_S초 기다립니다."""
+        print(f"적재 작업자에게 폴더 '{folder_id}'의 적재를 요청하고 기다립니다.")
+        _ingestion_requester(folder_id)
+        deadline = time.monotonic() + INGESTION_WAIT_S
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval_s)
+            if count_documents(collection_name):
+                return True
+        print(f"폴더 '{folder_id}'의 적재가 {INGESTION_WAIT_S:g}초 안에 끝나지 않았습니다.")
+        return False
+
+    def ingest_folder(self, folder_id, collection_name=None, replace=False):
+        """
+        문서 출처(DOCUMENT_SOURCE)에서 폴더의 문서를 가져와(필요하면 OCR) 벡터 DB 컬렉션에 추가합니다.
+        로컬 출처이면 적재한 뒤 파일 변경 감시를 시작합니다.
+        같은 컬렉션의 적재는 한 번에 하나씩 실행합니다.
+        프로파일링 중인 요청이면 다운로드부터 임베딩 저장까지의 최대 메모리 할당량을 기록합니다.
+
+        Args:
+            folder_id (str): 문서를 가져올 폴더의 ID. (Google Drive 폴더 ID 또는 LOCAL_DOCUMENTS_PATH 아래 디렉터리 이름)
+            collection_name (str, optional): 저장할 컬렉션 이름. None이면 'regulations_<폴더 ID>'를 사용합니다.
+            replace (bool): True이면 컬렉션의 기존 내용을 이번에 내려받은 문서로 교체합니다.
+
+        Returns:
+            int: 벡터 DB에 저장한 문서 수. 폴더에 문서가 없거나 저장하지 못했으면 0.
+        """
+        collection_name = collection_name or f"regulations_{folder_id}"
+        print(f"새로운 폴더 ID '{folder_id}'에 대한 문서를 처리합니다.")
+        with _collection_ingestion_lock(collection_name), track_memory("ingestion"):
+            source = get_document_source()
+            # 감시할 출처이면 내려받기 전에 파일 버전을 읽어 둡니다. (그 뒤에 바뀐 파일은 감시를 시작할 때 다시 적재)
+            versions = source.list_files(folder_id) if source.supports_watch else None
+            documents = source.download_documents(folder_id)
+            if not documents:
+                print(f"폴더 '{folder_id}'에 문서가 없습니다.")
+                return 0
+            with span("ingestion.add_documents", document_count=len(documents)):
+                stored = add_documents_to_db(documents, collection_name, replace=replace)
+            if not stored:
+                print(f"폴더 '{folder_id}'의 문서를 컬렉션 '{collection_name}'에 저장하지 못했습니다.")
+                return 0
+        self.watch_folder(folder_id, collection_name, versions)
+        return len(documents)
+
+
+# 리뷰어와 감사 에이전트가 함께 쓰는 문서 관리 에이전트 (처음 요청할 때 생성)
+_shared_document_manager = None
+_shared_lock = threading.Lock()
+
+def get_document_manager():
+    """프로세스에서 공유하는 DocumentManagerAgent 인스턴스를 반환합니다."""
+    global _shared_document_manager
+    if _shared_document_manager is None:
+        with _shared_lock:
+            if _shared_document_manager is None:
+                _shared_document_manager = DocumentManagerAgent()
+    return _shared_document_manager
@@ -1,7 +1,15 @@
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.agents.document_manager import DocumentManagerAgent
-from src.config import GEMINI_API_KEY
+from src.agents.document_manager import get_document_manager
+from src.agents.schemas import ReviewerVerdict
+from src.utils.context_packer import pack_context
+from src.utils.deadlines import hedged_call
+from src.utils.llm_factory import create_chat_model
+from src.utils.session_store import describe_prior_turn, resolve_documents
+from src.utils.tracing import span
+from src.utils.document_types import REGULATION_DOC_TYPES
+from src.config import (
+    GEMINI_API_KEY, REVIEWER_CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, CONTEXT_USE_SUMMARIES, CONTEXT_FULL_TEXT_PASSAGES,
+)
 
 class RegulationReviewerAgent:
     """사용자 질의에 대한 규정 위반 여부와 위험도를 분석하는 에이전트"""
@@ -9,12 +17,12 @@ class RegulationReviewerAgent:
     def __init__(self):
         # Gemini LLM 초기화
         if GEMINI_API_KEY:
-            self.llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.1, google_api_key=GEMINI_API_KEY)
+            self.llm = create_chat_model("gemini-2.5-flash", temperature=0.1)
             print("규정 검토 에이전트: Gemini 모델을 사용합니다.")
         else:
             raise ValueError("Gemini API 키가 설정되지 않았습니다.")
         
-        self.doc_manager = DocumentManagerAgent()
+        self.doc_manager = get_document_manager()
         
         # 규정 검토 분석을 위한 프롬프트 템플릿
         self.prompt_template = PromptTemplate(
@@ -23,42 +31,71 @@ class RegulationReviewerAgent:
             당신은 학생회 규정 검토 전문가입니다. 다음 질의와 관련 규정을 분석하여 질의에 포함된 내용이 규정 위반에 해당하는지,
             위반 가능성이 있다면 그 위험도는 어느 정도인지 평가해 대안이나 권고사항을 제시하세요.
             답변 시에는 반드시 어떤 문서의 규정을 참고했는지 명시해 주세요. (예: '재정·회계 세칙' 제10조)
+            파일명 머리글에 '(요약)'이 붙은 구절은 원문 대신 조항 요약과 주요 의무만 담고 있습니다.
             
-            분석 결과는 아래 형식에 맞춰서 명확하고 구체적으로 작성해 주세요.
+            판정 결과는 지정된 구조화 형식의 각 필드에 맞춰 명확하고 구체적으로 작성해 주세요.
+            - violation: 규정 위반 여부 (위반 가능성 높음, 위반 가능성 낮음, 위반 없음)
+            - risk_level: 위험도 (높음, 보통, 낮음)
+            - cited_articles: 참고한 문서와 조항 목록
+            - rationale: 왜 그렇게 판단했는지 관련 규정 조항과 함께 구체적으로 설명
+            - recommendations: 규정 위반을 막기 위한 대안이나 향후 조치 제안
             
             ---
-            **사용자 질의: {query}
+            **사용자 질의:** {query}
             
-            **관련 규정:
+            **관련 규정:**
             {regulations}
-            
-            **분석 결과:
-            - **규정 위반 여부:** (위반 가능성 높음, 위반 가능성 낮음, 위반 없음)
-            - **위험도: (높음, 보통, 낮음)
-            - **근거: (왜 그렇게 판단했는지 관련 규정 조항과 함께 구체적으로 설명)
-            - **권고사항: (규정 위반을 막기 위한 대안이나 향후 조치 제안)
             ---
             """
         )
         
-        self.chain = self.prompt_template | self.llm
+        # 스키마로 검증된 판정 결과를 반환하도록 구조화 출력을 사용합니다.
+        self.chain = self.prompt_template | self.llm.with_structured_output(ReviewerVerdict)
+
+    def review_and_analyze(self, query, folder_id, prior=None):
+        """
+        사용자 질의를 분석하여 규정 위반 여부와 위험도를 평가합니다.
+        prior(세션의 직전 턴 문맥)가 주어지면 후속 질문으로 보고 이전 검색 결과를 재사용하거나 보강하며,
+        직전 질문과 판정을 함께 LLM에 전달합니다.
 
-    def review_and_analyze(self, query, folder_id):
-        """사용자 질의를 분석하여 규정 위반 여부와 위험도를 평가"""
-        # 관련 규정 문서 검색
-        relevant_docs = self.doc_manager.get_relevant_documents(query, folder_id)
+        Returns:
+            dict: 성공 시 {"result": ReviewerVerdict 필드 딕셔너리}, 실패 시 {"error": 오류 메시지}.
+                  "documents"에는 사용한 검색 결과({슬롯: 청크 목록})를 담습니다.
+        """
+        # 관련 규정 문서 검색 (회칙/세칙만 대상으로 검색)
+        relevant_docs = resolve_documents(
+            prior,
+            "reviewer.regulations",
+            lambda text: self.doc_manager.get_relevant_documents(text, folder_id, doc_types=REGULATION_DOC_TYPES),
+            query,
+        )
+        documents = {"reviewer.regulations": relevant_docs}
         
-        # 검색된 문서를 파일명과 함께 텍스트로 결합
-        regulations_text = "\n\n".join(
-            [f"--- 파일명: {doc.metadata.get('source', '알 수 없음')}\n{doc.page_content}" for doc in relevant_docs]
+        # 겹치는 청크를 병합하고 중복을 제거하여 토큰 예산 안에서 파일명과 함께 결합
+        # (청크 요약이 있으면 상위 구절만 원문으로, 나머지는 요약으로 넣습니다)
+        packed = pack_context(
+            relevant_docs, REVIEWER_CONTEXT_TOKEN_BUDGET, mmr_lambda=CONTEXT_MMR_LAMBDA,
+            full_text_passages=CONTEXT_FULL_TEXT_PASSAGES if CONTEXT_USE_SUMMARIES else None,
+        )
+        regulations_text = packed["text"]
+        print(
+            f"규정 검토 컨텍스트: {packed['naive_tokens']} → {packed['packed_tokens']} 토큰 "
+            f"(요약 구절 {packed['summarized_passages']}개)"
         )
 
         if not regulations_text:
-            return "관련 규정을 찾을 수 없습니다. 좀 더 구체적인 질의를 해주세요."
+            return {"error": "관련 규정을 찾을 수 없습니다. 좀 더 구체적인 질의를 해주세요."}
+        
+        llm_query = describe_prior_turn(
+            query, prior, "reviewer_verdict", (("violation", "규정 위반 여부"), ("risk_level", "위험도"))
+        )
             
-        # LLM을 통한 규정 분석 실행
+        # LLM을 통한 규정 분석 실행 (같은 입력으로 다시 호출해도 안전하므로 헤징 대상)
         try:
-            analysis_result = self.chain.invoke({"query": query, "regulations": regulations_text})
-            return analysis_result.content
+            with span("llm.reviewer", model=self.llm.model):
+                verdict = hedged_call(
+                    "reviewer_llm", lambda: self.chain.invoke({"query": llm_query, "regulations": regulations_text})
+                )
+            return {"result": verdict.model_dump(), "documents": documents}
         except Exception as e:
-            return f"규정 분석 중 오류가 발생했습니다: {e}"
\ No newline at end of file
+            return {"error": f"규정 분석 중 오류가 발생했습니다: {e}"}
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+에이전트 구조화 출력 스키마 모듈
+규정 검토 에이전트와 감사 에이전트가 반환하는 판정 결과의 형식을 정의하고,
+판정 결과로부터 위험도 산정, 화면 표시용 마크다운, 조정 에이전트용 요약을 만듭니다.
+"""
+
+import json
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+RiskLevel = Literal["높음", "보통", "낮음"]
+
+# 위험도 비교용 순서 (값이 클수록 위험)
+RISK_ORDER = {"낮음": 0, "보통": 1, "높음": 2}
+
+# 조정 에이전트 요약에서 근거 설명을 자르는 길이
+_RATIONALE_SUMMARY_LENGTH = 500
+
+
+class ReviewerVerdict(BaseModel):
+    """규정 검토 에이전트의 판정 결과"""
+
+    violation: Literal["위반 가능성 높음", "위반 가능성 낮음", "위반 없음"] = Field(
+        description="질의 내용의 규정 위반 여부"
+    )
+    risk_level: RiskLevel = Field(description="규정 위반 위험도")
+    cited_articles: List[str] = Field(
+        default_factory=list,
+        description="판단 근거가 된 규정 조항 목록 (예: '재정·회계 세칙 제10조')",
+    )
+    rationale: str = Field(description="관련 규정 조항을 들어 왜 그렇게 판단했는지에 대한 구체적인 설명")
+    recommendations: List[str] = Field(
+        default_factory=list, description="규정 위반을 막기 위한 대안이나 향후 조치"
+    )
+
+
+class AuditorVerdict(BaseModel):
+    """감사 에이전트의 판정 결과"""
+
+    compliance: Literal["준수", "위반 가능성 높음", "위반 가능성 낮음"] = Field(
+        description="감사 기준 준수 여부"
+    )
+    sanction_likelihood: Literal["가능성 높음", "가능성 낮음", "가능성 없음"] = Field(
+        description="감사 처분 가능성"
+    )
+    cited_articles: List[str] = Field(default_factory=list, description="판단 근거가 된 규정 조항 목록")
+    cited_audit_cases: List[str] = Field(
+        default_factory=list, description="참고한 과거 감사 사례 또는 감사 보고서 항목"
+    )
+    rationale: str = Field(description="관련 규정과 과거 감사 사례를 바탕으로 한 구체적인 판단 근거")
+    recommendations: List[str] = Field(
+        default_factory=list, description="감사 리스크를 줄이기 위한 대안이나 조치"
+    )
+
+
+class ChunkSummary(BaseModel):
+    """적재 단계에서 만드는 규정 청크 요약"""
+
+    articles: List[str] = Field(
+        default_factory=list, description="청크에 포함된 조항 번호와 제목 (예: '제10조 (예산 집행)')"
+    )
+    summary: str = Field(description="청크 내용의 핵심을 2~3문장으로 요약한 내용")
+    obligations: List[str] = Field(
+        default_factory=list, description="청크에 규정된 주요 의무, 금지 사항, 요건, 절차 (조항 번호 포함)"
+    )
+
+
+def auditor_risk_level(verdict: Dict[str, Any]) -> str:
+    """감사 판정의 준수 여부와 처분 가능성을 위험도로 변환합니다."""
+    if verdict["sanction_likelihood"] == "가능성 높음" or verdict["compliance"] == "위반 가능성 높음":
+        return "높음"
+    if verdict["sanction_likelihood"] == "가능성 낮음" or verdict["compliance"] == "위반 가능성 낮음":
+        return "보통"
+    return "낮음"
+
+
+def combine_risk_level(reviewer_verdict: Optional[Dict[str, Any]], auditor_verdict: Optional[Dict[str, Any]]) -> str:
+    """
+    두 에이전트의 판정 중 더 높은 위험도를 반환합니다.
+    한쪽 판정만 있으면 그 판정을 사용하고, 둘 다 없으면 "분석 불가"를 반환합니다.
+    """
+    levels = []
+    if reviewer_verdict:
+        levels.append(reviewer_verdict["risk_level"])
+    if auditor_verdict:
+        levels.append(auditor_risk_level(auditor_verdict))
+    if not levels:
+        return "분석 불가"
+    return max(levels, key=lambda level: RISK_ORDER[level])
+
+
+def _bullet_list(items: List[str]) -> str:
+    if not items:
+        return "  - (없음)"
+    return "\n".join(f"  - {item}" for item in items)
+
+
+def render_reviewer_markdown(verdict: Dict[str, Any]) -> str:
+    """규정 검토 판정을 화면 표시용 마크다운으로 변환합니다."""
+    return (
+        f"- **규정 위반 여부:** {verdict['violation']}\n"
+        f"- **위험도:** {verdict['risk_level']}\n"
+        f"- **근거 조항:**\n{_bullet_list(verdict['cited_articles'])}\n"
+        f"- **근거:** {verdict['rationale']}\n"
+        f"- **권고사항:**\n{_bullet_list(verdict['recommendations'])}"
+    )
+
+
+def render_auditor_markdown(verdict: Dict[str, Any]) -> str:
+    """감사 판정을 화면 표시용 마크다운으로 변환합니다."""
+    return (
+        f"- **감사 기준 준수 여부:** {verdict['compliance']}\n"
+        f"- **감사 처분 가능성:** {verdict['sanction_likelihood']}\n"
+        f"- **근거 조항:**\n{_bullet_list(verdict['cited_articles'])}\n"
+        f"- **참고 감사 사례:**\n{_bullet_list(verdict['cited_audit_cases'])}\n"
+        f"- **근거:** {verdict['rationale']}\n"
+        f"- **권고사항:**\n{_bullet_list(verdict['recommendations'])}"
+    )
+
+
+def _truncate(text: str, length: int) -> str:
+    return text if len(text) <= length else text[:length] + "…"
+
+
+def build_verdict_summary(reviewer_result: Dict[str, Any], auditor_result: Dict[str, Any]) -> str:
+    """
+    조정 에이전트 프롬프트에 넣을 간결한 JSON 요약을 만듭니다.
+    판정이 없는 에이전트는 오류 메시지만 포함합니다.
+    """
+    reviewer_verdict = reviewer_result.get("result")
+    auditor_verdict = auditor_result.get("result")
+
+    summary = {"종합 위험도": combine_risk_level(reviewer_verdict, auditor_verdict)}
+    if reviewer_verdict:
+        summary["규정 검토"] = {
+            "위반 여부": reviewer_verdict["violation"],
+            "위험도": reviewer_verdict["risk_level"],
+            "근거 조항": reviewer_verdict["cited_articles"],
+            "근거": _truncate(reviewer_verdict["rationale"], _RATIONALE_SUMMARY_LENGTH),
+            "권고": reviewer_verdict["recommendations"],
+        }
+    else:
+        summary["규정 검토"] = {"오류": reviewer_result.get("error", "분석 결과 없음")}
+
+    if auditor_verdict:
+        summary["감사"] = {
+            "준수 여부": auditor_verdict["compliance"],
+            "처분 가능성": auditor_verdict["sanction_likelihood"],
+            "근거 조항": auditor_verdict["cited_articles"],
+            "감사 사례": auditor_verdict["cited_audit_cases"],
+            "근거": _truncate(auditor_verdict["rationale"], _RATIONALE_SUMMARY_LENGTH),
+            "권고": auditor_verdict["recommendations"],
+        }
+    else:
+        summary["감사"] = {"오류": auditor_result.get("error", "분석 결과 없음")}
+
+    return json.dumps(summary, ensure_ascii=False, indent=1)
+
+
+def verdicts_agree(reviewer_verdict: Optional[Dict[str, Any]], auditor_verdict: Optional[Dict[str, Any]]) -> bool:
+    """두 에이전트의 판정이 모두 있고, 각 판정에서 산정한 위험도가 같은지 확인합니다."""
+    if not reviewer_verdict or not auditor_verdict:
+        return False
+    return reviewer_verdict["risk_level"] == auditor_risk_level(auditor_verdict)
+
+
+def _merge_unique(*item_lists: List[str]) -> List[str]:
+    merged = []
+    for items in item_lists:
+        for item in items:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+def render_agreed_recommendation(reviewer_verdict: Dict[str, Any], auditor_verdict: Dict[str, Any]) -> str:
+    """
+    두 에이전트의 판정이 일치할 때 조정 에이전트 형식과 같은 최종 권고안을 템플릿으로 만듭니다.
+    LLM을 호출하지 않으므로 판정 결과에 있는 조항과 권고만 사용합니다.
+    """
+    cited_articles = _merge_unique(reviewer_verdict["cited_articles"], auditor_verdict["cited_articles"])
+    recommendations = _merge_unique(reviewer_verdict["recommendations"], auditor_verdict["recommendations"])
+    if not recommendations:
+        recommendations = ["현재 계획대로 진행하되, 관련 증빙 자료를 규정에 맞게 보관하세요."]
+
+    return (
+        "**최종 종합 분석 및 권고안:**\n"
+        f"- **핵심 요약:** 규정 검토 결과 '{reviewer_verdict['violation']}'(위험도 {reviewer_verdict['risk_level']}), "
+        f"감사 분석 결과 '{auditor_verdict['compliance']}'(감사 처분 {auditor_verdict['sanction_likelihood']})으로 "
+        "두 에이전트의 판단이 일치합니다.\n"
+        "- **의견 조정:** 두 에이전트의 의견이 일치하여 별도의 조정이 필요하지 않습니다.\n"
+        f"- **근거 조항:**\n{_bullet_list(cited_articles)}\n"
+        f"- **최종 권고:**\n{_bullet_list(recommendations)}"
+    )
+
+
+def render_degraded_recommendation(reviewer_result: Dict[str, Any], auditor_result: Dict[str, Any]) -> str:
+    """조정 에이전트가 제한 시간 안에 응답하지 못했을 때, 두 에이전트의 판정만으로 간이 권고안을 만듭니다."""
+    reviewer_verdict = reviewer_result.get("result")
+    auditor_verdict = auditor_result.get("result")
+    cited_articles = _merge_unique(
+        (reviewer_verdict or {}).get("cited_articles", []), (auditor_verdict or {}).get("cited_articles", [])
+    )
+    recommendations = _merge_unique(
+        (reviewer_verdict or {}).get("recommendations", []), (auditor_verdict or {}).get("recommendations", [])
+    )
+
+    return (
+        "**최종 종합 분석 및 권고안:**\n"
+        "> ⚠️ 조정 에이전트가 제한 시간 안에 응답하지 않아, 두 에이전트의 판정만으로 작성한 간이 권고안입니다. "
+        "의견 조정은 수행되지 않았습니다.\n\n"
+        f"- **종합 위험도:** {combine_risk_level(reviewer_verdict, auditor_verdict)}\n"
+        f"- **근거 조항:**\n{_bullet_list(cited_articles)}\n"
+        f"- **권고사항:**\n{_bullet_list(recommendations)}"
+    )
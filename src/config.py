@@ -16,30 +16,215 @@ class ConfigurationError(Exception):
     """설정 오류를 나타내는 사용자 정의 예외"""
     pass
 
-def _get_required_env_var(key: str) -> str:
-    """필수 환경 변수를 안전하게 가져옵니다."""
-    value = os.getenv(key)
-    if not value:
-        raise ConfigurationError(f"필수 환경 변수 '{key}'가 설정되지 않았습니다.")
-    return value
-
 def _get_optional_env_var(key: str, default: str) -> str:
     """선택적 환경 변수를 가져옵니다."""
     return os.getenv(key, default)
 
-try:
-    GEMINI_API_KEY = _get_required_env_var("GEMINI_API_KEY")
-    
-    NOTION_API_KEY = _get_required_env_var("NOTION_API_KEY")
-    NOTION_DATABASE_ID = _get_required_env_var("NOTION_DATABASE_ID")
-    
-    GOOGLE_DRIVE_FOLDER_ID = _get_required_env_var("GOOGLE_DRIVE_FOLDER_ID")
-    GOOGLE_DRIVE_CREDS_FILE = _get_optional_env_var("GOOGLE_DRIVE_CREDS_FILE", "credentials.json")
-    
-    CHROMADB_PATH = _get_optional_env_var("CHROMADB_PATH", "./chroma_db")
-    
-    logger.info("모든 환경 변수가 성공적으로 로드되었습니다.")
-    
-except ConfigurationError as e:
-    logger.error(f"설정 오류: {e}")
-    raise
\ No newline at end of file
+def _get_int_env_var(key: str, default: str) -> int:
+    """정수 환경 변수를 가져옵니다. 값이 정수가 아니면 ConfigurationError를 발생시킵니다."""
+    value = _get_optional_env_var(key, default)
+    try:
+        return int(value)
+    except ValueError:
+        raise ConfigurationError(f"환경 변수 '{key}'는 정수여야 합니다. (현재 값: '{value}')") from None
+
+def _get_float_env_var(key: str, default: str) -> float:
+    """실수 환경 변수를 가져옵니다. 값이 숫자가 아니면 ConfigurationError를 발생시킵니다."""
+    value = _get_optional_env_var(key, default)
+    try:
+        return float(value)
+    except ValueError:
+        raise ConfigurationError(f"환경 변수 '{key}'는 숫자여야 합니다. (현재 값: '{value}')") from None
+
+# 서비스별 필수 설정은 가져올 때 검사하지 않고 그 서비스를 처음 사용할 때 require_setting()으로 확인합니다.
+# (Notion이나 Drive 설정이 없어도 앱을 시작하고, 이미 적재된 인덱스로 질의할 수 있습니다)
+GEMINI_API_KEY = _get_optional_env_var("GEMINI_API_KEY", "")
+
+NOTION_API_KEY = _get_optional_env_var("NOTION_API_KEY", "")
+NOTION_DATABASE_ID = _get_optional_env_var("NOTION_DATABASE_ID", "")
+# Notion 기록 방식: "create"(실행마다 새 페이지) 또는 "upsert"(정규화한 질의와 폴더마다 페이지 하나, 바뀐 블록만 갱신)
+NOTION_WRITE_MODE = _get_optional_env_var("NOTION_WRITE_MODE", "create")
+# upsert 방식에서 질의별 페이지 ID와 블록 내용 해시를 기록하는 SQLite 파일
+NOTION_PAGE_STATE_PATH = _get_optional_env_var("NOTION_PAGE_STATE_PATH", "./notion_pages.sqlite")
+# 질의 키를 저장할 데이터베이스의 텍스트 속성 이름 (설정하면 로컬 기록이 없을 때 이 속성으로 기존 페이지를 찾습니다)
+NOTION_QUERY_KEY_PROPERTY = _get_optional_env_var("NOTION_QUERY_KEY_PROPERTY", "")
+
+GOOGLE_DRIVE_FOLDER_ID = _get_optional_env_var("GOOGLE_DRIVE_FOLDER_ID", "")
+GOOGLE_DRIVE_CREDS_FILE = _get_optional_env_var("GOOGLE_DRIVE_CREDS_FILE", "credentials.json")
+
+# 문서 출처: "drive"(기본, Google Drive 폴더) 또는 "local"(LOCAL_DOCUMENTS_PATH 아래 폴더 ID 이름의 디렉터리)
+DOCUMENT_SOURCE = _get_optional_env_var("DOCUMENT_SOURCE", "drive")
+LOCAL_DOCUMENTS_PATH = _get_optional_env_var("LOCAL_DOCUMENTS_PATH", "./documents")
+# 로컬 출처에서 적재한 폴더의 파일 변경을 감시하여 바뀐 파일만 다시 임베딩합니다.
+LOCAL_WATCH_ENABLED = _get_optional_env_var("LOCAL_WATCH_ENABLED", "true").lower() == "true"
+# 변경 알림을 모아 한 번에 처리하기까지 기다리는 시간 (파일 복사가 끝나기를 기다림)
+LOCAL_WATCH_DEBOUNCE_S = _get_float_env_var("LOCAL_WATCH_DEBOUNCE_S", "1.0")
+# watchdog이 없거나 알림을 쓸 수 없는 파일 시스템(NFS 등)에서 디렉터리를 다시 훑는 간격
+LOCAL_WATCH_POLL_S = _get_float_env_var("LOCAL_WATCH_POLL_S", "5.0")
+
+CHROMADB_PATH = _get_optional_env_var("CHROMADB_PATH", "./chroma_db")
+
+# 벡터 저장소 백엔드: "chroma"(기본) 또는 "flat"(NumPy 전수 탐색, 메모리 매핑)
+VECTOR_STORE_BACKEND = _get_optional_env_var("VECTOR_STORE_BACKEND", "chroma")
+FLAT_INDEX_PATH = _get_optional_env_var("FLAT_INDEX_PATH", "./flat_index")
+# flat 인덱스 저장 형식: "float32", "float16", "int8"(행별 스케일), "pq"(곱 양자화, FLAT_INDEX_PQ_SUBVECTORS바이트/청크)
+FLAT_INDEX_DTYPE = _get_optional_env_var("FLAT_INDEX_DTYPE", "float32")
+# flat 인덱스는 버전 디렉터리로 게시되며, 다른 프로세스가 읽고 있을 수 있도록 최근 버전을 이만큼 남겨 둡니다.
+FLAT_INDEX_KEEP_VERSIONS = _get_int_env_var("FLAT_INDEX_KEEP_VERSIONS", "3")
+FLAT_INDEX_PQ_SUBVECTORS = _get_int_env_var("FLAT_INDEX_PQ_SUBVECTORS", "96")
+# 0보다 크면 압축 코드로 이만큼 후보를 고른 뒤 정확한 임베딩으로 다시 정렬합니다. (pq 또는 공유 임베딩 풀에서 사용)
+FLAT_INDEX_RERANK_CANDIDATES = _get_int_env_var("FLAT_INDEX_RERANK_CANDIDATES", "50")
+# 정확한 임베딩을 폴더 컬렉션들이 공유하는 풀(FLAT_INDEX_PATH/_pool)에 한 번만 저장합니다. (여러 폴더에 같은 청크가 있을 때)
+FLAT_INDEX_SHARED_POOL = _get_optional_env_var("FLAT_INDEX_SHARED_POOL", "false").lower() == "true"
+
+# 임베딩 디스크 캐시 경로 (빈 값이면 캐시를 사용하지 않습니다)
+EMBEDDING_CACHE_PATH = _get_optional_env_var("EMBEDDING_CACHE_PATH", "")
+
+# 스캔 PDF OCR 설정: 렌더링 색상("rgb", "gray", "binary"), 해상도("auto"이면 글자 높이와 페이지 크기로 페이지마다 선택),
+# 자동 해상도의 목표 글자 높이(픽셀)와 범위, Tesseract 페이지 분할 방식(--psm)과 엔진(--oem, 빈 값이면 기본값)
+# 기본값은 이전 동작(컬러, pdf2image 기본 200 DPI, 빈 페이지도 OCR)이며, 적응형 설정은 bench_ocr.py로 정확도를 확인한 뒤 켭니다.
+OCR_LANG = _get_optional_env_var("OCR_LANG", "kor+eng")
+OCR_COLOR_MODE = _get_optional_env_var("OCR_COLOR_MODE", "rgb")
+OCR_DPI = _get_optional_env_var("OCR_DPI", "200")
+OCR_TARGET_TEXT_HEIGHT_PX = _get_int_env_var("OCR_TARGET_TEXT_HEIGHT_PX", "40")
+OCR_MIN_DPI = _get_int_env_var("OCR_MIN_DPI", "150")
+OCR_MAX_DPI = _get_int_env_var("OCR_MAX_DPI", "400")
+OCR_PSM = _get_optional_env_var("OCR_PSM", "")
+OCR_OEM = _get_optional_env_var("OCR_OEM", "")
+# 켜면 잉크가 거의 없는 빈 페이지(간지, 뒷면 스캔)는 OCR 없이 건너뜁니다.
+OCR_SKIP_BLANK_PAGES = _get_optional_env_var("OCR_SKIP_BLANK_PAGES", "false").lower() == "true"
+
+# 문서 분할 설정
+CHUNK_SIZE = _get_int_env_var("CHUNK_SIZE", "1000")
+CHUNK_OVERLAP = _get_int_env_var("CHUNK_OVERLAP", "200")
+
+# 에이전트별 검색 컨텍스트 토큰 예산과 MMR 가중치 (관련도 비중, 0~1)
+REVIEWER_CONTEXT_TOKEN_BUDGET = _get_int_env_var("REVIEWER_CONTEXT_TOKEN_BUDGET", "2500")
+AUDITOR_CONTEXT_TOKEN_BUDGET = _get_int_env_var("AUDITOR_CONTEXT_TOKEN_BUDGET", "3000")
+CONTEXT_MMR_LAMBDA = _get_float_env_var("CONTEXT_MMR_LAMBDA", "0.7")
+
+# 청크 요약: 켜면 적재할 때 청크마다 요약과 주요 의무를 만들어 메타데이터로 저장합니다. (청크 내용 해시로 디스크 캐시)
+# 요약이 있는 청크는 관련도 상위 CONTEXT_FULL_TEXT_PASSAGES개 구절만 원문으로, 나머지는 요약으로 프롬프트에 넣습니다.
+CHUNK_SUMMARIES_ENABLED = _get_optional_env_var("CHUNK_SUMMARIES_ENABLED", "false").lower() == "true"
+CHUNK_SUMMARY_MODEL = _get_optional_env_var("CHUNK_SUMMARY_MODEL", "gemini-2.5-flash")
+CHUNK_SUMMARY_CACHE_PATH = _get_optional_env_var("CHUNK_SUMMARY_CACHE_PATH", "./summary_cache")
+CHUNK_SUMMARY_CONCURRENCY = _get_int_env_var("CHUNK_SUMMARY_CONCURRENCY", "4")
+CONTEXT_USE_SUMMARIES = _get_optional_env_var("CONTEXT_USE_SUMMARIES", "true").lower() == "true"
+CONTEXT_FULL_TEXT_PASSAGES = _get_int_env_var("CONTEXT_FULL_TEXT_PASSAGES", "2")
+
+# 여러 폴더 연합 검색 (폴더 ID를 쉼표로 구분해 지정): 한 폴더가 차지할 수 있는 검색 결과 비율 (0~1, 0이면 제한 없음)
+# FEDERATED_WARM_MISSING이 켜져 있으면 아직 적재되지 않은 폴더는 이번 질의에서 건너뛰고 백그라운드에서 적재합니다.
+FEDERATED_SOURCE_SHARE = _get_float_env_var("FEDERATED_SOURCE_SHARE", "0.6")
+FEDERATED_WARM_MISSING = _get_optional_env_var("FEDERATED_WARM_MISSING", "true").lower() == "true"
+
+# ChromaDB HNSW 인덱스 설정 (빈 값이면 ChromaDB 기본값을 사용합니다, 새 컬렉션에만 적용)
+CHROMA_HNSW_M = _get_optional_env_var("CHROMA_HNSW_M", "")
+CHROMA_HNSW_CONSTRUCTION_EF = _get_optional_env_var("CHROMA_HNSW_CONSTRUCTION_EF", "")
+CHROMA_HNSW_SEARCH_EF = _get_optional_env_var("CHROMA_HNSW_SEARCH_EF", "")
+
+# 조정 에이전트 빠른 경로 설정
+# 두 에이전트의 판정이 일치하고 종합 위험도가 기준 이하이면 전체 조정 LLM 호출을 생략합니다.
+# 모델을 지정하지 않으면 판정 결과로 정해진 템플릿을 채워 권고안을 만듭니다.
+# 답변 형식이 바뀌므로 기본값은 꺼져 있으며, COORDINATOR_FAST_PATH_ENABLED=true로 켭니다.
+COORDINATOR_FAST_PATH_ENABLED = _get_optional_env_var("COORDINATOR_FAST_PATH_ENABLED", "false").lower() == "true"
+COORDINATOR_FAST_PATH_MAX_RISK = _get_optional_env_var("COORDINATOR_FAST_PATH_MAX_RISK", "낮음")
+COORDINATOR_FAST_PATH_MODEL = _get_optional_env_var("COORDINATOR_FAST_PATH_MODEL", "")
+
+# 파이프라인 체크포인트 SQLite 파일 경로 (기본값은 빈 값으로 체크포인트를 저장하지 않습니다)
+# 실패한 요청을 재시도할 때 이어서 실행하려면 앱 데이터 디렉터리 아래의 경로(예: ./data/checkpoints.sqlite)를 지정합니다.
+CHECKPOINT_DB_PATH = _get_optional_env_var("CHECKPOINT_DB_PATH", "")
+# 완료되지 않은(실패하거나 중단된) 체크포인트를 재개할 수 있도록 보관하는 시간 (초). 지나면 지웁니다.
+CHECKPOINT_TTL_S = _get_float_env_var("CHECKPOINT_TTL_S", "86400")
+
+# 요청 전체 시간 예산과 노드별 마감 시간 (초, 0이면 제한하지 않음)
+PIPELINE_REQUEST_BUDGET_S = _get_float_env_var("PIPELINE_REQUEST_BUDGET_S", "120")
+ROUTER_DEADLINE_S = _get_float_env_var("ROUTER_DEADLINE_S", "10")
+AGENT_DEADLINE_S = _get_float_env_var("AGENT_DEADLINE_S", "45")
+COORDINATOR_DEADLINE_S = _get_float_env_var("COORDINATOR_DEADLINE_S", "45")
+# Gemini 요청 한 번의 제한 시간(초)과 재시도 횟수. 마감 시간이 지나 버려진 호출도 이 시간 안에 끝나 작업 스레드를 돌려줍니다.
+# 기본값은 가장 긴 노드 마감 시간이며, 0이면 제한하지 않습니다.
+LLM_REQUEST_TIMEOUT_S = _get_float_env_var(
+    "LLM_REQUEST_TIMEOUT_S", str(max(ROUTER_DEADLINE_S, AGENT_DEADLINE_S, COORDINATOR_DEADLINE_S))
+)
+LLM_MAX_RETRIES = _get_int_env_var("LLM_MAX_RETRIES", "1")
+
+# 멱등 LLM 호출(라우터, 에이전트 분석) 헤징: 관측 p95가 지나면 같은 요청을 한 번 더 보냅니다.
+HEDGE_REQUESTS = _get_optional_env_var("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MIN_SAMPLES = _get_int_env_var("HEDGE_MIN_SAMPLES", "20")
+
+# 요청 단위 추적: 켜면 요청마다 노드/검색/LLM/Notion 구간 타임라인을 JSON Lines로 기록합니다.
+TRACING_ENABLED = _get_optional_env_var("TRACING_ENABLED", "false").lower() == "true"
+TRACE_EXPORT_PATH = _get_optional_env_var("TRACE_EXPORT_PATH", "./traces/traces.jsonl")
+
+# Prometheus 지표 엔드포인트 포트 (Gradio 서버와 함께 시작, 기본값 0은 시작하지 않음)
+METRICS_PORT = _get_int_env_var("METRICS_PORT", "0")
+# 지표 엔드포인트를 열 주소 (기본값은 로컬에서만 접근, 외부 수집기가 필요하면 0.0.0.0으로 지정)
+METRICS_HOST = _get_optional_env_var("METRICS_HOST", "127.0.0.1")
+
+# 요청 프로파일링: 켜면 모든 요청을, 꺼져 있으면 profile=True로 요청한 실행만 프로파일링합니다.
+# 프로파일러는 "sampling"(호출 스택 샘플링, flamegraph용 접힌 스택) 또는 "cprofile"(결정적 프로파일, pstats)입니다.
+PROFILE_REQUESTS = _get_optional_env_var("PROFILE_REQUESTS", "false").lower() == "true"
+PROFILER = _get_optional_env_var("PROFILER", "sampling")
+PROFILE_OUTPUT_DIR = _get_optional_env_var("PROFILE_OUTPUT_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL_MS = _get_float_env_var("PROFILE_SAMPLE_INTERVAL_MS", "5")
+
+# 채팅 서버 입장 제어: 동시에 실행할 파이프라인 수와 대기열 최대 길이, 대기열에서 기다릴 최대 시간(초, 0이면 제한 없음)
+# 대기열이 가득 차거나 대기 시간이 지나면 "혼잡" 응답을 즉시 돌려줍니다.
+MAX_CONCURRENT_PIPELINES = _get_int_env_var("MAX_CONCURRENT_PIPELINES", "4")
+MAX_QUEUED_REQUESTS = _get_int_env_var("MAX_QUEUED_REQUESTS", "16")
+ADMISSION_QUEUE_TIMEOUT_S = _get_float_env_var("ADMISSION_QUEUE_TIMEOUT_S", "60")
+# 같은 질의(정규화 후)와 폴더 ID로 처리 중인 요청이 있으면 새로 실행하지 않고 그 결과를 함께 받습니다.
+COALESCE_REQUESTS = _get_optional_env_var("COALESCE_REQUESTS", "true").lower() == "true"
+
+# 다중 프로세스 배치: QUERY_WORKERS가 1 이상이면 서버 프로세스는 HTTP만 처리하고,
+# 파이프라인은 질의 작업자 프로세스(각각 WORKER_CONCURRENCY개 동시 처리)에서, 문서 적재는 적재 작업자 하나에서 실행합니다.
+# (flat 백엔드 필요) 질의 작업자는 인덱스를 읽기만 하고, 적재 작업자가 게시한 새 버전을 재시작 없이 읽습니다.
+QUERY_WORKERS = _get_int_env_var("QUERY_WORKERS", "0")
+WORKER_CONCURRENCY = _get_int_env_var("WORKER_CONCURRENCY", "4")
+# 질의 작업자가 적재 작업자에게 폴더 적재를 요청한 뒤 새 버전을 기다리는 최대 시간 (초)
+INGESTION_WAIT_S = _get_float_env_var("INGESTION_WAIT_S", "300")
+
+# 세션 대화 문맥: 직전 턴의 검색 청크와 판정을 세션별로 보관하여 후속 질문에 재사용합니다.
+# 보관하는 세션 수는 MAX_SESSIONS개까지이며, SESSION_TTL_S초 동안 쓰지 않은 세션은 만료합니다.
+SESSION_CONTEXT_ENABLED = _get_optional_env_var("SESSION_CONTEXT_ENABLED", "true").lower() == "true"
+MAX_SESSIONS = _get_int_env_var("MAX_SESSIONS", "1000")
+SESSION_TTL_S = _get_float_env_var("SESSION_TTL_S", "1800")
+# 직전 주제 질의와의 임베딩 유사도가 REUSE 이상이면 검색을 생략하고, EXTEND 이상(또는 "그럼", "그건" 같은 후속 표현)이면
+# 이전 청크에 추가 검색 결과를 보탭니다. 그보다 낮으면 새 주제로 보고 처음부터 검색합니다.
+SESSION_REUSE_SIMILARITY = _get_float_env_var("SESSION_REUSE_SIMILARITY", "0.9")
+SESSION_EXTEND_SIMILARITY = _get_float_env_var("SESSION_EXTEND_SIMILARITY", "0.6")
+
+# 답변 캐시: 같은 질의(정규화 후)와 폴더, 같은 인덱스 버전이면 파이프라인을 실행하지 않고 저장한 결과를 돌려줍니다.
+# 인덱스가 갱신되면 키가 바뀌므로 이전 답변은 쓰이지 않습니다. 이전 턴이 있는 세션의 질의는 캐시하지 않습니다.
+ANSWER_CACHE_ENABLED = _get_optional_env_var("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MAX_ENTRIES = _get_int_env_var("ANSWER_CACHE_MAX_ENTRIES", "500")
+ANSWER_CACHE_TTL_S = _get_float_env_var("ANSWER_CACHE_TTL_S", "86400")
+# 사용자 질의 기록 (JSON Lines, 기본값은 빈 값으로 기록하지 않음). REQUEST_LOG_MAX_BYTES를 넘으면 '.1' 파일로 넘기고 새로 씁니다.
+# 질의 원문이 디스크에 남으므로 운영자가 경로를 지정했을 때만 기록합니다. (캐시 예열의 자주 묻는 질문 집계에 사용)
+REQUEST_LOG_PATH = _get_optional_env_var("REQUEST_LOG_PATH", "")
+REQUEST_LOG_MAX_BYTES = _get_int_env_var("REQUEST_LOG_MAX_BYTES", str(10 * 1024 * 1024))
+# 캐시 예열: 서버 시작 시와 인덱스가 갱신될 때마다 지정한 질문과 최근 자주 들어온 질문을 미리 실행하여 답변 캐시에 넣습니다.
+# 질문 목록은 WARMUP_QUERIES('|'로 구분), WARMUP_QUERIES_FILE(한 줄에 하나), UI 예시 질문,
+# 질의 기록에서 최근 WARMUP_LOG_WINDOW_H시간 동안 많이 들어온 WARMUP_TOP_N개 순서입니다.
+WARMUP_ENABLED = _get_optional_env_var("WARMUP_ENABLED", "false").lower() == "true"
+WARMUP_QUERIES = _get_optional_env_var("WARMUP_QUERIES", "")
+WARMUP_QUERIES_FILE = _get_optional_env_var("WARMUP_QUERIES_FILE", "")
+WARMUP_TOP_N = _get_int_env_var("WARMUP_TOP_N", "20")
+WARMUP_LOG_WINDOW_H = _get_float_env_var("WARMUP_LOG_WINDOW_H", "168")
+# 예열 한 번에 쓸 LLM 호출 수 상한과 동시에 실행할 질문 수 (예산을 넘는 질문은 검색만 미리 실행)
+WARMUP_MAX_LLM_CALLS = _get_int_env_var("WARMUP_MAX_LLM_CALLS", "100")
+WARMUP_CONCURRENCY = _get_int_env_var("WARMUP_CONCURRENCY", "2")
+# 인덱스 갱신을 확인하는 간격 (초)
+WARMUP_CHECK_INTERVAL_S = _get_float_env_var("WARMUP_CHECK_INTERVAL_S", "300")
+
+logger.info("모든 환경 변수가 성공적으로 로드되었습니다.")
+
+def require_setting(key: str) -> str:
+    """
+    서비스를 사용하는 시점에 필수 설정 값을 확인하여 반환합니다.
+    값이 비어 있으면 ConfigurationError를 발생시킵니다.
+    """
+    value = globals().get(key)
+    if not value:
+        raise ConfigurationError(f"필수 환경 변수 '{key}'가 설정되지 않았습니다.")
+    return value
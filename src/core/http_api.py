@@ -0,0 +1,256 @@
+"""
+HTTP API 모듈
+Gradio UI 옆에서 같은 프로세스로 동작하는 JSON/HTTP API를 제공합니다.
+
+- POST /api/query         질의 하나를 실행하고 구조화된 결과를 반환합니다.
+- POST /api/batch         여러 질의를 실행하고 질의별 결과를 입력 순서대로 반환합니다.
+- GET  /api/query/stream  노드 완료와 조정 에이전트 토큰을 server-sent events로 스트리밍합니다.
+- GET  /api/health        상태 확인
+
+모든 요청은 UI와 같은 답변 캐시, 입장 제어(동시 실행 한도, 대기열)와 요청 병합을 거치며,
+같은 프로세스에서 실행되므로 에이전트, 모델 클라이언트, 벡터 DB, 임베딩 캐시, 작업 스레드 풀을 UI와 공유합니다.
+QUERY_WORKERS를 설정하면 파이프라인은 질의 작업자 프로세스에서 실행되고, 이벤트도 작업자에서 그대로 전달됩니다.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.agents.document_manager import split_folder_ids
+from src.config import MAX_CONCURRENT_PIPELINES, WARMUP_ENABLED, ConfigurationError, require_setting
+from src.core.langgraph_pipeline import determine_risk_level
+from src.core.warmup import run_warmup_loop
+from src.core.worker_pool import dispatch_pipeline
+from src.utils.admission import ServerBusy, run_admitted
+from src.utils.answer_cache import lookup_answer, store_answer
+from src.utils.pipeline_events import event_sink
+from src.utils.request_log import record_request
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_LENGTH = 1000
+MAX_BATCH_SIZE = 100
+MAX_FOLDERS_PER_QUERY = 10
+# 혼잡 응답(503)에서 다시 시도하기까지 기다리라고 알려 줄 시간 (초)
+RETRY_AFTER_S = 5
+
+
+class QueryRequest(BaseModel):
+    """질의 하나에 대한 요청 본문"""
+    query: str = Field(..., min_length=1, max_length=MAX_QUERY_LENGTH)
+    folder_id: Optional[str] = Field(None, description="검색할 Google Drive 폴더 ID (기본값: GOOGLE_DRIVE_FOLDER_ID)")
+    folder_ids: Optional[List[str]] = Field(
+        None, max_length=MAX_FOLDERS_PER_QUERY, description="함께 검색할 폴더 ID 목록 (folder_id와 합쳐 연합 검색)"
+    )
+    session_id: Optional[str] = Field(None, description="체크포인트 재개와 후속 질문 문맥용 세션 ID")
+
+
+class BatchRequest(BaseModel):
+    """여러 질의에 대한 요청 본문"""
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    concurrency: int = Field(MAX_CONCURRENT_PIPELINES, ge=1, description="동시에 실행할 질의 수 (입장 제어 한도 이내)")
+
+
+def _resolve_folder_id(folder_id, folder_ids=None):
+    # 여러 폴더는 쉼표로 이어 하나의 폴더 ID 문자열로 파이프라인에 전달합니다. (요청 병합, 체크포인트 키에 그대로 사용)
+    folder_id = ",".join(split_folder_ids([folder_id or "", *(folder_ids or [])]))
+    if folder_id:
+        return folder_id
+    try:
+        return require_setting("GOOGLE_DRIVE_FOLDER_ID")
+    except ConfigurationError:
+        raise HTTPException(status_code=400, detail="folder_id가 없고 GOOGLE_DRIVE_FOLDER_ID도 설정되지 않았습니다.")
+
+
+def build_result(request: QueryRequest, folder_id: str, state: Dict[str, Any], node_timings: Dict[str, float],
+                 elapsed_s: float, coalesced: bool, cached: bool = False) -> Dict[str, Any]:
+    """파이프라인 최종 상태를 API 응답 형식으로 변환합니다."""
+    reviewer_result = state.get("reviewer_result") or {}
+    auditor_result = state.get("auditor_result") or {}
+    return {
+        "query": request.query,
+        "folder_id": folder_id,
+        "router_decision": state.get("router_decision") or None,
+        "risk_level": determine_risk_level(reviewer_result, auditor_result) if reviewer_result or auditor_result else None,
+        "coordinator_path": state.get("coordinator_path") or None,
+        "follow_up": state.get("follow_up") or None,
+        "final_recommendation": state.get("final_recommendation", ""),
+        "reviewer": {
+            "verdict": reviewer_result.get("result"),
+            "error": reviewer_result.get("error"),
+            "analysis": state.get("reviewer_analysis", ""),
+        },
+        "auditor": {
+            "verdict": auditor_result.get("result"),
+            "error": auditor_result.get("error"),
+            "analysis": state.get("auditor_analysis", ""),
+        },
+        "degraded_nodes": state.get("degraded_nodes") or [],
+        "coalesced": coalesced,
+        "cached": cached,
+        "timings": {"total_ms": round(elapsed_s * 1000, 3), "nodes_ms": node_timings},
+    }
+
+
+async def execute_query(request: QueryRequest, coalesce: Optional[bool] = None, on_event=None) -> Dict[str, Any]:
+    """
+    입장 제어를 거쳐 질의 하나를 실행하고 API 응답 형식의 결과를 반환합니다.
+    on_event를 주면 노드 완료, 조정 에이전트 토큰 이벤트를 받습니다. (작업 스레드에서 호출될 수 있음)
+    답변 캐시에 있으면 실행하지 않고 캐시된 결과를 반환하며(이벤트 없음), 자리가 없으면 ServerBusy를 발생시킵니다.
+    """
+    folder_id = _resolve_folder_id(request.folder_id, request.folder_ids)
+    start_time = time.perf_counter()
+    ran_here = False
+    record_request(request.query, folder_id)
+    cache_key, cached_state = lookup_answer(request.query, folder_id, session_id=request.session_id)
+    if cached_state is not None:
+        return build_result(request, folder_id, cached_state, {}, time.perf_counter() - start_time, False, cached=True)
+
+    async def run():
+        nonlocal ran_here
+        ran_here = True
+        node_timings = {}
+
+        def collect(event):
+            if event["event"] == "node_completed":
+                node_timings[event["node"]] = event["elapsed_ms"]
+            if on_event is not None:
+                on_event(event)
+
+        with event_sink(collect):
+            state = await dispatch_pipeline(request.query, folder_id, session_id=request.session_id)
+        return state, node_timings
+
+    # 병합된 요청은 먼저 실행한 요청의 상태와 노드 처리 시간을 함께 받습니다.
+    state, node_timings = await run_admitted(
+        request.query, folder_id, run, coalesce=coalesce, session_id=request.session_id
+    )
+    store_answer(cache_key, state)
+    return build_result(request, folder_id, state, node_timings, time.perf_counter() - start_time, not ran_here)
+
+
+def _busy_response(error):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "busy", "detail": str(error)},
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def create_api_app(warmup_queries=()) -> FastAPI:
+    """
+    HTTP API 애플리케이션을 생성합니다. Gradio UI는 gradio_app.main()에서 이 앱의 '/'에 함께 마운트합니다.
+    WARMUP_ENABLED이면 서버가 시작된 뒤 warmup_queries(UI 예시 질문)와 설정한 질문으로 답변 캐시를 예열합니다.
+    """
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # 예열은 서버의 이벤트 루프에서 실행해야 입장 제어와 요청 병합을 사용자 요청과 공유합니다.
+        warmup_task = asyncio.create_task(run_warmup_loop(list(warmup_queries))) if WARMUP_ENABLED else None
+        try:
+            yield
+        finally:
+            if warmup_task is not None:
+                warmup_task.cancel()
+
+    app = FastAPI(title="학생회 규정 검토 API", docs_url="/api/docs", openapi_url="/api/openapi.json", lifespan=lifespan)
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/api/query")
+    async def query(request: QueryRequest):
+        try:
+            return await execute_query(request)
+        except ServerBusy as e:
+            return _busy_response(e)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"API 질의 처리 중 오류 발생: {e}", exc_info=True)
+            return JSONResponse(status_code=500, content={"error": "internal", "detail": str(e)})
+
+    @app.post("/api/batch")
+    async def batch(request: BatchRequest):
+        # 배치 하나가 대기열을 모두 차지하지 않도록 동시에 입장을 요청하는 질의 수를 제한합니다.
+        semaphore = asyncio.Semaphore(min(request.concurrency, MAX_CONCURRENT_PIPELINES))
+        start_time = time.perf_counter()
+
+        async def run_one(item):
+            async with semaphore:
+                try:
+                    return {"status": "ok", **await execute_query(item)}
+                except ServerBusy as e:
+                    return {"status": "busy", "query": item.query, "error": str(e)}
+                except HTTPException as e:
+                    return {"status": "invalid", "query": item.query, "error": e.detail}
+                except Exception as e:
+                    logger.error(f"배치 질의 처리 중 오류 발생: {e}", exc_info=True)
+                    return {"status": "error", "query": item.query, "error": str(e)}
+
+        results = await asyncio.gather(*(run_one(item) for item in request.queries))
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return {
+            "results": results,
+            "summary": {"total": len(results), **counts},
+            "timings": {"total_ms": round((time.perf_counter() - start_time) * 1000, 3)},
+        }
+
+    @app.get("/api/query/stream")
+    async def query_stream(
+        query: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH),
+        folder_id: Optional[str] = None,
+        folder_ids: Optional[List[str]] = Query(None),
+        session_id: Optional[str] = None,
+    ):
+        request = QueryRequest(query=query, folder_id=folder_id, folder_ids=folder_ids, session_id=session_id)
+        _resolve_folder_id(request.folder_id, request.folder_ids)
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def on_event(event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        async def run():
+            try:
+                # 스트림마다 자기 실행의 이벤트가 필요하므로 병합하지 않습니다.
+                result = await execute_query(request, coalesce=False, on_event=on_event)
+                await events.put({"event": "result", **result})
+            except ServerBusy as e:
+                await events.put({"event": "error", "error": "busy", "detail": str(e)})
+            except Exception as e:
+                logger.error(f"스트리밍 질의 처리 중 오류 발생: {e}", exc_info=True)
+                await events.put({"event": "error", "error": "internal", "detail": str(e)})
+            finally:
+                await events.put(None)
+
+        # 클라이언트가 연결을 끊어도 실행은 끝까지 진행하여 입장 제어의 실행 수와 실제 실행 수가 어긋나지 않게 합니다.
+        task = asyncio.create_task(run())
+
+        async def stream():
+            yield _format_sse({"event": "accepted", "time": time.time(), "query": query})
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield _format_sse(event)
+            await task
+
+        return StreamingResponse(
+            stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    return app
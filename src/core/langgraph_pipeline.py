@@ -1,14 +1,52 @@
-from typing import TypedDict
+from typing import Annotated, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain.prompts import PromptTemplate
+import hashlib
 import logging
-from src.config import GEMINI_API_KEY
+import operator
+import os
+import threading
+import time
+from src.config import (
+    AGENT_DEADLINE_S,
+    CHECKPOINT_DB_PATH,
+    CHECKPOINT_TTL_S,
+    COORDINATOR_DEADLINE_S,
+    PIPELINE_REQUEST_BUDGET_S,
+    ROUTER_DEADLINE_S,
+)
 
 from src.agents.regulation_reviewer import RegulationReviewerAgent
 from src.agents.auditor import AuditorAgent
 from src.agents.coordinator import CoordinatorAgent
+from src.agents.schemas import (
+    combine_risk_level,
+    render_auditor_markdown,
+    render_degraded_recommendation,
+    render_reviewer_markdown,
+)
+from src.utils.deadlines import DeadlineExceeded, hedged_call, node_timeout, run_with_deadline
+from src.utils.metrics import (
+    COORDINATOR_PATHS,
+    PIPELINE_IN_FLIGHT,
+    PIPELINE_REQUEST_DURATION,
+    PIPELINE_REQUESTS,
+    measure_node,
+)
+from src.utils.llm_factory import create_chat_model
 from src.utils.notion_handler import record_result_to_notion
+from src.utils.pipeline_events import evented_node
+from src.utils.profiling import new_request_id, profile_request, profiled_node
+from src.utils.session_store import (
+    classify_follow_up,
+    commit_turn,
+    discard_turn,
+    forget_session,
+    get_prior_turn,
+    stage_documents,
+)
+from src.utils.tracing import span, start_trace, traced_node
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -19,17 +57,22 @@ class AgentState(TypedDict):
     folder_id: str | None
     reviewer_analysis: str
     auditor_analysis: str
+    reviewer_result: dict
+    auditor_result: dict
     final_recommendation: str
+    coordinator_path: str
     router_decision: str
     session_id: str
+    # 세션 안에서 이 요청의 진행 중인 턴을 구분하는 ID (같은 세션의 동시 요청끼리 검색 결과가 섞이지 않도록)
+    turn_id: str
+    # 세션 직전 턴과 비교한 후속 질문 처리 방식 ("reuse", "extend", "new", 세션이 없으면 "")
+    follow_up: str
+    # 요청 마감 시각 (epoch 초, 0이면 제한 없음)
+    deadline_at: float
+    # 마감 시간을 넘겨 간이 결과로 대체된 노드 목록 (노드마다 덧붙임)
+    degraded_nodes: Annotated[list, operator.add]
 
-# 에이전트 인스턴스 생성
-reviewer_agent = RegulationReviewerAgent()
-auditor_agent = AuditorAgent()
-coordinator_agent = CoordinatorAgent()
-
-# 질문 라우팅용 LLM 설정
-query_router_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.0, google_api_key=GEMINI_API_KEY)
+# 질문 라우팅용 프롬프트
 query_router_prompt = PromptTemplate.from_template(
     """
     다음 질문이 '학생회 업무, 규정, 재정, 감사'와 관련이 있으면 'relevant', 아니면 'irrelevant'라고만 답변하세요.
@@ -37,26 +80,93 @@ query_router_prompt = PromptTemplate.from_template(
     답변:
     """
 )
-query_router_chain = query_router_prompt | query_router_llm
+
+# 에이전트와 LLM은 모듈을 가져올 때가 아니라 처음 사용할 때 생성하여 프로세스 안에서 공유합니다.
+# (앱 시작 시간을 줄이고, 요청을 처리하지 않는 실행에서는 모델 클라이언트를 만들지 않습니다)
+_component_factories = {
+    "reviewer_agent": RegulationReviewerAgent,
+    "auditor_agent": AuditorAgent,
+    "coordinator_agent": CoordinatorAgent,
+    "query_router_llm": lambda: create_chat_model("gemini-2.5-flash", temperature=0.0),
+    "query_router_chain": lambda: query_router_prompt | get_component("query_router_llm"),
+    "general_llm": lambda: create_chat_model("gemini-2.5-flash", temperature=0.7),
+}
+_component_lock = threading.RLock()
+
+def get_component(name):
+    """이름에 해당하는 에이전트나 LLM을 반환합니다. 처음 호출할 때 한 번만 생성합니다."""
+    component = globals().get(name)
+    if component is not None:
+        return component
+    with _component_lock:
+        component = globals().get(name)
+        if component is None:
+            component = _component_factories[name]()
+            globals()[name] = component
+    return component
+
+def __getattr__(name):
+    # `from src.core.langgraph_pipeline import coordinator_agent` 같은 기존 사용법을 유지합니다.
+    if name in _component_factories:
+        return get_component(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def load_session(state: AgentState) -> AgentState:
+    """세션의 직전 턴과 비교하여 후속 질문인지, 이전 검색 결과를 재사용할 수 있는지 판단합니다."""
+    follow_up = classify_follow_up(state.get("session_id"), state.get("turn_id"), state["folder_id"], state["query"])
+    if follow_up:
+        print(f"세션 문맥 판단: '{follow_up}' (질문: '{state['query']}')")
+    return {"follow_up": follow_up}
 
 def route_query(state: AgentState) -> str:
     """사용자 질의의 학생회 업무 관련성을 판단하는 라우터"""
+    follow_up = state.get("follow_up")
+    if follow_up == "reuse":
+        # 직전 턴(관련 질의)과 같은 주제이므로 라우터 LLM을 호출하지 않습니다.
+        print(f"라우터 결정: 'relevant' (이전 주제의 후속 질문: '{state['query']}')")
+        return {"router_decision": "relevant"}
+    
     print("질문 라우팅 에이전트가 실행됩니다...")
-    decision = query_router_chain.invoke({"query": state["query"]}).content.strip().lower()
+    query_router_chain = get_component("query_router_chain")
+    router_query = state["query"]
+    prior = get_prior_turn(state.get("session_id"), follow_up)
+    if prior:
+        # "그럼 승인 절차는요?"처럼 앞 대화에 기대는 질문은 직전 질문과 함께 판단해야 관련성을 알 수 있습니다.
+        router_query = f"{prior['last_query']}\n{state['query']}"
+    try:
+        with span("llm.router", model=get_component("query_router_llm").model):
+            response = run_with_deadline(
+                hedged_call,
+                node_timeout(ROUTER_DEADLINE_S, state.get("deadline_at")),
+                "router_llm",
+                lambda: query_router_chain.invoke({"query": router_query}),
+            )
+    except DeadlineExceeded as e:
+        # 관련 질의를 일반 답변으로 보내는 것보다 전체 분석을 하는 편이 안전하므로 relevant로 처리합니다.
+        logging.warning(f"라우터 시간 초과, relevant로 처리합니다: {e}")
+        return {"router_decision": "relevant", "degraded_nodes": ["route_query"]}
+    decision = response.content.strip().lower()
     print(f"라우터 결정: '{decision}' (질문: '{state['query']}')")
     return {"router_decision": decision}
 
 def handle_irrelevant_query(state: AgentState) -> str:
     """학생회 업무와 관련 없는 질문에 대한 일반적인 응답 처리"""
     print(f"일반 질문 처리 시작: '{state['query']}'")
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    
-    general_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, google_api_key=GEMINI_API_KEY)
+    general_llm = get_component("general_llm")
     
     try:
-        response = general_llm.invoke(state["query"]).content
+        with span("llm.general", model=general_llm.model):
+            response = run_with_deadline(
+                general_llm.invoke, node_timeout(AGENT_DEADLINE_S, state.get("deadline_at")), state["query"]
+            ).content
         print(f"일반 질문 답변 완료")
         return {"final_recommendation": response}
+    except DeadlineExceeded as e:
+        print(f"일반 질문 답변 시간 초과: {e}")
+        return {
+            "final_recommendation": "⚠️ 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
+            "degraded_nodes": ["irrelevant_query_branch"]
+        }
     except Exception as e:
         print(f"일반 질문 답변 오류: {e}")
         return {"final_recommendation": "죄송합니다. 현재 답변을 처리할 수 없습니다."}
@@ -65,108 +175,121 @@ def run_reviewer(state: AgentState) -> AgentState:
     """규정 검토 에이전트 실행"""
     print("규정 검토 에이전트가 실행됩니다...")
     
+    degraded_nodes = []
     try:
-        reviewer_result = reviewer_agent.review_and_analyze(state["query"], state["folder_id"])
-        return {"reviewer_analysis": reviewer_result}
+        reviewer_result = run_with_deadline(
+            get_component("reviewer_agent").review_and_analyze,
+            node_timeout(AGENT_DEADLINE_S, state.get("deadline_at")),
+            state["query"], state["folder_id"],
+            get_prior_turn(state.get("session_id"), state.get("follow_up"))
+        )
+        # 검색 청크는 상태(체크포인트)에 넣지 않고 세션 문맥에만 보관합니다.
+        stage_documents(state.get("session_id"), state.get("turn_id"), reviewer_result.pop("documents", None))
+    except DeadlineExceeded as e:
+        logging.warning(f"규정 검토 에이전트 시간 초과: {e}")
+        reviewer_result = {"error": f"⚠️ 규정 검토 분석이 제한 시간 안에 끝나지 않았습니다. ({e})"}
+        degraded_nodes.append("run_reviewer")
     except Exception as e:
         logging.error(f"규정 검토 에이전트 실행 실패: {e}")
-        return {"reviewer_analysis": f"규정 검토 분석 실패: {str(e)}"}
+        reviewer_result = {"error": f"규정 검토 분석 실패: {str(e)}"}
+    
+    if "result" in reviewer_result:
+        reviewer_analysis = render_reviewer_markdown(reviewer_result["result"])
+    else:
+        reviewer_analysis = reviewer_result["error"]
+    return {"reviewer_result": reviewer_result, "reviewer_analysis": reviewer_analysis, "degraded_nodes": degraded_nodes}
 
 def run_auditor(state: AgentState) -> AgentState:
     """감사 에이전트 실행"""
     print("감사 에이전트가 실행됩니다...")
     
+    degraded_nodes = []
     try:
-        auditor_result = auditor_agent.review_and_audit(state["query"], state["folder_id"])
-        return {"auditor_analysis": auditor_result}
+        auditor_result = run_with_deadline(
+            get_component("auditor_agent").review_and_audit,
+            node_timeout(AGENT_DEADLINE_S, state.get("deadline_at")),
+            state["query"], state["folder_id"],
+            get_prior_turn(state.get("session_id"), state.get("follow_up"))
+        )
+        stage_documents(state.get("session_id"), state.get("turn_id"), auditor_result.pop("documents", None))
+    except DeadlineExceeded as e:
+        logging.warning(f"감사 에이전트 시간 초과: {e}")
+        auditor_result = {"error": f"⚠️ 감사 분석이 제한 시간 안에 끝나지 않았습니다. ({e})"}
+        degraded_nodes.append("run_auditor")
     except Exception as e:
         logging.error(f"감사 에이전트 실행 실패: {e}")
-        return {"auditor_analysis": f"감사 분석 실패: {str(e)}"}
+        auditor_result = {"error": f"감사 분석 실패: {str(e)}"}
+    
+    if "result" in auditor_result:
+        auditor_analysis = render_auditor_markdown(auditor_result["result"])
+    else:
+        auditor_analysis = auditor_result["error"]
+    return {"auditor_result": auditor_result, "auditor_analysis": auditor_analysis, "degraded_nodes": degraded_nodes}
 
 def run_coordinator(state: AgentState) -> AgentState:
-    """조정 에이전트 실행 및 Notion 기록"""
+    """
+    조정 에이전트 실행
+    최종 권고안 도출에 실패하면 예외를 발생시켜, 체크포인트에서 이 노드부터 다시 실행할 수 있게 합니다.
+    마감 시간을 넘기면 두 에이전트의 판정만으로 간이 권고안을 만들고 degraded로 표시합니다.
+    """
     print("조정 에이전트가 실행됩니다...")
     
     try:
-        final_result = coordinator_agent.synthesize_and_coordinate(
+        final_result = run_with_deadline(
+            get_component("coordinator_agent").synthesize_and_coordinate,
+            node_timeout(COORDINATOR_DEADLINE_S, state.get("deadline_at")),
             initial_query=state["query"],
-            reviewer_analysis=state["reviewer_analysis"],
-            auditor_analysis=state["auditor_analysis"]
+            reviewer_result=state["reviewer_result"],
+            auditor_result=state["auditor_result"]
         )
-        
-        # 위험도 자동 판정
-        risk_level = determine_risk_level(state["reviewer_analysis"], state["auditor_analysis"])
-        
-        # Notion에 분석 결과 기록
-        notion_data = {
-            "title": f"[{state['query'][:20]}] 분석 결과",
-            "content": final_result.get("result", "분석 실패"),
-            "risk_level": risk_level
-        }
-        
-        try:
-            record_result_to_notion(notion_data)
-        except Exception as notion_error:
-            logging.warning(f"Notion 기록 실패: {notion_error}")
-        
+    except DeadlineExceeded as e:
+        logging.warning(f"조정 에이전트 시간 초과, 간이 권고안으로 대체합니다: {e}")
+        COORDINATOR_PATHS.inc(path="degraded")
         return {
-            "final_recommendation": final_result.get("result", final_result.get("error")), 
-            "reviewer_analysis": state["reviewer_analysis"], 
-            "auditor_analysis": state["auditor_analysis"]
+            "final_recommendation": render_degraded_recommendation(state["reviewer_result"], state["auditor_result"]),
+            "coordinator_path": "degraded",
+            "degraded_nodes": ["run_coordinator"]
         }
-        
-    except Exception as e:
-        logging.error(f"조정 에이전트 실행 실패: {e}")
-        return {"final_recommendation": f"최종 분석 실패: {str(e)}"}
-
-def determine_risk_level(reviewer_analysis: str, auditor_analysis: str) -> str:
-    """규정 검토와 감사 분석 결과를 바탕으로 위험도 자동 판정"""
-    
-    # 분석 결과가 없는 경우
-    if not reviewer_analysis or not auditor_analysis:
-        return "분석 불가"
-    
-    # 키워드 기반 위험도 판정
-    high_risk_keywords = [
-        "위반 가능성 높음", "위험도: 높음", "위험도 높음",
-        "감사 처분 가능성 높음", "처분 가능성 높음", "가능성 높음",
-        "중대한 위반", "심각한", "경고", "제재", "처분"
-    ]
-    
-    medium_risk_keywords = [
-        "위반 가능성 낮음", "위험도: 보통", "위험도 보통", 
-        "감사 처분 가능성 낮음", "처분 가능성 낮음", "가능성 낮음",
-        "주의 필요", "검토 필요", "확인 필요"
-    ]
-    
-    low_risk_keywords = [
-        "위반 없음", "위험도: 낮음", "위험도 낮음",
-        "가능성 없음", "처분 가능성 없음", "문제없음", "준수"
-    ]
-    
-    # 전체 분석 텍스트
-    full_text = (reviewer_analysis + " " + auditor_analysis).lower()
-    
-    # 고위험 키워드 카운트
-    high_risk_count = sum(1 for keyword in high_risk_keywords if keyword.lower() in full_text)
-    medium_risk_count = sum(1 for keyword in medium_risk_keywords if keyword.lower() in full_text)
-    low_risk_count = sum(1 for keyword in low_risk_keywords if keyword.lower() in full_text)
-    
-    # 위험도 판정 로직
-    if high_risk_count >= 2:
-        return "높음"
-    elif high_risk_count >= 1 and medium_risk_count >= 1:
-        return "높음"  
-    elif high_risk_count >= 1:
-        return "보통"
-    elif medium_risk_count >= 2:
-        return "보통"
-    elif medium_risk_count >= 1:
-        return "낮음"
-    elif low_risk_count >= 1:
-        return "낮음"
-    else:
-        return "분석 필요"
+    if "error" in final_result:
+        logging.error(f"조정 에이전트 실행 실패: {final_result['error']}")
+        raise RuntimeError(final_result["error"])
+    
+    COORDINATOR_PATHS.inc(path=final_result.get("path") or "unknown")
+    return {
+        "final_recommendation": final_result["result"],
+        "coordinator_path": final_result.get("path", "")
+    }
+
+def record_to_notion(state: AgentState) -> AgentState:
+    """분석 결과를 Notion에 기록 (기록 실패는 결과에 영향을 주지 않습니다)"""
+    # 구조화된 판정 결과로 위험도 판정
+    risk_level = determine_risk_level(state["reviewer_result"], state["auditor_result"])
+    
+    notion_data = {
+        "title": f"[{state['query'][:20]}] 분석 결과",
+        "content": state["final_recommendation"],
+        "risk_level": risk_level,
+        # upsert 방식(NOTION_WRITE_MODE=upsert)의 페이지 키
+        "query": state["query"],
+        "folder_id": state["folder_id"],
+    }
+    
+    try:
+        record_result_to_notion(notion_data)
+    except Exception as notion_error:
+        logging.warning(f"Notion 기록 실패: {notion_error}")
+    
+    return {}
+
+def determine_risk_level(reviewer_result: dict, auditor_result: dict) -> str:
+    """
+    규정 검토와 감사 에이전트의 구조화된 판정 결과로 위험도를 판정합니다.
+    두 판정 중 더 높은 위험도를 사용하며, 판정이 모두 없으면 "분석 불가"를 반환합니다.
+    """
+    return combine_risk_level(
+        (reviewer_result or {}).get("result"),
+        (auditor_result or {}).get("result"),
+    )
 
 def route_agents(state: AgentState) -> str:
     """라우터 결정에 따른 워크플로우 분기 처리"""
@@ -180,67 +303,191 @@ def route_agents(state: AgentState) -> str:
         print("→ irrelevant_query_branch로 이동")  
         return "irrelevant_query_branch"
 
-def run_parallel_agents(state: AgentState) -> AgentState:
-    """규정 검토 에이전트와 감사 에이전트를 순차 실행하여 상태 업데이트"""
-    print("에이전트 순차적 실행 시작...")
-    
-    # 두 에이전트 순차 실행
-    reviewer_result = run_reviewer(state)
-    auditor_result = run_auditor(state)
-    
-    # 상태 업데이트
-    updated_state = {
-        **state,
-        "reviewer_analysis": reviewer_result.get("reviewer_analysis", ""),
-        "auditor_analysis": auditor_result.get("auditor_analysis", "")
-    }
-    
-    return updated_state
+def _instrument_node(name, fn):
+    return evented_node(name, traced_node(name, measure_node(name, profiled_node(name, fn))))
+
 
-def create_graph():
-    """LangGraph 워크플로우 생성 및 구성"""
+def create_graph(checkpointer=None):
+    """
+    LangGraph 워크플로우 생성 및 구성
+    
+    Args:
+        checkpointer: 노드 완료 시점마다 상태를 저장할 LangGraph 체크포인터. None이면 저장하지 않습니다.
+    """
     workflow = StateGraph(AgentState)
     
-    # 워크플로우 노드 추가
-    workflow.add_node("route_query", route_query)
-    workflow.add_node("irrelevant_query_branch", handle_irrelevant_query)
-    workflow.add_node("relevant_query_branch", run_parallel_agents)
-    workflow.add_node("run_coordinator", run_coordinator)
+    # 워크플로우 노드 추가 (노드 단위로 체크포인트가 저장되도록 단계를 나눕니다)
+    # 노드마다 처리 시간 지표를 기록하고, 추적이 켜져 있으면 'node.<이름>' span도 기록합니다.
+    # 프로파일링 중인 요청이면 노드를 실행하는 작업 스레드도 프로파일에 포함합니다.
+    # 이벤트 콜백이 등록된 요청(HTTP 스트리밍 등)에는 노드가 끝날 때마다 'node_completed' 이벤트를 보냅니다.
+    workflow.add_node("load_session", _instrument_node("load_session", load_session))
+    workflow.add_node("route_query", _instrument_node("route_query", route_query))
+    workflow.add_node("irrelevant_query_branch", _instrument_node("irrelevant_query_branch", handle_irrelevant_query))
+    workflow.add_node("run_reviewer", _instrument_node("run_reviewer", run_reviewer))
+    workflow.add_node("run_auditor", _instrument_node("run_auditor", run_auditor))
+    workflow.add_node("run_coordinator", _instrument_node("run_coordinator", run_coordinator))
+    workflow.add_node("record_to_notion", _instrument_node("record_to_notion", record_to_notion))
     
     # 워크플로우 흐름 정의
-    workflow.set_entry_point("route_query")
+    workflow.set_entry_point("load_session")
+    workflow.add_edge("load_session", "route_query")
     workflow.add_conditional_edges(
         "route_query",
         route_agents,
         {
-            "relevant_query_branch": "relevant_query_branch",
+            "relevant_query_branch": "run_reviewer",
             "irrelevant_query_branch": "irrelevant_query_branch",
         },
     )
-    workflow.add_edge("relevant_query_branch", "run_coordinator")
+    workflow.add_edge("run_reviewer", "run_auditor")
+    workflow.add_edge("run_auditor", "run_coordinator")
+    workflow.add_edge("run_coordinator", "record_to_notion")
     workflow.add_edge("irrelevant_query_branch", END)
-    workflow.add_edge("run_coordinator", END)
+    workflow.add_edge("record_to_notion", END)
     
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
     return app
 
 
-async def run_agent_pipeline(query: str, folder_id: str | None = None):
-    """멀티에이전트 파이프라인 실행"""
-    app = create_graph()
+def make_thread_id(session_id: str, query: str, folder_id: str | None) -> str:
+    """
+    세션 ID와 질의, 폴더 ID로 체크포인트 스레드 ID를 만듭니다.
+    같은 세션에서 같은 질의를 다시 보내면(재시도) 같은 스레드로 이어집니다.
+    """
+    request_hash = hashlib.sha256(f"{folder_id or ''}\n{query}".encode("utf-8")).hexdigest()[:16]
+    return f"{session_id}:{request_hash}"
+
+
+async def _touch_thread(checkpointer, thread_id: str):
+    """스레드의 마지막 사용 시각을 기록하고, CHECKPOINT_TTL_S가 지나도록 재개되지 않은 스레드를 지웁니다."""
+    async with checkpointer.lock:
+        await checkpointer.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        async with checkpointer.conn.execute(
+            "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ? AND thread_id != ?",
+            (time.time() - CHECKPOINT_TTL_S, thread_id),
+        ) as cursor:
+            expired = [row[0] for row in await cursor.fetchall()]
+        await checkpointer.conn.execute(
+            "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)", (thread_id, time.time())
+        )
+        await checkpointer.conn.commit()
+    for expired_thread in expired:
+        await _delete_thread(checkpointer, expired_thread)
+    if expired:
+        logging.info(f"만료된 체크포인트 스레드 {len(expired)}개를 지웠습니다.")
+
+
+async def _delete_thread(checkpointer, thread_id: str):
+    await checkpointer.adelete_thread(thread_id)
+    async with checkpointer.lock:
+        await checkpointer.conn.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (thread_id,))
+        await checkpointer.conn.commit()
+
+
+async def _invoke_with_checkpoint(query: str, folder_id: str | None, session_id: str, turn_id: str):
+    """
+    체크포인트 DB를 열고, 같은 요청의 이전 실행이 중간에 끝났으면 마지막으로 완료된 노드 다음부터 이어서 실행합니다.
+    완료된 실행의 스레드는 지우므로, 같은 질의를 다시 보내면 파이프라인을 처음부터 다시 실행합니다.
+    (인덱스가 갱신된 뒤에도 이전 답변을 돌려주지 않도록)
+    """
+    checkpoint_dir = os.path.dirname(os.path.abspath(CHECKPOINT_DB_PATH))
+    os.makedirs(checkpoint_dir, exist_ok=True)
     
-    initial_state = {
+    async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB_PATH) as checkpointer:
+        app = create_graph(checkpointer)
+        thread_id = make_thread_id(session_id, query, folder_id)
+        config = {"configurable": {"thread_id": thread_id}}
+        await _touch_thread(checkpointer, thread_id)
+        
+        snapshot = await app.aget_state(config)
+        if snapshot.values and snapshot.next:
+            # 이전 실행이 중간에 실패함: 완료된 노드는 건너뛰고 남은 노드만 실행
+            logging.info(f"체크포인트에서 파이프라인을 재개합니다. (다음 노드: {', '.join(snapshot.next)})")
+            # 재시도는 새 요청이므로 시간 예산을 다시 부여합니다.
+            await app.aupdate_state(config, {"deadline_at": _new_deadline()})
+            final_state = await app.ainvoke(None, config)
+        else:
+            if snapshot.values:
+                # 이전 버전에서 남은 완료된 스레드
+                await checkpointer.adelete_thread(thread_id)
+            final_state = await app.ainvoke(_initial_state(query, folder_id, session_id, turn_id), config)
+        
+        # 완료된 스레드는 재개할 일이 없으므로 지웁니다. (실패한 실행의 스레드만 남음)
+        await _delete_thread(checkpointer, thread_id)
+        return final_state
+
+
+def _initial_state(query: str, folder_id: str | None, session_id: str, turn_id: str) -> dict:
+    return {
         "query": query,
         "folder_id": folder_id,
         "reviewer_analysis": "",
         "auditor_analysis": "",
+        "reviewer_result": {},
+        "auditor_result": {},
         "final_recommendation": "",
+        "coordinator_path": "",
         "router_decision": "",
-        "session_id": ""
+        "session_id": session_id,
+        "turn_id": turn_id,
+        "follow_up": "",
+        "deadline_at": _new_deadline(),
+        "degraded_nodes": []
     }
 
+
+def _new_deadline() -> float:
+    """지금부터 요청 시간 예산이 끝나는 시각을 반환합니다. 예산이 0이면 제한하지 않습니다."""
+    return time.time() + PIPELINE_REQUEST_BUDGET_S if PIPELINE_REQUEST_BUDGET_S > 0 else 0.0
+
+
+async def run_agent_pipeline(
+    query: str, folder_id: str | None = None, session_id: str | None = None, profile: bool | None = None,
+    new_conversation: bool = False
+):
+    """
+    멀티에이전트 파이프라인 실행
+    
+    session_id가 주어지고 CHECKPOINT_DB_PATH가 설정되어 있으면 노드마다 체크포인트를 저장하므로,
+    실패하거나 타임아웃된 요청을 같은 session_id로 다시 보내면 마지막으로 완료된 노드부터 이어서 실행합니다.
+    
+    session_id가 주어지면 직전 턴의 검색 청크와 판정을 세션 문맥으로 보관하여 후속 질문에 재사용합니다.
+    (SESSION_CONTEXT_ENABLED) new_conversation이 True이면 이전 문맥을 지우고 새 대화로 시작합니다.
+    
+    profile이 True이면(None이면 PROFILE_REQUESTS 설정을 따름) 이 실행을 프로파일링하여 PROFILE_OUTPUT_DIR에
+    요청 ID 이름으로 저장하고, 저장한 파일 경로를 결과의 "profile_files"에 담아 반환합니다.
+    """
+    start_time = time.perf_counter()
+    # 프로파일 파일 이름과 세션의 진행 중인 턴 ID로 함께 씁니다.
+    request_id = new_request_id()
+    if new_conversation:
+        forget_session(session_id)
+    PIPELINE_IN_FLIGHT.inc()
     try:
-        final_state = await app.ainvoke(initial_state)
-        return final_state
-    except Exception as e:
+        with profile_request(request_id, enabled=profile, query=query[:100], folder_id=folder_id) as request_profile:
+            with start_trace("pipeline", query=query[:100], folder_id=folder_id, session_id=session_id):
+                if session_id and CHECKPOINT_DB_PATH:
+                    final_state = await _invoke_with_checkpoint(query, folder_id, session_id, request_id)
+                else:
+                    app = create_graph()
+                    final_state = await app.ainvoke(_initial_state(query, folder_id, session_id or "", request_id))
+    except Exception:
+        PIPELINE_REQUESTS.inc(status="error")
+        if not CHECKPOINT_DB_PATH:
+            discard_turn(session_id, request_id)
+        # 체크포인트가 있으면 재시도가 이전 실행의 turn_id로 이어서 실행하므로, 진행 중인 턴을 남겨 두었다가
+        # 재개된 실행이 끝날 때 반영합니다. (재시도하지 않은 턴은 세션 만료나 세션별 상한으로 정리됨)
         raise
+    finally:
+        PIPELINE_IN_FLIGHT.dec()
+    
+    commit_turn(session_id, final_state)
+    PIPELINE_REQUESTS.inc(status="degraded" if final_state.get("degraded_nodes") else "ok")
+    PIPELINE_REQUEST_DURATION.observe(
+        time.perf_counter() - start_time, route=final_state.get("router_decision") or "unknown"
+    )
+    if request_profile is not None:
+        final_state = {**final_state, "profile_files": request_profile.paths}
+    return final_state
@@ -0,0 +1,178 @@
+"""
+캐시 예열 모듈
+서버 시작 직후와 인덱스가 갱신될 때마다 자주 묻는 질문을 미리 실행하여 답변 캐시를 채웁니다. (WARMUP_ENABLED)
+
+- 질문 목록: WARMUP_QUERIES, WARMUP_QUERIES_FILE, UI 예시 질문, 질의 기록에서 최근 자주 들어온 질문(WARMUP_TOP_N) 순서이며
+  정규화한 질의와 폴더가 같으면 한 번만 실행합니다.
+- 예산: 한 번 예열할 때 LLM 호출을 WARMUP_MAX_LLM_CALLS까지만 씁니다. 질문마다 최대 호출 수를 먼저 잡아 두고
+  끝난 뒤 최종 상태로 추정한 실제 호출 수와의 차이를 돌려받습니다. 예산을 넘는 질문은 검색만 미리 실행하여
+  질의 임베딩(EMBEDDING_CACHE_PATH)과 인덱스 페이지를 데워 둡니다.
+- 동시성: WARMUP_CONCURRENCY개까지 동시에 실행하며, 사용자 요청과 같은 입장 제어를 거치므로 서버의 동시 실행 한도를
+  넘지 않습니다. 같은 질문을 사용자가 보내면 요청 병합으로 예열 실행의 결과를 함께 받습니다. 대기열이 가득 차면 건너뜁니다.
+- 인덱스 갱신: WARMUP_CHECK_INTERVAL_S초마다 예열한 폴더들의 인덱스 버전을 확인하여 바뀌었으면 다시 예열합니다.
+  (답변 캐시 키에 인덱스 버전이 들어가므로 갱신 전의 답변은 더 이상 쓰이지 않습니다)
+"""
+
+import asyncio
+import logging
+from collections import Counter
+
+from src.config import (
+    COORDINATOR_FAST_PATH_MODEL,
+    GOOGLE_DRIVE_FOLDER_ID,
+    WARMUP_CHECK_INTERVAL_S,
+    WARMUP_CONCURRENCY,
+    WARMUP_LOG_WINDOW_H,
+    WARMUP_MAX_LLM_CALLS,
+    WARMUP_QUERIES,
+    WARMUP_QUERIES_FILE,
+    WARMUP_TOP_N,
+)
+from src.core.worker_pool import dispatch_pipeline
+from src.utils.admission import ServerBusy, normalize_query, run_admitted
+from src.utils.answer_cache import index_fingerprint, lookup_answer, store_answer
+from src.utils.metrics import WARMUP_LLM_CALLS, WARMUP_RESULTS, WARMUP_RUNS
+from src.utils.request_log import frequent_queries
+
+logger = logging.getLogger(__name__)
+
+# 관련 질의 하나가 쓰는 최대 LLM 호출 수 (질문 분류, 규정 검토, 감사 분석, 종합 권고)
+MAX_LLM_CALLS_PER_QUERY = 4
+
+
+def estimate_llm_calls(final_state):
+    """파이프라인 최종 상태로 실제 LLM 호출 수를 추정합니다. (작업자 프로세스에서 실행한 경우에도 알 수 있도록)"""
+    if final_state.get("router_decision") != "relevant":
+        # 질문 분류 + 일반 답변
+        return 2
+    calls = 3
+    path = final_state.get("coordinator_path")
+    if path == "full_path" or (path == "fast_path" and COORDINATOR_FAST_PATH_MODEL):
+        calls += 1
+    return calls
+
+
+def _configured_queries():
+    queries = [query.strip() for query in WARMUP_QUERIES.split("|") if query.strip()]
+    if WARMUP_QUERIES_FILE:
+        try:
+            with open(WARMUP_QUERIES_FILE, "r", encoding="utf-8") as f:
+                queries.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        except OSError as e:
+            logger.warning(f"예열 질문 파일을 읽지 못했습니다: {e}")
+    return queries
+
+
+def collect_warmup_queries(extra_queries=(), folder_id=None):
+    """
+    예열할 (질문, 폴더 ID) 목록을 우선순위 순서로 만듭니다.
+    지정한 질문과 예시 질문은 folder_id(기본값: GOOGLE_DRIVE_FOLDER_ID)로, 질의 기록의 질문은 기록된 폴더로 실행합니다.
+    """
+    folder_id = folder_id or GOOGLE_DRIVE_FOLDER_ID
+    candidates = []
+    if folder_id:
+        candidates.extend((query, folder_id) for query in [*_configured_queries(), *extra_queries])
+    for entry in frequent_queries(WARMUP_TOP_N, WARMUP_LOG_WINDOW_H * 3600):
+        if entry["folder_id"]:
+            candidates.append((entry["query"], entry["folder_id"]))
+
+    seen = set()
+    entries = []
+    for query, folder in candidates:
+        key = (normalize_query(query), folder)
+        if key[0] and key not in seen:
+            seen.add(key)
+            entries.append((query, folder))
+    return entries
+
+
+def warm_retrieval(query, folder_id):
+    """에이전트와 같은 조건으로 검색만 실행합니다. 아직 적재되지 않은 폴더는 건너뜁니다. (적재는 하지 않음)"""
+    from src.utils.document_types import AUDIT_DOC_TYPES, REGULATION_DOC_TYPES
+    from src.utils.vector_db_manager import count_documents, search_documents_from_db
+
+    for folder in folder_id.split(","):
+        collection_name = f"regulations_{folder.strip()}"
+        if not count_documents(collection_name):
+            continue
+        search_documents_from_db(query, collection_name, k=5, doc_types=REGULATION_DOC_TYPES)
+        search_documents_from_db(query, collection_name, k=3, doc_types=AUDIT_DOC_TYPES)
+
+
+async def warm_up(entries, max_llm_calls=WARMUP_MAX_LLM_CALLS, concurrency=WARMUP_CONCURRENCY):
+    """
+    질문 목록을 미리 실행하여 답변 캐시를 채웁니다. 예산을 넘는 질문은 검색만 실행합니다.
+
+    Args:
+        entries (list): (질문, 폴더 ID) 목록. 앞에 있을수록 먼저 예산을 씁니다.
+        max_llm_calls (int): 이번 예열에서 쓸 LLM 호출 수 상한.
+        concurrency (int): 동시에 실행할 질문 수.
+
+    Returns:
+        dict: 결과별 질문 수와 추정 LLM 호출 수 ({"answered", "cached", "retrieval", "busy", "failed", "llm_calls"}).
+    """
+    remaining = max_llm_calls
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = Counter()
+    llm_calls = 0
+
+    async def warm_one(query, folder_id):
+        nonlocal remaining, llm_calls
+        async with semaphore:
+            key, cached = lookup_answer(query, folder_id)
+            if cached is not None:
+                results["cached"] += 1
+                return
+            if key is None or remaining < MAX_LLM_CALLS_PER_QUERY:
+                await asyncio.to_thread(warm_retrieval, query, folder_id)
+                results["retrieval"] += 1
+                return
+
+            remaining -= MAX_LLM_CALLS_PER_QUERY
+            try:
+                final_state = await run_admitted(query, folder_id, lambda: dispatch_pipeline(query, folder_id))
+            except ServerBusy:
+                remaining += MAX_LLM_CALLS_PER_QUERY
+                results["busy"] += 1
+                return
+            except Exception as e:
+                # 실패한 실행이 쓴 호출 수는 알 수 없으므로 잡아 둔 예산을 돌려받지 않습니다.
+                logger.warning(f"예열 질문 실행 실패 ('{query[:30]}'): {e}")
+                results["failed"] += 1
+                return
+            calls = estimate_llm_calls(final_state)
+            remaining += MAX_LLM_CALLS_PER_QUERY - calls
+            llm_calls += calls
+            store_answer(key, final_state)
+            results["answered"] += 1
+
+    await asyncio.gather(*(warm_one(query, folder_id) for query, folder_id in entries))
+    for result, count in results.items():
+        WARMUP_RESULTS.inc(count, result=result)
+    WARMUP_LLM_CALLS.inc(llm_calls)
+    return {**{name: results[name] for name in ("answered", "cached", "retrieval", "busy", "failed")}, "llm_calls": llm_calls}
+
+
+async def run_warmup_loop(extra_queries=(), check_interval_s=WARMUP_CHECK_INTERVAL_S):
+    """서버가 시작되면 한 번 예열하고, 예열한 폴더의 인덱스 버전이 바뀔 때마다 다시 예열합니다."""
+    fingerprints = None
+    reason = "startup"
+    while True:
+        try:
+            entries = collect_warmup_queries(extra_queries)
+            folders = sorted({folder for _, folder in entries})
+            current = await asyncio.to_thread(lambda: {folder: index_fingerprint(folder) for folder in folders})
+            if current != fingerprints:
+                if entries:
+                    logger.info(f"답변 캐시를 예열합니다. (질문 {len(entries)}개, 사유: {reason})")
+                    WARMUP_RUNS.inc(reason=reason)
+                    summary = await warm_up(entries)
+                    logger.info(f"답변 캐시 예열 완료: {summary}")
+                # 예열 중에 폴더가 처음 적재되었을 수 있으므로 예열을 마친 뒤의 버전을 기준으로 삼습니다.
+                fingerprints = await asyncio.to_thread(lambda: {folder: index_fingerprint(folder) for folder in folders})
+                reason = "index_sync"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"답변 캐시 예열 중 오류 발생: {e}", exc_info=True)
+        await asyncio.sleep(check_interval_s)
@@ -0,0 +1,437 @@
+"""
+다중 프로세스 작업자 모듈
+서버 프로세스(Gradio UI, HTTP API, 입장 제어)는 요청만 받고, 파이프라인은 질의 작업자 프로세스에서 실행합니다.
+
+- 질의 작업자 (QUERY_WORKERS개): 각자 이벤트 루프에서 파이프라인을 최대 WORKER_CONCURRENCY개까지 동시에 실행합니다.
+  벡터 인덱스는 읽기만 하며, 적재 작업자가 새 버전을 게시하면 다음 검색부터 재시작 없이 새 버전을 사용합니다.
+  비어 있는 폴더에 대한 질의는 직접 적재하지 않고 적재 작업자에게 요청한 뒤 새 버전을 기다립니다.
+- 적재 작업자 (1개): 인덱스에 기록하는 유일한 프로세스입니다. 폴더 적재 요청을 차례로 처리하므로
+  OCR, 임베딩 같은 무거운 적재 작업이 질의 처리와 CPU(GIL)를 다투지 않습니다.
+
+작업자는 "spawn" 방식으로 시작하며(fork 이후의 gRPC/스레드 상태를 물려받지 않도록), 서버 프로세스와는
+작업자마다 전용 파이프로만 통신합니다. 작업자가 비정상 종료하면 실행 중이던 요청은 오류로 끝내고 작업자를 다시 시작합니다.
+flat 벡터 저장소(VECTOR_STORE_BACKEND=flat)에서만 사용할 수 있습니다.
+"""
+
+import asyncio
+import atexit
+import contextlib
+import logging
+import multiprocessing
+import multiprocessing.connection
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+
+from src.config import (
+    QUERY_WORKERS,
+    VECTOR_STORE_BACKEND,
+    WORKER_CONCURRENCY,
+    ConfigurationError,
+)
+from src.utils.metrics import WORKER_INGESTIONS, WORKER_PROCESSES, WORKER_RESTARTS, WORK_QUEUE_DEPTH
+from src.utils.pipeline_events import current_event_sink
+
+logger = logging.getLogger(__name__)
+
+# 결과 수신 스레드가 종료 여부를 확인하는 주기 (초)
+_RECEIVE_TIMEOUT_S = 0.5
+# 종료할 때 작업자가 스스로 끝나기를 기다리는 시간 (초)
+_SHUTDOWN_TIMEOUT_S = 10.0
+
+
+class WorkerError(Exception):
+    """질의 작업자에서 파이프라인 실행이 실패했거나 작업자가 비정상 종료했음을 나타내는 예외"""
+    pass
+
+
+# ===== 작업자 프로세스 =====
+
+def _query_worker_main(conn, initializer):
+    """질의 작업자 프로세스의 진입점"""
+    if initializer is not None:
+        initializer()
+
+    from src.agents.document_manager import set_ingestion_requester
+
+    # 파이프라인 노드는 작업 스레드에서도 이벤트를 보내므로 전송을 직렬화합니다.
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    # 이 프로세스는 인덱스를 읽기만 하고, 비어 있는 폴더의 적재는 서버 프로세스를 거쳐 적재 작업자에게 맡깁니다.
+    set_ingestion_requester(lambda folder_id: send(("ingest", folder_id)))
+    asyncio.run(_serve_queries(conn, send))
+
+
+async def _serve_queries(conn, send):
+    """서버 프로세스가 보낸 요청을 받는 대로 실행합니다. (동시 실행 수는 서버 프로세스가 제한)"""
+    loop = asyncio.get_running_loop()
+    running = set()
+    while True:
+        try:
+            message = await loop.run_in_executor(None, conn.recv)
+        except EOFError:
+            break
+        if message is None:
+            break
+        task = asyncio.create_task(_run_query(send, *message))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _run_query(send, request_id, query, folder_id, session_id, profile, new_conversation, stream_events):
+    from src.core.langgraph_pipeline import run_agent_pipeline
+    from src.utils.pipeline_events import event_sink
+
+    def run():
+        return run_agent_pipeline(
+            query, folder_id, session_id=session_id, profile=profile, new_conversation=new_conversation
+        )
+
+    try:
+        if stream_events:
+            with event_sink(lambda event: send(("event", request_id, event))):
+                final_state = await run()
+        else:
+            final_state = await run()
+        send(("done", request_id, dict(final_state)))
+    except Exception as e:
+        send(("error", request_id, f"{type(e).__name__}: {e}"))
+
+
+def _ingestion_worker_main(conn, initializer):
+    """적재 작업자 프로세스의 진입점. 인덱스에 기록하는 유일한 프로세스입니다."""
+    if initializer is not None:
+        initializer()
+
+    from src.agents.document_manager import get_document_manager
+    from src.utils.vector_db_manager import count_documents
+
+    manager = get_document_manager()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        folder_id, refresh = message
+        # 여러 질의 작업자가 같은 폴더를 요청할 수 있으므로, 이미 적재된 폴더는 다시 적재하지 않습니다.
+        if not refresh and count_documents(f"regulations_{folder_id}"):
+            # 이전 실행에서 적재한 로컬 폴더이면 여기서 변경 감시를 시작합니다. (이미 감시 중이면 그대로)
+            manager.watch_folder(folder_id)
+            conn.send(("ingested", folder_id, "skipped", None))
+            continue
+        try:
+            documents = manager.ingest_folder(folder_id, replace=refresh)
+            conn.send(("ingested", folder_id, "ok" if documents else "empty", None))
+        except Exception as e:
+            conn.send(("ingested", folder_id, "error", f"{type(e).__name__}: {e}"))
+
+
+# ===== 서버 프로세스 =====
+
+class _PendingQuery:
+    __slots__ = ("loop", "future", "on_event", "message", "preferred_worker")
+
+    def __init__(self, loop, future, on_event, message, preferred_worker=None):
+        self.loop = loop
+        self.future = future
+        self.on_event = on_event
+        self.message = message
+        self.preferred_worker = preferred_worker
+
+
+class _WorkerHandle:
+    """작업자 프로세스 하나와 그 프로세스와 연결된 파이프, 실행 중인 요청 ID"""
+    __slots__ = ("role", "index", "process", "conn", "in_flight")
+
+    def __init__(self, role, index, process, conn):
+        self.role = role
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.in_flight = set()
+
+
+def _settle(future, result=None, error=None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class QueryWorkerPool:
+    """
+    질의 작업자 프로세스 num_workers개와 적재 작업자 하나를 관리합니다.
+
+    작업자마다 전용 파이프를 사용하므로 한 작업자가 비정상 종료해도 다른 작업자와의 통신은 영향을 받지 않습니다.
+    요청은 실행 중인 요청이 가장 적은 작업자에게 보내며, 모든 작업자가 concurrency개씩 실행 중이면
+    자리가 날 때까지 서버 프로세스에서 도착 순서대로 기다립니다. 세션 ID가 있는 요청은 세션 대화 문맥을
+    재사용할 수 있도록, 자리가 있으면 세션 ID로 정해지는 작업자에게 보냅니다.
+
+    initializer는 각 작업자 프로세스가 파이프라인을 가져오기 전에 인자 없이 호출하는 함수입니다.
+    (spawn 방식이므로 pickle할 수 있어야 합니다. 예: functools.partial(모듈 수준 함수, ...))
+    """
+
+    def __init__(self, num_workers, concurrency=WORKER_CONCURRENCY, initializer=None):
+        if VECTOR_STORE_BACKEND != "flat":
+            raise ConfigurationError(
+                "다중 프로세스 작업자는 flat 벡터 저장소에서만 사용할 수 있습니다. (VECTOR_STORE_BACKEND=flat)"
+            )
+        self.num_workers = max(1, num_workers)
+        self.concurrency = max(1, concurrency)
+        self.initializer = initializer
+
+        self._context = multiprocessing.get_context("spawn")
+        self._query_workers = []
+        self._ingestion_worker = None
+        self._pending = {}
+        self._backlog = deque()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._receiver = None
+
+    # ----- 시작 / 종료 -----
+
+    def start(self):
+        """작업자 프로세스와 결과 수신 스레드를 시작합니다."""
+        self._ingestion_worker = self._spawn("ingestion", None)
+        self._query_workers = [self._spawn("query", index) for index in range(self.num_workers)]
+        self._receiver = threading.Thread(target=self._receive_messages, name="worker-receiver", daemon=True)
+        self._receiver.start()
+        # 인터프리터가 종료하면서 작업자를 끝낼 때 비정상 종료로 보고 다시 시작하지 않도록 먼저 풀을 닫습니다.
+        atexit.register(self.stop)
+
+        WORKER_PROCESSES.set_function(lambda: sum(w.process.is_alive() for w in self._query_workers), role="query")
+        WORKER_PROCESSES.set_function(lambda: int(self._ingestion_worker.process.is_alive()), role="ingestion")
+        WORK_QUEUE_DEPTH.set_function(lambda: len(self._backlog), pool="query_workers")
+        logger.info(f"질의 작업자 {self.num_workers}개(각 {self.concurrency}개 동시 실행)와 적재 작업자 1개를 시작했습니다.")
+        return self
+
+    def _spawn(self, role, index):
+        parent_conn, child_conn = self._context.Pipe()
+        target = _query_worker_main if role == "query" else _ingestion_worker_main
+        name = f"query-worker-{index}" if role == "query" else "ingestion-worker"
+        process = self._context.Process(target=target, args=(child_conn, self.initializer), name=name, daemon=True)
+        process.start()
+        # 작업자 쪽 끝을 닫아 두어야 작업자가 종료했을 때 recv()가 EOFError로 알려 줍니다.
+        child_conn.close()
+        return _WorkerHandle(role, index, process, parent_conn)
+
+    def stop(self):
+        """작업자에게 종료를 알리고, 제한 시간 안에 끝나지 않으면 강제로 종료합니다."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        with self._lock:
+            workers = self._query_workers + [self._ingestion_worker]
+            for worker in workers:
+                with contextlib.suppress(OSError, ValueError):
+                    worker.conn.send(None)
+
+        deadline = time.monotonic() + _SHUTDOWN_TIMEOUT_S
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(1.0)
+        if self._receiver is not None:
+            self._receiver.join(_RECEIVE_TIMEOUT_S * 2)
+        for worker in workers:
+            worker.conn.close()
+
+        with self._lock:
+            pending = list(self._pending.values())
+            self._backlog.clear()
+        for item in pending:
+            item.loop.call_soon_threadsafe(_settle, item.future, None, WorkerError("작업자 풀이 종료되었습니다."))
+
+    # ----- 요청 -----
+
+    def pending(self):
+        """작업자에 보냈거나 자리를 기다리는, 아직 결과를 받지 못한 요청 수"""
+        with self._lock:
+            return len(self._pending)
+
+    async def run(self, query, folder_id=None, session_id=None, profile=None, on_event=None, new_conversation=False):
+        """
+        질의 작업자에서 파이프라인을 실행하고 최종 상태를 반환합니다.
+        on_event를 주면 작업자에서 발생한 파이프라인 이벤트를 결과 수신 스레드에서 전달합니다.
+        실행이 실패하거나 작업자가 비정상 종료하면 WorkerError를 발생시킵니다.
+        """
+        if self._stopping.is_set():
+            raise WorkerError("작업자 풀이 종료되었습니다.")
+        loop = asyncio.get_running_loop()
+        request_id = uuid.uuid4().hex
+        message = (request_id, query, folder_id, session_id, profile, new_conversation, on_event is not None)
+        preferred_worker = zlib.crc32(session_id.encode("utf-8")) % self.num_workers if session_id else None
+        pending = _PendingQuery(loop, loop.create_future(), on_event, message, preferred_worker)
+        with self._lock:
+            self._pending[request_id] = pending
+            self._backlog.append(request_id)
+            self._dispatch_locked()
+        try:
+            return await pending.future
+        finally:
+            # 호출자가 기다리기를 그만두면 아직 보내지 않은 요청은 보내지 않습니다. (이미 실행 중이면 결과를 버림)
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def request_ingestion(self, folder_id, refresh=False):
+        """
+        적재 작업자에게 폴더 적재를 요청합니다. refresh가 True이면 이미 적재된 폴더도 다시 내려받아
+        새 버전으로 교체하며, 질의 작업자는 교체가 끝날 때까지 이전 버전으로 계속 검색합니다.
+        """
+        with self._lock:
+            try:
+                self._ingestion_worker.conn.send((folder_id, refresh))
+            except (OSError, ValueError) as e:
+                logger.error(f"적재 작업자에게 폴더 '{folder_id}' 적재를 요청하지 못했습니다: {e}")
+
+    def _dispatch_locked(self):
+        """자리가 있는 작업자에게 대기 중인 요청을 보냅니다. self._lock을 잡은 상태에서 호출합니다."""
+        while self._backlog:
+            pending = self._pending.get(self._backlog[0])
+            if pending is None:
+                self._backlog.popleft()
+                continue
+            worker = min(self._query_workers, key=lambda w: len(w.in_flight))
+            if pending.preferred_worker is not None:
+                preferred = self._query_workers[pending.preferred_worker]
+                if len(preferred.in_flight) < self.concurrency:
+                    worker = preferred
+            if len(worker.in_flight) >= self.concurrency:
+                return
+            request_id = self._backlog.popleft()
+            try:
+                worker.conn.send(pending.message)
+            except (OSError, ValueError):
+                # 방금 종료한 작업자: 수신 스레드가 다시 시작한 뒤 보냅니다.
+                self._backlog.appendleft(request_id)
+                return
+            worker.in_flight.add(request_id)
+
+    # ----- 결과 수신 -----
+
+    def _receive_messages(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                workers = {worker.conn: worker for worker in self._query_workers + [self._ingestion_worker]}
+            for conn in multiprocessing.connection.wait(list(workers), timeout=_RECEIVE_TIMEOUT_S):
+                worker = workers[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._restart(worker)
+                    continue
+                self._handle_message(worker, message)
+
+    def _handle_message(self, worker, message):
+        kind = message[0]
+        if kind == "ingest":
+            self.request_ingestion(message[1])
+            return
+        if kind == "ingested":
+            _, folder_id, status, error = message
+            WORKER_INGESTIONS.inc(status=status)
+            if error:
+                logger.error(f"폴더 '{folder_id}' 적재 실패: {error}")
+            else:
+                logger.info(f"폴더 '{folder_id}' 적재 요청 처리: {status}")
+            return
+
+        request_id = message[1]
+        with self._lock:
+            pending = self._pending.get(request_id)
+            if kind in ("done", "error"):
+                worker.in_flight.discard(request_id)
+                self._dispatch_locked()
+        if pending is None:
+            # 호출자가 이미 기다리기를 그만둔 요청
+            return
+        if kind == "event":
+            if pending.on_event is not None:
+                try:
+                    pending.on_event(message[2])
+                except Exception as e:
+                    logger.warning(f"작업자 이벤트 전달 실패: {e}")
+        elif kind == "done":
+            pending.loop.call_soon_threadsafe(_settle, pending.future, message[2], None)
+        elif kind == "error":
+            pending.loop.call_soon_threadsafe(_settle, pending.future, None, WorkerError(message[2]))
+
+    def _restart(self, worker):
+        """비정상 종료한 작업자의 실행 중 요청을 오류로 끝내고 같은 자리에 새 작업자를 시작합니다."""
+        if self._stopping.is_set():
+            return
+        worker.process.join(1.0)
+        worker.conn.close()
+        name = "적재 작업자" if worker.role == "ingestion" else f"질의 작업자 {worker.index}"
+        logger.error(f"{name}(pid {worker.process.pid})이 비정상 종료했습니다. (종료 코드 {worker.process.exitcode}) 다시 시작합니다.")
+        WORKER_RESTARTS.inc(role=worker.role)
+
+        replacement = self._spawn(worker.role, worker.index)
+        with self._lock:
+            if worker.role == "ingestion":
+                self._ingestion_worker = replacement
+            else:
+                self._query_workers[worker.index] = replacement
+            failed = [self._pending[request_id] for request_id in worker.in_flight if request_id in self._pending]
+            self._dispatch_locked()
+        for pending in failed:
+            pending.loop.call_soon_threadsafe(
+                _settle, pending.future, None, WorkerError(f"요청을 처리하던 작업자가 비정상 종료되었습니다. ({name})")
+            )
+
+
+# 서버 프로세스에서 시작한 작업자 풀 (없으면 파이프라인을 이 프로세스에서 실행합니다)
+_worker_pool = None
+
+
+def start_worker_pool(num_workers=QUERY_WORKERS, concurrency=WORKER_CONCURRENCY, initializer=None):
+    """작업자 풀을 시작하고 dispatch_pipeline()이 사용하도록 등록합니다."""
+    global _worker_pool
+    if _worker_pool is not None:
+        return _worker_pool
+    _worker_pool = QueryWorkerPool(num_workers, concurrency, initializer).start()
+    return _worker_pool
+
+
+def get_worker_pool():
+    """시작된 작업자 풀을 반환합니다. 없으면 None."""
+    return _worker_pool
+
+
+def stop_worker_pool():
+    """작업자 풀을 종료하고 등록을 해제합니다."""
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.stop()
+        _worker_pool = None
+
+
+async def dispatch_pipeline(query, folder_id=None, session_id=None, profile=None, new_conversation=False):
+    """
+    작업자 풀이 시작되어 있으면 질의 작업자에서, 아니면 이 프로세스에서 파이프라인을 실행합니다.
+    현재 요청에 등록된 이벤트 콜백(event_sink)은 작업자에서 실행하는 경우에도 그대로 이벤트를 받습니다.
+    """
+    if _worker_pool is None:
+        from src.core.langgraph_pipeline import run_agent_pipeline
+        return await run_agent_pipeline(
+            query, folder_id, session_id=session_id, profile=profile, new_conversation=new_conversation
+        )
+    return await _worker_pool.run(
+        query, folder_id, session_id=session_id, profile=profile, on_event=current_event_sink(),
+        new_conversation=new_conversation,
+    )
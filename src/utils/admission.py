@@ -0,0 +1,189 @@
+# src/utils/admission.py
+# 이 파일은 채팅 서버의 요청 병합(coalescing)과 입장 제어(admission control)를 제공합니다.
+#
+# - RequestCoalescer: 같은 키(정규화한 질의 + 폴더 ID)로 처리 중인 요청이 있으면 새로 실행하지 않고
+#   그 실행의 결과를 함께 받습니다. (공지 직후 여러 사용자가 같은 질문을 동시에 보내는 경우)
+# - AdmissionController: 동시에 실행할 파이프라인 수를 제한하고, 초과 요청은 최대 길이가 정해진 대기열에서
+#   도착 순서대로 기다리게 합니다. 대기열이 가득 찼거나 대기 시간이 지나면 ServerBusy를 발생시킵니다.
+#
+# 두 객체 모두 하나의 이벤트 루프(Gradio 서버) 안에서만 사용하므로 별도의 잠금 없이 상태를 관리합니다.
+#
+# 세션 대화 문맥이 켜져 있으면 실행한 세션에만 턴이 반영되므로(후속 질문의 문맥) 같은 세션의 요청끼리만 병합합니다.
+
+import asyncio
+import contextlib
+import re
+import time
+import unicodedata
+from collections import deque
+
+from src.config import (
+    ADMISSION_QUEUE_TIMEOUT_S,
+    COALESCE_REQUESTS,
+    MAX_CONCURRENT_PIPELINES,
+    MAX_QUEUED_REQUESTS,
+    MAX_SESSIONS,
+    SESSION_CONTEXT_ENABLED,
+    SESSION_TTL_S,
+)
+from src.utils.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_DECISIONS,
+    ADMISSION_QUEUED,
+    ADMISSION_WAIT_DURATION,
+    COALESCED_REQUESTS,
+)
+from src.utils.session_store import SessionStore
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ServerBusy(Exception):
+    """동시 실행 한도와 대기열이 모두 가득 차서 요청을 받을 수 없음을 나타내는 예외"""
+    pass
+
+
+def normalize_query(query):
+    """
+    같은 질문을 같은 키로 묶기 위해 질의를 정규화합니다.
+    유니코드 정규화(NFKC), 대소문자 통일, 공백 정리, 끝의 물음표/마침표 제거를 합니다.
+    """
+    text = unicodedata.normalize("NFKC", query or "").casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip("?!.。 ")
+
+
+def coalescing_key(query, folder_id, session_id=None):
+    """질의와 폴더 ID(세션 대화 문맥을 쓰는 요청이면 세션 ID까지)로 요청 병합 키를 만듭니다."""
+    return (normalize_query(query), folder_id or "", session_id or "")
+
+
+class RequestCoalescer:
+    """같은 키로 처리 중인 요청의 실행 하나를 여러 호출자가 함께 기다리게 합니다."""
+
+    def __init__(self):
+        self._in_flight = {}
+
+    def in_flight(self):
+        return len(self._in_flight)
+
+    async def run(self, key, factory):
+        """
+        키에 해당하는 실행이 있으면 그 결과를 기다리고, 없으면 factory()로 새로 실행합니다.
+        실행은 별도 작업(Task)으로 돌리므로 먼저 요청한 사용자가 연결을 끊어도 함께 기다리는 요청은 결과를 받습니다.
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc()
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(factory())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class AdmissionController:
+    """
+    동시 실행 수를 max_concurrent로 제한하고 초과 요청을 최대 max_queue개까지 도착 순서대로 대기시킵니다.
+    실행이 끝나면 대기 중인 요청에 자리를 바로 넘겨 주므로 늦게 도착한 요청이 앞지르지 않습니다.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout_s=0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self._active = 0
+        self._waiters = deque()
+
+    def active(self):
+        return self._active
+
+    def queued(self):
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        """실행 자리를 얻을 때까지 기다렸다가 블록을 실행합니다. 자리를 얻지 못하면 ServerBusy를 발생시킵니다."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self):
+        if self._active < self.max_concurrent and not self.queued():
+            self._active += 1
+            ADMISSION_DECISIONS.inc(result="admitted")
+            return
+        if self.queued() >= self.max_queue:
+            ADMISSION_DECISIONS.inc(result="rejected")
+            raise ServerBusy(f"동시 처리 한도({self.max_concurrent})와 대기열({self.max_queue})이 모두 가득 찼습니다.")
+
+        ADMISSION_DECISIONS.inc(result="queued")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_s or None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 취소되는 순간 자리를 넘겨받았으면 다음 대기 요청에 돌려줍니다.
+                self._release()
+            with contextlib.suppress(ValueError):
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_DECISIONS.inc(result="timed_out")
+                raise ServerBusy(f"대기열에서 {self.queue_timeout_s:g}초 안에 차례가 오지 않았습니다.") from None
+            raise
+        finally:
+            ADMISSION_WAIT_DURATION.observe(time.perf_counter() - start_time)
+
+    def _release(self):
+        # 실행 수를 줄이지 않고 자리를 대기 중인 첫 요청에 그대로 넘깁니다.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+
+# 채팅 서버가 공유하는 기본 인스턴스
+request_coalescer = RequestCoalescer()
+admission_controller = AdmissionController(MAX_CONCURRENT_PIPELINES, MAX_QUEUED_REQUESTS, ADMISSION_QUEUE_TIMEOUT_S)
+
+# 이 서버에서 한 번 이상 처리한 세션 (질의 작업자 프로세스의 세션 문맥과 같은 한도로 보관)
+_sessions_with_history = SessionStore(MAX_SESSIONS, SESSION_TTL_S)
+
+ADMISSION_ACTIVE.set_function(lambda: admission_controller.active())
+ADMISSION_QUEUED.set_function(lambda: admission_controller.queued())
+
+
+def session_has_history(session_id):
+    """이 서버에서 이미 처리한 적이 있는(후속 질문이 될 수 있는) 세션인지 확인합니다."""
+    return bool(SESSION_CONTEXT_ENABLED and session_id and _sessions_with_history.get(session_id))
+
+
+async def run_admitted(query, folder_id, factory, coalesce=None, session_id=None):
+    """
+    입장 제어를 거쳐 factory()를 실행합니다. coalesce가 켜져 있으면(기본값: COALESCE_REQUESTS)
+    같은 질의와 폴더 ID로 처리 중인 실행의 결과를 함께 받으며, 병합된 요청은 실행 자리를 차지하지 않습니다.
+    세션 대화 문맥이 켜져 있고 session_id가 주어지면 같은 세션의 요청끼리만 병합합니다.
+    """
+    session_key = session_id if SESSION_CONTEXT_ENABLED and session_id else None
+
+    async def admitted():
+        async with admission_controller.admit():
+            try:
+                return await factory()
+            finally:
+                # 파이프라인을 실행한 세션에만 턴이 반영되므로 그 세션만 이전 턴이 있는 세션으로 기록합니다.
+                if session_key:
+                    _sessions_with_history.put(session_key, True)
+
+    if coalesce is None:
+        coalesce = COALESCE_REQUESTS
+    if not coalesce:
+        return await admitted()
+    return await request_coalescer.run(coalescing_key(query, folder_id, session_key), admitted)
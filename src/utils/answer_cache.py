@@ -0,0 +1,71 @@
+# src/utils/answer_cache.py
+# 이 파일은 파이프라인 최종 상태를 질의별로 보관하는 답변 캐시를 제공합니다. (ANSWER_CACHE_ENABLED)
+#
+# - 키는 정규화한 질의, 폴더 ID, 폴더 컬렉션들의 인덱스 버전입니다. 인덱스가 갱신되면(적재, 로컬 폴더 감시)
+#   키가 바뀌므로 이전 인덱스로 만든 답변은 쓰이지 않습니다. (flat 백엔드는 적재 작업자가 게시한 버전도 반영)
+# - 조회할 때 만든 키로 저장하므로, 실행 도중 인덱스가 바뀌어도 새 인덱스의 답변으로 잘못 저장되지 않습니다.
+#   단, 조회할 때 아직 적재되지 않은 폴더가 있었으면 그 실행이 폴더를 적재하므로 저장할 때 적재된 버전으로 키를 다시 만듭니다.
+# - 이전 턴이 있는 세션의 질의(후속 질문), 프로파일링 요청, 제한 시간을 넘겨 간이 결과가 섞인 답변은 캐시하지 않습니다.
+# - 서버 프로세스(Gradio UI, HTTP API) 메모리에 ANSWER_CACHE_MAX_ENTRIES개까지, ANSWER_CACHE_TTL_S초 동안 보관합니다.
+#   캐시 예열(src/core/warmup.py)이 자주 들어오는 질문의 답변을 미리 채워 둡니다.
+
+from src.config import ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_S
+from src.utils.admission import normalize_query, session_has_history
+from src.utils.metrics import ANSWER_CACHE_ENTRIES, CACHE_LOOKUPS
+from src.utils.session_store import SessionStore
+
+_answers = SessionStore(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_S, evictions=None)
+
+ANSWER_CACHE_ENTRIES.set_function(lambda: len(_answers))
+
+
+def index_fingerprint(folder_id):
+    """
+    폴더(쉼표로 구분한 여러 폴더 포함) 컬렉션들의 인덱스 버전을 이어 붙인 문자열을 반환합니다.
+    아직 적재되지 않은(비어 있는) 폴더가 있으면 None입니다.
+    """
+    from src.utils.vector_db_manager import get_index_version
+
+    folder_ids = [part.strip() for part in (folder_id or "").split(",") if part.strip()]
+    versions = [get_index_version(f"regulations_{folder}") for folder in folder_ids]
+    if not versions or not all(versions):
+        return None
+    return ",".join(versions)
+
+
+def answer_key(query, folder_id):
+    return (normalize_query(query), folder_id or "", index_fingerprint(folder_id))
+
+
+def lookup_answer(query, folder_id, session_id=None):
+    """
+    캐시된 답변을 찾습니다. 캐시를 쓸 수 없는 요청(기능 꺼짐, 이전 턴이 있는 세션)이면 키도 None입니다.
+
+    Returns:
+        tuple: (저장할 때 넘길 키, 캐시된 최종 상태 또는 None)
+    """
+    if not ANSWER_CACHE_ENABLED or session_has_history(session_id):
+        return None, None
+    key = answer_key(query, folder_id)
+    state = _answers.get(key) if key[2] is not None else None
+    CACHE_LOOKUPS.inc(cache="answer", result="hit" if state is not None else "miss")
+    return key, dict(state) if state is not None else None
+
+
+def store_answer(key, final_state):
+    """lookup_answer가 돌려준 키로 최종 상태를 저장합니다. 간이 결과가 섞였거나 프로파일 결과이면 저장하지 않습니다."""
+    if key is None or not final_state or final_state.get("degraded_nodes") or final_state.get("profile_files"):
+        return False
+    if key[2] is None:
+        # 조회할 때 비어 있던 폴더는 이 실행이 적재했으므로 적재된 버전으로 키를 만듭니다.
+        key = (key[0], key[1], index_fingerprint(key[1]))
+        if key[2] is None:
+            return False
+    # 세션 ID는 요청마다 다르므로 저장하지 않습니다.
+    _answers.put(key, {**final_state, "session_id": ""})
+    return True
+
+
+def clear_answers():
+    """캐시된 답변을 모두 지웁니다."""
+    _answers.clear()
@@ -0,0 +1,130 @@
+# src/utils/chunk_summaries.py
+# 이 파일은 적재 단계에서 청크마다 요약과 주요 의무를 만들어 청크 메타데이터로 저장합니다. (CHUNK_SUMMARIES_ENABLED)
+# 질의할 때는 관련도가 가장 높은 몇 개 구절만 원문으로, 나머지는 요약으로 프롬프트에 넣어 입력 토큰을 줄입니다. (context_packer)
+#
+# 요약은 청크 내용 해시(요약 모델과 프롬프트 버전 포함)를 키로 디스크에 캐시하므로
+# 같은 내용의 청크는 폴더를 다시 적재하거나 다른 폴더에 있어도 한 번만 요약합니다.
+# 요약에 실패한 청크는 메타데이터 없이 저장되며, 질의할 때 원문으로 들어갑니다.
+
+import hashlib
+import json
+import threading
+
+from langchain.prompts import PromptTemplate
+from langchain.storage import LocalFileStore
+
+from src.agents.schemas import ChunkSummary
+from src.config import CHUNK_SUMMARY_CACHE_PATH, CHUNK_SUMMARY_CONCURRENCY, CHUNK_SUMMARY_MODEL
+from src.utils.llm_factory import create_chat_model
+from src.utils.metrics import CACHE_LOOKUPS, CHUNK_SUMMARIES
+from src.utils.tracing import span
+
+# 요약 프롬프트나 스키마를 바꾸면 올려서 이전 캐시를 쓰지 않게 합니다.
+SUMMARY_PROMPT_VERSION = "1"
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template="""
+    다음은 학생회 규정 문서 또는 감사 보고서의 일부입니다. 이 내용을 다른 에이전트가 원문 대신 참고할 수 있도록 요약하세요.
+    - articles: 포함된 조항 번호와 제목 (예: '제10조 (예산 집행)'), 조항이 없으면 빈 목록
+    - summary: 핵심 내용을 2~3문장으로 요약
+    - obligations: 주요 의무, 금지 사항, 요건, 절차를 조항 번호와 함께 한 줄씩 (금액, 기한, 승인 주체 등 수치와 주체는 그대로 유지)
+
+    ---
+    {text}
+    ---
+    """
+)
+
+_chain = None
+_store = None
+_init_lock = threading.Lock()
+
+
+def _get_chain():
+    global _chain
+    if _chain is None:
+        with _init_lock:
+            if _chain is None:
+                llm = create_chat_model(CHUNK_SUMMARY_MODEL, temperature=0)
+                _chain = SUMMARY_PROMPT | llm.with_structured_output(ChunkSummary)
+    return _chain
+
+
+def _get_store():
+    """요약 캐시 저장소. CHUNK_SUMMARY_CACHE_PATH가 비어 있으면 캐시하지 않습니다."""
+    global _store
+    if _store is None and CHUNK_SUMMARY_CACHE_PATH:
+        _store = LocalFileStore(CHUNK_SUMMARY_CACHE_PATH)
+    return _store
+
+
+def summary_cache_key(text):
+    """청크 내용, 요약 모델, 프롬프트 버전으로 캐시 키를 만듭니다."""
+    return hashlib.sha256(f"{CHUNK_SUMMARY_MODEL}\n{SUMMARY_PROMPT_VERSION}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _apply(chunk, summary):
+    # 벡터 저장소 메타데이터는 문자열 같은 단일 값만 저장할 수 있으므로 목록은 줄바꿈으로 이어 붙입니다.
+    chunk.metadata["summary"] = summary["summary"]
+    chunk.metadata["obligations"] = "\n".join(summary.get("obligations") or [])
+    chunk.metadata["articles"] = ", ".join(summary.get("articles") or [])
+
+
+def summarize_chunks(chunks):
+    """
+    청크마다 요약, 주요 의무, 조항 목록을 만들어 메타데이터('summary', 'obligations', 'articles')에 채웁니다.
+    캐시에 없는 청크만 CHUNK_SUMMARY_CONCURRENCY개씩 동시에 요약하며, 같은 내용의 청크는 한 번만 요약합니다.
+
+    Args:
+        chunks (list): LangChain Document 청크 목록. (제자리에서 메타데이터를 갱신합니다)
+
+    Returns:
+        dict: {"cached", "generated", "failed"} 청크 수.
+    """
+    if not chunks:
+        return {"cached": 0, "generated": 0, "failed": 0}
+
+    keys = [summary_cache_key(chunk.page_content) for chunk in chunks]
+    store = _get_store()
+    stored = store.mget(keys) if store else [None] * len(keys)
+    summaries = {key: json.loads(value) for key, value in zip(keys, stored) if value is not None}
+    cached = sum(key in summaries for key in keys)
+    if store:
+        CACHE_LOOKUPS.inc(cached, cache="chunk_summary", result="hit")
+        CACHE_LOOKUPS.inc(len(keys) - cached, cache="chunk_summary", result="miss")
+
+    pending = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in summaries:
+            pending.setdefault(key, chunk.page_content)
+
+    generated = {}
+    if pending:
+        with span("ingestion.summarize_chunks", chunk_count=len(pending), model=CHUNK_SUMMARY_MODEL):
+            results = _get_chain().batch(
+                [{"text": text} for text in pending.values()],
+                config={"max_concurrency": CHUNK_SUMMARY_CONCURRENCY},
+                return_exceptions=True,
+            )
+        for key, result in zip(pending, results):
+            if isinstance(result, Exception):
+                print(f"청크 요약 중 오류 발생: {result}")
+                continue
+            generated[key] = result.model_dump()
+        if store and generated:
+            store.mset([(key, json.dumps(value, ensure_ascii=False).encode("utf-8")) for key, value in generated.items()])
+        summaries.update(generated)
+
+    failed = 0
+    for key, chunk in zip(keys, chunks):
+        if key in summaries:
+            _apply(chunk, summaries[key])
+        else:
+            failed += 1
+    new_count = len(chunks) - cached - failed
+    CHUNK_SUMMARIES.inc(cached, result="cached")
+    CHUNK_SUMMARIES.inc(new_count, result="generated")
+    CHUNK_SUMMARIES.inc(failed, result="failed")
+    print(f"청크 요약: {len(chunks)}개 중 캐시 {cached}개, 새로 요약 {new_count}개, 실패 {failed}개")
+    return {"cached": cached, "generated": new_count, "failed": failed}
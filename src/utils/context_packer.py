@@ -0,0 +1,273 @@
+# src/utils/context_packer.py
+# 이 파일은 검색된 청크를 에이전트 프롬프트용 컨텍스트로 조립합니다.
+# 1) 같은 문서에서 겹치거나 이어지는 청크를 하나의 구절로 병합하고
+# 2) MMR(Maximal Marginal Relevance)로 거의 같은 내용의 구절을 제거하며
+# 3) 에이전트별 토큰 예산 안에서 관련도 순으로 구절을 채워 넣습니다.
+#    남은 예산보다 긴 구절은 앞부분만 잘라 넣으므로 가장 관련도가 높은 구절은 항상 들어갑니다.
+# 적재할 때 만든 청크 요약(chunk_summaries)이 있으면 관련도 상위 몇 개 구절만 원문으로, 나머지는 요약으로 넣습니다.
+
+from src.utils.tokens import estimate_tokens
+
+# 텍스트 겹침으로 병합할 때 필요한 최소 겹침 글자 수 (start_index가 없는 기존 청크용)
+_MIN_TEXT_OVERLAP = 30
+# 이미 선택된 구절과 이 값 이상 유사하면 중복으로 간주하여 제외합니다.
+_NEAR_DUPLICATE_THRESHOLD = 0.85
+# 남은 예산이 이보다 작으면 긴 구절을 잘라 넣지 않고 제외합니다. (첫 구절은 예외)
+_MIN_TRUNCATED_TOKENS = 100
+_TRUNCATION_MARKER = "\n(이하 생략)"
+
+
+def _source_of(doc):
+    return doc.metadata.get("source") or doc.metadata.get("source_file") or "알 수 없음"
+
+
+def _summary_of(doc):
+    """청크 메타데이터의 요약. 적재할 때 요약하지 않은 청크면 None."""
+    if not doc.metadata.get("summary"):
+        return None
+    return {
+        "summary": doc.metadata["summary"],
+        "obligations": doc.metadata.get("obligations", ""),
+        "articles": doc.metadata.get("articles", ""),
+    }
+
+
+def _shingles(text, size=3):
+    """공백을 제거한 글자 n-gram 집합. 한국어 구절 간 유사도 계산에 사용합니다."""
+    compact = "".join(text.split())
+    if len(compact) <= size:
+        return {compact}
+    return {compact[i:i + size] for i in range(len(compact) - size + 1)}
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _text_overlap(left, right):
+    """left의 끝부분과 right의 앞부분이 겹치는 길이를 반환합니다. (splitter의 chunk_overlap 구간)"""
+    max_overlap = min(len(left), len(right))
+    for length in range(max_overlap, _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def _merge_passages(docs):
+    """
+    같은 출처에서 겹치거나 맞닿은 청크를 하나의 구절로 병합합니다.
+
+    Returns:
+        list: {"source", "text", "start", "end", "relevance", "summaries"} 딕셔너리 목록.
+              summaries는 구절을 이루는 청크의 요약 목록입니다. (요약이 없는 청크는 None)
+    """
+    total = len(docs)
+    by_source = {}
+    for rank, doc in enumerate(docs):
+        # 검색 순위를 관련도로 사용합니다. (1위 = 1.0)
+        relevance = 1.0 - rank / total
+        by_source.setdefault(_source_of(doc), []).append((doc, relevance))
+
+    passages = []
+    for source, items in by_source.items():
+        with_index = [(d, r) for d, r in items if d.metadata.get("start_index") is not None]
+        without_index = [(d, r) for d, r in items if d.metadata.get("start_index") is None]
+
+        # 시작 위치가 있는 청크는 구간이 겹치거나 맞닿으면 병합합니다.
+        with_index.sort(key=lambda item: item[0].metadata["start_index"])
+        current = None
+        for doc, relevance in with_index:
+            start = doc.metadata["start_index"]
+            end = start + len(doc.page_content)
+            if current and start <= current["end"]:
+                if end > current["end"]:
+                    current["text"] += doc.page_content[current["end"] - start:]
+                    current["end"] = end
+                    current["summaries"].append(_summary_of(doc))
+                current["relevance"] = max(current["relevance"], relevance)
+                continue
+            current = {
+                "source": source, "text": doc.page_content, "start": start, "end": end, "relevance": relevance,
+                "summaries": [_summary_of(doc)],
+            }
+            passages.append(current)
+
+        # 시작 위치가 없는 기존 청크는 텍스트 겹침으로 이어 붙이거나 완전히 같은 내용을 합칩니다.
+        merged = []
+        for doc, relevance in without_index:
+            text = doc.page_content
+            for passage in merged:
+                if text in passage["text"]:
+                    passage["relevance"] = max(passage["relevance"], relevance)
+                    break
+                overlap = _text_overlap(passage["text"], text)
+                if overlap:
+                    passage["text"] += text[overlap:]
+                    passage["relevance"] = max(passage["relevance"], relevance)
+                    passage["summaries"].append(_summary_of(doc))
+                    break
+                overlap = _text_overlap(text, passage["text"])
+                if overlap:
+                    passage["text"] = text + passage["text"][overlap:]
+                    passage["relevance"] = max(passage["relevance"], relevance)
+                    passage["summaries"].insert(0, _summary_of(doc))
+                    break
+            else:
+                merged.append({
+                    "source": source, "text": text, "start": None, "end": None, "relevance": relevance,
+                    "summaries": [_summary_of(doc)],
+                })
+        passages.extend(merged)
+
+    return passages
+
+
+def _select_by_mmr(passages, mmr_lambda):
+    """
+    MMR 순서로 구절을 정렬하고, 이미 선택된 구절과 거의 같은 구절은 제외합니다.
+
+    Returns:
+        tuple: (선택된 구절 목록, 제외된 중복 구절 수)
+    """
+    for passage in passages:
+        passage["shingles"] = _shingles(passage["text"])
+
+    remaining = list(passages)
+    selected = []
+    dropped = 0
+    while remaining:
+        best, best_score, best_similarity = None, None, 0.0
+        for passage in remaining:
+            similarity = max((_jaccard(passage["shingles"], s["shingles"]) for s in selected), default=0.0)
+            score = mmr_lambda * passage["relevance"] - (1 - mmr_lambda) * similarity
+            if best_score is None or score > best_score:
+                best, best_score, best_similarity = passage, score, similarity
+        remaining.remove(best)
+        if best_similarity >= _NEAR_DUPLICATE_THRESHOLD:
+            dropped += 1
+            continue
+        selected.append(best)
+    return selected, dropped
+
+
+def format_passage(source, text):
+    """프롬프트에 넣을 구절 형식 (파일명 머리글 포함)."""
+    return f"--- 파일명: {source}\n{text}"
+
+
+def format_summary_passage(source, summaries):
+    """원문 대신 넣는 요약 구절 형식 (파일명과 조항 목록 머리글, 청크별 요약과 주요 의무)."""
+    articles = ", ".join(summary["articles"] for summary in summaries if summary["articles"])
+    lines = [f"--- 파일명: {source} (요약{', 조항: ' + articles if articles else ''})"]
+    for summary in summaries:
+        lines.append(summary["summary"])
+        lines.extend(f"- {item}" for item in summary["obligations"].splitlines() if item.strip())
+    return "\n".join(lines)
+
+
+def _truncate_to_tokens(text, max_tokens):
+    """
+    추정 토큰 수가 max_tokens 이하가 되도록 텍스트 앞부분을 잘라 생략 표시를 붙입니다.
+    가능하면 줄바꿈이나 공백에서 자릅니다.
+    """
+    limit = max_tokens - estimate_tokens(_TRUNCATION_MARKER)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    cut = low
+    for separator in ("\n", " "):
+        boundary = text.rfind(separator, 0, cut)
+        if boundary > cut // 2:
+            cut = boundary
+            break
+    return text[:cut].rstrip() + _TRUNCATION_MARKER
+
+
+def naive_context(docs):
+    """기존 방식처럼 모든 청크를 그대로 이어 붙인 컨텍스트를 반환합니다. (비교 기준)"""
+    return "\n\n".join(format_passage(_source_of(doc), doc.page_content) for doc in docs)
+
+
+def pack_context(docs, token_budget, mmr_lambda=0.7, full_text_passages=None):
+    """
+    검색된 청크를 병합, 중복 제거한 뒤 토큰 예산 안에서 프롬프트 컨텍스트로 조립합니다.
+
+    Args:
+        docs (list): 검색 순위 순의 LangChain Document 목록.
+        token_budget (int): 컨텍스트에 사용할 최대 토큰 수.
+        mmr_lambda (float): MMR에서 관련도에 주는 가중치 (0~1, 낮을수록 다양성 중시).
+        full_text_passages (int, optional): 원문으로 넣을 상위 구절 수. 그 뒤의 구절은 모든 청크에 요약이 있으면
+                                            요약으로 넣습니다. None이면 요약을 쓰지 않습니다.
+
+    Returns:
+        dict: text(조립된 컨텍스트), sources(사용된 출처 목록), naive_tokens(기존 방식 토큰 수),
+              packed_tokens(조립 후 토큰 수), merged_chunks, dropped_duplicates, dropped_over_budget,
+              truncated_passages(예산에 맞게 잘라 넣은 구절 수), summarized_passages(요약으로 넣은 구절 수)
+    """
+    naive_tokens = estimate_tokens(naive_context(docs))
+    if not docs:
+        return {
+            "text": "", "sources": [], "naive_tokens": 0, "packed_tokens": 0,
+            "merged_chunks": 0, "dropped_duplicates": 0, "dropped_over_budget": 0, "truncated_passages": 0,
+            "summarized_passages": 0,
+        }
+
+    passages = _merge_passages(docs)
+    selected, dropped_duplicates = _select_by_mmr(passages, mmr_lambda)
+
+    parts = []
+    used_tokens = 0
+    dropped_over_budget = 0
+    truncated_passages = 0
+    summarized_passages = 0
+    for rank, passage in enumerate(selected):
+        formatted = format_passage(passage["source"], passage["text"])
+        tokens = estimate_tokens(formatted)
+        summarized = False
+        if full_text_passages is not None and rank >= full_text_passages and all(passage["summaries"]):
+            summary_text = format_summary_passage(passage["source"], passage["summaries"])
+            summary_tokens = estimate_tokens(summary_text)
+            # 짧은 구절은 요약이 원문보다 길 수 있으므로 더 짧은 쪽을 씁니다.
+            if summary_tokens < tokens:
+                formatted, tokens, summarized = summary_text, summary_tokens, True
+        if used_tokens + tokens > token_budget:
+            remaining = token_budget - used_tokens
+            # 이어진 청크가 병합되어 예산보다 길어진 구절도 있으므로, 앞부분이라도 넣을 수 있으면 잘라 넣습니다.
+            if parts and remaining < _MIN_TRUNCATED_TOKENS:
+                dropped_over_budget += 1
+                continue
+            formatted = _truncate_to_tokens(formatted, remaining)
+            tokens = estimate_tokens(formatted)
+            truncated_passages += 1
+        parts.append((passage, formatted))
+        used_tokens += tokens
+        summarized_passages += summarized
+
+    # 같은 문서의 구절은 원문 순서대로 읽히도록 관련도 순서를 유지하되 출처별로 묶어 둡니다.
+    source_order = []
+    for passage, _ in parts:
+        if passage["source"] not in source_order:
+            source_order.append(passage["source"])
+    parts.sort(key=lambda item: (
+        source_order.index(item[0]["source"]),
+        item[0]["start"] if item[0]["start"] is not None else 0,
+    ))
+    text = "\n\n".join(formatted for _, formatted in parts)
+
+    return {
+        "text": text,
+        "sources": source_order,
+        "naive_tokens": naive_tokens,
+        "packed_tokens": estimate_tokens(text),
+        "merged_chunks": len(docs) - len(passages),
+        "dropped_duplicates": dropped_duplicates,
+        "dropped_over_budget": dropped_over_budget,
+        "truncated_passages": truncated_passages,
+        "summarized_passages": summarized_passages,
+    }
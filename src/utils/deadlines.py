@@ -0,0 +1,171 @@
+# src/utils/deadlines.py
+# 이 파일은 파이프라인 노드의 마감 시간(deadline)과 LLM 호출 헤징(hedging)을 제공합니다.
+#
+# - run_with_deadline: 함수를 작업 스레드에서 실행하고 제한 시간이 지나면 DeadlineExceeded를 발생시킵니다.
+#   파이썬 스레드는 강제로 멈출 수 없으므로, 시간이 초과된 호출은 백그라운드에서 끝날 때까지 실행되고 결과는 버려집니다.
+# - hedged_call: 호출 이름별로 관측한 지연 시간의 p95가 지나도 응답이 없으면 같은 요청을 한 번 더 보내고
+#   먼저 도착한 응답을 사용합니다. 라우터, 에이전트 분석처럼 같은 요청을 두 번 보내도 안전한 호출에만 사용하세요.
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from src.config import HEDGE_MIN_SAMPLES, HEDGE_REQUESTS
+from src.utils.metrics import WORK_QUEUE_DEPTH
+from src.utils.profiling import profiled_call
+from src.utils.tracing import current_span
+
+# 노드 실행용과 헤징용 풀을 분리합니다. (노드 안에서 헤징 호출을 할 때 같은 풀을 쓰면 교착될 수 있음)
+_deadline_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="node-deadline")
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+# 풀이 포화되면 작업이 대기열에 쌓이므로 수집 시점의 대기열 길이를 지표로 노출합니다.
+WORK_QUEUE_DEPTH.set_function(lambda: _deadline_executor._work_queue.qsize(), pool="node_deadline")
+WORK_QUEUE_DEPTH.set_function(lambda: _hedge_executor._work_queue.qsize(), pool="llm_hedge")
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """노드 또는 요청의 마감 시간이 지났음을 나타내는 예외"""
+    pass
+
+
+class LatencyTracker:
+    """최근 호출 지연 시간을 고정 크기 창으로 보관하고 백분위수를 계산합니다."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def record_hedge(self, won=False):
+        """헤징 요청을 보낸 횟수와 헤징 요청이 먼저 응답한 횟수를 기록합니다."""
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedged_calls += 1
+
+    def sample_count(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, q):
+        """q(0~100) 백분위수를 반환합니다. 샘플이 없으면 None을 반환합니다."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self):
+        return {
+            "samples": self.sample_count(),
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+def get_latency_tracker(name):
+    """호출 이름별 LatencyTracker를 반환합니다. (없으면 생성)"""
+    with _trackers_lock:
+        if name not in _trackers:
+            _trackers[name] = LatencyTracker()
+        return _trackers[name]
+
+
+def get_latency_stats():
+    """모든 호출 이름의 지연 시간 통계를 반환합니다."""
+    with _trackers_lock:
+        names = list(_trackers)
+    return {name: get_latency_tracker(name).snapshot() for name in names}
+
+
+def remaining_budget(deadline_at):
+    """요청 마감 시각(epoch 초)까지 남은 시간을 반환합니다. 마감 시각이 없으면 None을 반환합니다."""
+    if not deadline_at:
+        return None
+    return deadline_at - time.time()
+
+
+def node_timeout(node_deadline, deadline_at):
+    """노드 제한 시간과 요청 전체의 남은 예산 중 더 짧은 값을 반환합니다. 둘 다 없으면 None을 반환합니다."""
+    candidates = [value for value in (node_deadline or None, remaining_budget(deadline_at)) if value is not None]
+    return min(candidates) if candidates else None
+
+
+def run_with_deadline(fn, timeout, *args, **kwargs):
+    """
+    fn을 작업 스레드에서 실행하고 timeout 초 안에 끝나지 않으면 DeadlineExceeded를 발생시킵니다.
+    timeout이 None이면 제한 없이 현재 스레드에서 실행합니다.
+    """
+    if timeout is None:
+        return fn(*args, **kwargs)
+    if timeout <= 0:
+        raise DeadlineExceeded("요청 시간 예산을 모두 사용했습니다.")
+
+    # 추적 span, 프로파일 등 contextvars 값이 작업 스레드에서도 유지되도록 현재 컨텍스트를 복사해 실행합니다.
+    future = _deadline_executor.submit(contextvars.copy_context().run, profiled_call, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded(f"{timeout:.1f}초 안에 응답하지 않았습니다.")
+
+
+def _timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start_time
+
+
+def hedged_call(name, fn):
+    """
+    fn()을 호출하고 지연 시간을 기록합니다.
+    HEDGE_REQUESTS가 켜져 있고 샘플이 HEDGE_MIN_SAMPLES개 이상 쌓였으면,
+    p95가 지나도록 응답이 없을 때 같은 호출을 한 번 더 보내 먼저 성공한 결과를 반환합니다.
+    """
+    tracker = get_latency_tracker(name)
+    hedge_after = tracker.percentile(95) if tracker.sample_count() >= HEDGE_MIN_SAMPLES else None
+
+    if not HEDGE_REQUESTS or hedge_after is None:
+        result, elapsed = _timed(fn)
+        tracker.record(elapsed)
+        return result
+
+    start_time = time.perf_counter()
+    primary = _hedge_executor.submit(contextvars.copy_context().run, profiled_call, fn)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        tracker.record(time.perf_counter() - start_time)
+        return primary.result()
+
+    tracker.record_hedge()
+    current_span().set_attribute("hedged", True)
+    hedge = _hedge_executor.submit(contextvars.copy_context().run, profiled_call, fn)
+    pending = {primary, hedge}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # 사용자가 실제로 기다린 시간(요청 시작부터 첫 성공 응답까지)을 기록합니다.
+                tracker.record(time.perf_counter() - start_time)
+                if future is hedge:
+                    tracker.record_hedge(won=True)
+                return future.result()
+            first_error = first_error or future.exception()
+    raise first_error
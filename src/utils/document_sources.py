@@ -0,0 +1,144 @@
+# src/utils/document_sources.py
+# 이 파일은 규정 문서를 가져오는 출처(문서 소스)를 정의합니다. DOCUMENT_SOURCE 설정으로 고릅니다.
+# - "drive": Google Drive 폴더 (폴더 ID = Drive 폴더 ID, 처음 적재할 때 OAuth 인증)
+# - "local": 공유 파일 시스템의 디렉터리 (폴더 ID = LOCAL_DOCUMENTS_PATH 아래 디렉터리 이름, 인증 없음)
+#
+# 어느 출처든 같은 포함 키워드 필터(is_supported_document)와 텍스트 추출(extract_text_from_pdf, 필요하면 OCR)을 사용하며,
+# 문서는 {"file_name", "text_content", "doc_type"} 딕셔너리 목록으로 돌려줍니다.
+# 로컬 출처는 파일 변경 감시(src/utils/folder_watcher.py)를 지원하여 바뀐 파일만 다시 적재할 수 있습니다.
+
+import os
+
+from src.config import DOCUMENT_SOURCE, LOCAL_DOCUMENTS_PATH
+from src.utils.document_types import classify_document_type, is_supported_document
+from src.utils.google_drive_handler import download_documents_from_folder, extract_text_from_pdf, get_google_drive_service
+
+SOURCE_NAMES = ("drive", "local")
+
+
+class DocumentSource:
+    """문서 출처의 공통 인터페이스입니다."""
+
+    name = ""
+    # 파일 변경 감시로 바뀐 파일만 다시 적재할 수 있는지 여부
+    supports_watch = False
+
+    def download_documents(self, folder_id):
+        """
+        폴더의 지원되는 문서를 가져와 텍스트를 추출합니다.
+
+        Returns:
+            list: 텍스트 내용, 파일 이름, 문서 종류가 포함된 딕셔너리 목록.
+        """
+        raise NotImplementedError
+
+
+class GoogleDriveSource(DocumentSource):
+    """Google Drive 폴더에서 문서를 내려받습니다. (Drive 서비스는 처음 적재할 때 인증)"""
+
+    name = "drive"
+
+    def download_documents(self, folder_id):
+        return download_documents_from_folder(get_google_drive_service(), folder_id)
+
+
+class LocalDirectorySource(DocumentSource):
+    """
+    root/<폴더 ID> 디렉터리 바로 아래의 PDF 파일을 읽습니다. (하위 디렉터리는 읽지 않음)
+    문서에는 파일 버전('source_version', 수정 시각과 크기)을 함께 넣어 감시할 때 바뀐 파일을 구분합니다.
+    """
+
+    name = "local"
+    supports_watch = True
+
+    def __init__(self, root=LOCAL_DOCUMENTS_PATH):
+        self.root = root
+
+    def folder_path(self, folder_id):
+        """폴더 ID에 해당하는 디렉터리 경로. 폴더 ID는 디렉터리 이름 하나여야 합니다."""
+        if not folder_id or folder_id in (".", "..") or os.sep in folder_id or (os.altsep and os.altsep in folder_id):
+            raise ValueError(f"로컬 문서 폴더 ID는 '{self.root}' 아래 디렉터리 이름이어야 합니다: {folder_id!r}")
+        return os.path.join(self.root, folder_id)
+
+    @staticmethod
+    def file_version(stat_result):
+        return f"{stat_result.st_mtime_ns}:{stat_result.st_size}"
+
+    def list_files(self, folder_id):
+        """
+        폴더의 지원되는 PDF 파일과 버전을 반환합니다. 포함 키워드가 없는 파일은 제외합니다.
+
+        Returns:
+            dict: {파일 이름: "수정 시각(ns):크기"}. 디렉터리가 없으면 빈 딕셔너리.
+        """
+        files = {}
+        try:
+            entries = list(os.scandir(self.folder_path(folder_id)))
+        except FileNotFoundError:
+            return files
+        for entry in entries:
+            if not entry.name.lower().endswith(".pdf") or not is_supported_document(entry.name):
+                continue
+            try:
+                if entry.is_file():
+                    files[entry.name] = self.file_version(entry.stat())
+            except FileNotFoundError:
+                # 목록을 읽는 사이에 지워진 파일
+                continue
+        return files
+
+    def load_files(self, folder_id, file_names):
+        """지정한 파일들의 텍스트를 추출합니다. 읽는 사이에 지워졌거나 텍스트가 없는 파일은 건너뜁니다."""
+        folder = self.folder_path(folder_id)
+        documents = []
+        for file_name in file_names:
+            path = os.path.join(folder, file_name)
+            try:
+                # 버전을 먼저 읽어 두면 읽는 도중 파일이 바뀌어도 다음 감시에서 다시 적재됩니다.
+                version = self.file_version(os.stat(path))
+                with open(path, "rb") as f:
+                    file_bytes = f.read()
+            except OSError as e:
+                print(f"'{file_name}' 파일을 읽지 못했습니다: {e}")
+                continue
+
+            text_content = extract_text_from_pdf(file_bytes)
+            if not text_content:
+                print(f"'{file_name}' 문서에서 텍스트를 추출하지 못했습니다.")
+                continue
+            doc_type = classify_document_type(file_name)
+            documents.append({
+                "file_name": file_name, "text_content": text_content, "doc_type": doc_type, "source_version": version,
+            })
+            print(f"'{file_name}' 문서({doc_type})의 텍스트 추출 완료.")
+        return documents
+
+    def download_documents(self, folder_id):
+        files = self.list_files(folder_id)
+        if not files:
+            print(f"로컬 폴더 '{self.folder_path(folder_id)}'에 지원되는 문서가 없습니다.")
+            return []
+        print(f"총 {len(files)}개의 문서를 발견했습니다. 텍스트 추출을 시작합니다.")
+        return self.load_files(folder_id, sorted(files))
+
+
+# set_document_source로 주입한 출처 (벤치마크, 오프라인 실행용)
+_source_override = None
+_sources = {}
+
+
+def set_document_source(source):
+    """get_document_source가 반환할 출처를 지정합니다. None을 넘기면 DOCUMENT_SOURCE 설정으로 되돌립니다."""
+    global _source_override
+    _source_override = source
+
+
+def get_document_source():
+    """DOCUMENT_SOURCE 설정에 따른 문서 출처를 반환합니다. 프로세스 안에서 하나를 만들어 공유합니다."""
+    if _source_override is not None:
+        return _source_override
+    if DOCUMENT_SOURCE not in SOURCE_NAMES:
+        raise ValueError(f"지원하지 않는 문서 출처입니다: {DOCUMENT_SOURCE} (가능한 값: {', '.join(SOURCE_NAMES)})")
+    if DOCUMENT_SOURCE not in _sources:
+        _sources[DOCUMENT_SOURCE] = LocalDirectorySource() if DOCUMENT_SOURCE == "local" else GoogleDriveSource()
+    return _sources[DOCUMENT_SOURCE]
@@ -0,0 +1,46 @@
+# src/utils/document_types.py
+# 이 파일은 파일 이름을 기준으로 규정 문서의 종류(회칙, 세칙, 감사 보고서)를 분류합니다.
+# 분류 결과는 벡터 DB 메타데이터로 저장되어 에이전트별 필터 검색에 사용됩니다.
+
+# 문서 종류 상수
+DOC_TYPE_BYLAWS = "회칙"
+DOC_TYPE_DETAILED_RULES = "세칙"
+DOC_TYPE_AUDIT_REPORT = "감사 보고서"
+
+# 에이전트별 검색 대상 문서 종류
+REGULATION_DOC_TYPES = [DOC_TYPE_BYLAWS, DOC_TYPE_DETAILED_RULES]
+AUDIT_DOC_TYPES = [DOC_TYPE_AUDIT_REPORT]
+
+# 처리 대상 파일 이름에 포함되어야 하는 키워드 목록
+INCLUDE_KEYWORDS = ["회칙", "세칙", "감사", "정기감사", "보고서"]
+
+# 분류 규칙 (앞쪽 규칙이 우선합니다)
+# '감사위원회 세칙'처럼 감사라는 단어가 들어간 규정도 있으므로,
+# 보고서 여부를 먼저 확인한 뒤 회칙/세칙을 확인하고 마지막으로 감사 키워드를 확인합니다.
+_CLASSIFICATION_RULES = [
+    ("보고서", DOC_TYPE_AUDIT_REPORT),
+    ("세칙", DOC_TYPE_DETAILED_RULES),
+    ("회칙", DOC_TYPE_BYLAWS),
+    ("감사", DOC_TYPE_AUDIT_REPORT),
+]
+
+
+def is_supported_document(file_name):
+    """파일 이름에 포함 키워드가 하나라도 있는지 확인합니다."""
+    return any(keyword in file_name for keyword in INCLUDE_KEYWORDS)
+
+
+def classify_document_type(file_name):
+    """
+    파일 이름으로 문서 종류를 판정합니다.
+
+    Args:
+        file_name (str): 문서 파일 이름.
+
+    Returns:
+        str | None: 문서 종류. 어떤 규칙에도 해당하지 않으면 None.
+    """
+    for keyword, doc_type in _CLASSIFICATION_RULES:
+        if keyword in file_name:
+            return doc_type
+    return None
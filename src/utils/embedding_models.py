@@ -0,0 +1,78 @@
+# src/utils/embedding_models.py
+# 이 파일은 임베딩 모델 생성과 디스크 캐시를 담당합니다.
+# 같은 텍스트를 다시 임베딩할 때 API를 호출하지 않도록 CacheBackedEmbeddings로 감싸고,
+# 오프라인 평가를 위해 네트워크 없이 동작하는 결정적 해싱 임베딩도 제공합니다.
+
+import hashlib
+
+import numpy as np
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from langchain_core.embeddings import Embeddings
+
+from src.utils.lexical_index import tokenize
+from src.utils.metrics import CACHE_LOOKUPS
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    토큰 해싱(feature hashing)으로 만드는 결정적 로컬 임베딩입니다.
+    의미 유사도는 Gemini 임베딩보다 약하지만 어휘가 겹치는 청크끼리 가까워지므로,
+    API 없이 반복 가능한 검색 평가와 벤치마크에 사용할 수 있습니다.
+    """
+
+    def __init__(self, dimension=256):
+        self.dimension = dimension
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class _CountingFileStore(LocalFileStore):
+    """조회 결과(적중/실패)를 캐시 지표로 기록하는 LocalFileStore"""
+
+    def mget(self, keys):
+        values = super().mget(keys)
+        hits = sum(value is not None for value in values)
+        if hits:
+            CACHE_LOOKUPS.inc(hits, cache="embedding", result="hit")
+        if len(values) - hits:
+            CACHE_LOOKUPS.inc(len(values) - hits, cache="embedding", result="miss")
+        return values
+
+
+def with_disk_cache(embeddings, cache_path, namespace):
+    """
+    임베딩 모델을 디스크 캐시로 감쌉니다. 문서와 질의 임베딩 모두 캐시합니다.
+
+    Args:
+        embeddings (Embeddings): 원본 임베딩 모델.
+        cache_path (str): 캐시 디렉터리.
+        namespace (str): 모델별로 캐시를 구분할 이름 (보통 모델 이름).
+
+    Returns:
+        Embeddings: 캐시가 적용된 임베딩 모델.
+    """
+    store = _CountingFileStore(cache_path)
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        store,
+        namespace=namespace,
+        query_embedding_cache=True,
+        key_encoder="sha256",
+    )
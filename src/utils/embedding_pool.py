@@ -0,0 +1,195 @@
+# src/utils/embedding_pool.py
+# 이 파일은 여러 폴더 컬렉션이 함께 쓰는 임베딩 풀(FLAT_INDEX_SHARED_POOL)을 제공합니다.
+#
+# 학생회마다 폴더 컬렉션(regulations_<폴더 ID>)을 따로 두면 학칙처럼 모든 폴더에 들어 있는 문서의 청크가
+# 컬렉션 수만큼 반복해서 저장됩니다. 풀은 청크의 정확한 임베딩(float16)을 내용 키(청크 텍스트 + 임베딩)로 한 번만 저장하고,
+# 컬렉션은 검색용 압축 코드(int8, pq)와 풀의 행 위치만 가집니다. 정확한 임베딩은 재순위화와 다시 게시할 때만 읽습니다.
+#
+# - 풀은 수정하지 않는 세그먼트 파일(<이름>.npy)과 내용 키 목록(<이름>.keys.json)으로 구성됩니다.
+#   게시할 때 풀에 없는 청크만 새 세그먼트로 기록하며, 키 파일을 마지막에 기록하여 세그먼트가 완성된 시점을 표시합니다.
+# - 컬렉션 버전의 meta.json에 참조하는 세그먼트 이름이 기록되므로, 읽는 프로세스는 키 목록 없이 세그먼트만 메모리 매핑합니다.
+# - 기록하는 프로세스(적재 작업자)는 게시할 때마다 어느 버전도 참조하지 않는 세그먼트를 지웁니다. (collect_garbage)
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+_SEGMENT_SUFFIX = ".npy"
+_KEYS_SUFFIX = ".keys.json"
+
+
+def content_key(text, vector):
+    """청크 텍스트와 float16 임베딩으로 내용 키를 만듭니다. (같은 텍스트라도 모델이 다르면 다른 키)"""
+    digest = hashlib.sha256(text.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(np.ascontiguousarray(vector, dtype=np.float16).tobytes())
+    return digest.hexdigest()[:32]
+
+
+class EmbeddingPool:
+    """폴더 컬렉션들이 공유하는 내용 주소 방식의 임베딩 저장소입니다."""
+
+    def __init__(self, directory, index_root=None):
+        """
+        Args:
+            directory (str): 세그먼트 파일을 저장할 디렉터리.
+            index_root (str, optional): 컬렉션 인덱스들이 있는 디렉터리. (참조 확인용, 기본값: directory의 상위 디렉터리)
+        """
+        self.directory = directory
+        self.index_root = index_root or os.path.dirname(os.path.abspath(directory))
+
+        self._lock = threading.Lock()
+        # 내용 키 -> (세그먼트 이름, 행). 기록하는 프로세스만 처음 추가할 때 읽습니다.
+        self._keys = None
+        self._segments = {}
+        # 아직 게시되지 않은 버전이 참조하는 세그먼트 (정리 대상에서 제외)
+        self._pending = Counter()
+
+    def _path(self, name, suffix):
+        return os.path.join(self.directory, name + suffix)
+
+    def segment_names(self):
+        """완성된 세그먼트 이름 목록을 오래된 순서로 반환합니다."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(_KEYS_SUFFIX)] for name in names if name.endswith(_KEYS_SUFFIX))
+
+    def _key_index(self):
+        if self._keys is None:
+            keys = {}
+            for name in self.segment_names():
+                with open(self._path(name, _KEYS_SUFFIX), "r", encoding="utf-8") as f:
+                    for row, key in enumerate(json.load(f)):
+                        keys.setdefault(key, (name, row))
+            self._keys = keys
+        return self._keys
+
+    def _segment(self, name):
+        matrix = self._segments.get(name)
+        if matrix is None:
+            matrix = np.load(self._path(name, _SEGMENT_SUFFIX), mmap_mode="r")
+            self._segments[name] = matrix
+        return matrix
+
+    # ----- 쓰기 (기록하는 프로세스) -----
+
+    def add(self, texts, vectors):
+        """
+        청크 임베딩을 풀에 넣습니다. 이미 있는 청크는 기존 행을 참조하고, 새 청크만 새 세그먼트로 기록합니다.
+        반환한 세그먼트는 release를 호출할 때까지 정리하지 않습니다.
+
+        Args:
+            texts (list): 청크 텍스트 목록.
+            vectors (np.ndarray): 정규화된 청크 임베딩 행렬.
+
+        Returns:
+            tuple: (참조하는 세그먼트 이름 목록, 청크별 (세그먼트 위치, 행) int32 행렬)
+        """
+        vectors = np.asarray(vectors, dtype=np.float16)
+        keys = [content_key(text, vector) for text, vector in zip(texts, vectors)]
+
+        with self._lock:
+            index = self._key_index()
+            new_rows = {}
+            for row, key in enumerate(keys):
+                if key not in index and key not in new_rows:
+                    new_rows[key] = row
+
+            if new_rows:
+                os.makedirs(self.directory, exist_ok=True)
+                name = f"s{time.time_ns()}"
+                segment_path = self._path(name, _SEGMENT_SUFFIX)
+                with open(f"{segment_path}.tmp", "wb") as f:
+                    np.save(f, vectors[list(new_rows.values())])
+                os.replace(f"{segment_path}.tmp", segment_path)
+                keys_path = self._path(name, _KEYS_SUFFIX)
+                with open(f"{keys_path}.tmp", "w", encoding="utf-8") as f:
+                    json.dump(list(new_rows), f)
+                os.replace(f"{keys_path}.tmp", keys_path)
+                for position, key in enumerate(new_rows):
+                    index[key] = (name, position)
+
+            segments = sorted({index[key][0] for key in keys})
+            positions = {name: position for position, name in enumerate(segments)}
+            refs = np.array([(positions[index[key][0]], index[key][1]) for key in keys], dtype=np.int32).reshape(-1, 2)
+            self._pending.update(segments)
+        return segments, refs
+
+    def release(self, segments):
+        """add가 반환한 세그먼트를 참조하는 버전이 게시되었거나 버려졌음을 알립니다."""
+        with self._lock:
+            self._pending.subtract(segments)
+            self._pending += Counter()
+
+    def collect_garbage(self):
+        """
+        어느 컬렉션 버전도 참조하지 않는 세그먼트를 지웁니다. (기록하는 프로세스에서만 호출)
+
+        Returns:
+            int: 지운 세그먼트 수.
+        """
+        with self._lock:
+            live = set(self._pending)
+            meta_paths = glob.glob(os.path.join(self.index_root, "*", "versions", "*", "meta.json"))
+            meta_paths += glob.glob(os.path.join(self.index_root, "*", "meta.json"))
+            for meta_path in meta_paths:
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        live.update(json.load(f).get("pool_segments") or [])
+                except (OSError, ValueError):
+                    # 지워지는 중인 이전 버전
+                    continue
+
+            removed = [name for name in self.segment_names() if name not in live]
+            for name in removed:
+                # 키 파일을 먼저 지워 다른 프로세스가 반쯤 지운 세그먼트를 완성된 것으로 보지 않게 합니다.
+                for suffix in (_KEYS_SUFFIX, _SEGMENT_SUFFIX):
+                    try:
+                        os.remove(self._path(name, suffix))
+                    except FileNotFoundError:
+                        pass
+                self._segments.pop(name, None)
+            if removed and self._keys is not None:
+                removed_set = set(removed)
+                self._keys = {key: ref for key, ref in self._keys.items() if ref[0] not in removed_set}
+        if removed:
+            print(f"임베딩 풀에서 참조되지 않는 세그먼트 {len(removed)}개를 지웠습니다.")
+        return len(removed)
+
+    # ----- 읽기 -----
+
+    def vectors(self, segments, refs):
+        """
+        참조하는 행의 임베딩을 float32 행렬로 반환합니다. (메모리 매핑된 세그먼트에서 필요한 행만 읽음)
+
+        Args:
+            segments (list): 컬렉션 버전이 참조하는 세그먼트 이름 목록.
+            refs (np.ndarray): (세그먼트 위치, 행) 행렬.
+        """
+        refs = np.asarray(refs)
+        result = None
+        for position in np.unique(refs[:, 0]):
+            matrix = self._segment(segments[position])
+            if result is None:
+                result = np.empty((len(refs), matrix.shape[1]), dtype=np.float32)
+            selected = refs[:, 0] == position
+            result[selected] = matrix[refs[selected, 1]]
+        return result if result is not None else np.empty((0, 0), dtype=np.float32)
+
+    def stats(self):
+        """세그먼트 수, 저장된 임베딩 수, 디스크 사용량(바이트)을 반환합니다."""
+        names = self.segment_names()
+        rows = 0
+        size = 0
+        for name in names:
+            rows += self._segment(name).shape[0]
+            size += os.path.getsize(self._path(name, _SEGMENT_SUFFIX)) + os.path.getsize(self._path(name, _KEYS_SUFFIX))
+        return {"segments": len(names), "rows": rows, "bytes": size}
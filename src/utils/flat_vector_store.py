@@ -0,0 +1,711 @@
+# src/utils/flat_vector_store.py
+# 이 파일은 ChromaDB 대신 사용할 수 있는 NumPy 기반 전수 탐색(flat) 벡터 저장소를 제공합니다.
+# 수천 개 규모의 청크에서는 HNSW 인덱스보다 정규화된 임베딩 행렬에 대한 행렬곱이 더 빠르고,
+# 메모리 매핑 파일을 사용하므로 프로세스 시작 시 로딩 비용도 거의 없습니다.
+#
+# VersionedFlatIndex는 인덱스를 수정하지 않는 버전 디렉터리로 게시하고 CURRENT 파일로 현재 버전을 가리킵니다.
+# 기록하는 프로세스(적재 작업자)는 하나뿐이고, 여러 질의 작업자 프로세스는 읽기 전용으로 열어
+# CURRENT가 바뀌면 다음 검색부터 새 버전을 사용합니다. (재시작 불필요, 검색 도중 파일이 바뀌지 않음)
+#
+# 폴더가 많은 배포에서는 int8(행별 스케일) 또는 pq(곱 양자화, 부분 벡터마다 256개 중심점의 번호) 코드로 검색하고,
+# 상위 후보만 정확한 임베딩으로 다시 점수를 매길 수 있습니다. (rerank_candidates)
+# 정확한 임베딩은 pq 인덱스의 exact.npy(float16) 또는 여러 컬렉션이 공유하는 임베딩 풀(src/utils/embedding_pool.py)에
+# 두고 메모리 매핑으로 후보 행만 읽으므로, 검색할 때 상주 메모리는 압축 코드 크기만큼만 늘어납니다.
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8", "pq")
+
+# pq 부분 벡터 수 기본값 (768차원이면 부분 벡터 8차원, 청크당 96바이트)
+DEFAULT_PQ_SUBVECTORS = 96
+# pq 중심점 학습에 사용하는 최대 청크 수와 k-means 반복 횟수
+_PQ_TRAINING_SAMPLE = 20000
+_PQ_ITERATIONS = 12
+# int8 점수 계산 시 float32로 변환하는 행 블록 크기 (질의마다 전체 행렬을 변환하지 않도록)
+_SCORE_BLOCK_ROWS = 1024
+
+_VECTORS_FILE = "vectors.npy"
+_SCALES_FILE = "scales.npy"
+_CODEBOOK_FILE = "codebook.npy"
+_EXACT_FILE = "exact.npy"
+_POOL_ROWS_FILE = "pool_rows.npy"
+_TABLE_FILE = "table.json"
+_META_FILE = "meta.json"
+_CURRENT_FILE = "CURRENT"
+_VERSIONS_DIR = "versions"
+
+
+def _normalize_rows(matrix):
+    """행 단위로 L2 정규화합니다. 길이가 0인 행은 그대로 둡니다."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _pad_columns(matrix, width):
+    if matrix.shape[1] == width:
+        return matrix
+    padded = np.zeros((matrix.shape[0], width), dtype=np.float32)
+    padded[:, :matrix.shape[1]] = matrix
+    return padded
+
+
+def _nearest_centroids(vectors, centroids):
+    """각 행에 가장 가까운 중심점 번호를 반환합니다."""
+    distances = (centroids * centroids).sum(axis=1)[None, :] - 2.0 * (vectors @ centroids.T)
+    return np.argmin(distances, axis=1)
+
+
+def _train_pq(matrix, subvectors, seed=0):
+    """
+    곱 양자화 코드북을 학습합니다. 차원을 subvectors개의 부분 벡터로 나누고 부분 공간마다 k-means로 중심점을 구합니다.
+    (차원이 나누어떨어지지 않으면 0으로 채웁니다)
+
+    Returns:
+        np.ndarray: (부분 벡터 수, 중심점 수, 부분 벡터 차원) 코드북.
+    """
+    rng = np.random.default_rng(seed)
+    subvectors = max(1, min(subvectors, matrix.shape[1]))
+    sub_dim = -(-matrix.shape[1] // subvectors)
+    sample = matrix
+    if len(sample) > _PQ_TRAINING_SAMPLE:
+        sample = sample[np.sort(rng.choice(len(sample), _PQ_TRAINING_SAMPLE, replace=False))]
+    sample = _pad_columns(np.asarray(sample, dtype=np.float32), subvectors * sub_dim)
+    centroid_count = min(256, len(sample))
+
+    codebook = np.empty((subvectors, centroid_count, sub_dim), dtype=np.float32)
+    for m in range(subvectors):
+        part = sample[:, m * sub_dim:(m + 1) * sub_dim]
+        centroids = part[rng.choice(len(part), centroid_count, replace=False)].copy()
+        for _ in range(_PQ_ITERATIONS):
+            assign = _nearest_centroids(part, centroids)
+            counts = np.bincount(assign, minlength=centroid_count)
+            filled = counts > 0
+            for j in range(sub_dim):
+                sums = np.bincount(assign, weights=part[:, j], minlength=centroid_count)
+                centroids[filled, j] = sums[filled] / counts[filled]
+        codebook[m] = centroids
+    return codebook
+
+
+def _encode_pq(matrix, codebook, batch_size=8192):
+    """행렬을 부분 벡터별 중심점 번호(uint8)로 변환합니다."""
+    subvectors, _, sub_dim = codebook.shape
+    codes = np.empty((matrix.shape[0], subvectors), dtype=np.uint8)
+    for start in range(0, matrix.shape[0], batch_size):
+        batch = _pad_columns(np.asarray(matrix[start:start + batch_size], dtype=np.float32), subvectors * sub_dim)
+        for m in range(subvectors):
+            codes[start:start + len(batch), m] = _nearest_centroids(batch[:, m * sub_dim:(m + 1) * sub_dim], codebook[m])
+    return codes
+
+
+def _pq_scores(query_matrix, codes, codebook):
+    """질의와 pq 코드의 근사 내적을 부분 벡터별 거리표로 계산합니다. (질의 m x 청크 n)"""
+    subvectors, _, sub_dim = codebook.shape
+    queries = _pad_columns(query_matrix, subvectors * sub_dim).reshape(len(query_matrix), subvectors, sub_dim)
+    # 질의별 (부분 벡터, 중심점) 내적표
+    tables = np.einsum("qms,mks->qmk", queries, codebook)
+    columns = np.arange(subvectors)[None, :]
+    scores = np.empty((len(query_matrix), codes.shape[0]), dtype=np.float32)
+    for row, table in enumerate(tables):
+        scores[row] = table[columns, codes].sum(axis=1)
+    return scores
+
+
+def _quantize(matrix, dtype, pq_subvectors=DEFAULT_PQ_SUBVECTORS):
+    """
+    정규화된 float32 행렬을 저장용 dtype으로 변환합니다.
+
+    Returns:
+        tuple: (저장용 행렬, 부가 데이터). 부가 데이터는 int8이면 행별 스케일, pq이면 코드북, 그 외에는 None입니다.
+    """
+    if dtype == "float32":
+        return matrix.astype(np.float32), None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    if dtype == "pq":
+        # 코드북은 청크 수와 관계없이 256 x 차원 크기이므로 float16으로 저장합니다. (작은 컬렉션의 오버헤드 절감)
+        codebook = _train_pq(matrix, pq_subvectors).astype(np.float16)
+        return _encode_pq(matrix, codebook.astype(np.float32)), codebook
+    # int8: 행별 대칭 양자화 (값 = code * scale)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _write_atomic(path, write_fn):
+    """임시 파일에 기록한 뒤 os.replace로 교체하여 읽는 쪽이 깨진 파일을 보지 않게 합니다."""
+    tmp_path = f"{path}.tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _matches_filter(metadata, search_filter):
+    """Chroma 스타일의 단순 메타데이터 필터({"key": value} 또는 {"key": {"$in": [...]}})를 평가합니다."""
+    for key, condition in search_filter.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FlatVectorStore:
+    """
+    메모리 매핑된 임베딩 행렬과 컬럼형 메타데이터 테이블로 구성된 벡터 저장소입니다.
+
+    디렉터리 구성:
+        vectors.npy    - 정규화된 임베딩 행렬 (float32, float16, int8) 또는 pq 코드
+        scales.npy     - int8 저장 시 행별 스케일
+        codebook.npy   - pq 저장 시 부분 벡터별 중심점 (float16)
+        exact.npy      - pq 저장 시 정확한 임베딩 (float16, 재순위화와 다시 게시할 때 사용)
+        pool_rows.npy  - 임베딩 풀을 쓸 때 청크별 (세그먼트 위치, 행). 이때는 exact.npy 대신 풀의 임베딩을 사용
+        table.json     - ids, texts, metadatas 컬럼
+        meta.json      - dtype, 차원, 청크 수, 참조하는 풀 세그먼트 등 인덱스 정보
+
+    LangChain 벡터 저장소와 같은 이름의 메서드(add_documents, similarity_search 등)를 제공하므로
+    vector_db_manager에서 Chroma와 같은 방식으로 사용할 수 있습니다.
+    """
+
+    def __init__(
+        self, directory, embedding_function=None, dtype="float32",
+        pool=None, pq_subvectors=DEFAULT_PQ_SUBVECTORS, rerank_candidates=0,
+    ):
+        """
+        Args:
+            directory (str): 인덱스 파일을 저장할 디렉터리.
+            embedding_function: embed_documents/embed_query를 제공하는 임베딩 객체.
+                                이미 계산된 임베딩만 다루는 경우 None이어도 됩니다.
+            dtype (str): 새 인덱스를 만들 때 사용할 저장 형식. 기존 인덱스는 저장된 형식을 따릅니다.
+            pool (EmbeddingPool, optional): 정확한 임베딩을 저장할 공유 임베딩 풀.
+            pq_subvectors (int): pq 저장 시 부분 벡터 수.
+            rerank_candidates (int): 0보다 크면 압축 코드로 이만큼 후보를 고른 뒤 정확한 임베딩으로 다시 정렬합니다.
+                                     (정확한 임베딩이 있는 pq 인덱스나 임베딩 풀을 쓰는 인덱스에만 적용)
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {dtype} (지원: {', '.join(SUPPORTED_DTYPES)})")
+
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.dtype = dtype
+        self.pool = pool
+        self.pq_subvectors = pq_subvectors
+        self.rerank_candidates = rerank_candidates
+
+        self._vectors = None
+        self._scales = None
+        self._codebook = None
+        self._exact = None
+        self._pool_segments = None
+        self._pool_rows = None
+        self._dimension = 0
+        self._upcast_vectors = None
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._column_cache = {}
+        self._load()
+
+    # ----- 저장/로딩 -----
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def _load(self):
+        """디스크의 인덱스를 메모리 매핑으로 엽니다. 인덱스가 없으면 빈 저장소로 시작합니다."""
+        meta_path = self._path(_META_FILE)
+        if not os.path.exists(meta_path):
+            return
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self._path(_TABLE_FILE), "r", encoding="utf-8") as f:
+            table = json.load(f)
+
+        self.dtype = meta["dtype"]
+        self._dimension = meta["dimension"]
+        self._ids = table["ids"]
+        self._texts = table["texts"]
+        self._metadatas = table["metadatas"]
+        self._column_cache = {}
+        self._upcast_vectors = None
+
+        if meta["count"]:
+            self._vectors = np.load(self._path(_VECTORS_FILE), mmap_mode="r")
+            if self.dtype == "int8":
+                self._scales = np.load(self._path(_SCALES_FILE), mmap_mode="r")
+            if self.dtype == "pq":
+                self._codebook = np.load(self._path(_CODEBOOK_FILE)).astype(np.float32)
+            if meta.get("pool_segments") is not None:
+                if self.pool is None:
+                    raise ValueError(f"'{self.directory}'는 임베딩 풀을 사용하는 인덱스입니다. (FLAT_INDEX_SHARED_POOL=true 필요)")
+                self._pool_segments = meta["pool_segments"]
+                self._pool_rows = np.load(self._path(_POOL_ROWS_FILE), mmap_mode="r")
+            elif os.path.exists(self._path(_EXACT_FILE)):
+                self._exact = np.load(self._path(_EXACT_FILE), mmap_mode="r")
+
+    def _save(self, vectors, extra, exact=None, pool_segments=None, pool_rows=None):
+        """
+        행렬과 테이블을 원자적으로 기록한 뒤 메모리 매핑으로 다시 엽니다.
+
+        Args:
+            vectors (np.ndarray): 저장용 행렬.
+            extra (np.ndarray | None): int8의 행별 스케일 또는 pq의 코드북.
+            exact (np.ndarray, optional): 함께 저장할 정확한 임베딩 (float16).
+            pool_segments (list, optional): 임베딩 풀을 쓸 때 참조하는 세그먼트 이름 목록.
+            pool_rows (np.ndarray, optional): 청크별 (세그먼트 위치, 행).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        def write_npy(array):
+            def _write(tmp_path):
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+            return _write
+
+        def write_json(data):
+            def _write(tmp_path):
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+            return _write
+
+        _write_atomic(self._path(_VECTORS_FILE), write_npy(vectors))
+        if extra is not None:
+            _write_atomic(self._path(_CODEBOOK_FILE if self.dtype == "pq" else _SCALES_FILE), write_npy(extra))
+        if exact is not None:
+            _write_atomic(self._path(_EXACT_FILE), write_npy(exact))
+        if pool_rows is not None:
+            _write_atomic(self._path(_POOL_ROWS_FILE), write_npy(pool_rows))
+        _write_atomic(
+            self._path(_TABLE_FILE),
+            write_json({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}),
+        )
+        meta = {"dtype": self.dtype, "dimension": int(vectors.shape[1]), "count": len(self._ids)}
+        if pool_segments is not None:
+            meta["pool_segments"] = pool_segments
+        # meta.json을 마지막에 기록하여 인덱스가 완성된 시점을 표시합니다.
+        _write_atomic(self._path(_META_FILE), write_json(meta))
+        self._load()
+
+    def has_exact_vectors(self):
+        """압축 코드와 별도로 정확한 임베딩(exact.npy 또는 임베딩 풀)이 있는지 여부"""
+        return self._exact is not None or self._pool_rows is not None
+
+    def _exact_rows(self, indices):
+        """지정한 행의 정확한 임베딩을 float32로 읽습니다."""
+        if self._pool_rows is not None:
+            return self.pool.vectors(self._pool_segments, self._pool_rows[indices])
+        return np.asarray(self._exact[indices], dtype=np.float32)
+
+    def _dequantized(self):
+        """저장된 행렬을 float32로 복원합니다. 정확한 임베딩이 있으면 그것을 사용합니다. (추가 기록, 내보내기용)"""
+        if self._vectors is None:
+            return None
+        if self.has_exact_vectors():
+            return self._exact_rows(np.arange(len(self._ids)))
+        if self.dtype == "int8":
+            return self._vectors.astype(np.float32) * np.asarray(self._scales)[:, None]
+        if self.dtype == "pq":
+            subvectors, _, sub_dim = self._codebook.shape
+            columns = np.arange(subvectors)[None, :]
+            decoded = self._codebook[columns, np.asarray(self._vectors)].reshape(len(self._ids), subvectors * sub_dim)
+            return decoded[:, :self._dimension]
+        return np.asarray(self._vectors, dtype=np.float32)
+
+    # ----- 쓰기 -----
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        """
+        이미 계산된 임베딩을 저장소에 추가합니다.
+
+        Args:
+            texts (list): 청크 텍스트 목록.
+            embeddings (list | np.ndarray): 청크 임베딩 목록.
+            metadatas (list, optional): 청크 메타데이터 목록.
+            ids (list, optional): 청크 ID 목록. 없으면 UUID를 생성합니다.
+
+        Returns:
+            list: 추가된 청크 ID 목록.
+        """
+        if not texts:
+            return []
+
+        new_vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        existing = self._dequantized()
+        combined = new_vectors if existing is None else np.vstack([existing, new_vectors])
+        stored, extra = _quantize(combined, self.dtype, self.pq_subvectors)
+
+        self._ids = list(self._ids) + list(ids)
+        self._texts = list(self._texts) + list(texts)
+        self._metadatas = list(self._metadatas) + [dict(m or {}) for m in metadatas]
+        if self.pool is not None:
+            segments, refs = self.pool.add(self._texts, combined)
+            try:
+                self._save(stored, extra, pool_segments=segments, pool_rows=refs)
+            finally:
+                self.pool.release(segments)
+        else:
+            self._save(stored, extra, exact=combined.astype(np.float16) if self.dtype == "pq" else None)
+        return list(ids)
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        """텍스트를 임베딩하여 저장소에 추가합니다."""
+        if self.embedding_function is None:
+            raise ValueError("임베딩 함수가 설정되지 않아 텍스트를 추가할 수 없습니다.")
+        texts = list(texts)
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    def add_documents(self, documents, ids=None):
+        """LangChain Document 목록을 저장소에 추가합니다."""
+        return self.add_texts(
+            [doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+        )
+
+    # ----- 읽기 -----
+
+    def count(self):
+        """저장된 청크 수를 반환합니다."""
+        return len(self._ids)
+
+    def export_columns(self):
+        """
+        저장된 모든 청크를 float32 임베딩과 함께 반환합니다. (스냅샷 내보내기용)
+
+        Returns:
+            dict: ids, texts, metadatas, embeddings
+        """
+        return {
+            "ids": list(self._ids),
+            "texts": list(self._texts),
+            "metadatas": [dict(m) for m in self._metadatas],
+            "embeddings": self._dequantized(),
+        }
+
+    def _filter_mask(self, search_filter):
+        """메타데이터 필터를 만족하는 행의 불리언 마스크를 반환합니다."""
+        if not search_filter:
+            return None
+
+        # 단일 키 필터(doc_type 등)는 컬럼 배열을 캐시해 두고 벡터화하여 평가합니다.
+        if len(search_filter) == 1:
+            key, condition = next(iter(search_filter.items()))
+            if not isinstance(condition, dict) or set(condition) <= {"$in", "$eq"}:
+                column = self._column_cache.get(key)
+                if column is None:
+                    column = np.array([m.get(key) for m in self._metadatas], dtype=object)
+                    self._column_cache[key] = column
+                if isinstance(condition, dict):
+                    values = condition.get("$in", [condition.get("$eq")])
+                else:
+                    values = [condition]
+                return np.isin(column, np.array(values, dtype=object))
+
+        return np.array([_matches_filter(m, search_filter) for m in self._metadatas], dtype=bool)
+
+    def _scores(self, query_matrix):
+        """정규화된 질의 행렬(m x d)과 저장된 행렬의 코사인 유사도(m x n)를 계산합니다."""
+        if self.dtype == "pq":
+            return _pq_scores(query_matrix, np.asarray(self._vectors), self._codebook)
+        if self.dtype == "int8":
+            scales = np.asarray(self._scales)
+            scores = np.empty((len(query_matrix), len(self._ids)), dtype=np.float32)
+            for start in range(0, len(self._ids), _SCORE_BLOCK_ROWS):
+                end = start + _SCORE_BLOCK_ROWS
+                block = self._vectors[start:end].astype(np.float32)
+                scores[:, start:end] = (query_matrix @ block.T) * scales[None, start:end]
+            return scores
+        if self.dtype == "float16":
+            # NumPy의 float16 -> float32 변환은 느리므로 첫 검색 때 한 번만 변환해 둡니다.
+            # (float16은 디스크 사용량을 줄이는 용도이며, 메모리 절감이 목적이면 int8을 사용하세요.)
+            if self._upcast_vectors is None:
+                self._upcast_vectors = np.asarray(self._vectors, dtype=np.float32)
+            return query_matrix @ self._upcast_vectors.T
+        return query_matrix @ self._vectors.T
+
+    def _top_k(self, scores, k, mask):
+        """점수 행렬의 각 행에서 상위 k개 인덱스와 점수를 argpartition으로 추출합니다."""
+        if mask is not None:
+            scores = np.where(mask[None, :], scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return [[] for _ in range(scores.shape[0])]
+
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+        results = []
+        for row, row_candidates in enumerate(candidates):
+            row_scores = scores[row, row_candidates]
+            order = np.argsort(-row_scores)
+            results.append([(int(row_candidates[i]), float(row_scores[i])) for i in order])
+        return results
+
+    def _to_document(self, index):
+        return Document(page_content=self._texts[index], metadata=dict(self._metadatas[index]))
+
+    def batch_similarity_search_by_vector(self, embeddings, k=4, filter=None):
+        """
+        여러 질의 임베딩을 한 번의 행렬곱으로 검색합니다.
+
+        Returns:
+            list: 질의별 (Document, 코사인 유사도) 목록.
+        """
+        if not self._ids:
+            return [[] for _ in embeddings]
+
+        query_matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        scores = self._scores(query_matrix)
+        candidates = k
+        if self.rerank_candidates > k and self.has_exact_vectors():
+            candidates = self.rerank_candidates
+        top = self._top_k(scores, candidates, self._filter_mask(filter))
+        if candidates > k:
+            top = self._rerank(query_matrix, top, k)
+        return [[(self._to_document(i), score) for i, score in row] for row in top]
+
+    def _rerank(self, query_matrix, top, k):
+        """압축 코드로 고른 후보를 정확한 임베딩의 코사인 유사도로 다시 정렬하여 상위 k개를 남깁니다."""
+        results = []
+        for query, row in zip(query_matrix, top):
+            if not row:
+                results.append(row)
+                continue
+            indices = np.array([i for i, _ in row])
+            exact_scores = self._exact_rows(indices) @ query
+            order = np.argsort(-exact_scores)[:k]
+            results.append([(int(indices[i]), float(exact_scores[i])) for i in order])
+        return results
+
+    def batch_similarity_search(self, queries, k=4, filter=None):
+        """여러 질의를 한 번에 임베딩하고 검색합니다."""
+        query_embeddings = self.embedding_function.embed_documents(list(queries))
+        results = self.batch_similarity_search_by_vector(query_embeddings, k=k, filter=filter)
+        return [[doc for doc, _ in row] for row in results]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        """질의와 가장 유사한 문서를 코사인 유사도와 함께 반환합니다."""
+        query_embedding = self.embedding_function.embed_query(query)
+        return self.batch_similarity_search_by_vector([query_embedding], k=k, filter=filter)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        """임베딩 벡터로 가장 유사한 문서를 반환합니다."""
+        return [doc for doc, _ in self.batch_similarity_search_by_vector([embedding], k=k, filter=filter)[0]]
+
+    def similarity_search(self, query, k=4, filter=None):
+        """질의와 가장 유사한 문서를 반환합니다."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+
+class VersionedFlatIndex:
+    """
+    버전 디렉터리와 CURRENT 포인터로 구성된 flat 인덱스입니다.
+
+    디렉터리 구성:
+        CURRENT            - 현재 버전 이름 (임시 파일에 쓴 뒤 os.replace로 원자적으로 교체)
+        versions/<버전>/   - FlatVectorStore 디렉터리 (게시한 뒤에는 수정하지 않음)
+
+    기록(add_*, publish)은 현재 버전에 새 청크를 합친 전체 인덱스를 새 버전 디렉터리에 만든 뒤 CURRENT를 바꿉니다.
+    읽기는 매번 CURRENT의 파일 정보(stat)를 확인하여 바뀌었으면 새 버전을 메모리 매핑으로 다시 엽니다.
+    이전 버전은 keep_versions개까지 남겨 두므로, 다른 프로세스가 검색 중인 버전이 곧바로 지워지지 않습니다.
+    이전 형식(디렉터리에 meta.json이 바로 있는 인덱스)도 그대로 읽으며, 처음 기록할 때 버전 형식으로 옮깁니다.
+    임베딩 풀을 쓰면 게시한 뒤 어느 버전도 참조하지 않는 풀 세그먼트를 정리합니다.
+    """
+
+    def __init__(
+        self, directory, embedding_function=None, dtype="float32", keep_versions=3,
+        pool=None, pq_subvectors=DEFAULT_PQ_SUBVECTORS, rerank_candidates=0,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {dtype} (지원: {', '.join(SUPPORTED_DTYPES)})")
+
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.dtype = dtype
+        self.keep_versions = max(1, keep_versions)
+        self.pool = pool
+        self.pq_subvectors = pq_subvectors
+        self.rerank_candidates = rerank_candidates
+
+        self._lock = threading.Lock()
+        self._store = None
+        self._version = None
+        self._pointer_signature = None
+
+    # ----- 버전 -----
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _read_pointer_signature(self):
+        try:
+            stat = os.stat(self._path(_CURRENT_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def current_version(self):
+        """CURRENT가 가리키는 버전 이름을 반환합니다. 아직 게시된 버전이 없으면 None."""
+        try:
+            with open(self._path(_CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def store(self):
+        """현재 버전의 FlatVectorStore를 반환합니다. CURRENT가 바뀌었으면 새 버전을 엽니다."""
+        signature = self._read_pointer_signature()
+        if self._store is not None and signature == self._pointer_signature:
+            return self._store
+
+        with self._lock:
+            if self._store is None or signature != self._pointer_signature:
+                version = self.current_version()
+                # 버전이 없으면 이전 형식 인덱스(또는 빈 저장소)로 엽니다.
+                path = self._path(_VERSIONS_DIR, version) if version else self.directory
+                self._store = self._open_store(path)
+                self._version = version
+                self._pointer_signature = signature
+            return self._store
+
+    def _open_store(self, path):
+        return FlatVectorStore(
+            path, dtype=self.dtype, pool=self.pool,
+            pq_subvectors=self.pq_subvectors, rerank_candidates=self.rerank_candidates,
+        )
+
+    def version(self):
+        """마지막으로 연 버전 이름을 반환합니다."""
+        self.store()
+        return self._version
+
+    def publish(self, ids, texts, metadatas, embeddings):
+        """
+        주어진 내용 전체로 새 버전을 만들고 CURRENT를 교체합니다. (임베딩 API는 호출하지 않음)
+
+        Returns:
+            str: 게시한 버전 이름.
+        """
+        version = f"v{time.time_ns()}"
+        version_dir = self._path(_VERSIONS_DIR, version)
+        staging_dir = f"{version_dir}.partial"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        # 내용이 비어 있어도 빈 버전 디렉터리를 게시합니다. (마지막 파일이 삭제된 폴더)
+        os.makedirs(staging_dir)
+        self._open_store(staging_dir).add_embeddings(
+            list(texts), embeddings, metadatas=list(metadatas), ids=list(ids)
+        )
+        os.replace(staging_dir, version_dir)
+
+        def write_pointer(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(version)
+
+        _write_atomic(self._path(_CURRENT_FILE), write_pointer)
+        self._prune(version)
+        if self.pool is not None:
+            self.pool.collect_garbage()
+        return version
+
+    def _prune(self, current):
+        """최근 keep_versions개를 제외한 이전 버전과 이전 형식 파일을 지웁니다."""
+        versions_dir = self._path(_VERSIONS_DIR)
+        versions = sorted(
+            name for name in os.listdir(versions_dir)
+            if os.path.isdir(os.path.join(versions_dir, name)) and not name.endswith(".partial")
+        )
+        for name in versions[:-self.keep_versions]:
+            if name != current:
+                shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+        for name in (_VECTORS_FILE, _SCALES_FILE, _CODEBOOK_FILE, _EXACT_FILE, _POOL_ROWS_FILE, _TABLE_FILE, _META_FILE):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+    # ----- 쓰기 -----
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        """이미 계산된 임베딩을 현재 버전에 더한 새 버전을 게시합니다."""
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        new_vectors = np.asarray(embeddings, dtype=np.float32)
+
+        current = self.store()
+        if current.count():
+            existing = current.export_columns()
+            self.publish(
+                existing["ids"] + list(ids),
+                existing["texts"] + list(texts),
+                existing["metadatas"] + [dict(m or {}) for m in metadatas],
+                np.vstack([existing["embeddings"], new_vectors]),
+            )
+        else:
+            self.publish(ids, texts, [dict(m or {}) for m in metadatas], new_vectors)
+        return list(ids)
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        """텍스트를 임베딩하여 새 버전으로 게시합니다."""
+        if self.embedding_function is None:
+            raise ValueError("임베딩 함수가 설정되지 않아 텍스트를 추가할 수 없습니다.")
+        texts = list(texts)
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    def add_documents(self, documents, ids=None):
+        """LangChain Document 목록을 새 버전으로 게시합니다."""
+        return self.add_texts(
+            [doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+        )
+
+    # ----- 읽기 (현재 버전에 위임) -----
+
+    def count(self):
+        return self.store().count()
+
+    def export_columns(self):
+        return self.store().export_columns()
+
+    def batch_similarity_search_by_vector(self, embeddings, k=4, filter=None):
+        return self.store().batch_similarity_search_by_vector(embeddings, k=k, filter=filter)
+
+    def batch_similarity_search(self, queries, k=4, filter=None):
+        query_embeddings = self.embedding_function.embed_documents(list(queries))
+        results = self.batch_similarity_search_by_vector(query_embeddings, k=k, filter=filter)
+        return [[doc for doc, _ in row] for row in results]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        query_embedding = self.embedding_function.embed_query(query)
+        return self.batch_similarity_search_by_vector([query_embedding], k=k, filter=filter)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        return [doc for doc, _ in self.batch_similarity_search_by_vector([embedding], k=k, filter=filter)[0]]
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
@@ -0,0 +1,177 @@
+# src/utils/folder_watcher.py
+# 이 파일은 로컬 문서 폴더의 파일 변경을 감시하여 바뀐 파일만 다시 추출·임베딩합니다. (DOCUMENT_SOURCE=local)
+#
+# - watchdog이 설치되어 있으면 운영체제의 파일 변경 알림(Linux inotify, macOS FSEvents, Windows ReadDirectoryChangesW)을 받고,
+#   알림이 LOCAL_WATCH_DEBOUNCE_S초 동안 잠잠해지면(파일 복사가 끝나면) 폴더를 다시 훑어 반영합니다.
+#   watchdog이 없거나 알림을 쓸 수 없는 파일 시스템이면 LOCAL_WATCH_POLL_S초마다 폴더를 다시 훑습니다.
+# - 무엇이 바뀌었는지는 알림 내용이 아니라 파일 목록의 버전(수정 시각:크기)을 마지막으로 적재한 버전과 비교하여 정합니다.
+#   그래서 이름 바꾸기, 편집기의 임시 파일 교체, 놓친 알림도 같은 방식으로 처리됩니다.
+# - 추가·수정된 파일은 다시 추출하여 그 파일의 청크만 교체하고, 삭제된 파일은 청크를 지웁니다. (replace_source_documents)
+#   다른 파일의 청크와 임베딩은 그대로 두므로 폴더 전체를 다시 적재하지 않습니다.
+# - 감시는 인덱스에 기록하는 프로세스(단일 프로세스 또는 적재 작업자)에서만 실행합니다.
+
+import threading
+import time
+
+from src.config import LOCAL_WATCH_DEBOUNCE_S, LOCAL_WATCH_POLL_S
+from src.utils.metrics import WATCH_REINDEX_DURATION, WATCHED_FILE_CHANGES, WATCHED_FOLDERS
+from src.utils.vector_db_manager import get_source_versions, replace_source_documents
+
+# 알림이 계속 이어져도 이 횟수만큼 기다린 뒤에는 반영합니다. (계속 쓰이는 파일 때문에 반영이 멈추지 않도록)
+MAX_DEBOUNCE_ROUNDS = 10
+
+
+class FolderWatcher:
+    """로컬 문서 폴더 하나를 감시하여 컬렉션을 최신 상태로 유지합니다."""
+
+    def __init__(self, source, folder_id, collection_name, debounce_s=LOCAL_WATCH_DEBOUNCE_S, poll_s=LOCAL_WATCH_POLL_S):
+        """
+        Args:
+            source (LocalDirectorySource): 파일 목록과 텍스트 추출을 제공하는 로컬 문서 출처.
+            folder_id (str): 감시할 폴더 ID.
+            collection_name (str): 갱신할 컬렉션 이름.
+            debounce_s (float): 마지막 알림 뒤 반영하기까지 기다리는 시간.
+            poll_s (float): 알림을 쓸 수 없을 때 폴더를 다시 훑는 간격.
+        """
+        self.source = source
+        self.folder_id = folder_id
+        self.collection_name = collection_name
+        self.debounce_s = debounce_s
+        self.poll_s = poll_s
+        # "notify"(파일 변경 알림) 또는 "poll"(주기적으로 다시 훑기)
+        self.mode = ""
+
+        # 마지막으로 적재한 파일별 버전
+        self._versions = {}
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._sync_lock = threading.Lock()
+        self._observer = None
+        self._thread = None
+
+    def start(self, versions=None):
+        """
+        폴더를 마지막으로 적재한 버전과 한 번 맞춘 뒤 감시를 시작합니다. (꺼져 있던 동안의 변경 반영)
+
+        Args:
+            versions (dict, optional): 방금 적재한 파일별 버전. None이면 컬렉션에 저장된 버전을 읽습니다.
+                                       (텍스트가 없어 청크가 없는 파일도 다시 추출하지 않도록 적재 직후에는 넘겨 줍니다)
+        """
+        self._versions = dict(versions) if versions is not None else get_source_versions(self.collection_name)
+        self.sync()
+        self._observer = self._start_observer()
+        self.mode = "notify" if self._observer is not None else "poll"
+        self._thread = threading.Thread(target=self._run, name=f"watch-{self.folder_id}", daemon=True)
+        self._thread.start()
+        print(f"로컬 폴더 '{self.source.folder_path(self.folder_id)}'의 변경을 감시합니다. (방식: {self.mode})")
+
+    def stop(self):
+        self._stopped.set()
+        self._changed.set()
+        if self._observer is not None:
+            self._observer.stop()
+        if self._thread is not None:
+            self._thread.join(self.poll_s + self.debounce_s)
+
+    def _start_observer(self):
+        """watchdog으로 파일 변경 알림을 받습니다. 사용할 수 없으면 None을 반환합니다. (주기적으로 다시 훑기)"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print(f"watchdog 패키지가 없어 {self.poll_s:g}초마다 폴더를 다시 훑습니다. (pip install watchdog)")
+            return None
+
+        changed = self._changed
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                changed.set()
+
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_Handler(), self.source.folder_path(self.folder_id), recursive=False)
+            observer.start()
+        except Exception as e:
+            print(f"파일 변경 알림을 사용할 수 없어 {self.poll_s:g}초마다 폴더를 다시 훑습니다: {e}")
+            return None
+        return observer
+
+    def _run(self):
+        while not self._stopped.is_set():
+            notified = self._changed.wait(self.poll_s)
+            if self._stopped.is_set():
+                break
+            if self._observer is not None and not notified:
+                continue
+            if notified:
+                # 알림이 debounce_s 동안 더 오지 않을 때까지 기다려 한 번에 반영합니다.
+                for _ in range(MAX_DEBOUNCE_ROUNDS):
+                    self._changed.clear()
+                    if not self._changed.wait(self.debounce_s) or self._stopped.is_set():
+                        break
+                self._changed.clear()
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"로컬 폴더 '{self.folder_id}' 변경 반영 중 오류 발생: {e}")
+
+    def sync(self):
+        """
+        폴더의 현재 파일 버전을 마지막으로 적재한 버전과 비교하여 바뀐 파일만 다시 적재합니다.
+
+        Returns:
+            int: 다시 적재하거나 지운 파일 수.
+        """
+        with self._sync_lock:
+            current = self.source.list_files(self.folder_id)
+            changed = sorted(name for name, version in current.items() if self._versions.get(name) != version)
+            deleted = sorted(name for name in self._versions if name not in current)
+            if not changed and not deleted:
+                return 0
+
+            print(f"로컬 폴더 '{self.folder_id}'의 변경을 반영합니다. (추가·수정 {len(changed)}개, 삭제 {len(deleted)}개)")
+            start_time = time.perf_counter()
+            documents = self.source.load_files(self.folder_id, changed)
+            if not replace_source_documents(documents, self.collection_name, changed + deleted):
+                # 다음 알림이나 다시 훑을 때 재시도합니다.
+                return 0
+
+            loaded = {doc["file_name"]: doc["source_version"] for doc in documents}
+            for name in changed:
+                # 텍스트를 추출하지 못한 파일도 파일이 다시 바뀔 때까지는 재시도하지 않습니다.
+                self._versions[name] = loaded.get(name, current[name])
+            for name in deleted:
+                self._versions.pop(name, None)
+            WATCH_REINDEX_DURATION.observe(time.perf_counter() - start_time)
+            WATCHED_FILE_CHANGES.inc(len(changed), change="changed")
+            WATCHED_FILE_CHANGES.inc(len(deleted), change="deleted")
+            return len(changed) + len(deleted)
+
+
+# 감시 중인 폴더 (컬렉션 이름 -> FolderWatcher)
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+WATCHED_FOLDERS.set_function(lambda: len(_watchers))
+
+
+def watch_folder(source, folder_id, collection_name, versions=None):
+    """폴더 감시를 시작합니다. 이미 감시 중인 컬렉션이면 기존 감시를 반환합니다. (versions는 FolderWatcher.start 참고)"""
+    with _watchers_lock:
+        watcher = _watchers.get(collection_name)
+        if watcher is None:
+            watcher = FolderWatcher(source, folder_id, collection_name)
+            watcher.start(versions)
+            _watchers[collection_name] = watcher
+        return watcher
+
+
+def stop_watchers():
+    """모든 폴더 감시를 멈춥니다."""
+    with _watchers_lock:
+        watchers = list(_watchers.values())
+        _watchers.clear()
+    for watcher in watchers:
+        watcher.stop()
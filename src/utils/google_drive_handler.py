@@ -1,25 +1,55 @@
 # src/utils/google_drive_handler.py
 import os
 import io
+import time
+import threading
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from PyPDF2 import PdfReader
-import pytesseract
-from pdf2image import convert_from_bytes
-from PIL import Image
 from src.config import GOOGLE_DRIVE_FOLDER_ID, GOOGLE_DRIVE_CREDS_FILE
+from src.utils.document_types import classify_document_type, is_supported_document
+from src.utils.metrics import DRIVE_BYTES, DRIVE_DOWNLOAD_DURATION, DRIVE_ERRORS, DRIVE_FILES
+from src.utils.ocr import ocr_pdf
 
 # Google Drive API의 인증 범위를 정의합니다.
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+# set_google_drive_service로 주입한 서비스 객체 (벤치마크, 오프라인 실행용)
+_service_override = None
+
+# 인증을 마친 서비스 객체는 프로세스에서 한 번만 만들어 공유합니다. (OAuth 흐름이 요청마다 반복되지 않도록)
+_service = None
+_service_lock = threading.Lock()
+
+def set_google_drive_service(service):
+    """
+    get_google_drive_service가 반환할 서비스 객체를 지정합니다. None을 넘기면 실제 Google Drive 인증으로 되돌립니다.
+    files().list()와 files().get_media()를 제공하는 객체(예: 로컬 디렉터리를 읽는 가짜 서비스)를 넘길 수 있습니다.
+    """
+    global _service_override
+    _service_override = service
+
 def get_google_drive_service():
     """
     Google Drive API 서비스 객체를 반환합니다.
-    인증이 필요한 경우 OAuth 2.0 흐름을 통해 자격 증명을 획득합니다.
+    인증이 필요한 경우 OAuth 2.0 흐름을 통해 자격 증명을 획득하며, 처음 호출할 때 한 번만 인증합니다.
     """
+    global _service
+    if _service_override is not None:
+        return _service_override
+    if _service is not None:
+        return _service
+    
+    with _service_lock:
+        if _service is None:
+            _service = _build_google_drive_service()
+    return _service
+
+def _build_google_drive_service():
+    """저장된 토큰 또는 OAuth 2.0 흐름으로 자격 증명을 얻어 Drive 서비스 객체를 만듭니다."""
     creds = None
     if os.path.exists('token.json'):
         creds = Credentials.from_authorized_user_file('token.json', SCOPES)
@@ -61,20 +91,18 @@ def extract_text_from_pdf(file_bytes):
     return text
 
 def extract_text_with_ocr(file_bytes):
-    """OCR을 사용하여 PDF 이미지에서 텍스트를 추출합니다."""
+    """OCR을 사용하여 PDF 이미지에서 텍스트를 추출합니다. 렌더링과 Tesseract 설정은 OCR_* 설정을 따릅니다."""
     text = ""
     
     try:
-        # PDF를 이미지로 변환
-        images = convert_from_bytes(file_bytes)
-        print(f"PDF를 {len(images)}개의 이미지로 변환했습니다.")
+        page_texts, pages = ocr_pdf(file_bytes)
+        skipped = sum(1 for page in pages if page["skipped"])
+        print(f"PDF {len(pages)}개 페이지를 OCR로 처리했습니다. (빈 페이지 {skipped}개 건너뜀)")
         
-        # 각 이미지에서 OCR로 텍스트 추출
-        for i, image in enumerate(images):
-            print(f"페이지 {i+1} OCR 처리 중...")
-            # pytesseract로 한국어 텍스트 추출
-            page_text = pytesseract.image_to_string(image, lang='kor+eng')
-            text += f"\n--- 페이지 {i+1} ---\n"
+        for page, page_text in zip(pages, page_texts):
+            if page["skipped"]:
+                continue
+            text += f"\n--- 페이지 {page['page']} ---\n"
             text += page_text
             
     except Exception as e:
@@ -92,13 +120,10 @@ def download_documents_from_folder(service, folder_id):
         folder_id (str): 문서를 다운로드할 Google Drive 폴더의 ID.
 
     Returns:
-        list: 텍스트 내용과 파일 이름이 포함된 딕셔너리 목록.
+        list: 텍스트 내용, 파일 이름, 문서 종류가 포함된 딕셔너리 목록.
     """
     documents = []
     
-    # 포함할 파일 이름에 포함된 키워드 목록을 정의합니다.
-    include_keywords = ["회칙", "세칙", "감사", "정기감사","보고서"]
-    
     try:
         results = service.files().list(
             q=f"'{folder_id}' in parents and mimeType='application/pdf'",
@@ -115,19 +140,23 @@ def download_documents_from_folder(service, folder_id):
             file_name = item['name']
             
             # 포함 키워드가 파일 이름에 포함되어 있는지 확인
-            if not any(keyword in file_name for keyword in include_keywords):
+            if not is_supported_document(file_name):
                 print(f"'{file_name}' 문서는 포함 키워드를 포함하지 않으므로 건너뜁니다.")
                 continue
                 
             file_id = item['id']
             mime_type = item['mimeType']
             
+            download_start = time.perf_counter()
             request = service.files().get_media(fileId=file_id)
             file_stream = io.BytesIO()
             downloader = MediaIoBaseDownload(file_stream, request)
             done = False
             while not done:
                 status, done = downloader.next_chunk()
+            DRIVE_DOWNLOAD_DURATION.observe(time.perf_counter() - download_start)
+            DRIVE_FILES.inc()
+            DRIVE_BYTES.inc(file_stream.getbuffer().nbytes)
             
             file_stream.seek(0)
             text_content = ""
@@ -135,12 +164,14 @@ def download_documents_from_folder(service, folder_id):
                 text_content = extract_text_from_pdf(file_stream.getvalue())
             
             if text_content:
-                documents.append({"file_name": file_name, "text_content": text_content})
-                print(f"'{file_name}' 문서의 텍스트 추출 완료.")
+                doc_type = classify_document_type(file_name)
+                documents.append({"file_name": file_name, "text_content": text_content, "doc_type": doc_type})
+                print(f"'{file_name}' 문서({doc_type})의 텍스트 추출 완료.")
             else:
                 print(f"'{file_name}' 문서에서 텍스트를 추출하지 못했습니다.")
                 
     except Exception as e:
+        DRIVE_ERRORS.inc()
         print(f"Google Drive API 호출 중 오류 발생: {e}")
         
     return documents
@@ -0,0 +1,238 @@
+# src/utils/index_snapshot.py
+# 이 파일은 폴더별 벡터 컬렉션을 이식 가능한 스냅샷으로 내보내고 가져오는 기능을 제공합니다.
+# 새 서버는 Google Drive 다운로드, OCR, 임베딩 없이 스냅샷만으로 몇 초 안에 검색을 시작할 수 있습니다.
+#
+# 스냅샷 디렉터리 구성 (모두 ChromaDB 버전과 무관한 형식입니다):
+#   manifest.json       - 형식 버전, 임베딩 모델, 원본 문서 목록, 파일별 SHA-256 체크섬
+#   embeddings.npy      - float32 임베딩 행렬 (np.load(mmap_mode="r")로 바로 열 수 있음)
+#   chunks.json         - ids, texts, metadatas 컬럼
+#   lexical_index.json  - BM25 어휘 색인 (외부 도구용으로 내보내기만 하며, 가져올 때는 체크섬만 검증하고 사용하지 않습니다)
+#
+# 사용 예:
+#   python -m src.utils.index_snapshot export --folder-id <폴더 ID> --output snapshots/<폴더 ID>
+#   python -m src.utils.index_snapshot import --input snapshots/<폴더 ID>
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.utils.lexical_index import LexicalIndex
+from src.utils.vector_db_manager import (
+    EMBEDDING_MODEL,
+    get_collection_contents,
+    replace_collection_contents,
+)
+
+SNAPSHOT_FORMAT = "regulation-index-snapshot"
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+LEXICAL_INDEX_FILE = "lexical_index.json"
+_DATA_FILES = (EMBEDDINGS_FILE, CHUNKS_FILE, LEXICAL_INDEX_FILE)
+
+
+class SnapshotError(Exception):
+    """스냅샷 형식, 체크섬 또는 호환성 오류를 나타내는 예외"""
+    pass
+
+
+def collection_name_for_folder(folder_id):
+    """폴더 ID에 대응하는 컬렉션 이름을 반환합니다. (DocumentManagerAgent와 같은 규칙)"""
+    return f"regulations_{folder_id}"
+
+
+def _sha256_of_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _build_source_manifest(texts, metadatas):
+    """원본 문서별 청크 수와 내용 해시를 정리합니다."""
+    sources = OrderedDict()
+    for text, metadata in zip(texts, metadatas):
+        file_name = metadata.get("source") or metadata.get("source_file") or "알 수 없음"
+        entry = sources.setdefault(file_name, {
+            "file_name": file_name,
+            "doc_type": metadata.get("doc_type"),
+            "chunk_count": 0,
+            "_digest": hashlib.sha256(),
+        })
+        entry["chunk_count"] += 1
+        entry["_digest"].update(text.encode("utf-8"))
+
+    manifest = []
+    for entry in sources.values():
+        digest = entry.pop("_digest")
+        entry["content_sha256"] = digest.hexdigest()
+        manifest.append(entry)
+    return manifest
+
+
+def export_snapshot(folder_id, output_dir):
+    """
+    폴더의 컬렉션을 스냅샷 디렉터리로 내보냅니다.
+
+    Args:
+        folder_id (str): 내보낼 Google Drive 폴더 ID.
+        output_dir (str): 스냅샷을 기록할 디렉터리. 이미 있으면 교체합니다.
+
+    Returns:
+        dict: 기록된 매니페스트.
+    """
+    collection_name = collection_name_for_folder(folder_id)
+    contents = get_collection_contents(collection_name)
+    if contents is None:
+        raise SnapshotError(f"'{collection_name}' 컬렉션이 없거나 비어 있습니다.")
+
+    embeddings = np.ascontiguousarray(contents["embeddings"], dtype=np.float32)
+
+    # 완성된 스냅샷만 보이도록 임시 디렉터리에 기록한 뒤 이름을 바꿉니다.
+    staging_dir = f"{output_dir.rstrip(os.sep)}.partial"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    np.save(os.path.join(staging_dir, EMBEDDINGS_FILE), embeddings)
+    with open(os.path.join(staging_dir, CHUNKS_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {"ids": contents["ids"], "texts": contents["texts"], "metadatas": contents["metadatas"]},
+            f, ensure_ascii=False,
+        )
+    with open(os.path.join(staging_dir, LEXICAL_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(LexicalIndex.build(contents["texts"]).to_dict(), f, ensure_ascii=False)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "folder_id": folder_id,
+        "collection_name": collection_name,
+        "embedding_model": EMBEDDING_MODEL,
+        "dimension": int(embeddings.shape[1]),
+        "chunk_count": len(contents["ids"]),
+        "sources": _build_source_manifest(contents["texts"], contents["metadatas"]),
+        "files": {
+            name: {
+                "sha256": _sha256_of_file(os.path.join(staging_dir, name)),
+                "bytes": os.path.getsize(os.path.join(staging_dir, name)),
+            }
+            for name in _DATA_FILES
+        },
+    }
+    with open(os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging_dir, output_dir)
+    print(f"'{collection_name}' 컬렉션을 스냅샷으로 내보냈습니다. (청크 {manifest['chunk_count']}개, 경로: {output_dir})")
+    return manifest
+
+
+def read_manifest(snapshot_dir):
+    """스냅샷 매니페스트를 읽고 형식과 버전을 확인합니다."""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"매니페스트 파일이 없습니다: {manifest_path}")
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError("인덱스 스냅샷 형식이 아닙니다.")
+    if manifest.get("format_version", 0) > SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(
+            f"지원하지 않는 스냅샷 버전입니다: {manifest.get('format_version')} "
+            f"(지원: {SNAPSHOT_FORMAT_VERSION} 이하)"
+        )
+    return manifest
+
+
+def verify_snapshot(snapshot_dir, manifest=None):
+    """매니페스트에 기록된 체크섬과 실제 파일을 비교합니다. 불일치하면 SnapshotError를 발생시킵니다."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    for name, expected in manifest["files"].items():
+        path = os.path.join(snapshot_dir, name)
+        if not os.path.exists(path):
+            raise SnapshotError(f"스냅샷 파일이 없습니다: {name}")
+        if os.path.getsize(path) != expected["bytes"]:
+            raise SnapshotError(f"스냅샷 파일 크기가 일치하지 않습니다: {name}")
+        if _sha256_of_file(path) != expected["sha256"]:
+            raise SnapshotError(f"스냅샷 파일 체크섬이 일치하지 않습니다: {name}")
+    return manifest
+
+
+def import_snapshot(snapshot_dir, folder_id=None, allow_model_mismatch=False):
+    """
+    스냅샷을 검증한 뒤 현재 벡터 저장소 백엔드에 컬렉션으로 가져옵니다.
+    네트워크 호출이나 임베딩 계산 없이 저장된 임베딩을 그대로 사용합니다.
+
+    Args:
+        snapshot_dir (str): 스냅샷 디렉터리.
+        folder_id (str, optional): 가져올 대상 폴더 ID. None이면 스냅샷의 폴더 ID를 사용합니다.
+        allow_model_mismatch (bool): 임베딩 모델이 현재 설정과 달라도 가져올지 여부.
+
+    Returns:
+        dict: 검증된 매니페스트.
+    """
+    manifest = verify_snapshot(snapshot_dir)
+
+    if manifest["embedding_model"] != EMBEDDING_MODEL and not allow_model_mismatch:
+        raise SnapshotError(
+            f"스냅샷 임베딩 모델({manifest['embedding_model']})이 현재 모델({EMBEDDING_MODEL})과 다릅니다."
+        )
+
+    embeddings = np.load(os.path.join(snapshot_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    with open(os.path.join(snapshot_dir, CHUNKS_FILE), "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    if embeddings.shape != (manifest["chunk_count"], manifest["dimension"]) or len(chunks["ids"]) != manifest["chunk_count"]:
+        raise SnapshotError("스냅샷의 청크 수 또는 임베딩 차원이 매니페스트와 일치하지 않습니다.")
+
+    collection_name = collection_name_for_folder(folder_id or manifest["folder_id"])
+    if not replace_collection_contents(
+        collection_name, chunks["ids"], chunks["texts"], chunks["metadatas"], embeddings
+    ):
+        raise SnapshotError(f"'{collection_name}' 컬렉션으로 가져오지 못했습니다.")
+
+    print(f"스냅샷을 '{collection_name}' 컬렉션으로 가져왔습니다. (청크 {manifest['chunk_count']}개)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="폴더별 벡터 컬렉션 스냅샷을 내보내거나 가져옵니다.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="컬렉션을 스냅샷으로 내보냅니다.")
+    export_parser.add_argument("--folder-id", required=True, help="내보낼 Google Drive 폴더 ID")
+    export_parser.add_argument("--output", required=True, help="스냅샷을 기록할 디렉터리")
+
+    import_parser = subparsers.add_parser("import", help="스냅샷을 컬렉션으로 가져옵니다.")
+    import_parser.add_argument("--input", required=True, help="스냅샷 디렉터리")
+    import_parser.add_argument("--folder-id", help="가져올 대상 폴더 ID (기본값: 스냅샷의 폴더 ID)")
+    import_parser.add_argument("--allow-model-mismatch", action="store_true", help="임베딩 모델이 달라도 가져옵니다.")
+
+    verify_parser = subparsers.add_parser("verify", help="스냅샷 체크섬만 검증합니다.")
+    verify_parser.add_argument("--input", required=True, help="스냅샷 디렉터리")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_snapshot(args.folder_id, args.output)
+    elif args.command == "import":
+        import_snapshot(args.input, folder_id=args.folder_id, allow_model_mismatch=args.allow_model_mismatch)
+    else:
+        manifest = verify_snapshot(args.input)
+        print(f"스냅샷 검증 완료: {manifest['collection_name']} (청크 {manifest['chunk_count']}개)")
+
+
+if __name__ == "__main__":
+    main()
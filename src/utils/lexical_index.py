@@ -0,0 +1,85 @@
+# src/utils/lexical_index.py
+# 이 파일은 청크 텍스트에 대한 BM25 기반 어휘(lexical) 색인을 제공합니다.
+# 한국어는 조사가 붙어 어절 단위로는 일치하기 어렵기 때문에 어절과 글자 bigram을 함께 색인합니다.
+
+import math
+import re
+from collections import Counter, defaultdict
+
+_TOKEN_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+def tokenize(text):
+    """
+    텍스트를 색인용 토큰 목록으로 변환합니다.
+    소문자화한 어절과, 두 글자 이상인 어절의 글자 bigram을 함께 반환합니다.
+    """
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class LexicalIndex:
+    """청크 목록에 대한 BM25 역색인입니다. 직렬화하여 인덱스 스냅샷에 함께 저장할 수 있습니다."""
+
+    def __init__(self, postings, doc_lengths, k1=1.5, b=0.75):
+        """
+        Args:
+            postings (dict): 토큰 -> [[청크 번호, 출현 횟수], ...]
+            doc_lengths (list): 청크별 토큰 수.
+        """
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, texts):
+        """청크 텍스트 목록으로 색인을 만듭니다."""
+        postings = defaultdict(list)
+        doc_lengths = []
+        for doc_index, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                postings[token].append([doc_index, count])
+        return cls(dict(postings), doc_lengths)
+
+    def to_dict(self):
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["postings"], data["doc_lengths"], k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+
+    def search(self, query, k=5):
+        """
+        질의에 대한 BM25 점수가 높은 청크를 반환합니다.
+
+        Returns:
+            list: (청크 번호, 점수) 목록. 점수 내림차순.
+        """
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            token_postings = self.postings.get(token)
+            if not token_postings:
+                continue
+            idf = math.log(1 + (doc_count - len(token_postings) + 0.5) / (len(token_postings) + 0.5))
+            for doc_index, count in token_postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / (self.avg_doc_length or 1)
+                scores[doc_index] += idf * count * (self.k1 + 1) / (count + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
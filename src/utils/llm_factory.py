@@ -0,0 +1,36 @@
+# src/utils/llm_factory.py
+# 이 파일은 에이전트와 파이프라인이 사용하는 채팅 모델 생성을 한곳에서 담당합니다.
+# 모든 모델에 토큰 사용량 추적과 지표 콜백을 연결하고,
+# 벤치마크나 오프라인 실행에서는 set_chat_model_factory로 Gemini 대신 다른 모델(예: 가짜 모델)을 주입할 수 있습니다.
+
+from src.config import GEMINI_API_KEY, LLM_MAX_RETRIES, LLM_REQUEST_TIMEOUT_S
+from src.utils.metrics import llm_metrics_callback
+from src.utils.tracing import llm_usage_callback
+
+_chat_model_factory = None
+
+
+def set_chat_model_factory(factory):
+    """
+    채팅 모델 생성 함수를 교체합니다. None을 넘기면 기본값(Gemini)으로 되돌립니다.
+    에이전트는 처음 사용할 때 모델을 만들므로 첫 요청 전에 호출해야 합니다.
+
+    Args:
+        factory (callable | None): factory(model=..., temperature=..., callbacks=[...])를 받아 채팅 모델을 반환하는 함수.
+    """
+    global _chat_model_factory
+    _chat_model_factory = factory
+
+
+def create_chat_model(model, temperature):
+    """지정한 모델 이름과 temperature로 채팅 모델을 생성합니다. (추적/지표 콜백 포함)"""
+    callbacks = [llm_usage_callback, llm_metrics_callback]
+    if _chat_model_factory is not None:
+        return _chat_model_factory(model=model, temperature=temperature, callbacks=callbacks)
+    # langchain_google_genai는 가져오는 데 오래 걸리므로 실제 모델을 만들 때 가져옵니다.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    # 마감 시간이나 헤징으로 버려진 호출도 제한 시간 안에 끝나도록 요청 제한 시간과 재시도 횟수를 둡니다.
+    return ChatGoogleGenerativeAI(
+        model=model, temperature=temperature, google_api_key=GEMINI_API_KEY, callbacks=callbacks,
+        timeout=LLM_REQUEST_TIMEOUT_S or None, max_retries=LLM_MAX_RETRIES,
+    )
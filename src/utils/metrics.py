@@ -0,0 +1,430 @@
+# src/utils/metrics.py
+# 이 파일은 운영 지표(metrics) 레지스트리와 Prometheus 텍스트 형식의 HTTP 엔드포인트를 제공합니다.
+# 파이프라인, 에이전트, 벡터 DB, Google Drive, Notion 모듈이 모두 이 레지스트리에 지표를 기록하며,
+# METRICS_PORT가 설정되어 있으면 start_metrics_server()로 Gradio 서버 옆의 METRICS_HOST:METRICS_PORT에서 /metrics로 노출합니다.
+#
+# 외부 의존성 없이 Counter, Gauge, Histogram(라벨 지원)만 구현합니다. 모든 갱신은 잠금으로 보호되어 스레드에 안전합니다.
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 기본 지연 시간 버킷 (초): 벡터 검색(ms 단위)부터 LLM 호출(수십 초)까지 포함
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 지표의 라벨은 {self.labelnames}이어야 합니다. (입력: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """단조 증가하는 누적 값 (예: 호출 수, 오류 수, 토큰 수)"""
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """올라가거나 내려가는 현재 값 (예: 처리 중인 요청 수, 대기열 길이)"""
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn, **labels):
+        """수집 시점마다 fn()을 호출하여 값을 읽습니다. (예: 작업 대기열 길이)"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def _render_samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                continue
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """관측값 분포를 누적 버킷으로 기록합니다. (예: 노드별 지연 시간)"""
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def time(self, **labels):
+        """with 문 구간의 소요 시간을 관측하는 컨텍스트 매니저를 반환합니다."""
+        return _HistogramTimer(self, labels)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted((key, {**series, "counts": list(series["counts"])}) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                le = f'le="{_format_value(float(upper_bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class _HistogramTimer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """이름으로 지표를 등록하고 Prometheus 텍스트 형식으로 내보냅니다."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ===== 파이프라인 =====
+PIPELINE_REQUESTS = registry.counter(
+    "pipeline_requests_total", "처리한 파이프라인 요청 수", ("status",)
+)
+PIPELINE_REQUEST_DURATION = registry.histogram(
+    "pipeline_request_duration_seconds", "파이프라인 요청 전체 처리 시간", ("route",)
+)
+PIPELINE_IN_FLIGHT = registry.gauge(
+    "pipeline_in_flight_requests", "현재 처리 중인 파이프라인 요청 수"
+)
+NODE_DURATION = registry.histogram(
+    "pipeline_node_duration_seconds", "LangGraph 노드별 처리 시간", ("node",)
+)
+NODE_ERRORS = registry.counter(
+    "pipeline_node_errors_total", "예외로 끝난 LangGraph 노드 실행 수", ("node",)
+)
+DEGRADED_NODES = registry.counter(
+    "pipeline_degraded_nodes_total", "마감 시간 초과로 간이 결과로 대체된 노드 수", ("node",)
+)
+COORDINATOR_PATHS = registry.counter(
+    "coordinator_path_total", "조정 단계 처리 경로별 요청 수 (fast_path, full_path, degraded)", ("path",)
+)
+WORK_QUEUE_DEPTH = registry.gauge(
+    "work_queue_depth", "작업 스레드 풀 대기열에 쌓인 작업 수", ("pool",)
+)
+
+# ===== 세션 대화 문맥 =====
+SESSION_FOLLOW_UPS = registry.counter(
+    "session_follow_ups_total", "세션 질의의 처리 방식별 수 (reuse, extend, new)", ("mode",)
+)
+SESSIONS_ACTIVE = registry.gauge("sessions_active", "대화 문맥을 보관 중인 세션 수")
+SESSION_EVICTIONS = registry.counter("session_evictions_total", "제거한 세션 문맥 수 (ttl, capacity)", ("reason",))
+
+# ===== 답변 캐시 / 캐시 예열 =====
+ANSWER_CACHE_ENTRIES = registry.gauge("answer_cache_entries", "답변 캐시에 보관 중인 답변 수")
+WARMUP_RESULTS = registry.counter(
+    "warmup_queries_total",
+    "캐시 예열 질문 수 (answered: 답변 저장, cached: 이미 캐시됨, retrieval: 예산 초과로 검색만, busy, failed)",
+    ("result",),
+)
+WARMUP_LLM_CALLS = registry.counter("warmup_llm_calls_total", "캐시 예열에 쓴 LLM 호출 수 (최종 상태로 추정)")
+WARMUP_RUNS = registry.counter("warmup_runs_total", "캐시 예열 실행 수 (startup: 시작 시, index_sync: 인덱스 갱신 후)", ("reason",))
+
+# ===== 작업자 프로세스 (QUERY_WORKERS) =====
+WORKER_PROCESSES = registry.gauge("worker_processes_alive", "살아 있는 작업자 프로세스 수", ("role",))
+WORKER_RESTARTS = registry.counter("worker_restarts_total", "비정상 종료 후 다시 시작한 작업자 프로세스 수", ("role",))
+WORKER_INGESTIONS = registry.counter("worker_ingestions_total", "적재 작업자가 처리한 폴더 적재 요청 수", ("status",))
+
+# ===== 입장 제어 / 요청 병합 =====
+ADMISSION_DECISIONS = registry.counter(
+    "admission_requests_total", "입장 제어 결과별 요청 수 (admitted, queued, rejected, timed_out)", ("result",)
+)
+ADMISSION_ACTIVE = registry.gauge("admission_active_requests", "입장하여 실행 중인 파이프라인 요청 수")
+ADMISSION_QUEUED = registry.gauge("admission_queued_requests", "입장 대기열에서 기다리는 요청 수")
+ADMISSION_WAIT_DURATION = registry.histogram("admission_queue_wait_seconds", "입장 대기열에서 기다린 시간")
+COALESCED_REQUESTS = registry.counter(
+    "coalesced_requests_total", "처리 중인 같은 요청의 결과를 함께 받은 요청 수"
+)
+
+# ===== LLM =====
+LLM_CALLS = registry.counter("llm_calls_total", "LLM 호출 수", ("model", "status"))
+LLM_TOKENS = registry.counter("llm_tokens_total", "LLM 토큰 사용량", ("model", "direction"))
+LLM_DURATION = registry.histogram("llm_call_duration_seconds", "LLM 호출 지연 시간", ("model",))
+
+# ===== 검색 / 임베딩 =====
+RETRIEVAL_DURATION = registry.histogram(
+    "retrieval_duration_seconds", "벡터 검색 처리 시간 (질의 임베딩 제외)", ("backend",)
+)
+EMBEDDING_DURATION = registry.histogram(
+    "embedding_duration_seconds", "임베딩 계산 시간", ("operation",)
+)
+RETRIEVAL_ERRORS = registry.counter("retrieval_errors_total", "문서 검색 오류 수")
+FEDERATED_SKIPPED_FOLDERS = registry.counter(
+    "federated_skipped_folders_total", "연합 검색에서 아직 적재되지 않아 건너뛴 폴더 수"
+)
+CACHE_LOOKUPS = registry.counter("cache_lookups_total", "캐시 조회 결과별 횟수", ("cache", "result"))
+
+# ===== 수집 (ingestion) =====
+INGESTED_DOCUMENTS = registry.counter("ingestion_documents_total", "벡터 DB에 추가한 문서 수")
+INGESTED_CHUNKS = registry.counter("ingestion_chunks_total", "벡터 DB에 추가한 청크 수")
+INGESTION_DURATION = registry.histogram(
+    "ingestion_duration_seconds", "문서 분할·임베딩·저장 처리 시간", buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+INGESTION_ERRORS = registry.counter("ingestion_errors_total", "문서 추가 오류 수")
+CHUNK_SUMMARIES = registry.counter(
+    "chunk_summaries_total", "적재 단계 청크 요약 수 (cached: 캐시 사용, generated: 새로 요약, failed: 실패)", ("result",)
+)
+
+# ===== 로컬 문서 폴더 감시 =====
+WATCHED_FOLDERS = registry.gauge("watched_folders", "파일 변경을 감시 중인 로컬 문서 폴더 수")
+WATCHED_FILE_CHANGES = registry.counter(
+    "watched_file_changes_total", "감시 중 다시 적재한 파일 수 (changed: 추가·수정, deleted: 삭제)", ("change",)
+)
+WATCH_REINDEX_DURATION = registry.histogram(
+    "watch_reindex_duration_seconds", "변경된 파일을 다시 추출·임베딩하는 데 걸린 시간", buckets=(0.5, 1, 2, 5, 10, 30, 60, 300)
+)
+
+# ===== Google Drive =====
+DRIVE_FILES = registry.counter("drive_files_downloaded_total", "Google Drive에서 내려받은 파일 수")
+DRIVE_BYTES = registry.counter("drive_download_bytes_total", "Google Drive에서 내려받은 바이트 수")
+DRIVE_DOWNLOAD_DURATION = registry.histogram("drive_download_duration_seconds", "파일 하나를 내려받는 데 걸린 시간")
+DRIVE_ERRORS = registry.counter("drive_errors_total", "Google Drive API 오류 수")
+
+# ===== OCR =====
+OCR_PAGES = registry.counter("ocr_pages_total", "OCR 대상 페이지 수 (ocr: 처리, blank: 빈 페이지 건너뜀)", ("result",))
+OCR_PAGE_DURATION = registry.histogram(
+    "ocr_page_duration_seconds", "페이지 하나의 렌더링과 OCR 시간", buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 60)
+)
+
+# ===== Notion =====
+NOTION_REQUESTS = registry.counter("notion_requests_total", "Notion API 요청 수", ("operation", "status"))
+NOTION_DURATION = registry.histogram("notion_request_duration_seconds", "Notion API 요청 지연 시간", ("operation",))
+NOTION_UPSERTS = registry.counter(
+    "notion_upserts_total",
+    "upsert 방식 Notion 기록 수 (created: 새 페이지, updated: 바뀐 블록만 갱신, rewritten: 페이지 교체, unchanged: API 호출 없음)",
+    ("result",),
+)
+
+
+def measure_node(name, fn):
+    """LangGraph 노드 함수의 처리 시간과 예외 수를 기록하도록 감쌉니다."""
+    def wrapper(state):
+        start_time = time.perf_counter()
+        try:
+            result = fn(state)
+        except Exception:
+            NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            NODE_DURATION.observe(time.perf_counter() - start_time, node=name)
+        for degraded_node in (result or {}).get("degraded_nodes", []):
+            DEGRADED_NODES.inc(node=degraded_node)
+        return result
+
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LLM 호출 수, 지연 시간, 토큰 사용량을 모델별로 기록하는 LangChain 콜백"""
+
+    def __init__(self):
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _on_start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "unknown"
+        with self._lock:
+            self._started[run_id] = (model, time.perf_counter())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._on_start(run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._on_start(run_id, kwargs)
+
+    def _finish(self, run_id):
+        with self._lock:
+            model, start_time = self._started.pop(run_id, ("unknown", None))
+        if start_time is not None:
+            LLM_DURATION.observe(time.perf_counter() - start_time, model=model)
+        return model
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._finish(run_id)
+        LLM_CALLS.inc(model=model, status="ok")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model, direction="input")
+                    LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model, direction="output")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model = self._finish(run_id)
+        LLM_CALLS.inc(model=model, status="error")
+
+
+# LLM 생성 시 callbacks=[..., llm_metrics_callback]으로 연결합니다.
+llm_metrics_callback = LLMMetricsCallback()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 수집 요청마다 로그가 쌓이지 않도록 접근 로그를 남기지 않습니다.
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    백그라운드 스레드에서 /metrics HTTP 엔드포인트를 시작합니다. 이미 시작했으면 기존 서버를 반환합니다.
+
+    Returns:
+        ThreadingHTTPServer: 시작된 서버. 포트를 열지 못하면 None을 반환합니다.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"지표 서버를 시작하지 못했습니다 (포트 {port}): {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"지표 엔드포인트: http://{host}:{port}/metrics")
+    return _server
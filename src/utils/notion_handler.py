@@ -1,36 +1,252 @@
 # src/utils/notion_handler.py
 # 이 파일은 Notion API를 사용하여 데이터를 Notion 데이터베이스에 기록하는 역할을 합니다.
+# NOTION_WRITE_MODE=upsert이면 같은 질문을 반복해도 페이지를 새로 만들지 않고, 기록해 둔 블록 해시와 비교하여
+# 바뀐 블록만 갱신합니다. (결과가 같으면 API를 호출하지 않음, 페이지 상태는 src/utils/notion_page_state.py)
+
+import hashlib
+import json
+import threading
 
-from notion_client import Client
 from notion_client.helpers import get_id
-from src.config import NOTION_API_KEY, NOTION_DATABASE_ID
+from src.config import NOTION_DATABASE_ID, NOTION_QUERY_KEY_PROPERTY, NOTION_WRITE_MODE, require_setting
+from src.utils.admission import normalize_query
+from src.utils.metrics import NOTION_DURATION, NOTION_REQUESTS, NOTION_UPSERTS
+from src.utils.notion_page_state import delete_page_state, load_page_state, save_page_state
+from src.utils.tracing import span
 from typing import Dict, Any, Optional
 
-# Notion API 클라이언트 초기화
-try:
-    notion_client = Client(auth=NOTION_API_KEY)
-except Exception as e:
-    print(f"Notion 클라이언트 초기화 중 오류 발생: {e}")
-    notion_client = None
+# Notion API 클라이언트 (결과를 처음 기록할 때 초기화)
+notion_client = None
+_client_lock = threading.Lock()
+_client_failed = False
 
 def get_notion_client():
     """
-    초기화된 Notion 클라이언트를 반환합니다.
-    클라이언트가 유효하지 않으면 None을 반환합니다.
+    Notion 클라이언트를 반환합니다. 처음 호출할 때 NOTION_API_KEY로 초기화합니다.
+    키가 없거나 초기화에 실패하면 None을 반환합니다.
     """
+    global notion_client, _client_failed
+    if notion_client is not None or _client_failed:
+        return notion_client
+    with _client_lock:
+        if notion_client is None and not _client_failed:
+            try:
+                from notion_client import Client
+                notion_client = Client(auth=require_setting("NOTION_API_KEY"))
+            except Exception as e:
+                print(f"Notion 클라이언트 초기화 중 오류 발생: {e}")
+                _client_failed = True
     return notion_client
 
+def set_notion_client(client):
+    """
+    기록에 사용할 Notion 클라이언트를 교체합니다. (벤치마크, 오프라인 실행용)
+    pages.create()와 blocks.children.append()를 제공하는 객체를 넘길 수 있습니다.
+    (upsert 방식은 pages.update(), blocks.update(), blocks.delete()도 사용합니다)
+    """
+    global notion_client, _client_failed
+    notion_client = client
+    _client_failed = False
+
+# Notion 블록 하나에 넣을 수 있는 최대 글자 수와 한 번에 추가할 수 있는 최대 블록 수
+BLOCK_TEXT_LIMIT = 2000
+APPEND_BATCH_SIZE = 100
+
+# upsert 방식에서 같은 질의 키를 동시에 기록하지 않도록 하는 잠금
+# 질의 키마다 잠금을 만들면 질문 수만큼 늘어나므로, 키 해시로 고른 고정 개수의 잠금을 나눠 씁니다.
+_KEY_LOCK_STRIPES = 64
+_key_locks = [threading.Lock() for _ in range(_KEY_LOCK_STRIPES)]
+
+def _text_block(block_type, text):
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": [{"type": "text", "text": {"content": text}}]},
+    }
+
+def _build_properties(result_data, key=None):
+    """페이지 속성(제목, 위험도, 설정 시 질의 키)을 만듭니다."""
+    properties = {
+        "Name": {"title": [{"text": {"content": result_data.get("title", "분석 결과")}}]},
+        "Risk Level": {"select": {"name": result_data.get("risk_level", "알 수 없음")}},
+    }
+    if key and NOTION_QUERY_KEY_PROPERTY:
+        properties[NOTION_QUERY_KEY_PROPERTY] = {"rich_text": [{"text": {"content": key}}]}
+    return properties
+
+def _build_blocks(content):
+    """
+    본문을 제목 블록과 문단 블록 목록으로 만듭니다.
+    빈 줄로 구분한 문단마다 블록 하나(2000자를 넘으면 나눔)로 만들어, 일부 문단만 바뀌면 그 블록만 갱신할 수 있게 합니다.
+    """
+    blocks = [_text_block("heading_2", "최종 종합 분석")]
+    paragraphs = [part.strip() for part in (content or "내용 없음").split("\n\n") if part.strip()]
+    for paragraph in paragraphs or ["내용 없음"]:
+        for i in range(0, len(paragraph), BLOCK_TEXT_LIMIT):
+            blocks.append(_text_block("paragraph", paragraph[i:i + BLOCK_TEXT_LIMIT]))
+    return blocks
+
+def _block_plain_text(block):
+    rich_text = block.get(block["type"], {}).get("rich_text", [])
+    return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in rich_text)
+
+def _block_hash(block):
+    """블록 종류와 글자 내용의 해시. (Notion에서 읽은 블록과 새로 만든 블록을 같은 방식으로 비교)"""
+    return hashlib.sha256(f"{block['type']}\0{_block_plain_text(block)}".encode("utf-8")).hexdigest()[:16]
+
+def _properties_hash(properties):
+    return hashlib.sha256(json.dumps(properties, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def query_key(query, folder_id=None):
+    """정규화한 질의와 폴더 ID로 upsert 방식의 페이지 키를 만듭니다."""
+    return hashlib.sha256(f"{normalize_query(query)}\0{folder_id or ''}".encode("utf-8")).hexdigest()[:32]
+
+def _call(operation, fn, span_attributes=None, **kwargs):
+    """Notion API를 호출하고 지연 시간, 결과를 기록합니다. 실패하면 예외를 그대로 올립니다."""
+    try:
+        with span(f"notion.{operation}", **(span_attributes or {})), NOTION_DURATION.time(operation=operation):
+            response = fn(**kwargs)
+    except Exception:
+        NOTION_REQUESTS.inc(operation=operation, status="error")
+        raise
+    NOTION_REQUESTS.inc(operation=operation, status="ok")
+    return response
+
+def _append_blocks(client, page_id, blocks):
+    """블록을 100개씩 추가하고 만들어진 블록 목록({"id", "type", "hash"})을 반환합니다."""
+    created = []
+    for start in range(0, len(blocks), APPEND_BATCH_SIZE):
+        batch = blocks[start:start + APPEND_BATCH_SIZE]
+        response = _call(
+            "append_blocks", client.blocks.children.append,
+            span_attributes={"block_count": len(batch)}, block_id=page_id, children=batch,
+        )
+        results = (response or {}).get("results") or []
+        for i, block in enumerate(batch):
+            block_id = results[i].get("id") if i < len(results) else None
+            created.append({"id": block_id, "type": block["type"], "hash": _block_hash(block)})
+    return created
+
+def _create_page(client, database_id, properties, blocks):
+    """새 페이지를 만들고 본문 블록을 추가합니다. (페이지 ID, 블록 목록)을 반환합니다."""
+    page = _call("create_page", client.pages.create, parent={"database_id": database_id}, properties=properties)
+    return page["id"], _append_blocks(client, page["id"], blocks)
+
+def diff_blocks(old_blocks, new_blocks):
+    """
+    기록된 블록 목록과 새 블록을 위치별로 비교합니다.
+    같은 위치의 블록 종류가 다르면 그 뒤는 모두 지우고 다시 추가합니다.
+
+    Returns:
+        tuple: (갱신할 (블록 ID, 새 블록) 목록, 지울 블록 ID 목록, 끝에 추가할 블록 목록, 유지·갱신되는 기존 블록 수)
+    """
+    updates = []
+    keep = min(len(old_blocks), len(new_blocks))
+    for i in range(keep):
+        old, new = old_blocks[i], new_blocks[i]
+        if old["type"] != new["type"]:
+            keep = i
+            break
+        if old["hash"] != _block_hash(new):
+            updates.append((old["id"], new))
+    deletes = [old["id"] for old in old_blocks[keep:]]
+    return updates, deletes, new_blocks[keep:], keep
+
+def _find_page_by_key(client, database_id, key):
+    """NOTION_QUERY_KEY_PROPERTY로 기존 페이지를 찾아 현재 블록 목록과 함께 반환합니다. 없으면 None."""
+    response = _call(
+        "query_database", client.databases.query,
+        database_id=database_id,
+        filter={"property": NOTION_QUERY_KEY_PROPERTY, "rich_text": {"equals": key}},
+        page_size=1,
+    )
+    pages = response.get("results") or []
+    if not pages:
+        return None
+    page_id = pages[0]["id"]
+    blocks = []
+    cursor = None
+    while True:
+        kwargs = {"block_id": page_id, "page_size": APPEND_BATCH_SIZE}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        response = _call("list_blocks", client.blocks.children.list, **kwargs)
+        for block in response.get("results") or []:
+            blocks.append({"id": block["id"], "type": block["type"], "hash": _block_hash(block)})
+        if not response.get("has_more"):
+            break
+        cursor = response.get("next_cursor")
+    # 속성은 알 수 없으므로 한 번 갱신합니다.
+    return {"page_id": page_id, "properties_hash": "", "blocks": blocks}
+
+def _upsert_page(client, database_id, key, properties, blocks):
+    """
+    질의 키의 페이지를 새 결과로 맞춥니다. 바뀐 블록만 갱신하고, 바뀐 것이 없으면 API를 호출하지 않습니다.
+    갱신할 호출 수가 페이지를 새로 만드는 것보다 많으면 기존 페이지를 보관(archive)하고 새로 만듭니다.
+
+    Returns:
+        str: "created", "updated", "rewritten", "unchanged" 중 하나.
+    """
+    state = load_page_state(key)
+    if state is None and NOTION_QUERY_KEY_PROPERTY:
+        state = _find_page_by_key(client, database_id, key)
+    properties_hash = _properties_hash(properties)
+
+    if state is None:
+        page_id, created = _create_page(client, database_id, properties, blocks)
+        save_page_state(key, page_id, properties_hash, created)
+        return "created"
+
+    page_id = state["page_id"]
+    updates, deletes, appends, keep = diff_blocks(state["blocks"], blocks)
+    properties_changed = state["properties_hash"] != properties_hash
+    if not (updates or deletes or appends or properties_changed):
+        return "unchanged"
+
+    append_calls = -(-len(appends) // APPEND_BATCH_SIZE)
+    diff_calls = len(updates) + len(deletes) + append_calls + int(properties_changed)
+    rewrite_calls = 2 + -(-len(blocks) // APPEND_BATCH_SIZE)
+    # 블록 ID를 모르는 기존 블록(추가 응답에 ID가 없던 경우)은 갱신·삭제할 수 없으므로 페이지를 교체합니다.
+    unknown_ids = any(block_id is None for block_id, _ in updates) or None in deletes
+    if diff_calls > rewrite_calls or unknown_ids:
+        _call("archive_page", client.pages.update, page_id=page_id, archived=True)
+        page_id, created = _create_page(client, database_id, properties, blocks)
+        save_page_state(key, page_id, properties_hash, created)
+        return "rewritten"
+
+    if properties_changed:
+        _call("update_page", client.pages.update, page_id=page_id, properties=properties)
+    for block_id, block in updates:
+        _call("update_block", client.blocks.update, block_id=block_id, **{block["type"]: block[block["type"]]})
+    kept = [
+        {"id": old["id"], "type": new["type"], "hash": _block_hash(new)}
+        for old, new in zip(state["blocks"][:keep], blocks[:keep])
+    ]
+    for block_id in deletes:
+        _call("delete_block", client.blocks.delete, block_id=block_id)
+    if appends:
+        kept.extend(_append_blocks(client, page_id, appends))
+    save_page_state(key, page_id, properties_hash, kept)
+    return "updated"
+
+def _key_lock(key):
+    # 키는 16진수 해시이므로 앞부분을 그대로 잠금 번호로 씁니다.
+    return _key_locks[int(key[:8], 16) % _KEY_LOCK_STRIPES]
+
 def record_result_to_notion(result_data: Dict[str, Any]):
     """
     멀티에이전트 시스템의 결과를 Notion 데이터베이스에 기록합니다.
+    NOTION_WRITE_MODE가 "upsert"이고 질의가 있으면 정규화한 질의와 폴더마다 페이지 하나를 유지하며 바뀐 블록만 갱신합니다.
 
     Args:
         result_data (dict): 기록할 데이터가 담긴 딕셔너리.
-                            예: {"title": "제목", "content": "본문 내용", "risk_level": "높음"}
+                            예: {"title": "제목", "content": "본문 내용", "risk_level": "높음",
+                                 "query": "원래 질의", "folder_id": "폴더 ID"}
     
     Returns:
         bool: 기록 성공 여부.
     """
+    notion_client = get_notion_client()
     if not notion_client:
         print("Notion 클라이언트가 유효하지 않아 데이터를 기록할 수 없습니다.")
         return False
@@ -42,71 +258,28 @@ def record_result_to_notion(result_data: Dict[str, Any]):
     except Exception as e:
         print(f"Notion 데이터베이스 ID가 유효하지 않습니다: {e}")
         return False
-    
-    # 페이지 생성 시 필요한 속성들을 정의합니다.
-    properties = {
-        "Name": {
-            "title": [
-                {
-                    "text": {
-                        "content": result_data.get("title", "분석 결과")
-                    }
-                }
-            ]
-        },
-        "Risk Level": {
-            "select": {
-                "name": result_data.get("risk_level", "알 수 없음")
-            }
-        },
-    }
-    
-    # 본문 내용을 2000자 단위로 분할합니다.
-    content_to_record = result_data.get("content", "내용 없음")
-    block_size = 2000
-    blocks = []
-    
-    # 제목 블록 추가
-    blocks.append({
-        "object": "block",
-        "type": "heading_2",
-        "heading_2": {
-            "rich_text": [{"type": "text", "text": {"content": "최종 종합 분석"}}]
-        }
-    })
-    
-    # 본문 내용 분할 및 블록 추가
-    for i in range(0, len(content_to_record), block_size):
-        chunk = content_to_record[i:i + block_size]
-        blocks.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {"content": chunk}
-                    }
-                ]
-            }
-        })
-    
+
+    blocks = _build_blocks(result_data.get("content", "내용 없음"))
+
+    if NOTION_WRITE_MODE == "upsert" and result_data.get("query"):
+        key = query_key(result_data["query"], result_data.get("folder_id"))
+        properties = _build_properties(result_data, key)
+        with _key_lock(key):
+            try:
+                result = _upsert_page(notion_client, database_id, key, properties, blocks)
+            except Exception as e:
+                # 일부만 반영되었을 수 있으므로 기록된 상태를 버리고 다음 기록 때 다시 맞춥니다.
+                delete_page_state(key)
+                print(f"Notion에 데이터를 기록하는 중 오류 발생: {e}")
+                return False
+        NOTION_UPSERTS.inc(result=result)
+        if result != "unchanged":
+            print(f"Notion 페이지에 결과를 반영했습니다. ({result})")
+        return True
+
     try:
-        # Notion 데이터베이스에 새로운 페이지를 생성합니다.
-        page_response = notion_client.pages.create(
-            parent={"database_id": database_id},
-            properties=properties
-        )
-        
-        # 페이지가 성공적으로 생성되면, 본문 내용을 블록으로 추가합니다.
-        page_id = page_response["id"]
-        if blocks:
-            # 모든 블록을 하나의 API 호출로 처리하여 성능을 향상시킵니다.
-            notion_client.blocks.children.append(
-                block_id=page_id,
-                children=blocks
-            )
-            
+        # Notion 데이터베이스에 새로운 페이지를 생성하고 본문 내용을 블록으로 추가합니다.
+        _create_page(notion_client, database_id, _build_properties(result_data), blocks)
         print("Notion 데이터베이스에 결과가 성공적으로 기록되었습니다.")
         return True
     except Exception as e:
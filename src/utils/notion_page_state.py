@@ -0,0 +1,83 @@
+# src/utils/notion_page_state.py
+# 이 파일은 Notion upsert 기록(NOTION_WRITE_MODE=upsert)에서 질의 키별로 마지막으로 기록한 페이지 상태를 보관합니다.
+#
+# 질의 키마다 페이지 ID, 속성 해시, 블록 목록({"id", "type", "hash"})을 SQLite 파일(NOTION_PAGE_STATE_PATH)에 저장하여
+# 같은 결과를 다시 기록할 때 Notion API를 호출하지 않고도 바뀐 블록이 없음을 알 수 있게 합니다.
+# 여러 작업자 프로세스가 같은 파일을 쓰므로 호출마다 연결을 열고 닫습니다. (WAL 모드)
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import NOTION_PAGE_STATE_PATH
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=10)
+    if path not in _initialized_paths:
+        with _init_lock:
+            if path not in _initialized_paths:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS notion_pages ("
+                    "query_key TEXT PRIMARY KEY, page_id TEXT NOT NULL, properties_hash TEXT NOT NULL, "
+                    "blocks TEXT NOT NULL, updated_at REAL NOT NULL)"
+                )
+                connection.commit()
+                _initialized_paths.add(path)
+    return connection
+
+
+def load_page_state(query_key, path=NOTION_PAGE_STATE_PATH):
+    """
+    질의 키로 마지막에 기록한 페이지 상태를 읽습니다.
+
+    Returns:
+        dict | None: {"page_id", "properties_hash", "blocks"} 또는 기록이 없으면 None.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    connection = _connect(path)
+    try:
+        row = connection.execute(
+            "SELECT page_id, properties_hash, blocks FROM notion_pages WHERE query_key = ?", (query_key,)
+        ).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        return None
+    return {"page_id": row[0], "properties_hash": row[1], "blocks": json.loads(row[2])}
+
+
+def save_page_state(query_key, page_id, properties_hash, blocks, path=NOTION_PAGE_STATE_PATH):
+    """페이지 상태를 저장합니다. 같은 질의 키의 이전 상태는 덮어씁니다."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = _connect(path)
+    try:
+        connection.execute(
+            "INSERT OR REPLACE INTO notion_pages (query_key, page_id, properties_hash, blocks, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (query_key, page_id, properties_hash, json.dumps(blocks, ensure_ascii=False), time.time()),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def delete_page_state(query_key, path=NOTION_PAGE_STATE_PATH):
+    """페이지 상태를 지웁니다. (기록 도중 실패하여 실제 페이지와 달라졌을 수 있을 때)"""
+    if not path or not os.path.exists(path):
+        return
+    connection = _connect(path)
+    try:
+        connection.execute("DELETE FROM notion_pages WHERE query_key = ?", (query_key,))
+        connection.commit()
+    finally:
+        connection.close()
@@ -0,0 +1,205 @@
+# src/utils/ocr.py
+# 이 파일은 스캔(이미지) PDF를 Tesseract로 읽는 OCR 경로를 제공합니다.
+#
+# 페이지마다 다음 순서로 처리하여 Tesseract가 읽는 픽셀 수를 필요한 만큼으로 줄입니다.
+# 1. 저해상도(PROBE_DPI) 회색조로 전체 페이지를 한 번 렌더링하여 잉크 비율과 글자 줄 높이를 잽니다.
+# 2. 잉크가 거의 없는 빈 페이지는 본 렌더링과 OCR 없이 건너뜁니다. (OCR_SKIP_BLANK_PAGES)
+# 3. OCR_DPI가 "auto"이면 잰 글자 높이가 OCR_TARGET_TEXT_HEIGHT_PX 픽셀이 되도록 DPI를 고릅니다.
+#    큰 글씨 페이지는 낮은 DPI로, 작은 글씨 페이지는 높은 DPI로 렌더링하며 페이지 크기에 따라 픽셀 수 상한을 둡니다.
+# 4. OCR_COLOR_MODE에 따라 회색조(gray) 또는 Otsu 이진화(binary)로 렌더링합니다. (rgb는 이전 동작)
+# 5. OCR_PSM, OCR_OEM을 지정하면 Tesseract의 페이지 분할 방식과 엔진을 바꿉니다. (빈 값이면 Tesseract 기본값)
+#
+# pytesseract와 pdf2image는 가져오는 데 오래 걸리므로 스캔 PDF를 처리할 때만 가져옵니다.
+
+import time
+
+from src.config import (
+    OCR_COLOR_MODE,
+    OCR_DPI,
+    OCR_LANG,
+    OCR_MAX_DPI,
+    OCR_MIN_DPI,
+    OCR_OEM,
+    OCR_PSM,
+    OCR_SKIP_BLANK_PAGES,
+    OCR_TARGET_TEXT_HEIGHT_PX,
+)
+from src.utils.metrics import OCR_PAGE_DURATION, OCR_PAGES
+
+COLOR_MODES = ("rgb", "gray", "binary")
+# 페이지 분석용 렌더링 해상도 (10pt 글자가 약 10픽셀)
+PROBE_DPI = 72
+# 글자 줄을 찾지 못했을 때 사용할 해상도
+FALLBACK_DPI = 300
+# 잉크(어두운 픽셀) 비율이 이보다 낮으면 빈 페이지로 봅니다.
+BLANK_INK_RATIO = 0.001
+# 한 페이지를 렌더링할 최대 픽셀 수 (A3 이상 큰 페이지에서 DPI를 낮춥니다)
+MAX_PAGE_PIXELS = 12_000_000
+# 종이 색(가장 흔한 밝기)보다 이만큼 이상 어두운 픽셀을 잉크로 봅니다.
+# (저해상도로 줄이면 가는 획이 회색으로 흐려지므로 고정 임계값 대신 종이 색 기준으로 잽니다)
+INK_CONTRAST = 48
+_INK_LEVEL = 128
+
+
+def otsu_threshold(histogram):
+    """256단계 회색조 히스토그램에서 클래스 간 분산이 가장 큰 이진화 임계값을 구합니다."""
+    total = sum(histogram)
+    if not total:
+        return _INK_LEVEL
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background_weight = 0
+    background_sum = 0
+    best_threshold, best_variance = _INK_LEVEL, -1.0
+    for level, count in enumerate(histogram):
+        background_weight += count
+        if background_weight == 0:
+            continue
+        foreground_weight = total - background_weight
+        if foreground_weight == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_weight
+        foreground_mean = (weighted_total - background_sum) / foreground_weight
+        variance = background_weight * foreground_weight * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def analyze_page(probe_image, probe_dpi=PROBE_DPI):
+    """
+    저해상도 회색조 페이지 이미지에서 잉크 비율과 글자 줄 높이를 잽니다.
+    가로 방향 투영(행마다 잉크 픽셀 수)에서 잉크가 있는 연속된 행을 글자 줄로 보고, 그 높이의 중앙값을 사용합니다.
+
+    Returns:
+        dict: {"width_in", "height_in", "ink_ratio", "text_height_pt"(찾지 못하면 None), "lines"}
+    """
+    image = probe_image.convert("L")
+    width, height = image.size
+    histogram = image.histogram()
+    paper_level = max(range(256), key=histogram.__getitem__)
+    # bytes.translate(None, delete)로 잉크 픽셀을 지운 뒤 길이 차이로 잉크 픽셀 수를 셉니다.
+    dark_bytes = bytes(range(max(0, paper_level - INK_CONTRAST)))
+    pixels = image.tobytes()
+    ink_rows = []
+    ink_pixels = 0
+    for row in range(height):
+        line = pixels[row * width:(row + 1) * width]
+        ink = width - len(line.translate(None, dark_bytes))
+        ink_pixels += ink
+        ink_rows.append(ink)
+
+    # 얼룩이나 쪽 번호 같은 잡음을 줄 높이에서 빼기 위해 행 너비의 0.5% 이상 잉크가 있는 행만 글자 줄로 봅니다.
+    min_row_ink = max(1, width // 200)
+    runs = []
+    run = 0
+    for ink in ink_rows + [0]:
+        if ink >= min_row_ink:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    runs.sort()
+    text_height_pt = runs[len(runs) // 2] * 72.0 / probe_dpi if runs else None
+    return {
+        "width_in": width / probe_dpi,
+        "height_in": height / probe_dpi,
+        "ink_ratio": ink_pixels / float(width * height or 1),
+        "text_height_pt": text_height_pt,
+        "lines": len(runs),
+    }
+
+
+def choose_dpi(page, target_text_height_px=OCR_TARGET_TEXT_HEIGHT_PX, min_dpi=OCR_MIN_DPI, max_dpi=OCR_MAX_DPI):
+    """페이지 분석 결과로 글자 높이가 target_text_height_px 픽셀이 되는 DPI를 고릅니다. (페이지 크기로 상한)"""
+    if page["text_height_pt"]:
+        dpi = target_text_height_px * 72.0 / page["text_height_pt"]
+    else:
+        dpi = FALLBACK_DPI
+    dpi = min(max(dpi, min_dpi), max_dpi)
+    area_in = page["width_in"] * page["height_in"]
+    if area_in:
+        dpi = min(dpi, (MAX_PAGE_PIXELS / area_in) ** 0.5)
+    return int(round(dpi))
+
+
+def binarize(image):
+    """회색조 이미지를 Otsu 임계값으로 흑백(1비트) 이미지로 바꿉니다."""
+    from PIL import Image
+
+    gray = image.convert("L")
+    threshold = otsu_threshold(gray.histogram())
+    return gray.point([0 if level <= threshold else 255 for level in range(256)]).convert("1", dither=Image.NONE)
+
+
+def tesseract_config(psm=OCR_PSM, oem=OCR_OEM):
+    """Tesseract 명령행 옵션 문자열을 만듭니다. 값이 비어 있는 항목은 Tesseract 기본값을 사용합니다."""
+    options = []
+    if str(oem).strip():
+        options.append(f"--oem {int(oem)}")
+    if str(psm).strip():
+        options.append(f"--psm {int(psm)}")
+    return " ".join(options)
+
+
+def ocr_pdf(file_bytes, color_mode=OCR_COLOR_MODE, dpi=OCR_DPI, psm=OCR_PSM, oem=OCR_OEM,
+            skip_blank_pages=OCR_SKIP_BLANK_PAGES, lang=OCR_LANG):
+    """
+    스캔 PDF의 각 페이지를 렌더링하여 OCR로 텍스트를 추출합니다. 인자를 주지 않으면 OCR_* 설정을 사용합니다.
+
+    Args:
+        file_bytes (bytes): PDF 파일 내용.
+        color_mode (str): "rgb"(컬러), "gray"(회색조), "binary"(Otsu 이진화).
+        dpi (str | int): 렌더링 해상도. "auto"이면 페이지마다 글자 높이와 페이지 크기로 고릅니다.
+        psm (str | int): Tesseract 페이지 분할 방식 (--psm, 빈 값이면 기본값).
+        oem (str | int): Tesseract OCR 엔진 방식 (--oem, 빈 값이면 기본값).
+        skip_blank_pages (bool): 잉크가 거의 없는 페이지를 OCR 없이 건너뛸지 여부.
+        lang (str): Tesseract 언어.
+
+    Returns:
+        tuple: (페이지별 텍스트 목록(건너뛴 페이지는 빈 문자열), 페이지별 처리 정보 목록)
+    """
+    import pytesseract
+    from pdf2image import convert_from_bytes
+
+    if color_mode not in COLOR_MODES:
+        raise ValueError(f"지원하지 않는 OCR 색상 방식입니다: {color_mode} (가능한 값: {', '.join(COLOR_MODES)})")
+    auto_dpi = str(dpi).strip().lower() == "auto"
+    config = tesseract_config(psm, oem)
+
+    # 자동 DPI나 빈 페이지 건너뛰기를 쓰면 먼저 저해상도로 전체 페이지를 분석합니다.
+    probes = None
+    if auto_dpi or skip_blank_pages:
+        probes = [analyze_page(image) for image in convert_from_bytes(file_bytes, dpi=PROBE_DPI, grayscale=True)]
+        page_count = len(probes)
+    else:
+        from pdf2image import pdfinfo_from_bytes
+
+        page_count = int(pdfinfo_from_bytes(file_bytes)["Pages"])
+
+    texts = []
+    pages = []
+    for page_number in range(1, page_count + 1):
+        page_start = time.perf_counter()
+        probe = probes[page_number - 1] if probes else None
+        if skip_blank_pages and probe["ink_ratio"] < BLANK_INK_RATIO:
+            OCR_PAGES.inc(result="blank")
+            texts.append("")
+            pages.append({"page": page_number, "skipped": True, "dpi": None, "seconds": time.perf_counter() - page_start})
+            continue
+
+        page_dpi = choose_dpi(probe) if auto_dpi else int(dpi)
+        image = convert_from_bytes(
+            file_bytes, dpi=page_dpi, first_page=page_number, last_page=page_number,
+            grayscale=color_mode != "rgb",
+        )[0]
+        if color_mode == "binary":
+            image = binarize(image)
+        page_text = pytesseract.image_to_string(image, lang=lang, config=config)
+
+        elapsed = time.perf_counter() - page_start
+        OCR_PAGES.inc(result="ocr")
+        OCR_PAGE_DURATION.observe(elapsed)
+        texts.append(page_text)
+        pages.append({"page": page_number, "skipped": False, "dpi": page_dpi, "seconds": elapsed})
+    return texts, pages
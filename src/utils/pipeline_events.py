@@ -0,0 +1,66 @@
+# src/utils/pipeline_events.py
+# 이 파일은 파이프라인 실행 중에 발생하는 이벤트(노드 완료, 조정 에이전트 토큰)를 호출자에게 전달합니다.
+# HTTP API의 스트리밍 엔드포인트(SSE)와 노드별 처리 시간 집계에 사용합니다.
+#
+# - event_sink(callback)로 등록한 콜백은 contextvars로 전달되므로, LangGraph 노드와
+#   copy_context()로 실행한 작업 스레드에서 emit_event()를 호출해도 같은 요청의 콜백이 받습니다.
+# - 콜백이 등록되지 않은 요청에서는 emit_event()가 아무것도 하지 않으며, 조정 에이전트도 스트리밍하지 않습니다.
+# - 콜백은 작업 스레드에서 호출될 수 있으므로 스레드에 안전해야 합니다. (예: loop.call_soon_threadsafe)
+
+import contextlib
+import contextvars
+import time
+
+_event_sink = contextvars.ContextVar("pipeline_event_sink", default=None)
+
+
+@contextlib.contextmanager
+def event_sink(callback):
+    """블록 안에서 실행하는 파이프라인의 이벤트를 callback(event: dict)으로 받습니다."""
+    token = _event_sink.set(callback)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+def current_event_sink():
+    """현재 요청에 등록된 이벤트 콜백을 반환합니다. (다른 프로세스에서 실행하는 파이프라인의 이벤트를 전달할 때 사용)"""
+    return _event_sink.get()
+
+
+def events_enabled():
+    """현재 요청에 이벤트 콜백이 등록되어 있는지 반환합니다."""
+    return _event_sink.get() is not None
+
+
+def emit_event(event, **data):
+    """현재 요청의 이벤트 콜백에 {"event": event, "time": epoch 초, **data}를 전달합니다."""
+    callback = _event_sink.get()
+    if callback is None:
+        return
+    try:
+        callback({"event": event, "time": time.time(), **data})
+    except Exception as e:
+        # 이벤트 전달 실패(예: 클라이언트 연결 종료)가 파이프라인 실행을 멈추지 않도록 합니다.
+        print(f"파이프라인 이벤트 전달 실패 ({event}): {e}")
+
+
+def evented_node(name, fn):
+    """LangGraph 노드 함수가 끝날 때 'node_completed' 이벤트(처리 시간, 간이 결과 여부)를 보내도록 감쌉니다."""
+    def wrapper(state):
+        if _event_sink.get() is None:
+            return fn(state)
+        start_time = time.perf_counter()
+        result = fn(state)
+        emit_event(
+            "node_completed",
+            node=name,
+            elapsed_ms=round((time.perf_counter() - start_time) * 1000, 3),
+            degraded=bool((result or {}).get("degraded_nodes")),
+        )
+        return result
+
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
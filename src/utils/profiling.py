@@ -0,0 +1,274 @@
+# src/utils/profiling.py
+# 이 파일은 파이프라인 요청 한 건을 프로파일링하는 기능을 제공합니다.
+# PROFILE_REQUESTS가 켜져 있거나 요청에 profile=True가 지정되면 run_agent_pipeline 실행 전체를 프로파일링하고,
+# 요청 ID 이름으로 PROFILE_OUTPUT_DIR에 결과를 저장합니다.
+#
+# - sampling(기본값): 요청에 참여한 스레드의 호출 스택을 PROFILE_SAMPLE_INTERVAL_MS마다 수집하여
+#   접힌 스택(folded stack) 형식의 <요청 ID>.folded로 저장합니다. flamegraph.pl, speedscope, inferno에서 바로 열 수 있습니다.
+# - cprofile: 요청에 참여한 스레드마다 cProfile을 켜고 합쳐서 <요청 ID>.prof(pstats)와 누적 시간 상위 함수 목록
+#   <요청 ID>.txt로 저장합니다. snakeviz, flameprof, `python -m pstats`로 볼 수 있습니다.
+# - 문서 적재(다운로드, OCR, 임베딩) 구간은 tracemalloc으로 최대 메모리 할당량을 측정하여 <요청 ID>.json에 기록합니다.
+#
+# 노드와 에이전트 작업은 작업 스레드에서 실행되므로, 요청의 contextvars를 물려받은 스레드만 profiled_call로 등록해
+# 동시에 처리 중인 다른 요청의 스택은 섞이지 않습니다. (tracemalloc은 프로세스 전역이므로 동시에 적재 중인 요청이
+# 있으면 최대 메모리에 함께 포함됩니다)
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+from src.config import PROFILE_OUTPUT_DIR, PROFILE_REQUESTS, PROFILE_SAMPLE_INTERVAL_MS, PROFILER
+from src.utils.tracing import current_span
+
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+# cProfile은 스레드마다 하나만 켤 수 있으므로, 이미 프로파일링 중인 스레드에서 중첩 호출되면 새로 켜지 않습니다.
+_thread_state = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def new_request_id():
+    """프로파일 파일 이름으로 쓸 요청 ID를 만듭니다. (시각 + 임의 값)"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class _StackSampler:
+    """등록된 스레드의 호출 스택을 주기적으로 수집하여 접힌 스택별 샘플 수를 셉니다."""
+
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self.counts = {}
+        self.sample_count = 0
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def add_thread(self, ident):
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def remove_thread(self, ident):
+        with self._lock:
+            remaining = self._threads.get(ident, 0) - 1
+            if remaining > 0:
+                self._threads[ident] = remaining
+            else:
+                self._threads.pop(ident, None)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            with self._lock:
+                idents = list(self._threads)
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                if ident not in names:
+                    names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names[ident])
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.sample_count += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for key, count in sorted(self.counts.items()):
+                f.write(f"{key} {count}\n")
+
+
+class RequestProfile:
+    """요청 한 건의 프로파일 상태. profile_request()가 만들고 요청이 끝나면 파일로 저장합니다."""
+
+    def __init__(self, request_id, mode):
+        self.request_id = request_id
+        self.mode = mode
+        self.memory = {}
+        self.paths = []
+        self.thread_count = 0
+        self._profilers = []
+        self._lock = threading.Lock()
+        self._sampler = _StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000) if mode == "sampling" else None
+
+    def _enter_thread(self):
+        """현재 스레드를 이 요청의 프로파일 대상으로 등록합니다. 등록을 해제하는 함수를 반환합니다."""
+        with self._lock:
+            self.thread_count += 1
+        if self._sampler is not None:
+            ident = threading.get_ident()
+            self._sampler.add_thread(ident)
+            return lambda: self._sampler.remove_thread(ident)
+
+        if getattr(_thread_state, "profiling", False):
+            return lambda: None
+        profiler = cProfile.Profile()
+        _thread_state.profiling = True
+        profiler.enable()
+
+        def leave():
+            profiler.disable()
+            _thread_state.profiling = False
+            with self._lock:
+                self._profilers.append(profiler)
+        return leave
+
+    def record_memory(self, label, peak_bytes, current_bytes, top_allocations):
+        with self._lock:
+            self.memory[label] = {
+                "peak_bytes": peak_bytes,
+                "current_bytes": current_bytes,
+                "top_allocations": top_allocations,
+            }
+
+    def save(self, duration_s, **metadata):
+        """프로파일 결과와 요약(JSON)을 저장하고 저장한 파일 경로 목록을 반환합니다."""
+        os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+        base_path = os.path.join(PROFILE_OUTPUT_DIR, self.request_id)
+        paths = []
+
+        if self._sampler is not None:
+            self._sampler.write(base_path + ".folded")
+            paths.append(base_path + ".folded")
+        elif self._profilers:
+            stats = pstats.Stats(self._profilers[0])
+            for profiler in self._profilers[1:]:
+                stats.add(profiler)
+            stats.dump_stats(base_path + ".prof")
+            summary = io.StringIO()
+            pstats.Stats(base_path + ".prof", stream=summary).sort_stats("cumulative").print_stats(60)
+            with open(base_path + ".txt", "w", encoding="utf-8") as f:
+                f.write(summary.getvalue())
+            paths.extend([base_path + ".prof", base_path + ".txt"])
+
+        with open(base_path + ".json", "w", encoding="utf-8") as f:
+            json.dump({
+                "request_id": self.request_id,
+                "profiler": self.mode,
+                "duration_s": duration_s,
+                "threads": self.thread_count,
+                "samples": self._sampler.sample_count if self._sampler is not None else None,
+                "memory": self.memory,
+                "files": [os.path.basename(path) for path in paths],
+                **metadata,
+            }, f, ensure_ascii=False, indent=2, default=str)
+        paths.append(base_path + ".json")
+        return paths
+
+
+def should_profile(requested=None):
+    """요청별 플래그가 있으면 그 값을, 없으면 PROFILE_REQUESTS 설정을 따릅니다."""
+    return PROFILE_REQUESTS if requested is None else bool(requested)
+
+
+@contextmanager
+def profile_request(request_id=None, enabled=None, **metadata):
+    """
+    with 블록 안의 요청 처리를 프로파일링합니다. 프로파일링하지 않으면 None을 반환합니다.
+    블록이 끝나면(예외 포함) 결과를 저장하고, 저장한 파일 경로를 반환값의 paths 속성에 기록합니다.
+    """
+    if not should_profile(enabled):
+        yield None
+        return
+
+    mode = "cprofile" if PROFILER == "cprofile" else "sampling"
+    profile = RequestProfile(request_id or new_request_id(), mode)
+    token = _active_profile.set(profile)
+    if profile._sampler is not None:
+        profile._sampler.start()
+    leave = profile._enter_thread()
+    start_time = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        duration_s = time.perf_counter() - start_time
+        leave()
+        if profile._sampler is not None:
+            profile._sampler.stop()
+        _active_profile.reset(token)
+        try:
+            profile.paths = profile.save(duration_s, **metadata)
+            print(f"프로파일 저장 완료: {profile.paths[0]}")
+        except OSError as e:
+            print(f"프로파일 저장 실패: {e}")
+
+
+def profiled_call(fn, *args, **kwargs):
+    """프로파일링 중인 요청의 컨텍스트에서 호출되면 현재 스레드를 프로파일 대상에 포함하여 fn을 실행합니다."""
+    profile = _active_profile.get()
+    if profile is None:
+        return fn(*args, **kwargs)
+    leave = profile._enter_thread()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        leave()
+
+
+def profiled_node(name, fn):
+    """LangGraph 노드 함수를 실행하는 스레드를 요청 프로파일에 포함시킵니다."""
+    def wrapper(state):
+        return profiled_call(fn, state)
+
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+@contextmanager
+def track_memory(label, top=10):
+    """
+    프로파일링 중인 요청이면 with 블록의 최대 메모리 할당량을 tracemalloc으로 측정하여 프로파일에 기록합니다.
+    (추적 중이면 현재 span에도 peak_memory_bytes로 기록합니다)
+    """
+    global _tracemalloc_users, _tracemalloc_owned
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        top_allocations = [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:top]
+        ]
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_owned:
+                tracemalloc.stop()
+                _tracemalloc_owned = False
+        profile.record_memory(label, peak_bytes, current_bytes, top_allocations)
+        current_span().set_attribute("peak_memory_bytes", peak_bytes)
+        print(f"{label} 최대 메모리 할당량: {peak_bytes / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,73 @@
+# src/utils/request_log.py
+# 이 파일은 사용자 질의를 JSON Lines 파일(REQUEST_LOG_PATH)로 기록하고, 최근 자주 들어온 질의를 집계합니다.
+# 집계 결과는 캐시 예열(src/core/warmup.py)이 미리 실행할 질문 목록으로 사용합니다.
+#
+# 한 줄에 {"time", "query", "folder_id"} 하나를 기록하며, 파일이 REQUEST_LOG_MAX_BYTES를 넘으면
+# '<경로>.1'로 넘기고 새 파일에 씁니다. (집계할 때는 두 파일을 모두 읽습니다)
+# 질의 원문이 디스크에 남으므로 REQUEST_LOG_PATH를 지정했을 때만 기록합니다. (기본값은 기록하지 않음)
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from src.config import REQUEST_LOG_MAX_BYTES, REQUEST_LOG_PATH
+from src.utils.admission import normalize_query
+
+_write_lock = threading.Lock()
+
+
+def record_request(query, folder_id, path=REQUEST_LOG_PATH):
+    """사용자 질의 하나를 기록합니다. 기록에 실패해도 요청 처리에는 영향을 주지 않습니다."""
+    if not path:
+        return
+    line = json.dumps({"time": time.time(), "query": query, "folder_id": folder_id or ""}, ensure_ascii=False)
+    try:
+        with _write_lock:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            if REQUEST_LOG_MAX_BYTES and os.path.exists(path) and os.path.getsize(path) > REQUEST_LOG_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"질의 기록 중 오류 발생: {e}")
+
+
+def _read_entries(path):
+    for file_path in (f"{path}.1", path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # 기록 중에 잘린 줄
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def frequent_queries(limit, window_s, path=REQUEST_LOG_PATH, now=None):
+    """
+    최근 window_s초 동안 기록된 질의를 정규화한 질의와 폴더 ID별로 세어 많이 들어온 순서로 반환합니다.
+
+    Returns:
+        list: {"query"(가장 최근 원문), "folder_id", "count"} 딕셔너리 목록. (최대 limit개)
+    """
+    if not path or limit <= 0:
+        return []
+    since = (now or time.time()) - window_s if window_s else 0
+    counts = Counter()
+    latest_text = {}
+    for entry in _read_entries(path):
+        if entry.get("time", 0) < since or not entry.get("query"):
+            continue
+        key = (normalize_query(entry["query"]), entry.get("folder_id") or "")
+        counts[key] += 1
+        latest_text[key] = entry["query"]
+    return [
+        {"query": latest_text[key], "folder_id": key[1], "count": count}
+        for key, count in counts.most_common(limit)
+    ]
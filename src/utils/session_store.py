@@ -0,0 +1,275 @@
+# src/utils/session_store.py
+# 이 파일은 채팅 세션별 대화 문맥(직전 턴의 검색 청크와 구조화된 판정)을 프로세스 메모리에 보관합니다.
+# 후속 질문("그럼 승인 절차는요?")이 같은 주제이면 이전 검색 결과를 그대로 쓰거나(reuse),
+# 이전 주제와 묶은 질의로 조금 더 검색해 보태고(extend), 주제가 바뀌었으면 처음부터 검색합니다(new).
+#
+# - 메모리 한도: 세션은 MAX_SESSIONS개까지 보관하며(가장 오래 쓰지 않은 세션부터 제거),
+#   SESSION_TTL_S초 동안 쓰지 않은 세션은 만료합니다. 세션마다 보관하는 청크 수도 제한합니다.
+# - 턴이 진행되는 동안 에이전트가 검색한 청크는 임시로 모아 두었다가(stage_documents),
+#   파이프라인이 관련 질의로 끝나면 commit_turn()으로 세션에 반영합니다. 실패한 턴은 반영하지 않습니다.
+#   같은 세션에서 여러 요청이 동시에 진행될 수 있으므로 진행 중인 턴은 요청마다 턴 ID(상태의 turn_id)로 따로 모읍니다.
+#   체크포인트에서 재개되는 실패한 턴은 버리지 않고 두었다가, 재개된 실행이 끝날 때 같은 turn_id로 반영합니다.
+# - 다중 프로세스 배치에서는 질의 작업자마다 따로 보관하므로, 같은 세션의 요청은 같은 작업자로 보냅니다.
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.config import (
+    MAX_SESSIONS,
+    SESSION_CONTEXT_ENABLED,
+    SESSION_EXTEND_SIMILARITY,
+    SESSION_REUSE_SIMILARITY,
+    SESSION_TTL_S,
+)
+from src.utils.metrics import SESSION_EVICTIONS, SESSION_FOLLOW_UPS, SESSIONS_ACTIVE
+
+# 앞 대화를 가리키는 후속 질문 표현
+FOLLOW_UP_MARKERS = (
+    "그럼", "그러면", "그렇다면", "그건", "그것", "그거", "이건", "이것", "그 경우", "이 경우",
+    "그때", "그 다음", "위의", "앞의", "방금", "추가로",
+)
+# 검색 결과 종류(예: "reviewer.regulations")마다 세션에 보관하는 최대 청크 수
+MAX_CHUNKS_PER_SLOT = 12
+# 세션마다 동시에 진행 중인 턴을 보관하는 최대 수 (취소되어 정리되지 않은 턴은 오래된 것부터 버립니다)
+MAX_PENDING_TURNS_PER_SESSION = 8
+
+
+class SessionStore:
+    """
+    세션 ID(또는 다른 키)별 값을 마지막 사용 순서로 보관하는 LRU + TTL 저장소입니다. (답변 캐시도 사용)
+    노드는 작업 스레드에서 실행되므로 잠금으로 보호합니다.
+    """
+
+    def __init__(self, max_sessions, ttl_s, evictions=SESSION_EVICTIONS):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_s = ttl_s
+        # 제거 사유별로 셀 카운터 (None이면 세지 않음)
+        self.evictions = evictions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            return len(self._entries)
+
+    def get(self, session_id):
+        """세션 값을 반환하고 마지막 사용 시각을 갱신합니다. 없거나 만료되었으면 None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            value, touched_at = entry
+            if self.ttl_s and now - touched_at > self.ttl_s:
+                del self._entries[session_id]
+                self._count_eviction("ttl")
+                return None
+            self._entries[session_id] = (value, now)
+            self._entries.move_to_end(session_id)
+            return value
+
+    def put(self, session_id, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[session_id] = (value, now)
+            self._entries.move_to_end(session_id)
+            self._evict_locked(now)
+
+    def pop(self, session_id):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_locked(self, now):
+        # 마지막 사용 순서로 정렬되어 있으므로 앞에서부터 만료된 세션을 지웁니다.
+        while self._entries and self.ttl_s:
+            _, touched_at = next(iter(self._entries.values()))
+            if now - touched_at <= self.ttl_s:
+                break
+            self._entries.popitem(last=False)
+            self._count_eviction("ttl")
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self._count_eviction("capacity")
+
+    def _count_eviction(self, reason):
+        if self.evictions is not None:
+            self.evictions.inc(reason=reason)
+
+
+# 세션별 직전 턴 문맥과, 진행 중인 턴에서 모은 검색 결과 (세션 ID -> {턴 ID: 턴})
+session_contexts = SessionStore(MAX_SESSIONS, SESSION_TTL_S)
+_pending_turns = SessionStore(MAX_SESSIONS, SESSION_TTL_S)
+_pending_lock = threading.Lock()
+
+SESSIONS_ACTIVE.set_function(lambda: len(session_contexts))
+
+
+def _enabled(session_id):
+    return SESSION_CONTEXT_ENABLED and bool(session_id)
+
+
+def _cosine(left, right):
+    left = np.asarray(left, dtype=np.float32)
+    right = np.asarray(right, dtype=np.float32)
+    norm = float(np.linalg.norm(left) * np.linalg.norm(right))
+    return float(left @ right) / norm if norm else 0.0
+
+
+def has_follow_up_marker(query):
+    """질의가 앞 대화를 가리키는 표현으로 시작하거나 포함하는지 확인합니다."""
+    text = (query or "").strip()
+    return any(marker in text for marker in FOLLOW_UP_MARKERS)
+
+
+def _pop_pending(session_id, turn_id):
+    with _pending_lock:
+        turns = _pending_turns.get(session_id)
+        if turns is None:
+            return None
+        pending = turns.pop(turn_id, None)
+        if not turns:
+            _pending_turns.pop(session_id)
+        return pending
+
+
+def classify_follow_up(session_id, turn_id, folder_id, query):
+    """
+    세션의 직전 턴과 비교하여 이번 질의의 처리 방식을 정하고, 진행 중인 턴(turn_id)으로 기록합니다.
+
+    Returns:
+        str: "reuse"(검색 생략), "extend"(이전 청크 + 추가 검색), "new"(처음부터 검색).
+             세션이 없거나 기능이 꺼져 있으면 "".
+    """
+    if not _enabled(session_id):
+        return ""
+    context = session_contexts.get(session_id)
+    mode = "new"
+    if context is not None and context["folder_id"] == folder_id:
+        from src.utils.vector_db_manager import get_embeddings
+
+        embedding_model = get_embeddings()
+        similarity = 0.0
+        if embedding_model is not None:
+            # 주제 질의는 이전 턴에서도 임베딩했으므로 디스크 캐시가 있으면 새 질의만 계산합니다.
+            topic_vector, query_vector = embedding_model.embed_documents([context["topic_query"], query])
+            similarity = _cosine(topic_vector, query_vector)
+        if similarity >= SESSION_REUSE_SIMILARITY:
+            mode = "reuse"
+        elif similarity >= SESSION_EXTEND_SIMILARITY or has_follow_up_marker(query):
+            mode = "extend"
+    SESSION_FOLLOW_UPS.inc(mode=mode)
+    with _pending_lock:
+        turns = _pending_turns.get(session_id) or OrderedDict()
+        turns[turn_id] = {"mode": mode, "documents": {}}
+        while len(turns) > MAX_PENDING_TURNS_PER_SESSION:
+            turns.popitem(last=False)
+        _pending_turns.put(session_id, turns)
+    return mode
+
+
+def get_prior_turn(session_id, mode):
+    """후속 질문(reuse, extend)이면 세션의 직전 턴 문맥을 반환합니다. 그 외에는 None."""
+    if mode not in ("reuse", "extend") or not _enabled(session_id):
+        return None
+    context = session_contexts.get(session_id)
+    if context is None:
+        return None
+    return {**context, "mode": mode}
+
+
+def resolve_documents(prior, slot, retrieve, query):
+    """
+    직전 턴 문맥에 따라 검색 결과를 정합니다.
+    reuse면 이전 청크를 그대로 쓰고, extend면 이전 주제와 묶은 질의로 검색한 청크를 앞에 두고 이전 청크를 뒤에 붙이며,
+    그 외에는 retrieve(query)로 새로 검색합니다.
+    """
+    previous = (prior or {}).get("documents", {}).get(slot)
+    if not previous:
+        return retrieve(query)
+    if prior["mode"] == "reuse":
+        return list(previous)
+
+    fresh = retrieve(f"{prior['topic_query']} {query}")
+    seen = set()
+    merged = []
+    for doc in list(fresh) + list(previous):
+        if doc.page_content in seen:
+            continue
+        seen.add(doc.page_content)
+        merged.append(doc)
+    return merged[:MAX_CHUNKS_PER_SLOT]
+
+
+def describe_prior_turn(query, prior, verdict_key, fields):
+    """후속 질문을 LLM에 보낼 때 직전 질문과 판정 요약을 덧붙인 질의를 만듭니다."""
+    if not prior:
+        return query
+    verdict = prior.get(verdict_key) or {}
+    summary = ", ".join(f"{label}: {verdict[field]}" for field, label in fields if verdict.get(field))
+    lines = [query, "", f"(이전 질문: {prior['last_query']})"]
+    if summary:
+        lines.append(f"(이전 판정: {summary})")
+    return "\n".join(lines)
+
+
+def stage_documents(session_id, turn_id, documents):
+    """진행 중인 턴에서 에이전트가 사용한 검색 결과({슬롯: 청크 목록})를 모아 둡니다."""
+    if not documents or not _enabled(session_id):
+        return
+    with _pending_lock:
+        pending = (_pending_turns.get(session_id) or {}).get(turn_id)
+        if pending is not None:
+            pending["documents"].update(documents)
+
+
+def commit_turn(session_id, final_state):
+    """
+    끝난 턴(final_state의 turn_id)의 검색 청크와 판정을 세션 문맥으로 저장합니다.
+    관련 질의가 아니었거나 두 에이전트 모두 판정을 내지 못했으면 이전 문맥을 그대로 둡니다.
+    """
+    if not _enabled(session_id):
+        return
+    pending = _pop_pending(session_id, final_state.get("turn_id"))
+    if pending is None or final_state.get("router_decision") != "relevant":
+        return
+    reviewer_verdict = (final_state.get("reviewer_result") or {}).get("result")
+    auditor_verdict = (final_state.get("auditor_result") or {}).get("result")
+    if not reviewer_verdict and not auditor_verdict:
+        return
+
+    previous = session_contexts.get(session_id) if pending["mode"] in ("reuse", "extend") else None
+    documents = dict(previous["documents"]) if previous else {}
+    documents.update({slot: list(docs)[:MAX_CHUNKS_PER_SLOT] for slot, docs in pending["documents"].items()})
+    session_contexts.put(session_id, {
+        "folder_id": final_state.get("folder_id"),
+        # 후속 질문은 주제를 바꾸지 않으므로 처음 질의를 주제로 유지합니다.
+        "topic_query": previous["topic_query"] if previous else final_state["query"],
+        "last_query": final_state["query"],
+        "documents": documents,
+        "reviewer_verdict": reviewer_verdict,
+        "auditor_verdict": auditor_verdict,
+        "turns": (previous["turns"] if previous else 0) + 1,
+    })
+
+
+def discard_turn(session_id, turn_id):
+    """실패한 턴에서 모은 검색 결과를 버립니다."""
+    if _enabled(session_id):
+        _pop_pending(session_id, turn_id)
+
+
+def forget_session(session_id):
+    """세션의 대화 문맥을 지웁니다. (새 대화 시작)"""
+    if session_id:
+        session_contexts.pop(session_id)
+        with _pending_lock:
+            _pending_turns.pop(session_id)
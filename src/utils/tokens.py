@@ -0,0 +1,22 @@
+# src/utils/tokens.py
+# 이 파일은 프롬프트 토큰 수를 네트워크 호출 없이 추정하는 함수를 제공합니다.
+# Gemini 토크나이저 기준으로 영문/숫자는 약 4글자당 1토큰, 한글 등 비ASCII 문자는 약 1.5글자당 1토큰입니다.
+
+import math
+
+
+def estimate_tokens(text):
+    """
+    텍스트의 대략적인 토큰 수를 반환합니다.
+
+    Args:
+        text (str): 토큰 수를 추정할 텍스트.
+
+    Returns:
+        int: 추정 토큰 수.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / 4 + other_chars / 1.5)
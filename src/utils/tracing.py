@@ -0,0 +1,195 @@
+# src/utils/tracing.py
+# 이 파일은 요청 단위 추적(tracing)을 제공합니다.
+# 요청마다 루트 span(trace)을 열고, 그 안에서 LangGraph 노드, 문서 검색, 임베딩, 벡터 검색, LLM 호출, Notion 기록을
+# 중첩된 span으로 기록한 뒤, 요청이 끝나면 타임라인 전체를 JSON 한 줄로 TRACE_EXPORT_PATH에 덧붙입니다.
+#
+# - 현재 span은 contextvars로 전달되므로 asyncio 작업과 copy_context()로 실행한 작업 스레드에서도 부모가 유지됩니다.
+# - TRACING_ENABLED가 꺼져 있으면 span()은 공유된 no-op 객체를 돌려주므로 호출 비용은 플래그 확인 한 번입니다.
+# - 각 span은 OpenTelemetry span과 같은 필드 이름(trace_id, span_id, parent_span_id, start/end_time_unix_nano,
+#   attributes, status)을 사용하므로 OTLP JSON으로 쉽게 변환할 수 있습니다.
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config import TRACE_EXPORT_PATH, TRACING_ENABLED
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class _NoopSpan:
+    """추적이 꺼져 있거나 진행 중인 trace가 없을 때 사용하는 빈 span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """하나의 요청에서 끝난 span들을 모읍니다. (헤징 등으로 여러 스레드에서 동시에 기록될 수 있음)"""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span_record):
+        with self._lock:
+            self.spans.append(span_record)
+
+
+class Span:
+    """시작/종료 시각과 속성을 기록하는 span. with 문으로 사용합니다."""
+
+    def __init__(self, trace, name, attributes, parent=None):
+        self.trace = trace
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.status = "OK"
+        self._token = None
+        self._start_ns = 0
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+
+        self.trace.add({
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self._start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": (end_ns - self._start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": self.status,
+        })
+        if self.parent_span_id is None:
+            _export_trace(self.trace, self, end_ns)
+        return False
+
+
+def _export_trace(trace, root, end_ns):
+    """요청 하나의 타임라인을 JSON 한 줄로 내보냅니다. 내보내기 실패는 요청 처리에 영향을 주지 않습니다."""
+    spans = sorted(trace.spans, key=lambda record: record["start_time_unix_nano"])
+    for record in spans:
+        record["start_offset_ms"] = (record["start_time_unix_nano"] - root._start_ns) / 1e6
+
+    line = json.dumps({
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "duration_ms": (end_ns - root._start_ns) / 1e6,
+        "input_tokens": sum(record["attributes"].get("input_tokens", 0) for record in spans),
+        "output_tokens": sum(record["attributes"].get("output_tokens", 0) for record in spans),
+        "spans": spans,
+    }, ensure_ascii=False, default=str)
+
+    try:
+        export_dir = os.path.dirname(os.path.abspath(TRACE_EXPORT_PATH))
+        os.makedirs(export_dir, exist_ok=True)
+        with _export_lock, open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"추적 기록 저장 실패: {e}")
+
+
+def start_trace(name, **attributes):
+    """요청 하나의 루트 span을 시작합니다. 추적이 꺼져 있으면 no-op span을 반환합니다."""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(_Trace(), name, attributes)
+
+
+def span(name, **attributes):
+    """현재 span의 자식 span을 시작합니다. 추적이 꺼져 있거나 진행 중인 trace가 없으면 no-op span을 반환합니다."""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(parent.trace, name, attributes, parent=parent)
+
+
+def current_span():
+    """현재 span을 반환합니다. 없으면 no-op span을 반환합니다."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced_node(name, fn):
+    """LangGraph 노드 함수를 'node.<이름>' span으로 감쌉니다."""
+    def wrapper(state):
+        with span(f"node.{name}"):
+            return fn(state)
+
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def _extract_token_usage(response):
+    """LLMResult에서 입력/출력 토큰 수를 꺼냅니다. 제공되지 않으면 None을 반환합니다."""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    token_usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata")
+    if token_usage:
+        return (
+            token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0)),
+            token_usage.get("completion_tokens", token_usage.get("output_tokens", 0)),
+        )
+    return None
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    LLM 호출이 끝날 때 토큰 사용량을 현재 span에 기록하는 LangChain 콜백.
+    동기 호출의 콜백은 호출한 스레드에서 실행되므로 호출을 감싼 span에 기록됩니다.
+    """
+
+    def on_llm_end(self, response, **kwargs):
+        usage = _extract_token_usage(response)
+        if usage is None:
+            return
+        input_tokens, output_tokens = usage
+        current = current_span()
+        current.add_attributes(input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+# LLM 생성 시 callbacks=[llm_usage_callback]으로 연결합니다.
+llm_usage_callback = LLMUsageCallback()
@@ -1,83 +1,356 @@
 # src/utils/vector_db_manager.py
-# 이 파일은 ChromaDB를 사용하여 문서 임베딩 및 벡터 검색을 관리합니다.
+# 이 파일은 ChromaDB 또는 NumPy flat 인덱스를 사용하여 문서 임베딩 및 벡터 검색을 관리합니다.
 
-import chromadb
-from langchain_chroma import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import contextvars
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from src.config import GEMINI_API_KEY, CHROMADB_PATH
+from src.config import (
+    GEMINI_API_KEY, CHROMADB_PATH, VECTOR_STORE_BACKEND, FLAT_INDEX_PATH, FLAT_INDEX_DTYPE, FLAT_INDEX_KEEP_VERSIONS,
+    FLAT_INDEX_PQ_SUBVECTORS, FLAT_INDEX_RERANK_CANDIDATES, FLAT_INDEX_SHARED_POOL,
+    EMBEDDING_CACHE_PATH, CHUNK_SIZE, CHUNK_OVERLAP,
+    CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF, CHUNK_SUMMARIES_ENABLED,
+)
+from src.utils.chunk_summaries import summarize_chunks
+from src.utils.document_types import classify_document_type
+from src.utils.embedding_models import with_disk_cache
+from src.utils.embedding_pool import EmbeddingPool
+from src.utils.flat_vector_store import VersionedFlatIndex
+from src.utils.metrics import (
+    EMBEDDING_DURATION,
+    INGESTED_CHUNKS,
+    INGESTED_DOCUMENTS,
+    INGESTION_DURATION,
+    INGESTION_ERRORS,
+    RETRIEVAL_DURATION,
+    RETRIEVAL_ERRORS,
+    WORK_QUEUE_DEPTH,
+)
+from src.utils.tracing import span
+
+# 임베딩 모델 이름 (인덱스 스냅샷 호환성 확인에도 사용합니다)
+EMBEDDING_MODEL = "models/embedding-001"
 
-# ChromaDB 클라이언트와 임베딩 모델을 전역으로 초기화합니다.
+# ChromaDB 클라이언트와 임베딩 모델은 처음 사용할 때 만들어 프로세스 전체에서 공유합니다.
+# (chromadb와 Gemini 클라이언트는 가져오는 데만 1초 가까이 걸리므로 모듈을 가져올 때 만들지 않습니다)
 client = None
 embeddings = None
+_init_lock = threading.Lock()
+_init_failed = set()
 
-try:
-    # 설정 파일에 지정된 경로를 사용하여 영구적인 DB를 생성합니다.
-    client = chromadb.PersistentClient(path=CHROMADB_PATH)
-    print("ChromaDB 클라이언트 초기화 성공.")
-except Exception as e:
-    print(f"ChromaDB 클라이언트 초기화 중 오류 발생: {e}")
-    print(e)
-
-try:
-    # Gemini 임베딩 모델을 초기화합니다.
-    if GEMINI_API_KEY:
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GEMINI_API_KEY)
-        print("Gemini 임베딩 모델 초기화 성공.")
-    else:
-        print("경고: GEMINI_API_KEY가 설정되지 않았습니다.")
-except Exception as e:
-    print(f"임베딩 모델 초기화 중 오류 발생: {e}")
-    print(e)
+# 문서 종류 메타데이터 확인을 마친 컬렉션 이름
+_checked_collections = set()
+
+# flat 백엔드에서 열어 둔 컬렉션별 인덱스 (메모리 매핑을 재사용하고, 새 버전이 게시되면 다시 엽니다)
+_flat_stores = {}
+# 폴더 컬렉션들이 공유하는 임베딩 풀 (FLAT_INDEX_SHARED_POOL)
+_embedding_pool = None
+
+# 이 프로세스에서 컬렉션 내용을 바꾼 횟수 (Chroma 백엔드의 인덱스 버전에 사용)
+_collection_generations = {}
+
+# 여러 컬렉션을 한 번에 검색할 때 컬렉션별 검색을 동시에 실행하는 풀
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="federated-search")
+WORK_QUEUE_DEPTH.set_function(lambda: _search_executor._work_queue.qsize(), pool="federated_search")
+
+if VECTOR_STORE_BACKEND == "flat":
+    # flat 백엔드는 ChromaDB 클라이언트를 사용하지 않습니다.
+    print(
+        f"flat 벡터 인덱스를 사용합니다. (경로: {FLAT_INDEX_PATH}, 형식: {FLAT_INDEX_DTYPE}"
+        f"{', 공유 임베딩 풀' if FLAT_INDEX_SHARED_POOL else ''})"
+    )
+
+def get_chroma_client():
+    """
+    ChromaDB 클라이언트를 반환합니다. 처음 호출할 때 생성하며,
+    flat 백엔드이거나 생성에 실패했으면 None을 반환합니다. (실패는 한 번만 보고합니다)
+    """
+    global client
+    if client is not None or VECTOR_STORE_BACKEND == "flat" or "client" in _init_failed:
+        return client
+    with _init_lock:
+        if client is None and "client" not in _init_failed:
+            try:
+                import chromadb
+                # 설정 파일에 지정된 경로를 사용하여 영구적인 DB를 생성합니다.
+                client = chromadb.PersistentClient(path=CHROMADB_PATH)
+                print("ChromaDB 클라이언트 초기화 성공.")
+            except Exception as e:
+                _init_failed.add("client")
+                print(f"ChromaDB 클라이언트 초기화 중 오류 발생: {e}")
+    return client
+
+def get_embeddings():
+    """
+    임베딩 모델을 반환합니다. 처음 호출할 때 Gemini 임베딩 모델(설정 시 디스크 캐시 포함)을 생성하며,
+    API 키가 없거나 생성에 실패했으면 None을 반환합니다.
+    """
+    global embeddings
+    if embeddings is not None or "embeddings" in _init_failed:
+        return embeddings
+    with _init_lock:
+        if embeddings is None and "embeddings" not in _init_failed:
+            try:
+                if not GEMINI_API_KEY:
+                    raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                model = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=GEMINI_API_KEY)
+                if EMBEDDING_CACHE_PATH:
+                    model = with_disk_cache(model, EMBEDDING_CACHE_PATH, namespace=EMBEDDING_MODEL)
+                embeddings = model
+                print("Gemini 임베딩 모델 초기화 성공.")
+            except Exception as e:
+                _init_failed.add("embeddings")
+                print(f"임베딩 모델 초기화 중 오류 발생: {e}")
+    return embeddings
+
+def set_embeddings(embedding_model):
+    """
+    벡터 DB가 사용할 임베딩 모델을 교체합니다. (벤치마크, 오프라인 평가용)
+    열어 둔 flat 저장소는 이전 모델을 참조하므로 닫고 다시 엽니다.
+    """
+    global embeddings
+    embeddings = embedding_model
+    _init_failed.discard("embeddings")
+    _flat_stores.clear()
+    _checked_collections.clear()
+
+def build_hnsw_metadata(m=None, construction_ef=None, search_ef=None):
+    """
+    ChromaDB HNSW 설정을 컬렉션 메타데이터로 변환합니다. 값이 없는 항목은 ChromaDB 기본값을 사용합니다.
+
+    Returns:
+        dict | None: 컬렉션 메타데이터.
+    """
+    metadata = {}
+    if m:
+        metadata["hnsw:M"] = int(m)
+    if construction_ef:
+        metadata["hnsw:construction_ef"] = int(construction_ef)
+    if search_ef:
+        metadata["hnsw:search_ef"] = int(search_ef)
+    return metadata or None
+
+def _is_store_available():
+    """현재 백엔드와 임베딩 모델이 사용 가능한지 확인합니다."""
+    if not get_embeddings():
+        return False
+    return VECTOR_STORE_BACKEND == "flat" or get_chroma_client() is not None
+
+def get_embedding_pool():
+    """공유 임베딩 풀을 반환합니다. FLAT_INDEX_SHARED_POOL이 꺼져 있으면 None입니다."""
+    global _embedding_pool
+    if _embedding_pool is None and FLAT_INDEX_SHARED_POOL:
+        _embedding_pool = EmbeddingPool(os.path.join(FLAT_INDEX_PATH, "_pool"), index_root=FLAT_INDEX_PATH)
+    return _embedding_pool
+
+def _get_flat_index(collection_name):
+    """컬렉션의 flat 인덱스를 반환합니다. 프로세스 안에서 컬렉션마다 하나를 열어 두고 공유합니다."""
+    index = _flat_stores.get(collection_name)
+    if index is None:
+        index = VersionedFlatIndex(
+            os.path.join(FLAT_INDEX_PATH, collection_name),
+            dtype=FLAT_INDEX_DTYPE,
+            keep_versions=FLAT_INDEX_KEEP_VERSIONS,
+            pool=get_embedding_pool(),
+            pq_subvectors=FLAT_INDEX_PQ_SUBVECTORS,
+            rerank_candidates=FLAT_INDEX_RERANK_CANDIDATES,
+        )
+        _flat_stores[collection_name] = index
+    return index
 
 def get_vector_store(collection_name):
     """
-    지정된 컬렉션 이름의 Chroma 벡터 저장소를 반환합니다.
+    지정된 컬렉션 이름의 벡터 저장소를 반환합니다.
+    VECTOR_STORE_BACKEND가 "flat"이면 VersionedFlatIndex를, 그 외에는 Chroma 저장소를 반환합니다.
     
     Args:
         collection_name (str): 사용할 컬렉션의 이름.
 
     Returns:
-        Chroma: Chroma 벡터 저장소 객체.
+        Chroma | VersionedFlatIndex: 벡터 저장소 객체.
     """
-    if not client or not embeddings:
+    if not _is_store_available():
         print("에러: 벡터 데이터베이스 또는 임베딩 모델이 유효하지 않습니다.")
         return None
     
+    if VECTOR_STORE_BACKEND == "flat":
+        index = _get_flat_index(collection_name)
+        index.embedding_function = get_embeddings()
+        return index
+    
+    from langchain_chroma import Chroma
     return Chroma(
-        client=client,
+        client=get_chroma_client(),
         collection_name=collection_name,
-        embedding_function=embeddings
+        embedding_function=get_embeddings(),
+        collection_metadata=build_hnsw_metadata(
+            CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF
+        ),
     )
 
-def _split_documents_into_chunks(documents):
+def count_documents(collection_name):
+    """
+    컬렉션에 저장된 청크 수를 반환합니다.
+
+    Args:
+        collection_name (str): 확인할 컬렉션의 이름.
+
+    Returns:
+        int: 청크 수. 저장소를 사용할 수 없으면 0.
+    """
+    vector_store = get_vector_store(collection_name)
+    if not vector_store:
+        return 0
+    if isinstance(vector_store, VersionedFlatIndex):
+        return vector_store.count()
+    return vector_store._collection.count()
+
+def get_index_version(collection_name):
+    """
+    컬렉션 내용이 바뀌면 달라지는 버전 문자열을 반환합니다. 비어 있으면 빈 문자열입니다. (답변 캐시 키에 사용)
+    flat 백엔드는 게시된 버전 이름이므로 다른 프로세스(적재 작업자)가 게시한 갱신도 반영되며,
+    Chroma 백엔드는 청크 수와 이 프로세스에서 컬렉션을 갱신한 횟수입니다.
+    """
+    if VECTOR_STORE_BACKEND == "flat":
+        index = _get_flat_index(collection_name)
+        count = index.count()
+        return (index.current_version() or f"count:{count}") if count else ""
+    count = count_documents(collection_name)
+    return f"count:{count}:{_collection_generations.get(collection_name, 0)}" if count else ""
+
+def _mark_collection_updated(collection_name):
+    _collection_generations[collection_name] = _collection_generations.get(collection_name, 0) + 1
+
+def get_collection_contents(collection_name):
+    """
+    컬렉션에 저장된 모든 청크를 임베딩과 함께 읽어옵니다.
+
+    Args:
+        collection_name (str): 읽을 컬렉션의 이름.
+
+    Returns:
+        dict: ids, texts, metadatas(list)와 embeddings(np.ndarray, float32)를 담은 딕셔너리.
+              컬렉션이 없거나 비어 있으면 None.
+    """
+    if VECTOR_STORE_BACKEND == "flat":
+        index = _get_flat_index(collection_name)
+        if not index.count():
+            return None
+        return index.export_columns()
+
+    client = get_chroma_client()
+    if not client:
+        return None
+    try:
+        collection = client.get_collection(collection_name)
+    except Exception:
+        return None
+    stored = collection.get(include=["embeddings", "documents", "metadatas"])
+    if not stored["ids"]:
+        return None
+    return {
+        "ids": list(stored["ids"]),
+        "texts": list(stored["documents"]),
+        "metadatas": [dict(m or {}) for m in stored["metadatas"]],
+        "embeddings": np.asarray(stored["embeddings"], dtype=np.float32),
+    }
+
+def replace_collection_contents(collection_name, ids, texts, metadatas, embeddings):
+    """
+    컬렉션의 내용을 이미 계산된 임베딩으로 통째로 교체합니다. 임베딩 API는 호출하지 않습니다.
+
+    Args:
+        collection_name (str): 교체할 컬렉션의 이름.
+        ids (list): 청크 ID 목록.
+        texts (list): 청크 텍스트 목록.
+        metadatas (list): 청크 메타데이터 목록.
+        embeddings (np.ndarray): 청크 임베딩 행렬.
+
+    Returns:
+        bool: 작업 성공 여부.
+    """
+    try:
+        if VECTOR_STORE_BACKEND == "flat":
+            # 새 버전을 완성한 뒤 CURRENT를 바꾸므로, 중간에 실패해도 기존 버전이 그대로 남습니다.
+            _get_flat_index(collection_name).publish(ids, texts, metadatas, embeddings)
+            return True
+
+        client = get_chroma_client()
+        if not client:
+            print("ChromaDB 클라이언트가 유효하지 않습니다.")
+            return False
+        try:
+            client.delete_collection(collection_name)
+        except Exception:
+            pass
+        collection = client.get_or_create_collection(
+            collection_name,
+            metadata=build_hnsw_metadata(CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF),
+        )
+        batch_size = client.get_max_batch_size()
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.add(
+                ids=list(ids[start:end]),
+                documents=list(texts[start:end]),
+                metadatas=list(metadatas[start:end]),
+                embeddings=np.asarray(embeddings[start:end], dtype=np.float32).tolist(),
+            )
+        _checked_collections.add(collection_name)
+        _mark_collection_updated(collection_name)
+        return True
+    except Exception as e:
+        print(f"컬렉션 교체 중 오류 발생: {e}")
+        return False
+
+def _split_documents_into_chunks(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
     """
-    텍스트 문서를 의미 기반의 작은 청크로 분할하고 파일 이름 메타데이터를 추가합니다.
+    텍스트 문서를 의미 기반의 작은 청크로 분할하고 파일 이름과 문서 종류 메타데이터를 추가합니다.
     
     Args:
         documents (list): 텍스트 내용이 담긴 딕셔너리 목록.
+                          'doc_type'이 없으면 파일 이름으로 문서 종류를 판정합니다.
+        chunk_size (int): 청크 최대 글자 수.
+        chunk_overlap (int): 인접 청크 간 겹치는 글자 수.
         
     Returns:
         list: 분할된 문서 청크 목록 (메타데이터 포함).
     """
     try:
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, 
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ".", " ", ""]
+            chunk_size=chunk_size, 
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", ".", " ", ""],
+            # 원문 내 시작 위치를 기록하여 겹치는 청크를 컨텍스트 구성 단계에서 병합할 수 있게 합니다.
+            add_start_index=True,
         )
         
         all_chunks = []
         for doc in documents:
             text_content = doc["text_content"]
             file_name = doc["file_name"]
+            doc_type = doc.get("doc_type") or classify_document_type(file_name)
             
             # 각 문서를 청크로 분할
             chunks = text_splitter.create_documents([text_content])
             
-            # 각 청크에 파일 이름 메타데이터 추가
+            # 각 청크에 파일 이름과 문서 종류 메타데이터 추가
+            # 'source'는 에이전트가 인용 출처로 읽는 키이고, 'source_file'은 기존 컬렉션과의 호환용입니다.
             for chunk in chunks:
+                chunk.metadata["source"] = file_name
                 chunk.metadata["source_file"] = file_name
+                if doc_type:
+                    chunk.metadata["doc_type"] = doc_type
+                # 로컬 출처는 파일 버전(수정 시각:크기)을 함께 저장하여 재시작 후에도 바뀐 파일만 다시 적재합니다.
+                if doc.get("source_version"):
+                    chunk.metadata["source_version"] = doc["source_version"]
             
             all_chunks.extend(chunks)
             
@@ -86,40 +359,203 @@ def _split_documents_into_chunks(documents):
         print(f"문서 분할 중 오류 발생: {e}")
         return []
 
-def add_documents_to_db(documents, collection_name):
+def add_documents_to_db(documents, collection_name, replace=False):
     """
     문서를 청크로 분할하고 벡터 데이터베이스에 추가합니다.
 
     Args:
         documents (list): 텍스트 문서 목록.
         collection_name (str): 문서를 추가할 컬렉션의 이름.
+        replace (bool): True이면 기존 내용에 추가하지 않고 이 문서들로 컬렉션을 통째로 교체합니다. (폴더 다시 적재)
     
     Returns:
         bool: 작업 성공 여부.
     """
-    if not client or not embeddings:
+    if not _is_store_available():
         print("벡터 데이터베이스 또는 임베딩 모델이 유효하지 않습니다.")
         return False
         
     try:
+        start_time = time.perf_counter()
         split_documents = _split_documents_into_chunks(documents)
         if not split_documents:
             return False
+        # 청크 요약은 적재할 때 한 번만 만들어 메타데이터로 함께 저장합니다. (내용이 같은 청크는 캐시 사용)
+        if CHUNK_SUMMARIES_ENABLED:
+            summarize_chunks(split_documents)
 
-        vector_store = get_vector_store(collection_name)
-        if not vector_store:
-            print("벡터 저장소를 가져오는 데 실패했습니다.")
-            return False
-        
-        vector_store.add_documents(split_documents)
-        print(f"총 {len(split_documents)}개의 문서 청크가 ChromaDB에 추가되었습니다.")
+        if replace:
+            # replace_collection_contents가 컬렉션 갱신도 표시합니다.
+            texts = [doc.page_content for doc in split_documents]
+            embeddings = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+            ids = [str(uuid.uuid4()) for _ in texts]
+            if not replace_collection_contents(collection_name, ids, texts, [doc.metadata for doc in split_documents], embeddings):
+                return False
+        else:
+            vector_store = get_vector_store(collection_name)
+            if not vector_store:
+                print("벡터 저장소를 가져오는 데 실패했습니다.")
+                return False
+            vector_store.add_documents(split_documents)
+            _mark_collection_updated(collection_name)
+        INGESTION_DURATION.observe(time.perf_counter() - start_time)
+        INGESTED_DOCUMENTS.inc(len(documents))
+        INGESTED_CHUNKS.inc(len(split_documents))
+        print(f"총 {len(split_documents)}개의 문서 청크가 벡터 저장소에 추가되었습니다.")
         return True
             
     except Exception as e:
+        INGESTION_ERRORS.inc()
         print(f"문서 추가 중 오류 발생: {e}")
         return False
 
-def search_documents_from_db(query, collection_name, k=5):
+def get_source_versions(collection_name):
+    """
+    컬렉션에 저장된 파일별 버전('source' -> 'source_version' 메타데이터)을 반환합니다.
+    버전 없이 적재된 파일은 빈 문자열이며, 컬렉션이 없거나 비어 있으면 빈 딕셔너리입니다.
+    """
+    if VECTOR_STORE_BACKEND == "flat":
+        index = _get_flat_index(collection_name)
+        metadatas = index.export_columns()["metadatas"] if index.count() else []
+    else:
+        client = get_chroma_client()
+        try:
+            metadatas = client.get_collection(collection_name).get(include=["metadatas"])["metadatas"] if client else []
+        except Exception:
+            metadatas = []
+    versions = {}
+    for metadata in metadatas:
+        metadata = metadata or {}
+        if metadata.get("source"):
+            versions[metadata["source"]] = metadata.get("source_version", "")
+    return versions
+
+def replace_source_documents(documents, collection_name, sources):
+    """
+    컬렉션에서 지정한 파일들의 청크만 지우고 다시 추출한 문서로 바꿉니다. 다른 파일의 청크와 임베딩은 그대로 둡니다.
+    (로컬 폴더 감시에서 바뀐 파일만 다시 임베딩할 때 사용)
+
+    Args:
+        documents (list): 다시 추출한 텍스트 문서 목록. (삭제된 파일은 포함하지 않음)
+        collection_name (str): 갱신할 컬렉션의 이름.
+        sources (list): 기존 청크를 지울 파일 이름 목록. (변경·삭제된 파일 모두 포함)
+
+    Returns:
+        bool: 작업 성공 여부.
+    """
+    if not _is_store_available():
+        print("벡터 데이터베이스 또는 임베딩 모델이 유효하지 않습니다.")
+        return False
+
+    try:
+        start_time = time.perf_counter()
+        split_documents = _split_documents_into_chunks(documents) if documents else []
+        if documents and not split_documents:
+            return False
+        if split_documents and CHUNK_SUMMARIES_ENABLED:
+            summarize_chunks(split_documents)
+
+        texts = [doc.page_content for doc in split_documents]
+        metadatas = [doc.metadata for doc in split_documents]
+        ids = [str(uuid.uuid4()) for _ in texts]
+        embeddings = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32) if texts else None
+        sources = set(sources)
+
+        if VECTOR_STORE_BACKEND == "flat":
+            # 남길 청크와 새 청크로 새 버전을 만들어 게시합니다. (질의 작업자는 다음 검색부터 새 버전을 읽음)
+            current = get_collection_contents(collection_name)
+            if current:
+                keep = [i for i, m in enumerate(current["metadatas"]) if m.get("source") not in sources]
+                ids = [current["ids"][i] for i in keep] + ids
+                metadatas = [current["metadatas"][i] for i in keep] + metadatas
+                texts = [current["texts"][i] for i in keep] + texts
+                kept_embeddings = current["embeddings"][keep]
+                embeddings = kept_embeddings if embeddings is None else np.vstack([kept_embeddings, embeddings])
+            if embeddings is None:
+                embeddings = np.zeros((0, 0), dtype=np.float32)
+            _get_flat_index(collection_name).publish(ids, texts, metadatas, embeddings)
+        else:
+            vector_store = get_vector_store(collection_name)
+            if not vector_store:
+                print("벡터 저장소를 가져오는 데 실패했습니다.")
+                return False
+            if sources:
+                vector_store._collection.delete(where={"source": {"$in": sorted(sources)}})
+            if texts:
+                vector_store._collection.add(
+                    ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings.tolist()
+                )
+        _mark_collection_updated(collection_name)
+        INGESTION_DURATION.observe(time.perf_counter() - start_time)
+        INGESTED_DOCUMENTS.inc(len(documents))
+        INGESTED_CHUNKS.inc(len(split_documents))
+        print(f"파일 {len(sources)}개의 청크를 교체했습니다. (새 청크 {len(split_documents)}개)")
+        return True
+
+    except Exception as e:
+        INGESTION_ERRORS.inc()
+        print(f"파일별 청크 교체 중 오류 발생: {e}")
+        return False
+
+def _build_doc_type_filter(doc_types):
+    """문서 종류 목록을 Chroma 메타데이터 필터로 변환합니다."""
+    if not doc_types:
+        return None
+    if len(doc_types) == 1:
+        return {"doc_type": doc_types[0]}
+    return {"doc_type": {"$in": list(doc_types)}}
+
+def ensure_document_type_metadata(collection_name):
+    """
+    문서 종류 메타데이터가 없는 기존 컬렉션의 청크에 'source'와 'doc_type'을 채워 넣습니다.
+    이전 버전에서 'source_file'만 저장된 컬렉션도 재임베딩 없이 필터 검색을 사용할 수 있게 합니다.
+    같은 프로세스에서는 컬렉션당 한 번만 확인합니다.
+
+    Args:
+        collection_name (str): 확인할 컬렉션의 이름.
+
+    Returns:
+        int: 메타데이터가 갱신된 청크 수.
+    """
+    if collection_name in _checked_collections:
+        return 0
+    # flat 백엔드는 처음부터 문서 종류를 포함해 구축되므로 보완이 필요 없습니다.
+    client = get_chroma_client()
+    if not client:
+        return 0
+
+    try:
+        collection = client.get_or_create_collection(
+            collection_name,
+            metadata=build_hnsw_metadata(CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF),
+        )
+        stored = collection.get(include=["metadatas"])
+        ids_to_update = []
+        metadatas_to_update = []
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = dict(metadata or {})
+            if "doc_type" in metadata and "source" in metadata:
+                continue
+            file_name = metadata.get("source") or metadata.get("source_file")
+            if not file_name:
+                continue
+            metadata["source"] = file_name
+            doc_type = classify_document_type(file_name)
+            if doc_type:
+                metadata["doc_type"] = doc_type
+            ids_to_update.append(chunk_id)
+            metadatas_to_update.append(metadata)
+
+        if ids_to_update:
+            collection.update(ids=ids_to_update, metadatas=metadatas_to_update)
+            print(f"'{collection_name}' 컬렉션의 {len(ids_to_update)}개 청크에 문서 종류 메타데이터를 추가했습니다.")
+        _checked_collections.add(collection_name)
+        return len(ids_to_update)
+    except Exception as e:
+        print(f"문서 종류 메타데이터 갱신 중 오류 발생: {e}")
+        return 0
+
+def search_documents_from_db(query, collection_name, k=5, doc_types=None):
     """
     쿼리와 가장 유사한 문서를 벡터 데이터베이스에서 검색합니다.
 
@@ -127,11 +563,13 @@ def search_documents_from_db(query, collection_name, k=5):
         query (str): 검색할 쿼리 텍스트.
         collection_name (str): 검색할 컬렉션의 이름.
         k (int): 반환할 문서의 개수.
+        doc_types (list, optional): 검색 대상 문서 종류 목록 (예: ["회칙", "세칙"]).
+                                    None이면 모든 문서에서 검색합니다.
 
     Returns:
         list: 검색된 관련 문서 목록.
     """
-    if not client or not embeddings:
+    if not _is_store_available():
         print("벡터 데이터베이스 또는 임베딩 모델이 유효하지 않습니다.")
         return []
         
@@ -141,11 +579,104 @@ def search_documents_from_db(query, collection_name, k=5):
             print("벡터 저장소를 가져오는 데 실패했습니다.")
             return []
             
-        # 유사도 검색
-        retrieved_docs = vector_store.similarity_search(query, k=k)
-        print(f"'{query}'에 대한 {len(retrieved_docs)}개의 관련 문서를 찾았습니다.")
+        # 질의 임베딩과 유사도 검색을 나누어 실행하여 각각의 소요 시간을 추적합니다.
+        with span("embedding.embed_query", model=EMBEDDING_MODEL), EMBEDDING_DURATION.time(operation="query"):
+            query_embedding = get_embeddings().embed_query(query)
+        
+        # 유사도 검색 (문서 종류가 지정되면 해당 종류의 청크만 후보로 사용)
+        search_filter = _build_doc_type_filter(doc_types)
+        with span("vector_store.search", backend=VECTOR_STORE_BACKEND, collection=collection_name, k=k), \
+                RETRIEVAL_DURATION.time(backend=VECTOR_STORE_BACKEND):
+            retrieved_docs = vector_store.similarity_search_by_vector(query_embedding, k=k, filter=search_filter)
+        scope = ", ".join(doc_types) if doc_types else "전체"
+        print(f"'{query}'에 대한 {len(retrieved_docs)}개의 관련 문서를 찾았습니다. (문서 종류: {scope})")
         return retrieved_docs
             
     except Exception as e:
+        RETRIEVAL_ERRORS.inc()
         print(f"문서 검색 중 오류 발생: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def _search_with_scores(vector_store, query_embedding, k, search_filter):
+    """임베딩 벡터로 검색하여 (Document, 관련도) 목록을 반환합니다. 관련도는 클수록 가깝습니다."""
+    if isinstance(vector_store, VersionedFlatIndex):
+        return vector_store.batch_similarity_search_by_vector([query_embedding], k=k, filter=search_filter)[0]
+    # Chroma는 거리를 돌려주므로 컬렉션의 거리 종류에 맞는 관련도(0~1)로 바꿉니다.
+    relevance = vector_store._select_relevance_score_fn()
+    results = vector_store.similarity_search_by_vector_with_relevance_scores(query_embedding, k=k, filter=search_filter)
+    return [(doc, relevance(distance)) for doc, distance in results]
+
+def merge_by_score(results_by_source, k, max_per_source=None):
+    """
+    출처별 (Document, 관련도) 목록을 관련도 순으로 합쳐 상위 k개를 고릅니다.
+    max_per_source를 주면 한 출처가 그 수보다 많이 차지하지 못하게 하되,
+    다른 출처의 결과가 모자라 k개를 채우지 못하면 남은 자리는 한도와 관계없이 관련도 순으로 채웁니다.
+
+    Returns:
+        list: (출처, Document, 관련도) 목록.
+    """
+    candidates = sorted(
+        ((score, source, doc) for source, results in results_by_source.items() for doc, score in results),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    selected = []
+    overflow = []
+    taken = {}
+    for score, source, doc in candidates:
+        if len(selected) >= k:
+            break
+        if max_per_source and taken.get(source, 0) >= max_per_source:
+            overflow.append((source, doc, score))
+            continue
+        taken[source] = taken.get(source, 0) + 1
+        selected.append((source, doc, score))
+    selected.extend(overflow[:k - len(selected)])
+    selected.sort(key=lambda item: item[2], reverse=True)
+    return selected
+
+def search_collections(query, collection_names, k=5, doc_types=None, source_share=None):
+    """
+    여러 컬렉션에서 동시에 검색하고 관련도 순으로 합친 상위 k개 문서를 반환합니다.
+    질의는 한 번만 임베딩하며, 검색에 실패한 컬렉션은 건너뜁니다.
+
+    Args:
+        query (str): 검색할 쿼리 텍스트.
+        collection_names (list): 검색할 컬렉션 이름 목록.
+        k (int): 반환할 문서의 개수.
+        doc_types (list, optional): 검색 대상 문서 종류 목록. None이면 모든 문서에서 검색합니다.
+        source_share (float, optional): 한 컬렉션이 차지할 수 있는 결과 비율 (0~1, None이면 제한 없음).
+
+    Returns:
+        list: (컬렉션 이름, Document, 관련도) 목록.
+    """
+    if not collection_names or not _is_store_available():
+        return []
+
+    with span("embedding.embed_query", model=EMBEDDING_MODEL), EMBEDDING_DURATION.time(operation="query"):
+        query_embedding = get_embeddings().embed_query(query)
+    search_filter = _build_doc_type_filter(doc_types)
+
+    def search_one(collection_name):
+        with span("vector_store.search", backend=VECTOR_STORE_BACKEND, collection=collection_name, k=k), \
+                RETRIEVAL_DURATION.time(backend=VECTOR_STORE_BACKEND):
+            return _search_with_scores(get_vector_store(collection_name), query_embedding, k, search_filter)
+
+    # 추적 문맥을 이어받도록 요청 스레드의 문맥을 복사해서 실행합니다.
+    futures = {
+        name: _search_executor.submit(contextvars.copy_context().run, search_one, name)
+        for name in collection_names
+    }
+    results_by_source = {}
+    for name, future in futures.items():
+        try:
+            results_by_source[name] = future.result()
+        except Exception as e:
+            RETRIEVAL_ERRORS.inc()
+            print(f"'{name}' 컬렉션 검색 중 오류 발생: {e}")
+
+    max_per_source = max(1, math.ceil(k * source_share)) if source_share else None
+    merged = merge_by_score(results_by_source, k, max_per_source)
+    scope = ", ".join(doc_types) if doc_types else "전체"
+    print(f"'{query}'에 대한 {len(merged)}개의 관련 문서를 {len(results_by_source)}개 컬렉션에서 찾았습니다. (문서 종류: {scope})")
+    return merged